@@ -0,0 +1,116 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Measure ACL propagation time for large scopes.
+
+The benchmark creates a program with a person in every program role and maps
+the given number of objects of each type to it. It measures:
+  - propagation of program roles to new relationships, as done when a large
+    scope is mapped in a single request;
+  - repeated propagation of the program ACL entries to the mapped objects, as
+    done by propagate_all.
+
+Created objects are left in the database, run it against a disposable
+database only.
+
+Usage:
+
+    python bin/benchmark_acl_propagation.py [--objects 1000]
+"""
+
+import argparse
+import time
+import uuid
+
+import flask
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc import db
+from ggrc.app import app
+from ggrc.access_control import propagation_graph
+from ggrc.models import all_models
+from ggrc.models.hooks.acl import propagation
+
+MAPPED_MODELS = (all_models.Market, all_models.Product)
+
+
+def _title(prefix):
+  return u"{} {}".format(prefix, uuid.uuid4())
+
+
+def create_scope(objects_count):
+  """Create a program and objects that will be mapped to it."""
+  program = all_models.Program(title=_title("Benchmark program"))
+  person = all_models.Person(email=u"{}@example.com".format(uuid.uuid4()))
+  db.session.add_all([program, person])
+  objects = []
+  for model in MAPPED_MODELS:
+    for _ in range(objects_count):
+      objects.append(model(title=_title("Benchmark object")))
+  db.session.add_all(objects)
+  db.session.commit()
+  for role_name in program.acr_name_acl_map:
+    program.add_person_with_role_name(person, role_name)
+  db.session.commit()
+  return program, objects
+
+
+def map_scope(program, objects):
+  """Map objects to the program and propagate ACL entries."""
+  for obj in objects:
+    db.session.add(all_models.Relationship(source=program, destination=obj))
+  db.session.flush()
+  db.session.plain_commit()
+  start = time.time()
+  propagation.propagate()
+  return time.time() - start
+
+
+def repropagate(program):
+  """Propagate program ACL entries again from scratch."""
+  # pylint: disable=protected-access
+  acl_ids = [acl.id for acl in program._access_control_list]
+  propagation._delete_propagated_acls(acl_ids)
+  flask.g.new_acl_ids = acl_ids
+  flask.g.new_relationship_ids = set()
+  flask.g.deleted_objects = set()
+  start = time.time()
+  propagation.propagate()
+  return time.time() - start
+
+
+def count_propagated():
+  """Get number of propagated ACL entries."""
+  return all_models.AccessControlList.query.filter(
+      all_models.AccessControlList.parent_id.isnot(None),
+  ).count()
+
+
+def run(objects_count):
+  """Run the benchmark and print the results."""
+  with app.test_request_context():
+    program, objects = create_scope(objects_count)
+    graph = propagation_graph.get_graph()
+    print "Propagation graph: {} roles propagate through relationships".format(
+        len(graph.propagated_role_ids))
+    print "Mapped objects: {}".format(len(objects))
+
+    before = count_propagated()
+    duration = map_scope(program, objects)
+    print "Map scope: {:.3f}s, {} ACL entries".format(
+        duration, count_propagated() - before)
+
+    duration = repropagate(program)
+    print "Repropagate program roles: {:.3f}s".format(duration)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--objects", type=int, default=1000,
+                      help="number of mapped objects of each type")
+  args = parser.parse_args()
+  run(args.objects)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,128 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compare CAD loading with and without the CAD registry.
+
+The benchmark creates the given number of global custom attributes for
+markets and a few markets. It measures with settings.CAD_REGISTRY enabled
+and disabled:
+  - a dry run import of the markets;
+  - loading of custom attribute definitions by the snapshot indexer;
+  - eager loading of the markets.
+
+Created objects are left in the database, run it against a disposable
+database only.
+
+Usage:
+
+    python bin/benchmark_cad_registry.py [--cads 200] [--objects 50]
+"""
+
+import argparse
+import time
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc import db
+from ggrc import settings
+from ggrc.app import app
+from ggrc.cache import cad_registry
+from ggrc.converters.base import ImportConverter
+from ggrc.models import all_models
+from ggrc.snapshotter import indexer
+
+
+class QueryCounter(object):
+  """Count queries executed by the engine."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self):
+    self.count = 0
+    sa.event.listen(Engine, "before_cursor_execute", self._count)
+
+  def _count(self, *_):
+    self.count += 1
+
+
+def create_data(cads_count, objects_count):
+  """Create global CADs and markets, return codes of the markets."""
+  for i in range(cads_count):
+    db.session.add(all_models.CustomAttributeDefinition(
+        title=u"Benchmark CA {} {}".format(i, uuid.uuid4()),
+        definition_type="market",
+        attribute_type="Text",
+    ))
+  markets = [all_models.Market(title=u"Benchmark market {}".format(
+      uuid.uuid4())) for _ in range(objects_count)]
+  db.session.add_all(markets)
+  db.session.commit()
+  return [market.slug for market in markets]
+
+
+def run_import(codes):
+  """Dry run import of market titles."""
+  csv_data = [["Object type"], ["Market", "Code*", "Title"]]
+  csv_data.extend(["", code, u"Imported {}".format(uuid.uuid4())]
+                  for code in codes)
+  converter = ImportConverter(None, dry_run=True, csv_data=csv_data)
+  converter.import_csv_data()
+  db.session.rollback()
+
+
+def run_indexer():
+  """Load CADs of snapshotted types."""
+  # pylint: disable=protected-access
+  indexer._get_custom_attribute_dict()
+
+
+def run_eager_query():
+  """Load markets with their CADs."""
+  all_models.Market.eager_query().all()
+  db.session.rollback()
+
+
+def measure(counter, func, *args):
+  """Get duration and query count of the second call of func."""
+  func(*args)
+  db.session.expunge_all()
+  queries = counter.count
+  start = time.time()
+  func(*args)
+  duration = time.time() - start
+  db.session.expunge_all()
+  return duration, counter.count - queries
+
+
+def run(cads_count, objects_count):
+  """Run the benchmark and print the results."""
+  with app.test_request_context():
+    codes = create_data(cads_count, objects_count)
+    counter = QueryCounter()
+    print "Global market CADs: {}, markets: {}".format(cads_count,
+                                                       objects_count)
+    for name, func, args in (("Dry run import", run_import, (codes,)),
+                             ("Indexer CADs", run_indexer, ()),
+                             ("Eager query", run_eager_query, ())):
+      for enabled in (False, True):
+        settings.CAD_REGISTRY = enabled
+        cad_registry.clear()
+        duration, queries = measure(counter, func, *args)
+        print "{} (registry {}): {:.3f}s, {} queries".format(
+            name, "on" if enabled else "off", duration, queries)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--cads", type=int, default=200,
+                      help="number of global CADs")
+  parser.add_argument("--objects", type=int, default=50,
+                      help="number of imported objects")
+  args = parser.parse_args()
+  run(args.cads, args.objects)
+
+
+if __name__ == "__main__":
+  main()
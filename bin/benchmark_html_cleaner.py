@@ -0,0 +1,129 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Measure HTML sanitization of description-like texts.
+
+The benchmark generates corpora of descriptions similar to the ones stored in
+GGRC and sanitizes them:
+  - with the plain bleach fix point loop;
+  - with html_cleaner.sanitize and an empty cache;
+  - with html_cleaner.sanitize again, as done on revision replays;
+  - with html_cleaner.clean_values, as done by the import converters.
+
+Usage:
+
+    python bin/benchmark_html_cleaner.py [--values 200] [--length 2000]
+"""
+
+import argparse
+import random
+import time
+
+from ggrc.utils import html_cleaner
+
+WORDS = (
+    u"control risk audit evidence assessment policy process system owner "
+    u"review quarterly access management vendor data retention encryption "
+    u"incident response compliance requirement objective test plan sample"
+).split()
+
+
+def _sentence(rand):
+  return u" ".join(rand.choice(WORDS)
+                   for _ in range(rand.randint(6, 16))).capitalize() + u"."
+
+
+def _paragraphs(rand, length):
+  paragraphs = []
+  while sum(len(paragraph) for paragraph in paragraphs) < length:
+    paragraphs.append(u" ".join(_sentence(rand) for _ in range(4)))
+  return paragraphs
+
+
+def plain_text(rand, length):
+  """Text typed without any formatting."""
+  return u"\n\n".join(_paragraphs(rand, length))
+
+
+def rich_text(rand, length):
+  """Text formatted in the rich text editor."""
+  parts = []
+  for paragraph in _paragraphs(rand, length):
+    if rand.random() < 0.3:
+      items = paragraph.split(u". ")
+      parts.append(u"<ul>{}</ul>".format(u"".join(
+          u"<li>{}</li>".format(item) for item in items)))
+    else:
+      parts.append(u'<p><strong>Note:</strong> {} <a href="https://'
+                   u'example.com/">link</a></p>'.format(paragraph))
+  return u"".join(parts)
+
+
+def pasted_text(rand, length):
+  """Text pasted from other documents with unsafe markup and entities."""
+  parts = []
+  for paragraph in _paragraphs(rand, length):
+    parts.append(u'<div style="color: red" onclick="alert(1)">{} &amp; '
+                 u'&lt;more&gt;</div><script>var x = 1;</script>\r\n'
+                 u''.format(paragraph))
+  return u"".join(parts)
+
+
+CORPORA = (
+    ("plain", plain_text),
+    ("rich", rich_text),
+    ("pasted", pasted_text),
+)
+
+
+def _measure(func, values):
+  start = time.time()
+  func(values)
+  return time.time() - start
+
+
+def run_bleach(values):
+  for value in values:
+    html_cleaner._clean(value)  # pylint: disable=protected-access
+
+
+def run_sanitize(values):
+  for value in values:
+    html_cleaner.sanitize(value)
+
+
+def run(values_count, length, duplicates):
+  """Run the benchmark and print the results."""
+  rand = random.Random(0)
+  for name, generate in CORPORA:
+    unique = [generate(rand, length)
+              for _ in range(max(values_count - duplicates, 1))]
+    values = unique + [rand.choice(unique) for _ in range(duplicates)]
+    rand.shuffle(values)
+    html_cleaner.CACHE.clear()
+    bleach_time = _measure(run_bleach, values)
+    html_cleaner.CACHE.clear()
+    cold_time = _measure(run_sanitize, values)
+    warm_time = _measure(run_sanitize, values)
+    html_cleaner.CACHE.clear()
+    batch_time = _measure(html_cleaner.clean_values, values)
+    print "{} ({} values, {} chars): bleach {:.3f}s, sanitize {:.3f}s, " \
+          "sanitize again {:.3f}s, batch {:.3f}s".format(
+              name, len(values), sum(len(value) for value in values),
+              bleach_time, cold_time, warm_time, batch_time)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--values", type=int, default=200,
+                      help="number of values in every corpus")
+  parser.add_argument("--length", type=int, default=2000,
+                      help="approximate length of every value")
+  parser.add_argument("--duplicates", type=int, default=20,
+                      help="number of repeated values in every corpus")
+  args = parser.parse_args()
+  run(args.values, args.length, args.duplicates)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,121 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Measure throughput of Issue Tracker ticket updates.
+
+The benchmark sends ticket updates to the Issue Tracker mock from
+ggrc.utils.issue_tracker_mock with a latency emulating network round trips.
+It compares:
+  - serial updates of all tickets, as done before the sync engine;
+  - updates sent by the sync engine worker pool, skipping tickets with
+    unchanged payload fingerprints.
+
+No database or Issue Tracker instance is needed.
+
+Usage:
+
+    python bin/benchmark_issue_tracker_sync.py [--tickets 1000] \\
+        [--latency 0.05] [--workers 8] [--rate 50] [--unchanged 0.5]
+"""
+
+import argparse
+import random
+import time
+
+from google.appengine.api import apiproxy_stub_map
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc.integrations import issues
+from ggrc.integrations.synchronization_jobs import sync_engine
+from ggrc.integrations.synchronization_jobs import sync_utils
+from ggrc.utils.issue_tracker_mock import init_issue_tracker_mock
+
+
+def generate_tickets(tickets_count, unchanged):
+  """Generate payloads and fingerprints stored after the previous sync."""
+  rand = random.Random(0)
+  payloads = {}
+  fingerprints = {}
+  for issue_id in range(1, tickets_count + 1):
+    payload = {
+        "status": rand.choice(["ASSIGNED", "FIXED", "VERIFIED"]),
+        "priority": rand.choice(["P1", "P2", "P3"]),
+        "severity": rand.choice(["S1", "S2", "S3"]),
+        "type": "PROCESS",
+        "component_id": 188208,
+        "ccs": ["user{}@example.com".format(rand.randint(1, 50))],
+    }
+    payloads[str(issue_id)] = payload
+    if rand.random() < unchanged:
+      fingerprints[str(issue_id)] = sync_engine.get_fingerprint(payload)
+  return payloads, fingerprints
+
+
+def run_serial(cli, payloads):
+  """Update all tickets one by one."""
+  for issue_id, payload in sorted(payloads.iteritems()):
+    sync_utils.update_issue(cli, issue_id, payload)
+
+
+def run_engine(cli, payloads, fingerprints, workers):
+  """Update changed tickets with the worker pool."""
+  items = [
+      (issue_id, payload) for issue_id, payload in sorted(payloads.iteritems())
+      if sync_engine.get_fingerprint(payload) != fingerprints.get(issue_id)
+  ]
+
+  def send(item):
+    return sync_utils.update_issue(cli, *item)
+
+  for _, _, error in sync_engine.iter_results(send, items, workers=workers):
+    if error is not None:
+      raise error
+
+
+def _measure(fetch_mock, func, *args):
+  requests = fetch_mock.request_count
+  start = time.time()
+  func(*args)
+  return time.time() - start, fetch_mock.request_count - requests
+
+
+def run(tickets_count, latency, workers, rate, unchanged):
+  """Run the benchmark and print the results."""
+  # pylint: disable=too-many-arguments
+  apiproxy_stub_map.apiproxy = apiproxy_stub_map.APIProxyStubMap()
+  fetch_mock = init_issue_tracker_mock(latency=latency, verbose=False)
+  sync_engine.RATE_LIMITER = sync_engine.TokenBucket(rate=rate,
+                                                     capacity=rate)
+  cli = issues.Client()
+  payloads, fingerprints = generate_tickets(tickets_count, unchanged)
+  print "Tickets: {}, unchanged: {}, latency: {}s, rate limit: {}/s".format(
+      tickets_count, len(fingerprints), latency, rate)
+
+  for name, func, args in (
+      ("Serial", run_serial, (cli, payloads)),
+      ("Sync engine ({} workers)".format(workers), run_engine,
+       (cli, payloads, fingerprints, workers)),
+  ):
+    duration, requests = _measure(fetch_mock, func, *args)
+    print "{}: {:.3f}s, {} requests, {:.1f} tickets/s".format(
+        name, duration, requests, tickets_count / duration)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--tickets", type=int, default=1000,
+                      help="number of synchronized tickets")
+  parser.add_argument("--latency", type=float, default=0.05,
+                      help="latency of a mocked request in seconds")
+  parser.add_argument("--workers", type=int, default=8,
+                      help="number of sync engine workers")
+  parser.add_argument("--rate", type=float, default=50,
+                      help="max number of requests per second")
+  parser.add_argument("--unchanged", type=float, default=0.5,
+                      help="share of tickets with unchanged payload")
+  args = parser.parse_args()
+  run(args.tickets, args.latency, args.workers, args.rate, args.unchanged)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,77 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Measure round trips of collection operations in ggrc.cache.MemCache.
+
+MemCache works with ggrc.cache.fake_memcache.FakeMemcacheClient, which
+spends --latency seconds on every call to emulate the memcache service. The
+benchmark reads a collection with a part of the ids cached, stores the
+missing ones, updates and removes the whole collection, and compares the
+read with reading every id with a separate gets call.
+
+Usage:
+
+    python bin/benchmark_memcache.py [--size 500] [--cached 0.8]
+"""
+
+import argparse
+import time
+
+from ggrc.cache import fake_memcache
+from ggrc.cache import memcache
+
+
+RESOURCE = "markets"
+
+
+def measure(client, name, function, *args):
+  """Run function and print its round trips and duration."""
+  round_trips = client.round_trips
+  start = time.time()
+  result = function(*args)
+  duration = time.time() - start
+  print "{:>12}: {:>5} round trips, {:.3f}s".format(
+      name, client.round_trips - round_trips, duration)
+  return result
+
+
+def get_per_key(client, ids):
+  """Read ids with a gets call per id."""
+  return {id_: client.gets("collection:{}:{}".format(RESOURCE, id_))
+          for id_ in ids}
+
+
+def run(size, cached_ratio, latency):
+  """Run the benchmark and print the results."""
+  client = fake_memcache.FakeMemcacheClient(latency=latency)
+  cache = memcache.MemCache(client=client)
+  ids = range(1, size + 1)
+  data = {id_: {"id": id_, "title": "Market {}".format(id_)} for id_ in ids}
+  cached_ids = ids[:int(size * cached_ratio)]
+  cache.add("collection", RESOURCE, {id_: data[id_] for id_ in cached_ids})
+
+  filter_ = {"ids": ids, "attrs": None}
+  measure(client, "per key get", get_per_key, client, ids)
+  found = measure(client, "get", cache.get, "collection", RESOURCE, filter_)
+  missing_ids = [id_ for id_ in ids if id_ not in found]
+  print "Found {} of {} ids".format(len(found), size)
+  measure(client, "add missing", cache.add, "collection", RESOURCE,
+          {id_: data[id_] for id_ in missing_ids})
+  measure(client, "update", cache.update, "collection", RESOURCE, data, 0)
+  measure(client, "remove", cache.remove, "collection", RESOURCE, data)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--size", type=int, default=500,
+                      help="number of ids in the collection")
+  parser.add_argument("--cached", type=float, default=0.8,
+                      help="part of the collection that is cached")
+  parser.add_argument("--latency", type=float, default=0.001,
+                      help="emulated duration of a round trip in seconds")
+  args = parser.parse_args()
+  run(args.size, args.cached, args.latency)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,161 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compare size and read latency of full and delta encoded revisions.
+
+The benchmark reads revisions of a sample of resources the way snapshotter
+and the revisions diff builder do, then compacts the same revisions inside a
+transaction, repeats the reads and rolls the transaction back, so the
+database is left unchanged.
+
+Usage:
+
+    python bin/benchmark_revision_storage.py [--type Control] [--limit 200]
+"""
+
+import argparse
+import json
+import time
+import zlib
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc import db
+from ggrc.app import app
+from ggrc.models import all_models
+from ggrc.utils import revision_storage
+from ggrc.utils import referenced_objects
+from ggrc.utils.revisions_diff import builder as revisions_diff
+
+
+def get_sample_resources(resource_type, limit):
+  """Get resources with the most revisions."""
+  model = all_models.Revision
+  query = db.session.query(
+      model.resource_type,
+      model.resource_id,
+  ).filter(
+      model.resource_type.notin_(revision_storage.NOT_COMPACTED_TYPES),
+  )
+  if resource_type:
+    query = query.filter(model.resource_type == resource_type)
+  return query.group_by(
+      model.resource_type,
+      model.resource_id,
+  ).order_by(
+      db.func.count(model.id).desc(),
+  ).limit(limit).all()
+
+
+def get_revision_ids(resources):
+  """Get ids of all revisions of the resources."""
+  model = all_models.Revision
+  ids = []
+  for resource_type, resource_id in resources:
+    ids.extend(id_ for id_, in db.session.query(model.id).filter(
+        model.resource_type == resource_type,
+        model.resource_id == resource_id,
+    ))
+  return ids
+
+
+def measure_size(resources, keyframe_interval):
+  """Get sizes of full and compacted content of the resources revisions."""
+  full_size = 0
+  compacted_size = 0
+  for resource_type, resource_id in resources:
+    # pylint: disable=protected-access
+    revisions = [
+        (id_, content) for id_, content, _, _ in
+        revision_storage._get_resource_revisions(resource_type, resource_id)
+    ]
+    for _, content in revisions:
+      full_size += len(json.dumps(content))
+    layout = revision_storage.plan_resource_layout(revisions,
+                                                   keyframe_interval)
+    for _, content, delta, _ in layout:
+      if delta is None:
+        compacted_size += len(json.dumps(content))
+      else:
+        compacted_size += len(zlib.compress(json.dumps(delta)))
+  return full_size, compacted_size
+
+
+def read_snapshotter(revision_ids):
+  """Read revision content as snapshots do."""
+  db.session.expire_all()
+  query = all_models.Revision.query.filter(
+      all_models.Revision.id.in_(revision_ids))
+  for revision in query:
+    revision.content.get("title")
+
+
+def read_diff_builder(revision_ids):
+  """Build diffs with current object state for the revisions."""
+  db.session.expire_all()
+  with app.test_request_context():
+    revisions = all_models.Revision.query.filter(
+        all_models.Revision.id.in_(revision_ids)).all()
+    for revision in revisions:
+      referenced_objects.mark_to_cache(revision.resource_type,
+                                       revision.resource_id)
+      revisions_diff.mark_for_latest_content(revision.resource_type,
+                                             revision.resource_id)
+    referenced_objects.rewarm_cache()
+    revisions_diff.rewarm_latest_content()
+    for revision in revisions:
+      instance = referenced_objects.get(revision.resource_type,
+                                        revision.resource_id)
+      if instance:
+        revisions_diff.prepare(instance, revision.content)
+
+
+def timed(function, *args):
+  """Get execution time of the function in seconds."""
+  start = time.time()
+  function(*args)
+  return time.time() - start
+
+
+def run(resource_type, limit, keyframe_interval):
+  """Run the benchmark and print the results."""
+  resources = get_sample_resources(resource_type, limit)
+  revision_ids = get_revision_ids(resources)
+  print "Resources: {}, revisions: {}".format(len(resources),
+                                              len(revision_ids))
+
+  full_size, compacted_size = measure_size(resources, keyframe_interval)
+  print "Content size: full {} B, compacted {} B ({:.1%})".format(
+      full_size, compacted_size,
+      float(compacted_size) / full_size if full_size else 0)
+
+  results = {}
+  for storage in ("full", "compacted"):
+    if storage == "compacted":
+      for resource in resources:
+        revision_storage.compact_resource(resource[0], resource[1],
+                                          keyframe_interval)
+      db.session.flush()
+    results[storage] = (
+        timed(read_snapshotter, revision_ids),
+        timed(read_diff_builder, revision_ids),
+    )
+  db.session.rollback()
+
+  for storage, (snapshotter, diff_builder) in sorted(results.items()):
+    print "{:>10}: snapshotter {:.3f}s, diff builder {:.3f}s".format(
+        storage, snapshotter, diff_builder)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--type", dest="resource_type", default=None)
+  parser.add_argument("--limit", type=int, default=200)
+  parser.add_argument("--interval", type=int, default=None)
+  args = parser.parse_args()
+  with app.app_context():
+    run(args.resource_type, args.limit,
+        args.interval or revision_storage.get_keyframe_interval())
+
+
+if __name__ == "__main__":
+  main()
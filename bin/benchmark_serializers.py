@@ -0,0 +1,92 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compare compiled JSON serializers with the JSON builder.
+
+The benchmark loads objects of the given type the same way /query does and
+publishes them with:
+  - ggrc.builder.json.publish followed by publish_representation;
+  - ggrc.builder.compiled.publish_objects.
+It checks that both outputs are equal and prints the throughput of each.
+
+Usage:
+
+    python bin/benchmark_serializers.py [--model Assessment] [--limit 2000]
+"""
+
+import argparse
+import json
+import time
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc.app import app
+from ggrc.builder import compiled
+from ggrc.builder import json as builder_json
+from ggrc.models import inflector
+from ggrc.utils import GrcEncoder
+
+
+def load_objects(model_name, limit):
+  """Load objects with the eager query used by /query."""
+  model = inflector.get_model(model_name)
+  return model.eager_query().order_by(model.id).limit(limit).all()
+
+
+def publish_with_builder(objects):
+  return builder_json.publish_representation(
+      [builder_json.publish(obj) for obj in objects]
+  )
+
+
+def publish_compiled(objects):
+  return compiled.publish_objects(objects)
+
+
+def measure(publisher, objects, repeat):
+  """Get the best time of publishing objects and the published result."""
+  best = None
+  result = None
+  for _ in range(repeat):
+    start = time.time()
+    result = publisher(objects)
+    duration = time.time() - start
+    if best is None or duration < best:
+      best = duration
+  return best, result
+
+
+def run(model_name, limit, repeat):
+  """Run the benchmark and print the results."""
+  with app.test_request_context():
+    objects = load_objects(model_name, limit)
+    print "Objects: {} {}".format(len(objects), model_name)
+    if not objects:
+      return
+
+    builder_time, expected = measure(publish_with_builder, objects, repeat)
+    compiled_time, result = measure(publish_compiled, objects, repeat)
+
+    equal = (json.dumps(expected, cls=GrcEncoder, sort_keys=True) ==
+             json.dumps(result, cls=GrcEncoder, sort_keys=True))
+    print "Equal output: {}".format(equal)
+    for name, duration in (("builder", builder_time),
+                           ("compiled", compiled_time)):
+      print "{:>8}: {:.3f}s, {:.0f} objects/s".format(
+          name, duration, len(objects) / duration)
+    print "Speedup: {:.2f}x".format(builder_time / compiled_time)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--model", default="Assessment",
+                      help="name of the published model")
+  parser.add_argument("--limit", type=int, default=2000,
+                      help="number of published objects")
+  parser.add_argument("--repeat", type=int, default=3,
+                      help="number of measured runs of each serializer")
+  args = parser.parse_args()
+  run(args.model, args.limit, args.repeat)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,268 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Measure reindexing of snapshots of a big audit.
+
+The benchmark creates an audit with the given number of market snapshots.
+Snapshot revisions are copies of a market revision with access control list
+and custom attribute values. It measures:
+  - population of revision content for a chunk of snapshots with
+    Revision.content and with the indexer, see indexer.get_index_content;
+  - reindex of the audit snapshots with an empty index, with an up to date
+    index and after changes of a part of the snapshot revisions.
+
+Created objects are left in the database, run it against a disposable
+database only.
+
+Usage:
+
+    python bin/benchmark_snapshot_reindex.py [--snapshots 100000] \\
+        [--cads 20] [--changed 0.01]
+"""
+
+import argparse
+import copy
+import datetime
+import time
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc import db
+from ggrc import utils
+from ggrc.app import app
+from ggrc.fulltext.mysql import MysqlRecordProperty as Record
+from ggrc.models import all_models
+from ggrc.snapshotter import indexer
+from ggrc.snapshotter.datastructures import Pair
+from ggrc.utils import log_event
+from ggrc.utils import user_generator
+
+
+class QueryCounter(object):
+  """Count queries executed by the engine."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self):
+    self.count = 0
+    sa.event.listen(Engine, "before_cursor_execute", self._count)
+
+  def _count(self, *_):
+    self.count += 1
+
+
+def create_market(cads_count):
+  """Create a market with custom attribute values and a revision."""
+  cads = [
+      all_models.CustomAttributeDefinition(
+          title=u"Benchmark CA {} {}".format(i, uuid.uuid4()),
+          definition_type="market",
+          attribute_type="Text",
+      )
+      for i in range(cads_count)
+  ]
+  db.session.add_all(cads)
+  market = all_models.Market(title=u"Benchmark market {}".format(
+      uuid.uuid4()))
+  for cad in cads:
+    market.custom_attribute_values.append(all_models.CustomAttributeValue(
+        custom_attribute=cad,
+        attribute_value=u"Value of {}".format(cad.title),
+    ))
+  db.session.add(market)
+  db.session.flush()
+  person = user_generator.find_or_create_user_by_email(
+      email="user@example.com", name="Example User")
+  market.add_person_with_role_name(person, "Admin")
+  log_event.log_event(db.session, market, current_user_id=person.id)
+  db.session.commit()
+  return all_models.Revision.query.filter_by(
+      resource_type="Market",
+      resource_id=market.id,
+  ).order_by(all_models.Revision.id.desc()).first()
+
+
+def create_audit(snapshots_count, cads_count):
+  """Create an audit with snapshots of market revision copies.
+
+  Returns:
+    tuple of the audit id and ids of snapshot revisions.
+  """
+  program = all_models.Program(title=u"Benchmark program {}".format(
+      uuid.uuid4()))
+  audit = all_models.Audit(title=u"Benchmark audit {}".format(uuid.uuid4()),
+                           program=program)
+  db.session.add_all([program, audit])
+  db.session.commit()
+  audit_id = audit.id
+  template = create_market(cads_count)
+  # pylint: disable=protected-access
+  template_content = template._content
+  event_id = template.event_id
+  first_id = template.resource_id + 1
+  now = datetime.datetime.utcnow()
+  revisions = all_models.Revision.__table__
+  snapshots = all_models.Snapshot.__table__
+  child_ids = range(first_id, first_id + snapshots_count)
+  snapshot_revision_ids = []
+  for chunk in utils.list_chunks(child_ids, 5000):
+    rows = []
+    for child_id in chunk:
+      content = copy.deepcopy(template_content)
+      content.update(id=child_id, title=u"Market {}".format(child_id))
+      rows.append({
+          "resource_id": child_id,
+          "resource_type": "Market",
+          "event_id": event_id,
+          "action": "created",
+          "content": content,
+          "created_at": now,
+          "updated_at": now,
+      })
+    db.session.execute(revisions.insert(), rows)
+    revision_ids = dict(db.session.query(
+        all_models.Revision.resource_id,
+        all_models.Revision.id,
+    ).filter(
+        all_models.Revision.resource_type == "Market",
+        all_models.Revision.resource_id.in_(chunk),
+        all_models.Revision.event_id == event_id,
+    ))
+    db.session.execute(snapshots.insert(), [{
+        "parent_type": "Audit",
+        "parent_id": audit_id,
+        "child_type": "Market",
+        "child_id": child_id,
+        "revision_id": revision_ids[child_id],
+        "created_at": now,
+        "updated_at": now,
+    } for child_id in chunk])
+    db.session.commit()
+    snapshot_revision_ids.extend(revision_ids[child_id] for child_id in chunk)
+  return audit_id, snapshot_revision_ids
+
+
+def get_pair_chunks(audit_id):
+  """Get lists of snapshot pairs of the audit split in indexer chunks."""
+  query = db.session.query(
+      all_models.Snapshot.parent_type,
+      all_models.Snapshot.parent_id,
+      all_models.Snapshot.child_type,
+      all_models.Snapshot.child_id,
+  ).filter(
+      all_models.Snapshot.parent_type == "Audit",
+      all_models.Snapshot.parent_id == audit_id,
+  )
+  return [{Pair.from_4tuple(row) for row in chunk}
+          for chunk in utils.generate_query_chunks(query)]
+
+
+def populate_revisions(pairs):
+  """Populate content of snapshot revisions with Revision.content."""
+  revisions = all_models.Revision.query.join(
+      all_models.Snapshot,
+      all_models.Snapshot.revision_id == all_models.Revision.id,
+  ).filter(sa.tuple_(
+      all_models.Snapshot.parent_type,
+      all_models.Snapshot.parent_id,
+      all_models.Snapshot.child_type,
+      all_models.Snapshot.child_id,
+  ).in_({pair.to_4tuple() for pair in pairs}))
+  for revision in revisions:
+    _ = revision.content
+
+
+def populate_index_content(pairs):
+  """Populate content of snapshot revisions with the indexer."""
+  # pylint: disable=protected-access
+  roles = indexer.get_roles()
+  cads = indexer._get_custom_attribute_dict()
+  for _, resource_type, content in indexer.get_snapshots_content(pairs):
+    indexer.get_index_content(content, resource_type, roles[resource_type],
+                              cads[resource_type])
+
+
+def reindex_audit(pair_chunks):
+  """Reindex snapshots of the audit, return numbers of written records."""
+  totals = [0, 0, 0]
+  for pairs in pair_chunks:
+    for i, count in enumerate(indexer.reindex_pairs(pairs)):
+      totals[i] += count
+  return totals
+
+
+def change_revisions(revision_ids, changed):
+  """Change titles in content of a part of snapshot revisions."""
+  if not changed:
+    return 0
+  changed_ids = revision_ids[::max(int(1 / changed), 1)]
+  revisions = all_models.Revision.query.filter(
+      all_models.Revision.id.in_(changed_ids))
+  for revision in revisions:
+    # pylint: disable=protected-access
+    content = dict(revision._content)
+    content["title"] = u"Changed {}".format(uuid.uuid4())
+    revision._content = content
+  db.session.commit()
+  return len(changed_ids)
+
+
+def measure(counter, func, *args):
+  """Get result, duration and query count of a call of func."""
+  queries = counter.count
+  start = time.time()
+  result = func(*args)
+  duration = time.time() - start
+  db.session.expunge_all()
+  return result, duration, counter.count - queries
+
+
+def run(snapshots_count, cads_count, changed):
+  """Run the benchmark and print the results."""
+  with app.test_request_context():
+    audit_id, revision_ids = create_audit(snapshots_count, cads_count)
+    pair_chunks = get_pair_chunks(audit_id)
+    counter = QueryCounter()
+    print "Snapshots: {}, market CADs: {}, chunks: {}".format(
+        snapshots_count, cads_count, len(pair_chunks))
+
+    for name, func in (("Revision.content", populate_revisions),
+                       ("Index content", populate_index_content)):
+      _, duration, queries = measure(counter, func, pair_chunks[0])
+      print "{} of {} snapshots: {:.3f}s, {} queries".format(
+          name, len(pair_chunks[0]), duration, queries)
+
+    db.session.query(Record).filter(
+        Record.type == "Snapshot",
+        Record.tags.like(u"Audit-{}-%".format(audit_id)),
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    changed_count = None
+    for name in ("Empty index", "Up to date index", "Changed revisions"):
+      if name == "Changed revisions":
+        changed_count = change_revisions(revision_ids, changed)
+      written, duration, queries = measure(counter, reindex_audit,
+                                           pair_chunks)
+      print ("Reindex, {}{}: {:.3f}s, {} queries, "
+             "{} inserted, {} updated, {} deleted records").format(
+                 name.lower(),
+                 " ({})".format(changed_count) if changed_count else "",
+                 duration, queries, *written)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--snapshots", type=int, default=100000,
+                      help="number of audit snapshots")
+  parser.add_argument("--cads", type=int, default=20,
+                      help="number of global market CADs")
+  parser.add_argument("--changed", type=float, default=0.01,
+                      help="share of changed snapshot revisions")
+  args = parser.parse_args()
+  run(args.snapshots, args.cads, args.changed)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,170 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""In memory representation of the access control role propagation tree.
+
+Propagated roles are access control roles with a parent_id. A role on an
+object propagates through a relationship in two steps:
+
+  parent role on the object
+    -> relationship role on the relationship, if the other end of the
+       relationship has a type with a grandchild role
+    -> child role on the object at the end of the relationship
+
+The graph keeps these edges as plain dicts, so propagation statements can
+use literal role ids instead of joining access_control_roles several times
+in every statement. The graph is built once per process and rebuilt when
+access control roles change.
+"""
+
+import collections
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.models import all_models
+
+
+class PropagationGraph(object):
+  """Propagation edges between access control roles.
+
+  Attributes:
+    relationship_edges: {(parent role id, other end type): set of
+      relationship role ids} - roles created on relationships.
+    child_edges: {(relationship role id, object type): set of child role
+      ids} - roles created on objects at the ends of relationships.
+    propagated_role_ids: ids of roles that propagate through relationships.
+  """
+
+  def __init__(self, roles):
+    """Build the graph.
+
+    Args:
+      roles: iterable of (id, parent_id, object_type) tuples of all access
+        control roles.
+    """
+    children = collections.defaultdict(list)
+    for role_id, parent_id, object_type in roles:
+      if parent_id is not None:
+        children[parent_id].append((role_id, object_type))
+
+    self.relationship_edges = collections.defaultdict(set)
+    self.child_edges = collections.defaultdict(set)
+    relationship_type = all_models.Relationship.__name__
+    for parent_id, child_roles in children.iteritems():
+      for child_id, child_type in child_roles:
+        if child_type != relationship_type:
+          continue
+        for grandchild_id, grandchild_type in children.get(child_id, []):
+          self.relationship_edges[(parent_id, grandchild_type)].add(child_id)
+          self.child_edges[(child_id, grandchild_type)].add(grandchild_id)
+    self.propagated_role_ids = sorted({
+        parent_id for parent_id, _ in self.relationship_edges
+    })
+
+  @staticmethod
+  def _layers(edges):
+    """Split edges into layers where every key has a single value.
+
+    Args:
+      edges: {key: set of values} dict.
+    Returns:
+      list of {key: value} dicts.
+    """
+    layers = []
+    for key, values in sorted(edges.iteritems()):
+      for index, value in enumerate(sorted(values)):
+        if index == len(layers):
+          layers.append({})
+        layers[index][key] = value
+    return layers
+
+  @staticmethod
+  def _mapping_expressions(layer, first_column, second_column):
+    """Get filter and value expressions for a single layer of edges.
+
+    Returns:
+      tuple of a condition that selects rows with an edge and an expression
+      with the value of the edge for the row.
+    """
+    keys = sorted(layer)
+    condition = sa.tuple_(first_column, second_column).in_(keys)
+    value = sa.case([
+        (sa.and_(first_column == first, second_column == second),
+         layer[(first, second)])
+        for first, second in keys
+    ])
+    return condition, value
+
+  def relationship_role_mappings(self, role_column, type_column):
+    """Get expressions for roles propagated to relationships.
+
+    Args:
+      role_column: column with the role id of the parent ACL entry.
+      type_column: column with the type of the other end of relationship.
+    Returns:
+      list of (condition, role id expression) tuples.
+    """
+    return [
+        self._mapping_expressions(layer, role_column, type_column)
+        for layer in self._layers(self.relationship_edges)
+    ]
+
+  def child_role_mappings(self, role_column, type_column):
+    """Get expressions for roles propagated from relationships to objects.
+
+    Args:
+      role_column: column with the role id of the relationship ACL entry.
+      type_column: column with the type of the object.
+    Returns:
+      list of (condition, role id expression) tuples.
+    """
+    return [
+        self._mapping_expressions(layer, role_column, type_column)
+        for layer in self._layers(self.child_edges)
+    ]
+
+
+_GRAPH = {
+    "fingerprint": None,
+    "graph": None,
+}
+
+
+def _get_fingerprint():
+  """Get a value that changes when any access control role changes.
+
+  Roles can be changed by another process, so the in memory graph is checked
+  against this cheap aggregate of the small roles table.
+  """
+  acr = all_models.AccessControlRole
+  return tuple(db.session.query(
+      sa.func.count(acr.id),
+      sa.func.max(acr.id),
+      sa.func.max(acr.updated_at),
+  ).one())
+
+
+def _load_graph():
+  """Build the propagation graph from the database."""
+  acr = all_models.AccessControlRole
+  return PropagationGraph(db.session.query(
+      acr.id,
+      acr.parent_id,
+      acr.object_type,
+  ))
+
+
+def get_graph():
+  """Get the current propagation graph."""
+  fingerprint = _get_fingerprint()
+  if _GRAPH["graph"] is None or _GRAPH["fingerprint"] != fingerprint:
+    _GRAPH["graph"] = _load_graph()
+    _GRAPH["fingerprint"] = fingerprint
+  return _GRAPH["graph"]
+
+
+def invalidate():
+  """Drop the cached propagation graph."""
+  _GRAPH["graph"] = None
+  _GRAPH["fingerprint"] = None
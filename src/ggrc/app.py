@@ -27,6 +27,7 @@ from ggrc import notifications
 from ggrc import settings
 from ggrc.gdrive import init_gdrive_routes
 from ggrc.utils import benchmark
+from ggrc.utils import profiler
 from ggrc.utils.issue_tracker_mock import init_issue_tracker_mock
 
 if settings.ISSUE_TRACKER_MOCK and not settings.PRODUCTION:
@@ -260,31 +261,28 @@ def _display_request_time():
 
 def register_indexing():
   """Register indexing after request hook"""
-  from ggrc.models import background_task
-  from ggrc.views import bg_update_ft_records
+  from ggrc.fulltext import indexing_queue
 
   # pylint: disable=unused-variable
   @app.after_request
   def create_indexing_bg_task(response):
-    """Create background task for indexing
-    Adds header 'X-GGRC-Indexing-Task-Id' with BG task id
+    """Add changed objects to the indexing queue
+    Adds header 'X-GGRC-Indexing-Task-Id' with BG task id if a new task for
+    draining the queue was created
     """
     if hasattr(db.session, "reindex_set"):
       model_ids = db.session.reindex_set.model_ids_to_reindex
       if model_ids:
-        with benchmark("Create indexing bg task"):
-          chunk_size = db.session.reindex_set.CHUNK_SIZE
-          bg_task = background_task.create_task(
-              name="indexing",
-              url=url_for(bg_update_ft_records.__name__),
-              parameters={"models_ids": model_ids,
-                          "chunk_size": chunk_size},
-              queued_callback=bg_update_ft_records
-          )
+        with benchmark("Enqueue objects for indexing"):
           db.session.expunge_all()  # improves plain_commit time
-          db.session.add(bg_task)
+          indexing_queue.enqueue(model_ids)
+          model_ids.clear()
           db.session.plain_commit()
-          response.headers.add("X-GGRC-Indexing-Task-Id", bg_task.id)
+          if indexing_queue.acquire_drain():
+            bg_task = indexing_queue.schedule_drain()
+            db.session.add(bg_task)
+            db.session.plain_commit()
+            response.headers.add("X-GGRC-Indexing-Task-Id", bg_task.id)
     return response
 
 
@@ -304,3 +302,4 @@ register_indexing()
 _enable_debug_toolbar()
 _display_sql_queries()
 _display_request_time()
+profiler.init_app(app)
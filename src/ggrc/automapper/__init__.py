@@ -14,6 +14,7 @@ from ggrc.automapper import rules
 from ggrc import login
 from ggrc.models.audit import Audit
 from ggrc.models.automapping import Automapping
+from ggrc.models import relationship_adjacency
 from ggrc.models.relationship import Relationship, RelationshipsCache, Stub
 from ggrc.models.issue import Issue
 from ggrc.models import exceptions
@@ -147,6 +148,9 @@ class AutomapperGenerator(object):
           "is_external": False}
           for src, dst in self.auto_mappings
           if (src, dst) != original]))  # (src, dst) is sorted
+      relationship_adjacency.sync_relationships(
+          Relationship.automapping_id == automapping_id,
+      )
 
       self._set_audit_id_for_issues(automapping_id)
 
@@ -0,0 +1,232 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compiled JSON serializers for GGRC models.
+
+ggrc.builder.json.publish finds out how to publish every attribute with
+reflection each time an object is published, and publish_representation
+walks the published objects twice to find and replace stubs.
+
+A compiled serializer does the reflection once per (model, inclusions,
+attribute whitelist) combination and keeps a list of attribute getters.
+Serializers are kept in a bounded LRU cache.
+Stubs created while publishing are registered together with their place in
+the result, so they are resolved without walking the result again.
+
+The output is equal to the output of publish followed by
+publish_representation.
+"""
+
+import collections
+import threading
+
+from sqlalchemy.ext.associationproxy import AssociationProxy
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.properties import RelationshipProperty
+
+from ggrc.builder import json as builder_json
+
+
+def _always(_):
+  return True
+
+
+def _get_custom_publish(model, attr_name):
+  """Get custom publish function of the attribute if there is one."""
+  custom_publish = getattr(model, "_custom_publish", {})
+  if attr_name in custom_publish:
+    return custom_publish[attr_name]
+  for base in model.__bases__:
+    custom_publish = getattr(base, "_custom_publish", {})
+    if attr_name in custom_publish:
+      return custom_publish[attr_name]
+  return None
+
+
+def _make_column_getter(attr_name):
+  def getter(obj):
+    return getattr(obj, attr_name)
+  return getter
+
+
+def _make_stub_getter(target_type, target_name):
+  """Get a getter for a relationship published as a stub."""
+  def getter(obj):
+    target_id = getattr(obj, target_name)
+    if target_id is not None:
+      return builder_json.LazyStubRepresentation(target_type, target_id)
+    return None
+  return getter
+
+
+def _make_generic_getter(builder, attr_name, inclusion):
+  """Get a getter that publishes the attribute with the builder."""
+  inclusions, include = inclusion[1:], len(inclusion) > 0
+
+  def getter(obj):
+    return builder.publish_attr(obj, attr_name, inclusions, include, _always)
+  return getter
+
+
+def _compile_getter(model, builder, attr_name, inclusion):
+  """Get a function that publishes the attribute of model objects.
+
+  Only the most common attribute kinds get specialized getters, all the
+  others are published by the builder.
+  """
+  custom_publish = _get_custom_publish(model, attr_name)
+  if custom_publish is not None:
+    return custom_publish
+  if inclusion:
+    return _make_generic_getter(builder, attr_name, inclusion)
+  class_attr = getattr(model, attr_name)
+  if isinstance(class_attr, AssociationProxy):
+    return _make_generic_getter(builder, attr_name, inclusion)
+  if (isinstance(class_attr, InstrumentedAttribute) and
+          isinstance(class_attr.property, RelationshipProperty)):
+    prop = class_attr.property
+    target_class = prop.mapper.class_
+    if (prop.uselist or prop.backref or
+            target_class.__mapper__.polymorphic_on is not None):
+      return _make_generic_getter(builder, attr_name, inclusion)
+    return _make_stub_getter(target_class.__name__,
+                             list(prop.local_columns)[0].key)
+  if class_attr.__class__.__name__ == "property":
+    return _make_generic_getter(builder, attr_name, inclusion)
+  return _make_column_getter(attr_name)
+
+
+def _get_attr_name(attr):
+  return attr.attr_name if hasattr(attr, "__call__") else attr
+
+
+class Serializer(object):
+  """Publish function specialized for a model."""
+
+  def __init__(self, model, inclusions=(), attribute_whitelist=None):
+    """Compile getters of published attributes.
+
+    Args:
+      model: model class.
+      inclusions: inclusions as accepted by ggrc.builder.json.publish.
+      attribute_whitelist: names of attributes to publish, all if None.
+    """
+    builder = builder_json.get_json_builder(model)
+    self.publishes = bool(getattr(builder, "_publish_attrs", []))
+    all_inclusions = set((attr,) for attr in builder._include_links)
+    all_inclusions.update(inclusions)
+    self.getters = []
+    for attr in builder._publish_attrs:
+      attr_name = _get_attr_name(attr)
+      if (attribute_whitelist is not None and
+              attr_name not in attribute_whitelist):
+        continue
+      inclusion = ()
+      for path in all_inclusions:
+        if path[0] == attr_name:
+          inclusion = path
+          break
+      self.getters.append(
+          (attr_name, _compile_getter(model, builder, attr_name, inclusion))
+      )
+
+  def publish(self, obj, stubs):
+    """Publish obj and register created stubs.
+
+    Args:
+      obj: model object to publish.
+      stubs: list to which (container, key, stub) tuples are added for every
+        stub in the result.
+    """
+    if not self.publishes:
+      return obj
+    json_obj = builder_json.publish_base_properties(obj)
+    for attr_name, getter in self.getters:
+      value = getter(obj)
+      json_obj[attr_name] = value
+      if isinstance(value, builder_json.LazyStubRepresentation):
+        stubs.append((json_obj, attr_name, value))
+      elif isinstance(value, (dict, list, tuple)):
+        nested_items = builder_json.walk_representation(value)
+        for nested, key, container in nested_items:
+          if isinstance(nested, builder_json.LazyStubRepresentation):
+            stubs.append((container, key, nested))
+    return json_obj
+
+
+# Max number of cached serializers. Attribute whitelists come from /query
+# requests, so the number of their combinations is not limited by the code.
+SERIALIZERS_CACHE_SIZE = 1000
+
+_SERIALIZERS = collections.OrderedDict()
+_SERIALIZERS_LOCK = threading.Lock()
+
+_PUBLISHED_NAMES = {}
+
+
+def _get_published_names(model):
+  """Get names of attributes that are published for the model."""
+  names = _PUBLISHED_NAMES.get(model)
+  if names is None:
+    builder = builder_json.get_json_builder(model)
+    names = frozenset(_get_attr_name(attr)
+                      for attr in getattr(builder, "_publish_attrs", []))
+    _PUBLISHED_NAMES[model] = names
+  return names
+
+
+def get_serializer(model, inclusions=(), attribute_whitelist=None):
+  """Get a cached serializer for the given model and options.
+
+  Serializers are kept in an LRU cache. Names in the attribute whitelist
+  that are not published for the model are dropped, so they don't create
+  new serializers.
+  """
+  whitelist = None
+  if attribute_whitelist:
+    whitelist = frozenset(attribute_whitelist) & _get_published_names(model)
+  key = (model, tuple(sorted(inclusions)), whitelist)
+  with _SERIALIZERS_LOCK:
+    serializer = _SERIALIZERS.pop(key, None)
+    if serializer is not None:
+      _SERIALIZERS[key] = serializer
+      return serializer
+  serializer = Serializer(model, inclusions, whitelist)
+  with _SERIALIZERS_LOCK:
+    _SERIALIZERS[key] = serializer
+    while len(_SERIALIZERS) > SERIALIZERS_CACHE_SIZE:
+      _SERIALIZERS.popitem(last=False)
+  return serializer
+
+
+def resolve_stubs(stubs):
+  """Replace registered stubs with rendered links."""
+  if not stubs:
+    return
+  results, type_columns = builder_json.fetch_stub_matches(
+      [(stub.type, stub.conditions) for _, _, stub in stubs]
+  )
+  for container, key, stub in stubs:
+    container[key] = stub.render(results, type_columns)
+
+
+def publish_objects(objects, inclusions=(), attribute_whitelist=None):
+  """Publish objects and resolve all their stubs with a single query.
+
+  Args:
+    objects: model objects, possibly of different types.
+    inclusions: inclusions as accepted by ggrc.builder.json.publish.
+    attribute_whitelist: names of attributes to publish, all if empty.
+
+  Returns:
+    list of JSON representations of objects.
+  """
+  stubs = []
+  result = [
+      get_serializer(
+          obj.__class__, inclusions, attribute_whitelist,
+      ).publish(obj, stubs)
+      for obj in objects
+  ]
+  resolve_stubs(stubs)
+  return result
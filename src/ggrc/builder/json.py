@@ -497,12 +497,12 @@ def reify_representation(resource, results, type_columns):
   return resource
 
 
-def publish_representation(resource):
-  queries = gather_queries(resource)
-
-  if not queries:
-    return resource
+def fetch_stub_matches(queries):
+  """Fetch rows for the given stub queries with a single union query.
 
+  Returns:
+    tuple of results and type columns to render stubs with.
+  """
   results, type_columns, query = build_stub_union_query(queries)
   rows = query.all()
   for row in rows:
@@ -511,7 +511,16 @@ def publish_representation(resource):
       vals = tuple(row[type_columns[type_][c]] for c in columns)
       if vals in matches:
         matches[vals].append(row)
+  return results, type_columns
+
+
+def publish_representation(resource):
+  queries = gather_queries(resource)
+
+  if not queries:
+    return resource
 
+  results, type_columns = fetch_stub_matches(queries)
   return reify_representation(resource, results, type_columns)
 
 
@@ -0,0 +1,336 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Process-wide registry of global custom attribute definitions.
+
+Global CADs (the ones without definition_id) of a definition type are loaded
+once and kept in process memory as:
+  - detached CustomAttributeDefinition copies for read-only use, e.g. by the
+    snapshot indexer;
+  - log_json() dicts of every CAD, used in revisions of objects.
+Callers that need CADs attached to the current session (e.g. to create
+custom attribute values) get copies merged into the session without any
+queries, see get_session_cads.
+
+The registry is versioned with a generation number. Commits that change any
+CAD bump the generation (see ggrc.models.hooks.custom_attribute_definition),
+and entries loaded with an older generation are loaded again. With
+settings.MEMCACHE_MECHANISM the generation is kept in memcache, otherwise in
+the cache_generations table, so it is shared by all processes either way.
+
+Sessions with flushed but not committed CAD changes bypass the registry and
+read CADs from the database.
+
+Set settings.CAD_REGISTRY to False to disable the registry.
+"""
+
+import threading
+import time
+
+import flask
+import sqlalchemy as sa
+from sqlalchemy import orm
+from sqlalchemy.orm import attributes
+
+from ggrc import db
+from ggrc import settings
+from ggrc.cache import memcache
+
+
+GENERATION_KEY = "cad_registry:generation"
+
+# Max age of registry entries in seconds. It limits the time CADs changed
+# outside of the ORM, e.g. by migrations, can stay stale.
+MAX_AGE = 600
+
+# Keys of the registry data in Session.info.
+SESSION_CADS = "cad_registry_cads"
+SESSION_CHANGED = "cad_registry_changed"
+SESSION_GENERATION = "cad_registry_generation"
+
+
+class _Entry(object):
+  """Global CADs of a definition type loaded with a generation."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self, generation, cads, log_jsons):
+    self.loaded_at = time.time()
+    self.generation = generation
+    self.cads = cads
+    self.log_jsons = log_jsons
+
+
+# pylint: disable=too-few-public-methods
+class CacheGeneration(db.Model):
+  """Generation of a process cache shared through the database."""
+
+  __tablename__ = "cache_generations"
+
+  name = db.Column(db.String(64), primary_key=True)
+  generation = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+_ENTRIES = {}
+_LOCK = threading.Lock()
+
+
+def is_enabled():
+  return getattr(settings, "CAD_REGISTRY", True)
+
+
+def _get_client():
+  """Get memcache client for the shared generation or None."""
+  if not memcache.has_memcache():
+    return None
+  from google.appengine.api import memcache as gae_memcache
+  return gae_memcache.Client()
+
+
+def _initial_generation():
+  # Start from the current time, so that an evicted generation never
+  # returns to a value that some process has already seen.
+  return int(time.time() * 1000)
+
+
+def _fetch_db_generation():
+  """Get the generation stored in the database, once per transaction.
+
+  The CADs loaded for the generation are read from the same transaction
+  snapshot.
+  """
+  session = db.session()
+  if SESSION_GENERATION not in session.info:
+    with session.no_autoflush:
+      generation = session.query(CacheGeneration.generation).filter(
+          CacheGeneration.name == GENERATION_KEY
+      ).scalar()
+    session.info[SESSION_GENERATION] = generation or 0
+  return session.info[SESSION_GENERATION]
+
+
+def _bump_db_generation():
+  """Increment the generation stored in the database in a new transaction."""
+  with db.engine.begin() as connection:
+    connection.execute(
+        sa.text("""
+            INSERT INTO cache_generations (name, generation)
+            VALUES (:name, 1)
+            ON DUPLICATE KEY UPDATE generation = generation + 1
+        """),
+        name=GENERATION_KEY,
+    )
+
+
+def _fetch_generation():
+  """Get the current generation from memcache or None if it can't be read."""
+  client = _get_client()
+  generation = client.get(GENERATION_KEY)
+  if generation is None:
+    client.add(GENERATION_KEY, _initial_generation())
+    generation = client.get(GENERATION_KEY)
+  return generation
+
+
+def get_generation():
+  """Get the current generation.
+
+  The generation is read from memcache once per request and from the
+  database once per transaction.
+  """
+  if not memcache.has_memcache():
+    return _fetch_db_generation()
+  if not flask.has_request_context():
+    return _fetch_generation()
+  if not hasattr(flask.g, "cad_registry_generation"):
+    flask.g.cad_registry_generation = _fetch_generation()
+  return flask.g.cad_registry_generation
+
+
+def bump_generation():
+  """Invalidate registry entries in all processes."""
+  with _LOCK:
+    _ENTRIES.clear()
+  client = _get_client()
+  if client is not None:
+    client.incr(GENERATION_KEY, initial_value=_initial_generation())
+  else:
+    _bump_db_generation()
+  if flask.has_request_context() and hasattr(flask.g,
+                                             "cad_registry_generation"):
+    del flask.g.cad_registry_generation
+
+
+def _query_global_cads(*definition_types):
+  """Get query for global CADs of definition types."""
+  from ggrc.models import all_models
+  cad = all_models.CustomAttributeDefinition
+  return cad.query.filter(
+      cad.definition_type.in_(definition_types),
+      cad.definition_id.is_(None),
+  ).options(
+      orm.undefer_group("CustomAttributeDefinition_complete"),
+  ).order_by(cad.id)
+
+
+def _detached_copy(obj):
+  """Create a detached copy of obj with all column attributes loaded."""
+  mapper = sa.inspect(obj).mapper
+  copy = mapper.class_manager.new_instance()
+  for prop in mapper.column_attrs:
+    attributes.set_committed_value(copy, prop.key, getattr(obj, prop.key))
+  orm.make_transient_to_detached(copy)
+  return copy
+
+
+def _load(definition_types, generation):
+  """Load registry entries of definition types with a single query."""
+  entries = {definition_type: _Entry(generation, [], {})
+             for definition_type in definition_types}
+  for cad in _query_global_cads(*definition_types):
+    entry = entries[cad.definition_type]
+    entry.cads.append(_detached_copy(cad))
+    entry.log_jsons[cad.id] = cad.log_json()
+  return entries
+
+
+def _get_entries(definition_types):
+  """Get {definition type: registry entry} dict or None if it is bypassed."""
+  if not is_enabled() or _session_changed(db.session()):
+    return None
+  generation = get_generation()
+  if generation is None:
+    return None
+  entries = {definition_type: _ENTRIES.get(definition_type)
+             for definition_type in definition_types}
+  now = time.time()
+  stale = [definition_type for definition_type, entry in entries.iteritems()
+           if entry is None or entry.generation != generation or
+           entry.loaded_at + MAX_AGE < now]
+  if stale:
+    loaded = _load(stale, generation)
+    with _LOCK:
+      _ENTRIES.update(loaded)
+    entries.update(loaded)
+  return entries
+
+
+def _get_entry(definition_type):
+  """Get registry entry of a definition type or None if it is bypassed."""
+  entries = _get_entries([definition_type])
+  return entries[definition_type] if entries is not None else None
+
+
+def get_global_cads(*definition_types):
+  """Get detached global CADs of definition types ordered by id.
+
+  The returned objects are shared between requests and must not be changed
+  or added to a session.
+
+  Returns:
+    {definition type: list of CADs} dict.
+  """
+  entries = _get_entries(definition_types)
+  if entries is None:
+    result = {definition_type: [] for definition_type in definition_types}
+    for cad in _query_global_cads(*definition_types):
+      result[cad.definition_type].append(_detached_copy(cad))
+    return result
+  return {definition_type: list(entry.cads)
+          for definition_type, entry in entries.iteritems()}
+
+
+def get_log_jsons(definition_type):
+  """Get {id: log_json} dict of global CADs of a definition type."""
+  entry = _get_entry(definition_type)
+  if entry is None:
+    return {cad.id: cad.log_json()
+            for cad in _query_global_cads(definition_type)}
+  return entry.log_jsons
+
+
+def _session_changed(session):
+  return session.info.get(SESSION_CHANGED, False)
+
+
+def _has_pending_cads(session):
+  """Check if the session has CAD changes that are not flushed yet."""
+  from ggrc.models import all_models
+  cad = all_models.CustomAttributeDefinition
+  return any(isinstance(obj, cad)
+             for obj in session.new | session.dirty | session.deleted)
+
+
+def get_session_cads(definition_type):
+  """Get global CADs of a definition type attached to the current session.
+
+  CADs are merged into the session without queries once per transaction.
+  """
+  session = db.session()
+  entry = _get_entry(definition_type)
+  if entry is None or _has_pending_cads(session):
+    return _query_global_cads(definition_type).all()
+  cache = session.info.setdefault(SESSION_CADS, {})
+  cached = cache.get(definition_type)
+  if cached is None or cached[0] != entry.generation:
+    merged = [session.merge(cad, load=False) for cad in entry.cads]
+    cached = cache[definition_type] = (entry.generation, merged)
+  return list(cached[1])
+
+
+def warm_session(definition_type):
+  """Merge global CADs into the current session if the registry is used.
+
+  Returns:
+    True if objects loaded in the current transaction get their global CADs
+    from the registry, see set_loaded_cads.
+  """
+  if (_get_entry(definition_type) is None or
+          _has_pending_cads(db.session())):
+    return False
+  get_session_cads(definition_type)
+  return True
+
+
+def get_warm_session_cads(session, definition_type):
+  """Get session CADs merged in the current transaction or None."""
+  if _session_changed(session):
+    return None
+  cached = session.info.get(SESSION_CADS, {}).get(definition_type)
+  if cached is None:
+    return None
+  return list(cached[1])
+
+
+def set_loaded_cads(target, context):
+  """Set global CADs of a loaded object if they are merged in the session.
+
+  Listener of the load event of models without local CADs.
+  """
+  cads = get_warm_session_cads(
+      context.session,
+      target._inflector.table_singular,  # pylint: disable=protected-access
+  )
+  if cads is not None:
+    attributes.set_committed_value(target, "custom_attribute_definitions",
+                                   cads)
+
+
+def mark_session_changed(session):
+  """Bypass the registry in a session with flushed CAD changes."""
+  session.info[SESSION_CHANGED] = True
+  session.info.pop(SESSION_CADS, None)
+
+
+def end_transaction(session, committed):
+  """Drop session data and bump the generation if CADs were committed."""
+  session.info.pop(SESSION_CADS, None)
+  session.info.pop(SESSION_GENERATION, None)
+  changed = session.info.pop(SESSION_CHANGED, False)
+  if changed and committed:
+    bump_generation()
+
+
+def clear():
+  """Drop all registry entries of the process."""
+  with _LOCK:
+    _ENTRIES.clear()
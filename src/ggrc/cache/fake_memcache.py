@@ -0,0 +1,168 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""In-memory client with the interface of AppEngine memcache.Client.
+
+The client keeps values in a process-local dict and is meant for tests and
+benchmarks of the cache layer without the AppEngine memcache service, e.g.:
+
+    MemCache(client=FakeMemcacheClient(latency=0.001))
+
+Every call to the client is one round trip. The number of round trips is
+kept in the `round_trips` attribute, and `latency` seconds are spent on each
+of them to emulate network delays.
+"""
+
+import copy
+import time
+
+
+# Return values of memcache.Client.delete.
+DELETE_NETWORK_FAILURE = 0
+DELETE_ITEM_MISSING = 1
+DELETE_SUCCESSFUL = 2
+
+# Expiration times greater than this are absolute unix timestamps.
+MAX_RELATIVE_EXPIRATION = 86400 * 30
+
+
+class FakeMemcacheClient(object):
+  """Fake memcache client that stores values in a dict."""
+
+  def __init__(self, latency=0):
+    self.latency = latency
+    self.round_trips = 0
+    self._entries = {}
+    self._versions = {}
+    self._cas_ids = {}
+
+  def _round_trip(self):
+    self.round_trips += 1
+    if self.latency:
+      time.sleep(self.latency)
+
+  @staticmethod
+  def _get_expiry(expiration_time):
+    if not expiration_time:
+      return None
+    if expiration_time > MAX_RELATIVE_EXPIRATION:
+      return expiration_time
+    return time.time() + expiration_time
+
+  def _get(self, key, for_cas=False):
+    """Get a copy of a stored value or None."""
+    if key not in self._entries:
+      return None
+    value, expiry = self._entries[key]
+    if expiry is not None and expiry <= time.time():
+      del self._entries[key]
+      return None
+    if for_cas:
+      self._cas_ids[key] = self._versions[key]
+    return copy.deepcopy(value)
+
+  def _set(self, key, value, expiration_time):
+    self._entries[key] = (copy.deepcopy(value),
+                          self._get_expiry(expiration_time))
+    self._versions[key] = self._versions.get(key, 0) + 1
+
+  def _add(self, key, value, expiration_time):
+    if self._get(key) is not None:
+      return False
+    self._set(key, value, expiration_time)
+    return True
+
+  def _cas(self, key, value, expiration_time):
+    """Set the value if nobody changed it since it was read with gets."""
+    cas_id = self._cas_ids.pop(key, None)
+    if (cas_id is None or self._get(key) is None or
+            self._versions[key] != cas_id):
+      return False
+    self._set(key, value, expiration_time)
+    return True
+
+  def _delete(self, key):
+    if self._get(key) is None:
+      return DELETE_ITEM_MISSING
+    del self._entries[key]
+    return DELETE_SUCCESSFUL
+
+  # pylint: disable=unused-argument,redefined-outer-name
+  # Arguments of the methods match memcache.Client ones.
+
+  def get(self, key, namespace=None, for_cas=False):
+    self._round_trip()
+    return self._get(key, for_cas)
+
+  def gets(self, key, namespace=None):
+    return self.get(key, namespace, for_cas=True)
+
+  def get_multi(self, keys, key_prefix='', namespace=None, for_cas=False):
+    self._round_trip()
+    result = {}
+    for key in keys:
+      value = self._get(key_prefix + key, for_cas)
+      if value is not None:
+        result[key] = value
+    return result
+
+  def set(self, key, value, time=0, min_compress_len=0, namespace=None):
+    self._round_trip()
+    self._set(key, value, time)
+    return True
+
+  def set_multi(self, mapping, time=0, key_prefix='', min_compress_len=0,
+                namespace=None):
+    self._round_trip()
+    for key, value in mapping.iteritems():
+      self._set(key_prefix + key, value, time)
+    return []
+
+  def add(self, key, value, time=0, min_compress_len=0, namespace=None):
+    self._round_trip()
+    return self._add(key, value, time)
+
+  def add_multi(self, mapping, time=0, key_prefix='', min_compress_len=0,
+                namespace=None):
+    self._round_trip()
+    return [key for key, value in mapping.iteritems()
+            if not self._add(key_prefix + key, value, time)]
+
+  def cas(self, key, value, time=0, min_compress_len=0, namespace=None):
+    self._round_trip()
+    return self._cas(key, value, time)
+
+  def cas_multi(self, mapping, time=0, key_prefix='', min_compress_len=0,
+                namespace=None):
+    self._round_trip()
+    return [key for key, value in mapping.iteritems()
+            if not self._cas(key_prefix + key, value, time)]
+
+  def delete(self, key, seconds=0, namespace=None):
+    self._round_trip()
+    return self._delete(key)
+
+  def delete_multi(self, keys, seconds=0, key_prefix='', namespace=None):
+    self._round_trip()
+    for key in keys:
+      self._delete(key_prefix + key)
+    return True
+
+  def incr(self, key, delta=1, namespace=None, initial_value=None):
+    """Increment an integer value, return None if the key is missing."""
+    self._round_trip()
+    value = self._get(key)
+    if value is None:
+      if initial_value is None:
+        return None
+      value = initial_value
+    value = int(value) + delta
+    self._set(key, value, 0)
+    return value
+
+  def flush_all(self):
+    self._round_trip()
+    self._entries.clear()
+    self._versions.clear()
+    self._cas_ids.clear()
+    return True
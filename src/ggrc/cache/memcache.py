@@ -21,13 +21,17 @@ def has_memcache():
 
 
 class MemCache(cache.Cache):
-  """MemCache class."""
+  """MemCache class.
 
-  def __init__(self):
+  All operations with collections use a single multi-key call to memcache
+  for each step, no matter how many ids are requested.
+  """
+
+  def __init__(self, client=None):
     super(MemCache, self).__init__()
     self.name = 'memcache'
     self.client = None
-    self.memcache_client = memcache.Client()
+    self.memcache_client = client or memcache.Client()
     self.supported_resources.update({
         cache_entry.model_plural: cache_entry.class_name
         for cache_entry in cache.all_cache_entries()
@@ -36,6 +40,13 @@ class MemCache(cache.Cache):
   def get_name(self):
     return self.name
 
+  @staticmethod
+  def _get_id_keys(cache_key, ids):
+    """Get {memcache key: id} dict for ids of a resource."""
+    return OrderedDict(
+        (cache_key + ":" + str(id_), id_) for id_ in ids
+    )
+
   def get(self, category, resource, filter):
     """ get items from mem cache for specified filter
 
@@ -45,47 +56,44 @@ class MemCache(cache.Cache):
       filter: dictionary containing ids and optional attrs
 
     Returns:
-      All or None policy is applied by default
       None on any errors
-      otherwise returns JSON string representation
+      otherwise OrderedDict of found items by id. Ids that are missing in
+      the cache are not in the result.
     """
 
     if not self.is_caching_supported(category, resource):
       return None
-    # TODO(dan): use memcache.Client.get_multi() instead of gets()
-    #
-    data = OrderedDict()
     cache_key = self.get_key(category, resource)
     if cache_key is None:
       return None
     ids, attrs = self.parse_filter(filter)
-    if ids is None and attrs is None:
+    if ids is None:
       return None
-    else:
-      if ids is None:
-        return None
-    for id_ in ids:
-      attrvalues = self.memcache_client.gets(cache_key + ":" + str(id_))
-      if attrvalues is not None:
-        if attrs is None:
-          data[id_] = attrvalues
-        else:
-          attr_dict = OrderedDict()
-          for attr in attrs:
-            if attr in attrvalues:
-              attr_dict[attr] = deepcopy(attrvalues.get(attr))
-          data[id_] = attr_dict
+    id_keys = self._get_id_keys(cache_key, ids)
+    # TODO(dan): cannot distinguish network failures vs
+    # id not found in memcache, both scenarios return no value
+    found = self.memcache_client.get_multi(id_keys.keys())
+    data = OrderedDict()
+    for key, id_ in id_keys.iteritems():
+      if key not in found:
+        continue
+      attrvalues = found[key]
+      if attrs is None:
+        data[id_] = attrvalues
       else:
-        # All or None policy is enforced, if one of the objects
-        # is not available in cache, then we return empty
-        # TODO(dan): cannot distinguish network failures vs
-        # id not found in memcache, both scenarios return empty list
-        return None
+        attr_dict = OrderedDict()
+        for attr in attrs:
+          if attr in attrvalues:
+            attr_dict[attr] = deepcopy(attrvalues.get(attr))
+        data[id_] = attr_dict
     return data
 
   def add(self, category, resource, data, expiration_time=0):
     """ add data to mem cache
 
+    New items are added and items that are already in the cache are replaced
+    with compare and set. This could occur on import scenarios.
+
     Args:
       category: collection or stub
       resource: regulation, controls, etc.
@@ -93,45 +101,43 @@ class MemCache(cache.Cache):
 
     Returns:
       None on any errors
-      Mapping of DTO formatted string, e.g. JSON string representation
+      Mapping of stored items by id, items that failed to be stored are
+      not in the result.
     """
     if not self.is_caching_supported(category, resource):
       return None
-    entries = {}
     cache_key = self.get_key(category, resource)
     if cache_key is None:
       return None
-    # TODO(dan): use memcache.Client.add_multi() instead of add()
-    for key in data.keys():
-      cache_key = cache_key + ":" + str(key)
-      cache_data = self.memcache_client.gets(cache_key)
-      if cache_data is None:
-        if self.memcache_client.add(cache_key,
-                                    data.get(key),
-                                    expiration_time) is False:
-          # We stop processing any further
-          # TODO(ggrcdev): Should we throw exceptions
-          # and/or log critical events
-          return None
-        else:
-          entries[key] = data
+    id_keys = self._get_id_keys(cache_key, data.keys())
+    cached = self.memcache_client.get_multi(id_keys.keys(), for_cas=True)
+    new_items = {}
+    cached_items = {}
+    for key, id_ in id_keys.iteritems():
+      if key in cached:
+        cached_items[key] = data[id_]
       else:
-        # This could occur on import scenarios
-        #
-        if self.memcache_client.cas(cache_key,
-                                    data.get(key),
-                                    expiration_time) is False:
-          # We stop processing any further
-          # TODO(ggrcdev): Should we throw exceptions
-          # and/or log critical events
-          return None
-        else:
-          entries[key] = data
-    return entries
+        new_items[key] = data[id_]
+    failed = set()
+    if new_items:
+      failed.update(self.memcache_client.add_multi(new_items,
+                                                   expiration_time))
+    if cached_items:
+      failed.update(self.memcache_client.cas_multi(cached_items,
+                                                   expiration_time))
+    if failed:
+      # TODO(ggrcdev): Should we throw exceptions
+      # and/or log critical events
+      logger.warning("CACHE: Unable to store %s of %s %s items",
+                     len(failed), len(id_keys), resource)
+    return {id_: data[id_] for key, id_ in id_keys.iteritems()
+            if key not in failed}
 
   def update(self, category, resource, data, expiration_time):
     """ Update items from mem cache for specified data
 
+    Only items that are present in the cache are updated.
+
     Args:
       category: collection or stub
       resource: regulation, controls, etc.
@@ -139,28 +145,23 @@ class MemCache(cache.Cache):
 
     Returns:
       None on any errors
-      Mapping of DTO formatted string, e.g. JSON string representation
+      Mapping of updated items by id.
     """
     if not self.is_caching_supported(category, resource):
       return None
-    entries = {}
     cache_key = self.get_key(category, resource)
     if cache_key is None:
       return None
-    # TODO(ggrcdev): use memcache.Client.cas_multi(),
-    # get_multi() instead of cas(), gets()
-    #
-    for key in data.keys():
-      id_ = cache_key + ":" + str(key)
-      if self.memcache_client.cas(id_,
-                                  data.get(key),
-                                  expiration_time) is False:
-        # RPC Error or value is not id is not found in cache.
-        # Cannot proceed further with update (All or None) policy
-        return None
-      else:
-        entries[key] = data
-    return entries
+    id_keys = self._get_id_keys(cache_key, data.keys())
+    cached = self.memcache_client.get_multi(id_keys.keys(), for_cas=True)
+    items = {key: data[id_] for key, id_ in id_keys.iteritems()
+             if key in cached}
+    if not items:
+      return {}
+    # RPC Error or value changed by another request since get_multi.
+    failed = set(self.memcache_client.cas_multi(items, expiration_time))
+    return {id_: data[id_] for key, id_ in id_keys.iteritems()
+            if key in items and key not in failed}
 
   def remove(self, category, resource, data, lockadd_seconds=0):
     """ delete items from mem cache for specified data
@@ -176,34 +177,15 @@ class MemCache(cache.Cache):
     """
     if not self.is_caching_supported(category, resource):
       return None
-    entries = {}
     cache_key = self.get_key(category, resource)
     if cache_key is None:
       return None
-    # TODO(dan): use memcache.Client.delete_multi(),
-    # get_multi() instead of delete(), gets()
-    #
-    for key in data.keys():
-      id_ = cache_key + ":" + str(key)
-      retvalue = self.memcache_client.delete(id_, lockadd_seconds)
-      # Log the event of delete failures
-      if retvalue == 0:
-        # retvalue of 0 indicates Network failure,
-        # Cannot proceed further with delete (All or None) policy
-        return None
-      elif retvalue == 2:
-        # retvalue of 2 indicates Success
-        entries[key] = data
-      elif retvalue == 1:
-        # retvalue of 1 indicates id_ is not present in memcache
-        # (could be expired), proceed with next entry
-        continue
-      else:
-        # Any other return value,
-        # Cannot proceed further with delete (All or None) policy
-        #
-        return None
-    return entries
+    id_keys = self._get_id_keys(cache_key, data.keys())
+    if not self.memcache_client.delete_multi(id_keys.keys(),
+                                             seconds=lockadd_seconds):
+      # Network failure, some of the items could be left in the cache
+      return None
+    return {id_: data for id_ in id_keys.itervalues()}
 
   def add_multi(self, data, expiration_time=0):
     """ Add multiple entries to memcache
@@ -0,0 +1,305 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Versioned memcache storage of user permissions.
+
+Permissions of a user are stored as separate entries:
+  - the base entry with everything that does not come from access control
+    lists (default permissions, user roles, contexts) and the list of object
+    types the ACL entries are stored for;
+  - one entry per object type with ids of objects the user can read, update
+    and delete, encoded as compressed varint deltas of sorted ids.
+
+Entry keys contain version numbers instead of being tracked in a global key
+list, so invalidation is a single atomic increment:
+  - global version - all permissions, e.g. after role definition changes;
+  - user version - all permissions of a single user, e.g. after the user was
+    added to or removed from a role;
+  - type version - permissions for objects of a single type of all users,
+    e.g. after a relationship that propagated roles was removed;
+  - user type version - permissions for objects of a single type of a single
+    user, used when an incremental update of the entry fails.
+
+New ACL entries created by propagation do not invalidate anything, ids of
+new objects are added to the existing per type entries instead.
+"""
+
+import collections
+import logging
+import time
+import zlib
+
+from ggrc.utils import benchmark
+
+
+logger = logging.getLogger(__name__)
+
+PERMISSION_CACHE_TIMEOUT = 3600  # 60 minutes
+
+ACL_ACTIONS = ("read", "update", "delete")
+
+GLOBAL_VERSION_KEY = "permissions:version"
+
+# Entries larger than this are not stored, the same as in memcache.
+MAX_ENTRY_SIZE = 10 ** 6 - 1
+
+
+def _user_version_key(user_id):
+  return "permissions:user:{}:version".format(user_id)
+
+
+def _type_version_key(object_type):
+  return "permissions:type:{}:version".format(object_type)
+
+
+def _user_type_version_key(user_id, object_type):
+  return "permissions:user:{}:type:{}:version".format(user_id, object_type)
+
+
+def _base_key(global_version, user_id, user_version):
+  return "permissions:{}:{}:{}".format(global_version, user_id, user_version)
+
+
+def _type_key(base_key, object_type, type_version, user_type_version):
+  return "{}:{}:{}:{}".format(base_key, object_type, type_version,
+                              user_type_version)
+
+
+def encode_ids(ids):
+  """Encode a set of positive integer ids into a compact string.
+
+  Ids are sorted, stored as varint encoded differences between neighbours
+  and compressed.
+  """
+  result = bytearray()
+  previous = 0
+  for id_ in sorted(set(ids)):
+    delta = id_ - previous
+    previous = id_
+    while delta >= 0x80:
+      result.append((delta & 0x7f) | 0x80)
+      delta >>= 7
+    result.append(delta)
+  return zlib.compress(bytes(result))
+
+
+def decode_ids(data):
+  """Decode a set of ids encoded with encode_ids."""
+  ids = set()
+  current = 0
+  delta = 0
+  shift = 0
+  for byte in bytearray(zlib.decompress(data)):
+    delta |= (byte & 0x7f) << shift
+    if byte & 0x80:
+      shift += 7
+      continue
+    current += delta
+    ids.add(current)
+    delta = 0
+    shift = 0
+  return ids
+
+
+def _encode_entry(acl_permissions):
+  """Encode {action: ids} dict of a single object type."""
+  return tuple(encode_ids(acl_permissions.get(action, ()))
+               for action in ACL_ACTIONS)
+
+
+def _decode_entry(entry):
+  """Decode entry made by _encode_entry to {action: ids} dict."""
+  return {action: decode_ids(data)
+          for action, data in zip(ACL_ACTIONS, entry)}
+
+
+def _entry_size(entry):
+  return sum(len(data) for data in entry)
+
+
+def _initial_version():
+  """Get initial value for missing version keys.
+
+  A version key can be evicted, so it must not start from a value that
+  could have been used for older entries.
+  """
+  return int(time.time() * 1000)
+
+
+def _get_versions(cache, keys, create_missing=True):
+  """Get values of version keys, creating missing ones if needed."""
+  versions = cache.get_multi(keys)
+  missing = [key for key in keys if key not in versions]
+  if missing and create_missing:
+    initial = _initial_version()
+    cache.add_multi({key: initial for key in missing}, time=0)
+    versions.update(cache.get_multi(missing))
+  return versions
+
+
+def _bump(cache, keys):
+  """Increment version keys."""
+  if not keys:
+    return
+  cache.offset_multi({key: 1 for key in keys},
+                     initial_value=_initial_version())
+
+
+def bump_global_version(cache):
+  """Invalidate cached permissions of all users."""
+  _bump(cache, [GLOBAL_VERSION_KEY])
+
+
+def bump_user_versions(cache, user_ids):
+  """Invalidate all cached permissions of the given users."""
+  _bump(cache, [_user_version_key(user_id) for user_id in user_ids])
+
+
+def bump_type_versions(cache, object_types):
+  """Invalidate cached permissions for objects of the given types."""
+  _bump(cache, [_type_version_key(type_) for type_ in object_types])
+
+
+def _get_base_key(cache, user_id, create_missing=True):
+  """Get key of the base entry for the current versions."""
+  keys = [GLOBAL_VERSION_KEY, _user_version_key(user_id)]
+  versions = _get_versions(cache, keys, create_missing)
+  if len(versions) < len(keys):
+    return None
+  return _base_key(versions[keys[0]], user_id, versions[keys[1]])
+
+
+def _get_type_keys(cache, base_key, user_id, object_types,
+                   create_missing=True):
+  """Get {object_type: key} dict of per type entries."""
+  version_keys = {}
+  for object_type in object_types:
+    version_keys[object_type] = (
+        _type_version_key(object_type),
+        _user_type_version_key(user_id, object_type),
+    )
+  versions = _get_versions(
+      cache,
+      [key for pair in version_keys.values() for key in pair],
+      create_missing,
+  )
+  result = {}
+  for object_type, (type_key, user_type_key) in version_keys.iteritems():
+    if type_key in versions and user_type_key in versions:
+      result[object_type] = _type_key(base_key, object_type,
+                                      versions[type_key],
+                                      versions[user_type_key])
+  return result
+
+
+def _merge_acl_permissions(permissions, object_type, acl_permissions):
+  """Add ACL permissions of a single object type to permissions dict."""
+  for action, ids in acl_permissions.iteritems():
+    if not ids:
+      continue
+    permissions.setdefault(action, {})\
+        .setdefault(object_type, {})\
+        .setdefault('resources', set())\
+        .update(ids)
+
+
+def load(cache, user_id, load_base, load_acl, store=True):
+  """Get permissions of the user, loading missing parts from the database.
+
+  Args:
+    cache: memcache client.
+    user_id: id of the user.
+    load_base: callable that returns a tuple of permissions dict without ACL
+      permissions and a list of object types that can have ACL permissions.
+    load_acl: callable that receives a list of object types and returns a
+      {object_type: {action: set of ids}} dict.
+    store: store the loaded parts into the cache.
+  Returns:
+    complete permissions dict.
+  """
+  base_key = _get_base_key(cache, user_id)
+  base_entry = cache.get(base_key)
+  if base_entry is None:
+    with benchmark("load_permissions > load base permissions"):
+      base_entry = load_base()
+    if store:
+      cache.add(base_key, base_entry, time=PERMISSION_CACHE_TIMEOUT)
+  base_permissions, object_types = base_entry
+
+  type_keys = _get_type_keys(cache, base_key, user_id, object_types)
+  entries = cache.get_multi(type_keys.values())
+  acl_permissions = {}
+  missing_types = []
+  for object_type, key in type_keys.iteritems():
+    if key in entries:
+      acl_permissions[object_type] = _decode_entry(entries[key])
+    else:
+      missing_types.append(object_type)
+
+  if missing_types:
+    with benchmark("load_permissions > load acl permissions for %s types" %
+                   len(missing_types)):
+      loaded = load_acl(missing_types)
+    new_entries = {}
+    for object_type in missing_types:
+      type_permissions = loaded.get(object_type, {})
+      acl_permissions[object_type] = type_permissions
+      entry = _encode_entry(type_permissions)
+      if _entry_size(entry) > MAX_ENTRY_SIZE:
+        logger.warning("Permissions of user %s for %s are too large to "
+                       "be cached", user_id, object_type)
+        continue
+      new_entries[type_keys[object_type]] = entry
+    if store and new_entries:
+      cache.add_multi(new_entries, time=PERMISSION_CACHE_TIMEOUT)
+
+  permissions = base_permissions
+  for object_type, type_permissions in acl_permissions.iteritems():
+    _merge_acl_permissions(permissions, object_type, type_permissions)
+  return permissions
+
+
+def add_acl_permissions(cache, acl_permissions):
+  """Add ids of objects to the cached permissions of users.
+
+  Only entries that are already cached are updated, missing ones are loaded
+  from the database when they are needed. If an entry was changed by another
+  process in the meantime, it is invalidated instead.
+
+  Args:
+    cache: memcache client.
+    acl_permissions: iterable of (person_id, object_type, object_id, read,
+      update, delete) tuples.
+  """
+  additions = collections.defaultdict(lambda: collections.defaultdict(
+      lambda: collections.defaultdict(set)))
+  for person_id, object_type, object_id, read, update, delete in \
+          acl_permissions:
+    for action, allowed in zip(ACL_ACTIONS, (read, update, delete)):
+      if allowed:
+        additions[person_id][object_type][action].add(object_id)
+
+  keys = {}
+  for person_id, types in additions.iteritems():
+    base_key = _get_base_key(cache, person_id, create_missing=False)
+    if base_key is None:
+      continue
+    type_keys = _get_type_keys(cache, base_key, person_id, types.keys(),
+                               create_missing=False)
+    for object_type, key in type_keys.iteritems():
+      keys[key] = (person_id, object_type)
+  if not keys:
+    return
+
+  entries = cache.get_multi(keys.keys(), for_cas=True)
+  updated = {}
+  for key, entry in entries.iteritems():
+    person_id, object_type = keys[key]
+    type_permissions = _decode_entry(entry)
+    for action, ids in additions[person_id][object_type].iteritems():
+      type_permissions[action].update(ids)
+    updated[key] = _encode_entry(type_permissions)
+  failed = cache.cas_multi(updated, time=PERMISSION_CACHE_TIMEOUT)
+  missing = set(keys) - set(entries)
+  _bump(cache, [_user_type_version_key(*keys[key])
+                for key in set(failed or []) | missing])
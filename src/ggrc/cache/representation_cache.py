@@ -0,0 +1,321 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Cache of published object representations.
+
+Serialized JSON of an object is stored under a key built from the object
+type, id, updated_at, the set of published fields and an object stamp:
+
+    repr:<type>:<id>:<updated_at>:<fields digest>:<stamp>
+
+Changes of the object itself change updated_at, so they never hit an old
+entry. Representations also contain data of other objects (e.g. access
+control list, custom attribute values), and changes of those objects do not
+always touch updated_at of the represented object. For that reason every
+object has a random stamp stored under "repr_stamp:<type>:<id>". Flushed
+objects and the objects they belong to get their stamps deleted in
+Cache.update_after_flush, which invalidates all their representations at
+once. A concurrent request can cache a representation of the old data
+between the flush and the commit, so the same stamps are deleted once more
+after the commit, the same way as cache.utils updates memcache before and
+after the commit. Changes of objects that are referenced further away (e.g.
+a renamed person in an access control list) become visible after EXPIRY.
+
+All lookups are done with two multi-get calls: one for stamps and one for
+representations.
+
+The cache does not know anything about permissions. Representations must be
+looked up only for objects that the current user can read, and the
+resulting JSON must be filtered the same way as a freshly published one.
+
+The backend is chosen with settings.REPRESENTATION_CACHE:
+  "local" -- in-process LRU, usable only with a single application process;
+  "memcache" -- AppEngine memcache or any client with the same interface;
+  empty -- the cache is disabled.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import threading
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.orm import interfaces
+
+from ggrc import settings
+from ggrc.utils import GrcEncoder
+
+
+logger = logging.getLogger(__name__)
+
+# Time to live of cached representations, in seconds. It limits the time a
+# representation can stay stale if an invalidation is missed.
+EXPIRY = 3600
+
+# Max number of entries in the in-process LRU backend.
+LOCAL_CACHE_SIZE = 10000
+
+# Max depth of parents invalidated together with a flushed object, e.g.
+# access control people -> access control list -> object.
+PARENT_DEPTH = 2
+
+
+class LocalBackend(object):
+  """In-process LRU backend with the interface of memcache.Client."""
+
+  def __init__(self, size=LOCAL_CACHE_SIZE):
+    self.size = size
+    self.entries = collections.OrderedDict()
+    self.lock = threading.Lock()
+
+  def get_multi(self, keys):
+    """Get {key: value} dict of found keys and mark them recently used."""
+    result = {}
+    with self.lock:
+      for key in keys:
+        if key in self.entries:
+          value = self.entries.pop(key)
+          self.entries[key] = value
+          result[key] = value
+    return result
+
+  def set_multi(self, mapping, time=0):  # pylint: disable=unused-argument
+    """Store all values and evict least recently used ones."""
+    with self.lock:
+      for key, value in mapping.iteritems():
+        self.entries.pop(key, None)
+        self.entries[key] = value
+      while len(self.entries) > self.size:
+        self.entries.popitem(last=False)
+    return []
+
+  def add_multi(self, mapping, time=0):
+    """Store values only for keys that are not in the cache yet."""
+    with self.lock:
+      mapping = {key: value for key, value in mapping.iteritems()
+                 if key not in self.entries}
+    return self.set_multi(mapping, time)
+
+  def delete_multi(self, keys):
+    with self.lock:
+      for key in keys:
+        self.entries.pop(key, None)
+    return True
+
+  def flush_all(self):
+    with self.lock:
+      self.entries.clear()
+    return True
+
+
+_LOCAL_BACKEND = LocalBackend()
+
+
+def get_backend():
+  """Get the configured backend or None if the cache is disabled."""
+  name = getattr(settings, "REPRESENTATION_CACHE", "")
+  if name == "local":
+    return _LOCAL_BACKEND
+  if name == "memcache":
+    from google.appengine.api import memcache
+    return memcache.Client()
+  return None
+
+
+def _stamp_key(type_, id_):
+  return "repr_stamp:{}:{}".format(type_, id_)
+
+
+def get_fields_digest(fields):
+  """Get a short digest of published fields and inclusions."""
+  if not fields:
+    return "all"
+  return hashlib.md5(repr(sorted(fields))).hexdigest()[:16]
+
+
+def _get_stamps(backend, objects):
+  """Get stamps of (type, id) pairs, creating the missing ones."""
+  keys = {obj: _stamp_key(*obj) for obj in objects}
+  found = backend.get_multi(keys.values())
+  missing = {key: uuid.uuid4().hex[:8]
+             for key in keys.itervalues() if key not in found}
+  if missing:
+    backend.add_multi(missing, time=EXPIRY)
+    # Another request could have added the same stamps in the meantime.
+    found.update(backend.get_multi(missing.keys()))
+  return {obj: found.get(key) for obj, key in keys.iteritems()}
+
+
+def _get_keys(backend, entries, digest):
+  """Get representation keys of (type, id, updated_at) entries."""
+  entries = [entry for entry in entries if entry[2] is not None]
+  stamps = _get_stamps(backend, set(entry[:2] for entry in entries))
+  keys = {}
+  for type_, id_, updated_at in entries:
+    stamp = stamps[(type_, id_)]
+    if stamp is None:
+      continue
+    keys[(type_, id_)] = "repr:{}:{}:{}:{}:{}".format(
+        type_, id_, updated_at.isoformat(), digest, stamp)
+  return keys
+
+
+def lookup(backend, entries, digest):
+  """Look up cached representations.
+
+  Args:
+    backend: cache backend.
+    entries: list of (type, id, updated_at) tuples.
+    digest: digest of published fields.
+
+  Returns:
+    tuple of {(type, id): representation} dict of found representations and
+    {(type, id): key} dict of keys for storing the missing ones.
+  """
+  keys = _get_keys(backend, entries, digest)
+  if not keys:
+    return {}, {}
+  found = backend.get_multi(keys.values())
+  result = {}
+  for obj, key in keys.iteritems():
+    if key in found:
+      result[obj] = json.loads(found[key])
+  return result, keys
+
+
+def store(backend, keys, representations):
+  """Store published representations.
+
+  Args:
+    backend: cache backend.
+    keys: {(type, id): key} dict returned by lookup.
+    representations: {(type, id): representation} dict.
+
+  Returns:
+    {(type, id): representation} dict with representations loaded from the
+    stored JSON, so that cached and fresh representations are equal.
+  """
+  mapping = {}
+  result = {}
+  for obj, representation in representations.iteritems():
+    dumped = json.dumps(representation, cls=GrcEncoder)
+    result[obj] = json.loads(dumped)
+    if obj in keys:
+      mapping[keys[obj]] = dumped
+  if mapping:
+    backend.set_multi(mapping, time=EXPIRY)
+  return result
+
+
+def publish_objects(objects, inclusions=(), attribute_whitelist=None):
+  """Publish objects with compiled serializers using the cache.
+
+  Arguments are the same as for ggrc.builder.compiled.publish_objects.
+  Objects must be already filtered by read permissions.
+  """
+  from ggrc.builder import compiled
+  backend = get_backend()
+  if backend is None:
+    return compiled.publish_objects(objects, inclusions, attribute_whitelist)
+
+  digest = get_fields_digest(
+      list(inclusions) + list(attribute_whitelist or []))
+  entries = [(obj.type, obj.id, getattr(obj, "updated_at", None))
+             for obj in objects]
+  cached, keys = lookup(backend, entries, digest)
+  missing = [obj for obj in objects if (obj.type, obj.id) not in cached]
+  if missing:
+    published = compiled.publish_objects(missing, inclusions,
+                                         attribute_whitelist)
+    cached.update(store(backend, keys, {
+        (obj.type, obj.id): representation
+        for obj, representation in zip(missing, published)
+    }))
+  return [cached[(obj.type, obj.id)] for obj in objects]
+
+
+def _get_parents(session, obj):
+  """Get (type, id) pairs of objects that obj belongs to.
+
+  Returns:
+    tuple of a list of (type, id) pairs and a list of parent objects found
+    in the session identity map.
+  """
+  pairs = []
+  loaded = []
+  mapper = sa.inspect(obj).mapper
+  columns = set(mapper.columns.keys())
+  for column in columns:
+    if column.endswith("_type") and column[:-5] + "_id" in columns:
+      type_, id_ = getattr(obj, column), getattr(obj, column[:-5] + "_id")
+      if type_ and id_:
+        pairs.append((type_, id_))
+  for prop in mapper.relationships:
+    if prop.direction is not interfaces.MANYTOONE:
+      continue
+    local_columns = list(prop.local_columns)
+    if len(local_columns) != 1:
+      continue
+    id_ = getattr(
+        obj, mapper.get_property_by_column(local_columns[0]).key, None)
+    if id_ is None:
+      continue
+    parent_mapper = prop.mapper
+    parent = session.identity_map.get(
+        parent_mapper.identity_key_from_primary_key([id_]))
+    if parent is not None:
+      loaded.append(parent)
+      pairs.append((parent.__class__.__name__, id_))
+    elif parent_mapper.polymorphic_on is None:
+      pairs.append((parent_mapper.class_.__name__, id_))
+  return pairs, loaded
+
+
+def get_invalidated_objects(session, objects):
+  """Get (type, id) pairs of objects and their parents."""
+  result = set()
+  level = list(objects)
+  seen = set()
+  for _ in range(PARENT_DEPTH + 1):
+    next_level = []
+    for obj in level:
+      if obj in seen or getattr(obj, "id", None) is None:
+        continue
+      seen.add(obj)
+      result.add((obj.__class__.__name__, obj.id))
+      pairs, loaded = _get_parents(session, obj)
+      result.update(pairs)
+      next_level.extend(loaded)
+    level = next_level
+  return result
+
+
+def drop_stamps(pairs):
+  """Drop stamps of (type, id) pairs."""
+  backend = get_backend()
+  if backend is None or not pairs:
+    return
+  keys = [_stamp_key(type_, id_) for type_, id_ in pairs]
+  if not backend.delete_multi(keys):
+    logger.error("Failed to invalidate %s cached representations", len(keys))
+
+
+def invalidate(session, objects):
+  """Drop stamps of flushed objects and their parents.
+
+  Returns:
+    set of invalidated (type, id) pairs, which must be invalidated again with
+    drop_stamps after the commit.
+  """
+  if get_backend() is None or not objects:
+    return set()
+  pairs = get_invalidated_objects(session, objects)
+  drop_stamps(pairs)
+  return pairs
+
+
+def clear():
+  """Drop all cached representations from the local backend."""
+  _LOCAL_BACKEND.flush_all()
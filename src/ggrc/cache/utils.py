@@ -9,7 +9,7 @@ import flask
 
 from ggrc import cache
 import ggrc.models
-from ggrc.utils.memcache import blob_get_chunk_keys
+from ggrc.cache import permissions_cache
 from ggrc.cache.memcache import has_memcache
 
 
@@ -191,7 +191,6 @@ def update_memcache_after_commit(context):
     if delete_result is not True:
       logger.error("CACHE: Failed to remove status entries from cache")
 
-  clear_permission_cache()
   cache_manager.clear_cache()
 
 
@@ -216,15 +215,7 @@ def clear_permission_cache():
     return
 
   client = get_cache_manager().cache_object.memcache_client
-
-  # We delete all the cached user permissions as well as
-  # the permissions:list value itself
-  keys_to_delete = list('permissions:list')
-  for user_key in client.get('permissions:list') or set():
-    keys_to_delete.append(user_key)
-    keys_to_delete.extend(blob_get_chunk_keys(client, user_key))
-
-  client.delete_multi(keys_to_delete)
+  permissions_cache.bump_global_version(client)
 
 
 def clear_users_permission_cache(user_ids):
@@ -233,18 +224,7 @@ def clear_users_permission_cache(user_ids):
     return
 
   client = get_cache_manager().cache_object.memcache_client
-
-  keys_to_delete = list()
-  cached_keys_set = client.get('permissions:list') or set()
-  for user_id in user_ids:
-    key = 'permissions:{}'.format(user_id)
-    if key in cached_keys_set:
-      cached_keys_set.remove(key)
-      keys_to_delete.append(key)
-      keys_to_delete.extend(blob_get_chunk_keys(client, key))
-
-  client.set('permissions:list', cached_keys_set)
-  client.delete_multi(keys_to_delete)
+  permissions_cache.bump_user_versions(client, user_ids)
 
 
 def clear_memcache():
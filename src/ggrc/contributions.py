@@ -3,8 +3,10 @@
 
 """Lists of ggrc contributions."""
 
+from ggrc.fulltext import indexing_queue
 from ggrc.integrations import synchronization_jobs
 from ggrc.models import import_export
+from ggrc.models import person_counters
 from ggrc.notifications import common
 from ggrc.notifications import fast_digest
 from ggrc.notifications import notification_handlers
@@ -16,6 +18,7 @@ NIGHTLY_CRON_JOBS = [
     common.send_daily_digest_notifications,
     common.send_calendar_events,
     import_export.clear_overtimed_tasks,
+    person_counters.reconcile,
 ]
 
 HOURLY_CRON_JOBS = [
@@ -35,6 +38,10 @@ IMPORT_EXPORT_JOBS = [
     import_export_notifications.check_import_export_jobs,
 ]
 
+INDEXING_QUEUE_JOBS = [
+    indexing_queue.schedule_stale_drain,
+]
+
 
 def contributed_notifications():
   """Get handler functions for ggrc notification file types."""
@@ -19,6 +19,7 @@ from ggrc.converters import base_block
 from ggrc.converters.snapshot_block import SnapshotBlockConverter
 from ggrc.converters.import_helper import extract_relevant_data
 from ggrc.converters.import_helper import split_blocks
+from ggrc.converters.import_helper import CsvChunkedBuilder
 from ggrc.converters.import_helper import CsvStringBuilder
 from ggrc.fulltext import get_indexer
 
@@ -188,28 +189,51 @@ class ExportConverter(BaseConverter):
       except ValueError:
         return ""
 
-  def build_csv_from_row_data(self):
-    """Export each block separated by empty lines."""
+  def stream_csv_data(self, write_chunk, chunk_size):
+    """Export csv data passing it to write_chunk in parts.
+
+    Args:
+      write_chunk: callable that receives every part of the csv file.
+      chunk_size: approximate size of a single part in bytes.
+    """
+    with benchmark("Initialize block converters."):
+      self.initialize_block_converters()
+    with benchmark("Stream csv data."):
+      try:
+        csv_builder = CsvChunkedBuilder(self._get_table_width(),
+                                        write_chunk, chunk_size)
+      except ValueError:
+        return
+      self._write_csv(csv_builder)
+      csv_builder.flush()
+
+  def _get_table_width(self):
+    """Get width of the csv table including the 'Object type' column."""
     table_width = max([converter.block_width
                        for converter in self.block_converters])
-    table_width += 1  # One line for 'Object line' column
+    return table_width + 1  # One line for 'Object line' column
 
-    csv_string_builder = CsvStringBuilder(table_width)
+  def _write_csv(self, csv_builder):
+    """Write each block separated by empty lines to the csv builder."""
     for block_converter in self.block_converters:
       csv_header = block_converter.generate_csv_header()
       csv_header[0].insert(0, "Object type")
       csv_header[1].insert(0, block_converter.name)
 
-      csv_string_builder.append_line(csv_header[0])
-      csv_string_builder.append_line(csv_header[1])
+      csv_builder.append_line(csv_header[0])
+      csv_builder.append_line(csv_header[1])
 
       for line in block_converter.generate_row_data():
         line.insert(0, "")
-        csv_string_builder.append_line(line)
+        csv_builder.append_line(line)
 
-      csv_string_builder.append_line([])
-      csv_string_builder.append_line([])
+      csv_builder.append_line([])
+      csv_builder.append_line([])
 
+  def build_csv_from_row_data(self):
+    """Export each block separated by empty lines."""
+    csv_string_builder = CsvStringBuilder(self._get_table_width())
+    self._write_csv(csv_string_builder)
     return csv_string_builder.get_csv_string()
 
   def _get_exportable_queries(self):
@@ -20,14 +20,19 @@ from flask import _app_ctx_stack
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
+from ggrc.cache import cad_registry
 from ggrc.models import reflection
 from ggrc.rbac import permissions
 from ggrc.utils import benchmark
+from ggrc.utils import html_cleaner
+from ggrc.utils import iter_chunks
 from ggrc.utils import structures
 from ggrc.utils import list_chunks
 from ggrc.converters import errors
 from ggrc.converters import get_shared_unique_rules
 from ggrc.converters import base_row
+from ggrc.converters.handlers import handlers
 from ggrc.converters.import_helper import get_column_order
 from ggrc.converters.import_helper import get_object_column_definitions
 from ggrc.models.mixins import issue_tracker as issue_tracker_mixins
@@ -125,17 +130,25 @@ class BlockConverter(object):
     cad = models.CustomAttributeDefinition
     gca_prefix = reflection.AttributeInfo.CUSTOM_ATTR_PREFIX
     lca_prefix = reflection.AttributeInfo.OBJECT_CUSTOM_ATTR_PREFIX
-    defs = cad.eager_query().filter(
+    titles = {
+        v["attr_name"]
+        for k, v in self.headers.items()
+        if k.startswith(gca_prefix) or k.startswith(lca_prefix)
+    }
+    # Global definitions are shared by all blocks of the type, see
+    # ggrc.cache.cad_registry.
+    defs = [
+        d for d in cad_registry.get_session_cads(self.table_singular)
+        if d.mandatory or d.title in titles
+    ]
+    defs.extend(cad.eager_query().filter(
         cad.definition_type == self.table_singular,
+        cad.definition_id.isnot(None),
         sa.or_(
             cad.mandatory,
-            cad.title.in_(
-                v["attr_name"]
-                for k, v in self.headers.items()
-                if k.startswith(gca_prefix) or k.startswith(lca_prefix)
-            ),
+            cad.title.in_(titles),
         ),
-    )
+    ))
     return {(d.definition_id, d.title): d for d in defs}
 
   def get_ca_definitions_cache(self):
@@ -349,8 +362,19 @@ class BlockConverter(object):
     return header
 
 
+def _rollback_savepoint(savepoint):
+  """Rollback savepoint if it was not already reverted during processing."""
+  if db.session.transaction is savepoint:
+    db.session.rollback()
+
+
 class ImportBlockConverter(BlockConverter):
   """Import block processing functionality."""
+
+  # Audit import creates snapshots with a separate event on every flush, so
+  # such rows are still committed one by one.
+  PER_ROW_IMPORT_CLASSES = (models.Audit,)
+
   def __init__(self, converter, object_class, rows, raw_headers,
                offset, class_name, csv_lines):
     # pylint: disable=too-many-arguments
@@ -423,22 +447,41 @@ class ImportBlockConverter(BlockConverter):
         k for k in self.headers if k not in self.converter.priority_columns
     ]
 
+  @property
+  def batch_size(self):
+    """Number of rows committed together in a single transaction."""
+    if self.object_class in self.PER_ROW_IMPORT_CLASSES:
+      return 1
+    return max(getattr(settings, "IMPORT_BATCH_SIZE", 1), 1)
+
+  def sanitize_html_columns(self):
+    """Sanitize HTML of text columns of all rows in a single batch.
+
+    Sanitized values are memoized by html_cleaner, so the sanitization hooks
+    do not run bleach again when the parsed values are set on objects.
+    """
+    sanitized_attrs = set(reflection.AttributeInfo.gather_attrs(
+        self.object_class, "_sanitize_html"))
+    values = []
+    for idx, (attr_name, header_dict) in enumerate(self.headers.iteritems()):
+      handler = header_dict["handler"]
+      if (attr_name not in sanitized_attrs or
+              not issubclass(handler, handlers.TextColumnHandler)):
+        continue
+      values.extend(handler.clean_whitespaces(row[idx].strip())
+                    for row in self.rows if len(row) > idx)
+    with benchmark("Sanitize HTML of %s values" % len(values)):
+      html_cleaner.clean_values(values)
+
   def import_csv_data(self):
     """Perform import sequence for the block."""
     try:
-      for row in self.row_converters_from_csv():
-        try:
-          row.process_row()
-        except ReservedNameError:
-          db.session.rollback()
-          row.add_error(errors.DUPLICATE_CAD_NAME)
-          logger.exception(errors.DUPLICATE_CAD_NAME)
-        except Exception:  # pylint: disable=broad-except
-          db.session.rollback()
-          row.add_error(errors.UNKNOWN_ERROR)
-          logger.exception("Unexpected error on import")
-        self._update_info(row)
-        _app_ctx_stack.top.sqlalchemy_queries = []
+      if not self.ignore:
+        self.sanitize_html_columns()
+      if self.batch_size > 1:
+        self._import_rows_in_batches(self.batch_size)
+      else:
+        self._import_rows()
     except Exception:  # pylint: disable=broad-except
       logger.exception("Unexpected error on import")
     finally:
@@ -447,6 +490,63 @@ class ImportBlockConverter(BlockConverter):
       if is_final_commit_required:
         db.session.commit()
 
+  def _import_rows(self):
+    """Process and commit rows one by one."""
+    for row in self.row_converters_from_csv():
+      try:
+        row.process_row()
+      except ReservedNameError:
+        db.session.rollback()
+        row.add_error(errors.DUPLICATE_CAD_NAME)
+        logger.exception(errors.DUPLICATE_CAD_NAME)
+      except Exception:  # pylint: disable=broad-except
+        db.session.rollback()
+        row.add_error(errors.UNKNOWN_ERROR)
+        logger.exception("Unexpected error on import")
+      self._update_info(row)
+      _app_ctx_stack.top.sqlalchemy_queries = []
+
+  def _import_rows_in_batches(self, batch_size):
+    """Process rows in batches committed in a single transaction.
+
+    Every row is processed inside its own savepoint, so a failed row is rolled
+    back without losing other rows of the batch. ACL entries of all rows of a
+    batch are propagated once after the batch is committed.
+    """
+    rows = self.row_converters_from_csv()
+    for rows_chunk in iter_chunks(rows, chunk_size=batch_size):
+      batch = []
+      for row in rows_chunk:
+        self._process_row_in_savepoint(row)
+        batch.append(row)
+        _app_ctx_stack.top.sqlalchemy_queries = []
+      if not batch:
+        return
+      with benchmark("Commit import batch of %s rows" % len(batch)):
+        base_row.commit_rows(self, batch, propagate_acl=True)
+      for row in batch:
+        self._update_info(row)
+
+  @staticmethod
+  def _process_row_in_savepoint(row):
+    """Process row without committing it and release or revert savepoint."""
+    savepoint = db.session.begin_nested()
+    try:
+      row.process_row(commit=False)
+    except ReservedNameError:
+      _rollback_savepoint(savepoint)
+      row.add_error(errors.DUPLICATE_CAD_NAME)
+      logger.exception(errors.DUPLICATE_CAD_NAME)
+    except Exception:  # pylint: disable=broad-except
+      _rollback_savepoint(savepoint)
+      row.add_error(errors.UNKNOWN_ERROR)
+      logger.exception("Unexpected error on import")
+    else:
+      if row.ignore:
+        _rollback_savepoint(savepoint)
+      elif db.session.transaction is savepoint:
+        db.session.plain_commit()
+
   def get_unique_values_dict(self, object_class):
     """Get the varible to storing row numbers for unique values.
 
@@ -246,8 +246,13 @@ class ImportRowConverter(RowConverter):
       logger.exception("Import failed with: %s", err.message)
       self.add_error(errors.UNKNOWN_ERROR)
 
-  def process_row(self):
-    """Parse, set, validate and commit data specified in self.row."""
+  def process_row(self, commit=True):
+    """Parse, set, validate and commit data specified in self.row.
+
+    Args:
+      commit: if False, the row data is only flushed and should be committed
+        later with commit_rows together with other rows of the batch.
+    """
     self._handle_raw_data()
     self._check_mandatory_fields()
     if self.ignore:
@@ -265,7 +270,8 @@ class ImportRowConverter(RowConverter):
       return
     self.flush_object()
     self.setup_secondary_objects()
-    self.commit_object()
+    if commit:
+      self.commit_object()
 
   def _check_object(self):
     """Check object if it has any pre commit checks.
@@ -325,37 +331,17 @@ class ImportRowConverter(RowConverter):
 
     This method also calls pre-and post-commit signals and handles failures.
     """
-    if self.block_converter.converter.dry_run or self.ignore:
-      return
+    commit_rows(self.block_converter, [self])
+
+  def handle_before_commit_signals(self, event=None):
+    """Send before commit signals and turn validation errors to row errors."""
     try:
-      if not self.is_new:
-        cache.Cache.add_to_cache(self.obj)
-      modified_objects = get_modified_objects(db.session)
-      import_event = log_event(db.session, None)
-      cache_utils.update_memcache_before_commit(
-          self.block_converter,
-          modified_objects,
-          self.block_converter.CACHE_EXPIRY_IMPORT,
-      )
-      try:
-        self.send_before_commit_signals(import_event)
-      except StatusValidationError as exp:
-        status_alias = self.headers.get("status", {}).get("display_name")
-        self.add_error(errors.VALIDATION_ERROR,
-                       column_name=status_alias,
-                       message=exp.message)
-      db.session.commit_hooks_enable_flag.disable()
-      db.session.commit()
-      self.block_converter.store_revision_ids(import_event)
-      cache_utils.update_memcache_after_commit(self.block_converter)
-      update_snapshot_index(modified_objects)
-    except exc.SQLAlchemyError as err:
-      db.session.rollback()
-      logger.exception("Import failed with: %s", err.message)
-      self.block_converter.add_errors(errors.UNKNOWN_ERROR,
-                                      line=self.offset + 2)
-    else:
-      self.send_post_commit_signals(event=import_event)
+      self.send_before_commit_signals(event)
+    except StatusValidationError as exp:
+      status_alias = self.headers.get("status", {}).get("display_name")
+      self.add_error(errors.VALIDATION_ERROR,
+                     column_name=status_alias,
+                     message=exp.message)
 
   def _setup_object(self):
     """ Set the object values or relate object values
@@ -464,6 +450,71 @@ class ImportRowConverter(RowConverter):
       )
 
 
+def _prepare_rows_commit(block_converter, rows):
+  """Log the import event and update memcache before committing rows.
+
+  Returns:
+    tuple of the modified objects and the import event.
+  """
+  for row in rows:
+    if not row.is_new:
+      cache.Cache.add_to_cache(row.obj)
+  modified_objects = get_modified_objects(db.session)
+  import_event = log_event(db.session, None)
+  cache_utils.update_memcache_before_commit(
+      block_converter,
+      modified_objects,
+      block_converter.CACHE_EXPIRY_IMPORT,
+  )
+  for row in rows:
+    row.handle_before_commit_signals(import_event)
+  return modified_objects, import_event
+
+
+def commit_rows(block_converter, rows, propagate_acl=False):
+  """Commit processed rows of an import block in a single transaction.
+
+  All rows share one import event, memcache update and snapshot index update.
+  If the commit fails, every committed row gets an error.
+
+  Commit hooks are disabled for the commit, so ACL entries and relationships
+  collected on flushes of the rows are propagated by the final commit of the
+  block, unless propagate_acl is set. ACL propagation commits its own
+  changes, so it runs after the commit of the rows.
+
+  Args:
+    block_converter: ImportBlockConverter that the rows belong to.
+    rows: list of ImportRowConverter objects which were processed without
+      committing.
+    propagate_acl: propagate ACL of the committed rows right after the
+      commit.
+  """
+  if block_converter.converter.dry_run:
+    return
+  rows = [row for row in rows if not row.ignore]
+  if not rows:
+    return
+  try:
+    modified_objects, import_event = _prepare_rows_commit(block_converter,
+                                                          rows)
+    db.session.commit_hooks_enable_flag.disable()
+    db.session.commit()
+    block_converter.store_revision_ids(import_event)
+    cache_utils.update_memcache_after_commit(block_converter)
+    update_snapshot_index(modified_objects)
+  except exc.SQLAlchemyError as err:
+    db.session.rollback()
+    logger.exception("Import failed with: %s", err.message)
+    for row in rows:
+      row.add_error(errors.UNKNOWN_ERROR)
+  else:
+    for row in rows:
+      row.send_post_commit_signals(event=import_event)
+    if propagate_acl:
+      from ggrc.models.hooks import acl
+      acl.after_commit()
+
+
 class ExportRowConverter(RowConverter):
   """Class for handling row data for export"""
   def __init__(self, block_converter, object_class, headers, **options):
@@ -278,3 +278,31 @@ class CsvStringBuilder(object):
   def get_csv_string(self):
     """Returns CSV string from buffer."""
     return self.output_buffer.getvalue()
+
+
+class CsvChunkedBuilder(CsvStringBuilder):
+  """CSV builder that passes the buffer content to a callback in chunks.
+
+  The buffer is flushed as soon as it grows over chunk_size bytes, so only a
+  single chunk of the CSV file is kept in memory. Chunks always end on a line
+  boundary.
+  """
+
+  def __init__(self, table_width, write_chunk, chunk_size):
+    super(CsvChunkedBuilder, self).__init__(table_width)
+    self.write_chunk = write_chunk
+    self.chunk_size = chunk_size
+
+  def append_line(self, line):
+    """Append line to CSV buffer and flush the buffer if it is full."""
+    super(CsvChunkedBuilder, self).append_line(line)
+    if self.output_buffer.tell() >= self.chunk_size:
+      self.flush()
+
+  def flush(self):
+    """Pass buffered data to write_chunk and start a new buffer."""
+    content = self.output_buffer.getvalue()
+    if content:
+      self.write_chunk(content)
+    self.output_buffer = StringIO()
+    self.csv_writer = csv.writer(self.output_buffer)
@@ -25,7 +25,8 @@ import sqlalchemy as sa
 from ggrc import db
 from ggrc import login
 from ggrc import utils
-from ggrc.utils import revisions as revision_utils, helpers
+from ggrc.fulltext import tokens
+from ggrc.utils import helpers
 from ggrc.utils import benchmark
 from ggrc.models import all_models as models
 
@@ -562,19 +563,41 @@ def store_data(attributes_data, index_data):
     db.session.execute(ATTRIBUTE_REPLACE_STATEMENT, attributes_data)
   if index_data:
     db.session.execute(INDEX_REPLACE_STATEMENT, index_data)
+    tokens.insert_postings(index_data)
   db.session.commit()
 
 
+def _get_latest_revision_ids_chunks(aggregate_type):
+  """Yield chunks of latest revision ids for all objects of a type.
+
+  Objects are split into id ranges, so that the latest revisions are looked
+  up for a bounded number of objects at once.
+  """
+  model = getattr(models, aggregate_type)
+  query = db.session.query(model.id)
+  for chunk in utils.generate_query_chunks(query, chunk_size=CA_CHUNK_SIZE):
+    object_ids = [object_id for object_id, in chunk]
+    if not object_ids:
+      continue
+    rows = db.session.query(
+        sa.func.max(models.Revision.id),
+    ).filter(
+        models.Revision.resource_type == aggregate_type,
+        models.Revision.resource_id.in_(object_ids),
+    ).group_by(
+        models.Revision.resource_id,
+    )
+    yield [revision_id for revision_id, in rows]
+
+
 def get_all_latest_revisions_ids():
-  """Get latest revisions for aggregate objects."""
-  with benchmark("Get all latest revision ids"):
-    attributes = get_computed_attributes()
-    revision_ids = []
-    for attribute in attributes:
-      aggregate_type = get_aggregate_type(attribute)
-      revisions = revision_utils.get_revisions_by_type(aggregate_type)
-      revision_ids.extend(revisions.values())
-    return revision_ids
+  """Yield chunks of latest revision ids for aggregate objects."""
+  attributes = get_computed_attributes()
+  aggregate_types = {get_aggregate_type(attribute)
+                     for attribute in attributes}
+  for aggregate_type in sorted(aggregate_types):
+    for ids_chunk in _get_latest_revision_ids_chunks(aggregate_type):
+      yield ids_chunk
 
 
 def delete_all_computed_values():
@@ -640,8 +663,12 @@ def compute_attributes(revision_ids):
   with benchmark("Compute attributes"):
 
     if revision_ids == "all_latest":
-      with benchmark("Get all latest revisions ids"):
-        revision_ids = get_all_latest_revisions_ids()
+      handled_ids = 0
+      for ids_chunk in get_all_latest_revisions_ids():
+        handled_ids += len(ids_chunk)
+        logger.info("Revision: %s", handled_ids)
+        recompute_attrs_for_revisions(ids_chunk)
+      return
 
     if not revision_ids:
       return
@@ -0,0 +1,295 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Coalescing queue of objects waiting for full text indexing.
+
+Requests that change indexed objects add them to the fulltext_dirty_objects
+table instead of creating an indexing task each. An object is stored once no
+matter how many requests changed it, and keeps the time it was enqueued
+first.
+
+A drain task is scheduled only by the request that takes the drain lease
+stored in fulltext_drain_state, so a burst of requests is handled by a
+single task. The lease is taken after the enqueued objects are committed.
+A drain that finds the queue empty releases the lease and checks the queue
+once more, so objects committed while the lease was held are never left
+without a drain.
+
+The task claims the oldest objects in big batches and reindexes them until
+the queue is empty. Claimed objects stay in the queue with a claim lease and
+are deleted in the transaction that commits their index records, so objects
+of a killed task are claimed again after LEASE_SECONDS. Objects enqueued
+again while they are claimed lose the claim and are reindexed once more.
+
+A cron job schedules a drain task for objects that are left in the queue for
+longer than STALE_SECONDS, e.g. after a failed task.
+"""
+
+import datetime
+import logging
+import uuid
+
+import flask
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.fulltext import listeners
+from ggrc.utils import benchmark
+
+
+logger = logging.getLogger(__name__)
+
+# Number of objects claimed from the queue at once.
+DRAIN_BATCH_SIZE = 1000
+
+# Number of objects reindexed by a single bulk_record_update_for call.
+REINDEX_CHUNK_SIZE = 100
+
+# Age of the oldest queued object after which the cron job schedules a drain.
+STALE_SECONDS = 300
+
+# Time after which claimed objects and the drain lease of a task that stopped
+# working are taken over. It must be longer than reindex of a single batch.
+LEASE_SECONDS = 600
+
+# Id of the single row of fulltext_drain_state.
+DRAIN_STATE_ID = 1
+
+ENQUEUE_QUERY = sa.text("""
+    INSERT INTO fulltext_dirty_objects (object_type, object_id, enqueued_at)
+    VALUES (:object_type, :object_id, :enqueued_at)
+    ON DUPLICATE KEY UPDATE claim_id = NULL, claimed_until = NULL
+""")
+
+
+# pylint: disable=too-few-public-methods
+class DirtyObject(db.Model):
+  """Db model for an object waiting for full text indexing."""
+  __tablename__ = "fulltext_dirty_objects"
+
+  object_type = db.Column(db.String(250), primary_key=True)
+  object_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  enqueued_at = db.Column(db.DateTime, nullable=False)
+  claim_id = db.Column(db.String(32), nullable=True)
+  claimed_until = db.Column(db.DateTime, nullable=True)
+
+  __table_args__ = (
+      db.Index("ix_fulltext_dirty_objects_enqueued_at", "enqueued_at"),
+  )
+
+
+class DrainState(db.Model):
+  """Db model for the lease of the task that drains the queue."""
+  __tablename__ = "fulltext_drain_state"
+
+  id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  leased_until = db.Column(db.DateTime, nullable=True)
+
+
+def _now():
+  return datetime.datetime.utcnow()
+
+
+def _lease_end(now):
+  return now + datetime.timedelta(seconds=LEASE_SECONDS)
+
+
+def _claimable(now):
+  """Filter for queued objects that are not claimed by a working drain."""
+  table = DirtyObject.__table__
+  return sa.or_(table.c.claim_id.is_(None), table.c.claimed_until < now)
+
+
+def has_claimable():
+  """Check if there are queued objects that can be claimed."""
+  return db.session.query(
+      sa.exists().where(_claimable(_now()))
+  ).scalar()
+
+
+def enqueue(model_ids):
+  """Add objects to the queue.
+
+  The objects are visible to drains when the session is committed, after
+  that acquire_drain tells if a drain task must be scheduled.
+
+  Args:
+    model_ids: {type name: set of ids} dict of objects to reindex.
+  """
+  now = _now()
+  # Sorted rows are locked in the same order by concurrent requests.
+  rows = [
+      {"object_type": object_type, "object_id": object_id, "enqueued_at": now}
+      for object_type, ids in sorted(model_ids.iteritems())
+      for object_id in sorted(ids)
+  ]
+  if rows:
+    db.session.execute(ENQUEUE_QUERY, rows)
+
+
+def acquire_drain():
+  """Take the drain lease if no drain task is scheduled or working.
+
+  The lease is taken in its own transaction.
+
+  Returns:
+    True if the lease is taken and a drain task must be scheduled.
+  """
+  now = _now()
+  table = DrainState.__table__
+  result = db.session.execute(table.update().where(sa.and_(
+      table.c.id == DRAIN_STATE_ID,
+      sa.or_(table.c.leased_until.is_(None), table.c.leased_until < now),
+  )).values(leased_until=_lease_end(now)))
+  if result.rowcount == 0:
+    # The state row is created on first use.
+    result = db.session.execute(table.insert().prefix_with("IGNORE"), {
+        "id": DRAIN_STATE_ID,
+        "leased_until": _lease_end(now),
+    })
+  db.session.plain_commit()
+  return result.rowcount == 1
+
+
+def _set_drain_lease(leased_until):
+  table = DrainState.__table__
+  db.session.execute(table.update().where(
+      table.c.id == DRAIN_STATE_ID,
+  ).values(leased_until=leased_until))
+
+
+def _claim_batch(claim_id, batch_size):
+  """Claim the oldest objects of the queue and extend the drain lease.
+
+  Returns:
+    {type name: set of ids} dict of claimed objects.
+  """
+  now = _now()
+  table = DirtyObject.__table__
+  rows = db.session.execute(
+      sa.select([
+          table.c.object_type,
+          table.c.object_id,
+      ]).where(
+          _claimable(now),
+      ).order_by(
+          table.c.enqueued_at,
+      ).limit(
+          batch_size,
+      ).with_for_update()
+  ).fetchall()
+  if rows:
+    db.session.execute(table.update().where(
+        sa.tuple_(table.c.object_type, table.c.object_id).in_(
+            [tuple(row) for row in rows]
+        )
+    ).values(claim_id=claim_id, claimed_until=_lease_end(now)))
+    _set_drain_lease(_lease_end(now))
+  db.session.plain_commit()
+  model_ids = {}
+  for object_type, object_id in rows:
+    model_ids.setdefault(object_type, set()).add(object_id)
+  return model_ids
+
+
+def _delete_claimed(claim_id):
+  table = DirtyObject.__table__
+  db.session.execute(table.delete().where(table.c.claim_id == claim_id))
+
+
+def _release_claimed(claim_id):
+  table = DirtyObject.__table__
+  db.session.execute(table.update().where(
+      table.c.claim_id == claim_id,
+  ).values(claim_id=None, claimed_until=None))
+
+
+def _finish_drain():
+  """Release the drain lease.
+
+  Returns:
+    True if objects were committed while the lease was held and the drain
+    must go on.
+  """
+  _set_drain_lease(None)
+  db.session.plain_commit()
+  return has_claimable() and acquire_drain()
+
+
+def drain(batch_size=DRAIN_BATCH_SIZE):
+  """Reindex queued objects until the queue is empty.
+
+  Claimed objects are released if their reindex fails.
+
+  Returns:
+    number of reindexed objects.
+  """
+  handled = 0
+  while True:
+    claim_id = uuid.uuid4().hex
+    model_ids = _claim_batch(claim_id, batch_size)
+    if not model_ids:
+      if _finish_drain():
+        continue
+      return handled
+    count = sum(len(ids) for ids in model_ids.itervalues())
+    try:
+      with benchmark("Reindex %s queued objects" % count):
+        listeners.update_ft_records(
+            {object_type: set(ids) for object_type, ids
+             in model_ids.iteritems()},
+            REINDEX_CHUNK_SIZE,
+        )
+        _delete_claimed(claim_id)
+        db.session.plain_commit()
+    except Exception:
+      db.session.rollback()
+      _release_claimed(claim_id)
+      _set_drain_lease(None)
+      db.session.plain_commit()
+      raise
+    handled += count
+    logger.info("Indexing queue: reindexed %s objects, %s", handled,
+                get_metrics())
+
+
+def get_metrics():
+  """Get queue depth and lag.
+
+  Returns:
+    dict with the number of queued objects and the age of the oldest one in
+    seconds.
+  """
+  depth, oldest = db.session.query(
+      sa.func.count(),
+      sa.func.min(DirtyObject.enqueued_at),
+  ).one()
+  lag = 0
+  if oldest is not None:
+    lag = max(0, (datetime.datetime.utcnow() - oldest).total_seconds())
+  return {"depth": depth, "lag_seconds": lag}
+
+
+def schedule_drain():
+  """Create a background task that drains the queue."""
+  from ggrc.models import background_task
+  from ggrc.views import bg_update_ft_records
+  return background_task.create_task(
+      name="indexing",
+      url=flask.url_for(bg_update_ft_records.__name__),
+      queued_callback=bg_update_ft_records,
+  )
+
+
+def schedule_stale_drain():
+  """Schedule a drain task if unclaimed objects wait for too long."""
+  now = _now()
+  oldest = db.session.query(
+      sa.func.min(DirtyObject.enqueued_at),
+  ).filter(
+      _claimable(now),
+  ).scalar()
+  if oldest is None or (now - oldest).total_seconds() < STALE_SECONDS:
+    return
+  schedule_drain()
+  db.session.commit()
@@ -10,6 +10,7 @@ from ggrc import db
 
 from ggrc import fulltext
 from ggrc import utils
+from ggrc.fulltext import tokens
 from ggrc.models.reflection import AttributeInfo
 
 
@@ -54,6 +55,7 @@ class Indexed(object):
       if not values:
         return
       db.session.execute(query, values)
+      tokens.insert_postings(values)
 
   @classmethod
   def get_delete_query_for(cls, ids):
@@ -76,6 +78,7 @@ class Indexed(object):
               fulltext_record_properties.key IN :obj_ids
     """
     db.session.execute(query, {"obj_type": cls.__name__, "obj_ids": ids})
+    tokens.delete_postings(cls.__name__, ids)
 
   @classmethod
   def bulk_record_update_for(cls, ids):
@@ -11,6 +11,7 @@ from sqlalchemy.sql.expression import select
 from sqlalchemy import event
 
 from ggrc import db
+from ggrc.fulltext import tokens
 from ggrc.fulltext.sql import SqlIndexer
 from ggrc.fulltext.mixin import Indexed
 from ggrc.models import all_models, get_model
@@ -85,7 +86,34 @@ class MysqlIndexer(SqlIndexer):
 
     if not terms:
       return whitelist
-    return sa.and_(whitelist, MysqlRecordProperty.content.contains(terms))
+    content_filter = MysqlRecordProperty.content.contains(terms)
+    candidates_filter = cls.get_candidates_filter(terms, model, attr_names)
+    if candidates_filter is None:
+      return sa.and_(whitelist, content_filter)
+    return sa.and_(whitelist, candidates_filter, content_filter)
+
+  @staticmethod
+  def get_candidates_filter(terms, model, properties=None):
+    """Get the filter for records of objects that can contain terms.
+
+    The filter is based on trigram postings, so it is only a prefilter and has
+    to be combined with the content filter.
+
+    Args:
+      terms: string to search in fulltext attributes
+      model: searched model
+      properties: optional list of property names to search in
+    Return:
+      sqlalchemy filter or None if postings can not be used for this search.
+    """
+    if not tokens.search_enabled() or not issubclass(model, Indexed):
+      return None
+    query_tokens = tokens.get_query_tokens(terms)
+    if query_tokens is None:
+      return None
+    return MysqlRecordProperty.key.in_(
+        tokens.get_candidates_query(query_tokens, model.__name__, properties)
+    )
 
   @staticmethod
   def get_permissions_query(model_names, permission_type='read'):
@@ -439,6 +467,36 @@ class MysqlIndexer(SqlIndexer):
 
     return db.session.execute(query)
 
+  def create_record(self, instance, commit=True):
+    """Create records and their token postings in db."""
+    records = list(self.records_generator(instance))
+    tokens.insert_postings(records)
+    self.add_records(records, commit=commit)
+
+  def delete_record(self, key, type, commit=True):
+    """Delete records and token postings for specific object."""
+    # pylint: disable=redefined-builtin
+    tokens.delete_postings(type, [key])
+    super(MysqlIndexer, self).delete_record(key, type, commit=commit)
+
+  def delete_records_by_ids(self, type, keys, commit=True):
+    """Delete records and token postings related to type and keys."""
+    # pylint: disable=redefined-builtin
+    if keys:
+      tokens.delete_postings(type, list(keys))
+    super(MysqlIndexer, self).delete_records_by_ids(type, keys, commit=commit)
+
+  def delete_all_records(self, commit=True):
+    """Clear index and token postings tables."""
+    tokens.delete_postings(None)
+    super(MysqlIndexer, self).delete_all_records(commit=commit)
+
+  def delete_records_by_type(self, type, commit=True):
+    """Delete index records and token postings for selected type."""
+    # pylint: disable=redefined-builtin
+    tokens.delete_postings(type)
+    super(MysqlIndexer, self).delete_records_by_type(type, commit=commit)
+
 
 Indexer = MysqlIndexer
 
@@ -0,0 +1,266 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Parallel and resumable full text reindex.
+
+A reindex job is split into work units, each of them covering an id range of
+a single indexed model. Units are stored in the reindex_checkpoints table and
+marked as done as soon as their records are committed, so a job that was
+interrupted continues with the remaining units on the next run.
+
+Units are handled by a pool of worker processes if REINDEX_PROCESSES setting
+is greater than one, otherwise they are handled in the current process.
+"""
+
+import datetime
+import logging
+import multiprocessing
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import fulltext
+from ggrc import models
+from ggrc import settings
+from ggrc import utils
+from ggrc.fulltext import mixin
+from ggrc.utils import benchmark
+
+
+logger = logging.getLogger(__name__)
+
+REINDEX_CHUNK_SIZE = 100
+
+# Number of reindex chunks handled by a single work unit.
+UNIT_CHUNKS = 50
+
+SNAPSHOT_TYPE = "Snapshot"
+
+REINDEX_JOB = "reindex"
+FULL_REINDEX_JOB = "full_reindex"
+
+
+# pylint: disable=too-few-public-methods
+class ReindexCheckpoint(db.Model):
+  """Db model for a single work unit of a reindex job."""
+  __tablename__ = 'reindex_checkpoints'
+
+  id = db.Column(db.Integer, primary_key=True)
+  job_name = db.Column(db.String(250), nullable=False)
+  object_type = db.Column(db.String(64), nullable=False)
+  min_id = db.Column(db.Integer, nullable=False)
+  max_id = db.Column(db.Integer, nullable=False)
+  count = db.Column(db.Integer, nullable=False, default=0)
+  done = db.Column(db.Boolean, nullable=False, default=False)
+  created_at = db.Column(db.DateTime, nullable=False)
+  updated_at = db.Column(db.DateTime, nullable=False)
+
+  __table_args__ = (
+      db.Index('ix_reindex_checkpoints_job_name_done', 'job_name', 'done'),
+  )
+
+
+def get_indexed_models():
+  """Get dict of models that take part in the global reindex."""
+  return {
+      m.__name__: m for m in models.all_models.all_models
+      if issubclass(m, mixin.Indexed) and m.REQUIRED_GLOBAL_REINDEX
+  }
+
+
+def _get_model_ids(object_type):
+  """Get sorted ids of all objects of the given type."""
+  if object_type == SNAPSHOT_TYPE:
+    model = models.all_models.Snapshot
+  else:
+    model = get_indexed_models()[object_type]
+  return [id_ for id_, in db.session.query(model.id).order_by(model.id)]
+
+
+def split_ids(ids, unit_size):
+  """Split sorted ids into (min_id, max_id, count) ranges of unit_size."""
+  return [(chunk[0], chunk[-1], len(chunk))
+          for chunk in utils.list_chunks(ids, chunk_size=unit_size)]
+
+
+def plan_units(job_name, object_types):
+  """Create work units for all objects of the given types.
+
+  Units that are left from the previous run of the same job are removed.
+  """
+  ReindexCheckpoint.query.filter_by(job_name=job_name).delete()
+  now = datetime.datetime.utcnow()
+  unit_size = REINDEX_CHUNK_SIZE * UNIT_CHUNKS
+  units = []
+  for object_type in object_types:
+    for min_id, max_id, count in split_ids(_get_model_ids(object_type),
+                                           unit_size):
+      units.append({
+          "job_name": job_name,
+          "object_type": object_type,
+          "min_id": min_id,
+          "max_id": max_id,
+          "count": count,
+          "done": False,
+          "created_at": now,
+          "updated_at": now,
+      })
+  if units:
+    db.session.execute(ReindexCheckpoint.__table__.insert(), units)
+  db.session.plain_commit()
+
+
+def get_pending_unit_ids(job_name):
+  """Get ids of work units of the job that are not done yet."""
+  query = db.session.query(ReindexCheckpoint.id).filter(
+      ReindexCheckpoint.job_name == job_name,
+      ReindexCheckpoint.done == sa.false(),
+  ).order_by(ReindexCheckpoint.id)
+  return [id_ for id_, in query]
+
+
+def warmup_indexer_cache():
+  """Load data shared by all reindexed objects into indexer cache."""
+  indexer = fulltext.get_indexer()
+  people_query = db.session.query(
+      models.all_models.Person.id,
+      models.all_models.Person.name,
+      models.all_models.Person.email
+  )
+  indexer.cache["people_map"] = {p.id: (p.name, p.email) for p in people_query}
+  indexer.cache["ac_role_map"] = dict(db.session.query(
+      models.all_models.AccessControlRole.id,
+      models.all_models.AccessControlRole.name,
+  ))
+
+
+def _reindex_range(object_type, min_id, max_id):
+  """Update index records of objects in the given id range."""
+  if object_type == SNAPSHOT_TYPE:
+    from ggrc.snapshotter import indexer as snapshot_indexer
+    snapshot = models.all_models.Snapshot
+    ids = [id_ for id_, in db.session.query(snapshot.id).filter(
+        snapshot.id.between(min_id, max_id))]
+    snapshot_indexer.reindex_snapshots(ids)
+    return
+  model = get_indexed_models()[object_type]
+  ids = [id_ for id_, in db.session.query(model.id).filter(
+      model.id.between(min_id, max_id)).order_by(model.id)]
+  for ids_chunk in utils.list_chunks(ids, chunk_size=REINDEX_CHUNK_SIZE):
+    model.bulk_record_update_for(ids_chunk)
+    db.session.plain_commit()
+
+
+def run_unit(unit_id):
+  """Reindex a single work unit and mark it as done."""
+  unit = ReindexCheckpoint.query.get(unit_id)
+  if unit is None or unit.done:
+    return unit_id
+  object_type, min_id, max_id = unit.object_type, unit.min_id, unit.max_id
+  with benchmark("Reindex %s %s-%s" % (object_type, min_id, max_id)):
+    _reindex_range(object_type, min_id, max_id)
+  ReindexCheckpoint.query.filter_by(id=unit_id).update({
+      "done": True,
+      "updated_at": datetime.datetime.utcnow(),
+  })
+  db.session.plain_commit()
+  return unit_id
+
+
+def _init_worker():
+  """Prepare a forked worker process to use its own db connections."""
+  db.session.remove()
+  db.engine.dispose()
+
+
+def _run_unit_in_worker(unit_id):
+  """Run a work unit in a pool worker process."""
+  from ggrc.app import app
+  with app.app_context():
+    try:
+      return run_unit(unit_id)
+    finally:
+      db.session.remove()
+
+
+def run_job(job_name, object_types, processes=None):
+  """Run the reindex job, resuming it if it was interrupted.
+
+  Args:
+    job_name: name of the job used for storing checkpoints.
+    object_types: list of object type names to reindex in a new job.
+    processes: number of worker processes, defaults to REINDEX_PROCESSES
+      setting.
+  """
+  if processes is None:
+    processes = getattr(settings, "REINDEX_PROCESSES", 1)
+  unit_ids = get_pending_unit_ids(job_name)
+  if unit_ids:
+    logger.info("Resuming %s with %s pending units", job_name, len(unit_ids))
+  else:
+    with benchmark("Plan %s units" % job_name):
+      plan_units(job_name, object_types)
+    unit_ids = get_pending_unit_ids(job_name)
+
+  warmup_indexer_cache()
+  total = len(unit_ids)
+  try:
+    if processes > 1 and total > 1:
+      db.session.remove()
+      db.engine.dispose()
+      pool = multiprocessing.Pool(processes=processes,
+                                  initializer=_init_worker)
+      try:
+        results = pool.imap_unordered(_run_unit_in_worker, unit_ids)
+        for handled, _ in enumerate(results, 1):
+          logger.info("%s: %s / %s units", job_name, handled, total)
+      finally:
+        pool.close()
+        pool.join()
+    else:
+      for handled, unit_id in enumerate(unit_ids, 1):
+        run_unit(unit_id)
+        logger.info("%s: %s / %s units", job_name, handled, total)
+  finally:
+    fulltext.get_indexer().invalidate_cache()
+
+
+def get_progress(job_name):
+  """Get progress of the reindex job.
+
+  Returns:
+    dict with numbers of done and total units and objects per object type.
+  """
+  query = db.session.query(
+      ReindexCheckpoint.object_type,
+      ReindexCheckpoint.done,
+      sa.func.count(ReindexCheckpoint.id),
+      sa.func.sum(ReindexCheckpoint.count),
+  ).filter(
+      ReindexCheckpoint.job_name == job_name,
+  ).group_by(
+      ReindexCheckpoint.object_type,
+      ReindexCheckpoint.done,
+  )
+  types = {}
+  for object_type, done, units, objects in query:
+    stats = types.setdefault(object_type, {
+        "units_done": 0,
+        "units_total": 0,
+        "objects_done": 0,
+        "objects_total": 0,
+    })
+    stats["units_total"] += units
+    stats["objects_total"] += int(objects or 0)
+    if done:
+      stats["units_done"] += units
+      stats["objects_done"] += int(objects or 0)
+  units_total = sum(s["units_total"] for s in types.values())
+  units_done = sum(s["units_done"] for s in types.values())
+  return {
+      "job_name": job_name,
+      "units_done": units_done,
+      "units_total": units_total,
+      "finished": units_done == units_total,
+      "types": types,
+  }
@@ -53,7 +53,11 @@ class SqlIndexer(object):
 
   def create_record(self, instance, commit=True):
     """Create records in db."""
-    for db_record in self.records_generator(instance):
+    self.add_records(self.records_generator(instance), commit=commit)
+
+  def add_records(self, records, commit=True):
+    """Add record dicts to db."""
+    for db_record in records:
       db.session.add(self.record_type(**db_record))
     if commit:
       db.session.commit()
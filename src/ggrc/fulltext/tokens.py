@@ -0,0 +1,192 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Trigram posting lists for full text records.
+
+Every full text record content is split into lowercase trigrams which are
+stored in the fulltext_record_tokens table as (token, type, key, property)
+postings. A search for some term can then intersect the posting lists of the
+term trigrams to get a small set of candidate objects before any LIKE
+'%term%' comparison is made against fulltext_record_properties rows.
+
+The postings are only a prefilter: they can contain stale entries and MySQL
+collations may fold different trigrams together, so the original content
+check must still be applied to the candidates.
+
+Usage of the index is controlled with two settings:
+  FULLTEXT_TOKEN_INDEX_MAINTAIN - keep postings up to date on every index
+    update. This should be enabled and followed by a full reindex before the
+    postings are used for searching.
+  FULLTEXT_TOKEN_INDEX_SEARCH - use postings for searching. It implies that
+    postings are maintained.
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import declared_attr
+
+from ggrc import db
+from ggrc import settings
+from ggrc import utils
+
+
+TOKEN_LENGTH = 3
+
+# Each additional token makes the posting intersection more selective, but
+# the gain becomes negligible for long terms while the query cost grows.
+MAX_QUERY_TOKENS = 16
+
+# Terms with LIKE wildcards have a different meaning than a plain substring,
+# so they can not be planned with postings.
+LIKE_WILDCARDS = (u"%", u"_")
+
+SORT_SUBPROPERTY = u"__sort__"
+
+INSERT_CHUNK_SIZE = 10000
+
+
+# pylint: disable=too-few-public-methods
+class MysqlRecordToken(db.Model):
+  """Db model for trigram postings of fulltext index records."""
+  __tablename__ = 'fulltext_record_tokens'
+
+  token = db.Column(db.String(TOKEN_LENGTH), primary_key=True)
+  type = db.Column(db.String(64), primary_key=True)
+  key = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  property = db.Column(db.String(250), primary_key=True)
+
+  @declared_attr
+  def __table_args__(cls):  # pylint: disable=no-self-argument
+    return (
+        db.Index('ix_{}_type_key'.format(cls.__tablename__), 'type', 'key'),
+    )
+
+
+def maintain_enabled():
+  """Check if postings should be updated together with index records."""
+  return bool(getattr(settings, "FULLTEXT_TOKEN_INDEX_MAINTAIN", False) or
+              search_enabled())
+
+
+def search_enabled():
+  """Check if postings should be used for searching."""
+  return bool(getattr(settings, "FULLTEXT_TOKEN_INDEX_SEARCH", False))
+
+
+def tokenize(text):
+  """Get a set of lowercase trigrams contained in text.
+
+  Args:
+    text: string that should be split into tokens.
+  Returns:
+    set of unicode trigrams. Text shorter than a single token gives an empty
+    set.
+  """
+  if not text:
+    return set()
+  text = unicode(text).lower()
+  return {text[i:i + TOKEN_LENGTH]
+          for i in range(len(text) - TOKEN_LENGTH + 1)}
+
+
+def get_query_tokens(terms):
+  """Get tokens that should be used to look up candidates for terms.
+
+  Returns:
+    sorted list of tokens, or None if terms can not be looked up in postings
+    and a plain content scan is needed.
+  """
+  if not terms or any(char in terms for char in LIKE_WILDCARDS):
+    return None
+  tokens = tokenize(terms)
+  if not tokens:
+    return None
+  return sorted(tokens)[:MAX_QUERY_TOKENS]
+
+
+def records_to_postings(records):
+  """Generate postings for full text records.
+
+  Args:
+    records: iterable of dicts with key, type, property, subproperty and
+      content items, the same ones that are inserted in the records table.
+  Yields:
+    dicts with token, type, key and property items.
+  """
+  for record in records:
+    if record.get("subproperty") == SORT_SUBPROPERTY:
+      continue
+    for token in tokenize(record.get("content")):
+      yield {
+          "token": token,
+          "type": record["type"],
+          "key": record["key"],
+          "property": record["property"],
+      }
+
+
+def insert_postings(records):
+  """Insert postings for the given full text records.
+
+  Postings are inserted with INSERT IGNORE because the same trigram can occur
+  in one property multiple times or be folded by the column collation.
+  """
+  if not maintain_enabled():
+    return
+  query = """
+      INSERT IGNORE INTO fulltext_record_tokens (
+        token, type, `key`, property
+      ) VALUES (:token, :type, :key, :property)
+  """
+  postings = records_to_postings(records)
+  for chunk in utils.iter_chunks(postings, chunk_size=INSERT_CHUNK_SIZE):
+    values = list(chunk)
+    if not values:
+      return
+    db.session.execute(query, values)
+
+
+def delete_postings(type_, keys=None):
+  """Delete postings of objects of the given type.
+
+  Args:
+    type_: object type name, if None postings of all types are deleted.
+    keys: optional list of object ids, if None postings of all objects of
+      the type are deleted.
+  """
+  if not maintain_enabled():
+    return
+  query = db.session.query(MysqlRecordToken)
+  if type_ is not None:
+    query = query.filter(MysqlRecordToken.type == type_)
+  if keys is not None:
+    if not keys:
+      return
+    query = query.filter(MysqlRecordToken.key.in_(keys))
+  query.delete(synchronize_session=False)
+
+
+def get_candidates_query(tokens, type_name, properties=None):
+  """Get a query for object ids that contain all given tokens.
+
+  Posting lists for all tokens are intersected by grouping the postings by
+  object property and counting the matched tokens.
+
+  Args:
+    tokens: list of tokens from get_query_tokens.
+    type_name: name of the searched object type.
+    properties: optional list of property names to search in.
+  Returns:
+    sqlalchemy query that selects the key column.
+  """
+  query = db.session.query(MysqlRecordToken.key).filter(
+      MysqlRecordToken.type == type_name,
+      MysqlRecordToken.token.in_(tokens),
+  )
+  if properties is not None:
+    query = query.filter(MysqlRecordToken.property.in_(properties))
+  return query.group_by(
+      MysqlRecordToken.key,
+      MysqlRecordToken.property,
+  ).having(
+      sa.func.count(sa.distinct(MysqlRecordToken.token)) == len(tokens)
+  )
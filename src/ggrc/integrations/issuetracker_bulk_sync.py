@@ -4,8 +4,10 @@
 """Bulk IssueTracker issues creation functionality."""
 
 import collections
+import contextlib
 import datetime
 import logging
+import threading
 
 from werkzeug import exceptions
 
@@ -15,6 +17,7 @@ from sqlalchemy.sql import expression as expr
 from ggrc import models, db, login, settings
 from ggrc.app import app
 from ggrc.integrations import integrations_errors, issues
+from ggrc.integrations.synchronization_jobs import sync_engine
 from ggrc.integrations.synchronization_jobs import sync_utils
 from ggrc.models import all_models, inflector
 from ggrc.models import exceptions as ggrc_exceptions
@@ -154,10 +157,25 @@ class IssueTrackerBulkCreator(object):
         Tuple with dicts of created issue info and errors.
     """
     errors = []
-    created = {}
+    prepared = self._prepare_issues(tracked_objs, errors)
+    created = self._sync_prepared_issues(prepared, errors)
+    with benchmark("Update issuetracker issues in db"):
+      self.update_db_issues(created, errors)
+    return created, errors
 
-    # IssueTracker server api doesn't support collection post, thus we
-    # create issues in loop.
+  def _prepare_issues(self, tracked_objs, errors):
+    """Prepare issue json of tracked objects that need synchronization.
+
+    Objects whose payload was already sent are skipped.
+
+    Args:
+        tracked_objs: list of IssuetrackedObjInfo.
+        errors: list of errors, updated with preparation errors.
+
+    Returns:
+        List of (obj_info, issue_json, issue_id, fingerprint) tuples.
+    """
+    prepared = []
     for obj_info in tracked_objs:
       try:
         if not self.bulk_sync_allowed(obj_info.obj):
@@ -167,27 +185,65 @@ class IssueTrackerBulkCreator(object):
         self._populate_issue_json(obj_info, issue_json)
 
         issue_id = getattr(obj_info.obj.issuetracker_issue, "issue_id", None)
-        with benchmark("Synchronize issue for {} with id {}".format(
-            obj_info.obj.type, obj_info.obj.id
-        )):
-          res = self.sync_issue(issue_json, issue_id)
-
-        self._process_result(res, issue_json)
-        created[(obj_info.obj.type, obj_info.obj.id)] = issue_json
-      except integrations_errors.Error as error:
-        self._add_error(errors, obj_info.obj, error)
-        if self.break_on_errs and getattr(error, "data", None) in (
-            WRONG_HOTLIST_ERR.format(issue_json["hotlist_ids"][0]),
-            WRONG_COMPONENT_ERR.format(issue_json["component_id"]),
+        fingerprint = self.get_fingerprint(issue_json)
+        if fingerprint is not None and fingerprint == getattr(
+            obj_info.obj.issuetracker_issue, "sync_fingerprint", None
         ):
-          break
-      except (TypeError, ValueError, ggrc_exceptions.ValidationError,
-              exceptions.Forbidden) as error:
+          # The same payload was already sent.
+          continue
+        prepared.append((obj_info, issue_json, issue_id, fingerprint))
+      except (integrations_errors.Error, TypeError, ValueError,
+              ggrc_exceptions.ValidationError, exceptions.Forbidden) as error:
         self._add_error(errors, obj_info.obj, error)
+    return prepared
 
-    with benchmark("Update issuetracker issues in db"):
-      self.update_db_issues(created, errors)
-    return created, errors
+  def _sync_prepared_issues(self, prepared, errors):
+    """Send prepared issues to IssueTracker.
+
+    Args:
+        prepared: list of tuples returned by _prepare_issues.
+        errors: list of errors, updated with synchronization errors.
+
+    Returns:
+        Dict of created issue info by (object type, object id).
+    """
+    created = {}
+
+    # IssueTracker server api doesn't support collection post, thus we
+    # send requests for single issues from a pool of workers.
+    def send(item):
+      _, issue_json, issue_id, _ = item
+      return self.sync_issue(issue_json, issue_id)
+
+    # Requests that are already sent when the synchronization is stopped
+    # can still create tickets, so their results are stored as well.
+    stop = threading.Event()
+    with benchmark("Synchronize {} issues".format(len(prepared))):
+      with contextlib.closing(
+          sync_engine.iter_results(send, prepared, stop=stop)
+      ) as results:
+        for (obj_info, issue_json, _, fingerprint), res, error in results:
+          try:
+            if error is not None:
+              raise error
+            self._process_result(res, issue_json)
+            issue_json["sync_fingerprint"] = fingerprint
+            created[(obj_info.obj.type, obj_info.obj.id)] = issue_json
+          except integrations_errors.Error as error:
+            self._add_error(errors, obj_info.obj, error)
+            if self._is_fatal_error(error, issue_json):
+              stop.set()
+          except (TypeError, ValueError, ggrc_exceptions.ValidationError,
+                  exceptions.Forbidden) as error:
+            self._add_error(errors, obj_info.obj, error)
+    return created
+
+  def _is_fatal_error(self, error, issue_json):
+    """Check if the error should stop synchronization of remaining issues."""
+    return self.break_on_errs and getattr(error, "data", None) in (
+        WRONG_HOTLIST_ERR.format(issue_json["hotlist_ids"][0]),
+        WRONG_COMPONENT_ERR.format(issue_json["component_id"]),
+    )
 
   def _get_issue_json(self, object_):
     """Get json data for issuetracker issue related to provided object."""
@@ -246,6 +302,12 @@ class IssueTrackerBulkCreator(object):
         issue_json
     )
 
+  @staticmethod
+  def get_fingerprint(issue_json):
+    """Get fingerprint of the payload to skip resending it or None."""
+    del issue_json
+    return None
+
   @staticmethod
   def bulk_sync_allowed(obj):
     """Check if user has permissions to synchronize issuetracker issue.
@@ -325,6 +387,7 @@ class IssueTrackerBulkCreator(object):
         "reporter": expr.bindparam("reporter"),
         "issue_id": expr.bindparam("issue_id"),
         "issue_url": expr.bindparam("issue_url"),
+        "sync_fingerprint": expr.bindparam("sync_fingerprint"),
     })
 
     try:
@@ -363,6 +426,7 @@ class IssueTrackerBulkCreator(object):
         "reporter": info["reporter"],
         "issue_id": info["issue_id"],
         "issue_url": info["issue_url"],
+        "sync_fingerprint": info.get("sync_fingerprint"),
     } for (obj_type, obj_id), info in issue_info.items()]
 
   def log_issues(self, issue_objs, action='modified'):
@@ -512,6 +576,14 @@ class IssueTrackerBulkUpdater(IssueTrackerBulkCreator):
         )
     )
 
+  @staticmethod
+  def get_fingerprint(issue_json):
+    """Get fingerprint of the payload to skip resending it.
+
+    Objects whose tickets were updated with the same payload are skipped.
+    """
+    return sync_engine.get_fingerprint(issue_json)
+
   def sync_issue(self, issue_json, issue_id=None):
     """Update existing issue in issuetracker with provided params."""
     return sync_utils.update_issue(
@@ -8,6 +8,7 @@ import datetime
 
 from ggrc.models.hooks.issue_tracker import assessment_integration
 from ggrc.integrations import integrations_errors, constants
+from ggrc.integrations.synchronization_jobs import sync_engine
 from ggrc.integrations.synchronization_jobs import sync_utils
 
 logger = logging.getLogger(__name__)
@@ -273,6 +274,41 @@ def _check_missing_ids(assessment_issues, processed_ids):
         ", ".join(str(missing_id) for missing_id in missing_ids))
 
 
+def _sync_prepared_issues(tracker_handler, prepared):
+  """Send prepared payloads concurrently and store the results.
+
+  Args:
+    - tracker_handler: AssessmentTrackerHandler object
+    - prepared: {issue_id: (issue_info, (issue_db_info, issue_payload))}
+
+  Returns:
+    -
+  """
+  def send(issue_id):
+    _, (_, issue_payload) = prepared[issue_id]
+    return tracker_handler.send_assessment_sync(issue_id, issue_payload)
+
+  results = sync_engine.iter_results(send, prepared.keys())
+  for issue_id, sync_result, error in results:
+    if error is not None:
+      # Unexpected errors are logged by the engine.
+      continue
+    issue_info, (issue_db_info, _) = prepared[issue_id]
+    try:
+      tracker_handler.apply_assessment_sync(
+          issue_info["object"],
+          issue_db_info,
+          sync_result
+      )
+    except Exception as ex:  # pylint: disable=broad-except
+      logger.error(
+          "Unhandled synchronization error: %s %s %s",
+          issue_id,
+          issue_info,
+          ex
+      )
+
+
 def sync_assessment_attributes():  # noqa
   """Synchronizes issue tracker ticket statuses with the Assessment statuses.
 
@@ -294,6 +330,7 @@ def sync_assessment_attributes():  # noqa
   processed_ids = set()
   tracker_handler = assessment_integration.AssessmentTrackerHandler()
   for batch in sync_utils.iter_issue_batches(assessment_issues.keys()):
+    prepared = {}
     for issue_id, issuetracker_state in batch.iteritems():
       issue_id, issue_info = _get_issue_info_by_issue_id(
           issue_id,
@@ -308,9 +345,8 @@ def sync_assessment_attributes():  # noqa
       processed_ids.add(issue_id)
 
       try:
-        tracker_handler.handle_assessment_sync(
+        sync_info = tracker_handler.prepare_assessment_sync(
             issue_info,
-            issue_id,
             issuetracker_state
         )
       except Exception as ex:  # pylint: disable=broad-except
@@ -321,6 +357,10 @@ def sync_assessment_attributes():  # noqa
             ex
         )
         continue
+      if sync_info is not None:
+        prepared[issue_id] = (issue_info, sync_info)
+
+    _sync_prepared_issues(tracker_handler, prepared)
 
   logger.error("Sync is done, %d issue(s) were processed.", len(processed_ids))
   _check_missing_ids(assessment_issues, processed_ids)
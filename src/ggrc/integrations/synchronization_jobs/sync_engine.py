@@ -0,0 +1,179 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Concurrent synchronization of Issue Tracker tickets.
+
+Issue Tracker API has no collection endpoints, so every ticket is synchronized
+with a separate request. The engine sends these requests from a bounded pool
+of worker threads:
+
+  - all requests of the process, including the ones made by workers, share a
+    token bucket of settings.ISSUE_TRACKER_SYNC_RATE requests per second,
+    see sync_utils;
+  - throttled and temporarily failed requests are retried with exponential
+    backoff, see get_backoff; ticket creation is retried only if the request
+    was not processed, see is_retriable;
+  - payload fingerprints let callers skip updates of tickets whose payload is
+    the same as the last one sent.
+
+Workers only send requests. Payloads are prepared and results are stored by
+the calling thread, so database sessions are never shared between threads.
+"""
+
+import hashlib
+import json
+import logging
+import Queue
+import threading
+import time
+
+from ggrc import settings
+from ggrc.integrations import constants
+
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses of requests that can succeed if they are sent again later.
+RETRIABLE_STATUSES = frozenset((429, 502, 503, 504))
+
+# HTTP statuses of requests that were not processed by the server. Only these
+# are retried for requests that are not idempotent, e.g. ticket creation, as
+# a gateway error can be returned after the ticket is created.
+NOT_PROCESSED_STATUSES = frozenset((429, 503))
+
+
+class TokenBucket(object):
+  """Thread safe token bucket rate limiter."""
+
+  def __init__(self, rate, capacity, clock=time.time, sleep=time.sleep):
+    self.rate = float(rate)
+    self.capacity = float(capacity)
+    self.tokens = self.capacity
+    self.clock = clock
+    self.sleep = sleep
+    self.updated = clock()
+    self.lock = threading.Lock()
+
+  def _take(self):
+    """Take a token and return 0 or return time to wait for a token."""
+    with self.lock:
+      now = self.clock()
+      self.tokens = min(self.capacity,
+                        self.tokens + (now - self.updated) * self.rate)
+      self.updated = now
+      if self.tokens >= 1:
+        self.tokens -= 1
+        return 0
+      return (1 - self.tokens) / self.rate
+
+  def acquire(self):
+    """Take a token, waiting until one is available."""
+    wait = self._take()
+    while wait:
+      self.sleep(wait)
+      wait = self._take()
+
+
+RATE_LIMITER = TokenBucket(
+    rate=getattr(settings, "ISSUE_TRACKER_SYNC_RATE", 10),
+    capacity=max(getattr(settings, "ISSUE_TRACKER_SYNC_RATE", 10), 1),
+)
+
+
+def get_backoff(attempt):
+  """Get delay in seconds before the retry of a failed attempt."""
+  return constants.REQUEST_TIMEOUT * 2 ** attempt
+
+
+def is_retriable(error, idempotent=True):
+  """Check if the failed request can be sent again."""
+  if idempotent:
+    return error.status in RETRIABLE_STATUSES
+  return error.status in NOT_PROCESSED_STATUSES
+
+
+def get_fingerprint(payload):
+  """Get a hash of a ticket payload that does not depend on key order."""
+  dumped = json.dumps(payload, sort_keys=True, default=unicode)
+  return hashlib.sha1(dumped).hexdigest()
+
+
+_STOP = object()
+
+
+def _work(func, tasks, results, stopped):
+  """Call func for tasks until the stop marker is taken."""
+  while True:
+    item = tasks.get()
+    if item is _STOP:
+      results.put(_STOP)
+      return
+    if stopped.is_set():
+      continue
+    try:
+      results.put((item, func(item), None))
+    except Exception as error:  # pylint: disable=broad-except
+      logger.exception("Unable to synchronize %r", item)
+      results.put((item, None, error))
+
+
+def iter_results(func, items, workers=None, stop=None):
+  """Call func for every item in a pool of worker threads.
+
+  Setting the stop event stops calling func for items that are not started
+  yet, results of the already started calls are still yielded. Closing the
+  generator also stops starting new calls, but drops results of the started
+  ones, so callers that store the results should close it only after the
+  loop is over, e.g. with contextlib.closing.
+
+  Args:
+    func: a callable that sends a request for an item. It must not use the
+        database session.
+    items: list of items.
+    workers: max number of concurrent calls, defaults to
+        settings.ISSUE_TRACKER_SYNC_WORKERS.
+    stop: optional threading.Event set by the caller to stop the calls.
+
+  Yields:
+    (item, result, error) tuples in the order of completion. Error is the
+    exception raised by func or None.
+  """
+  if workers is None:
+    workers = getattr(settings, "ISSUE_TRACKER_SYNC_WORKERS", 1)
+  if stop is None:
+    stop = threading.Event()
+  workers = min(workers, len(items))
+  if workers <= 1:
+    for item in items:
+      if stop.is_set():
+        return
+      try:
+        yield item, func(item), None
+      except Exception as error:  # pylint: disable=broad-except
+        logger.exception("Unable to synchronize %r", item)
+        yield item, None, error
+    return
+
+  tasks = Queue.Queue()
+  results = Queue.Queue()
+  for item in items:
+    tasks.put(item)
+  threads = []
+  for _ in range(workers):
+    tasks.put(_STOP)
+    thread = threading.Thread(target=_work,
+                              args=(func, tasks, results, stop))
+    thread.start()
+    threads.append(thread)
+  try:
+    finished = 0
+    while finished < workers:
+      result = results.get()
+      if result is _STOP:
+        finished += 1
+        continue
+      yield result
+  finally:
+    stop.set()
+    for thread in threads:
+      thread.join()
@@ -11,6 +11,7 @@ from sqlalchemy.sql import expression
 from ggrc import models
 from ggrc.integrations import integrations_errors, constants
 from ggrc.integrations import issues
+from ggrc.integrations.synchronization_jobs import sync_engine
 
 logger = logging.getLogger(__name__)
 
@@ -122,19 +123,21 @@ def iter_issue_batches(ids):
       yield issue_infos
 
 
-def update_issue(cli, issue_id, params):
-  """Performs issue update request."""
+def _send_request(func, description, args, idempotent=True):
+  """Send a rate limited request and retry it if it fails temporarily."""
   last_error = integrations_errors.Error
-  for _ in range(constants.MAX_REQUEST_ATTEMPTS):
+  for attempt in range(constants.MAX_REQUEST_ATTEMPTS):
+    sync_engine.RATE_LIMITER.acquire()
     try:
-      return cli.update_issue(issue_id, params)
+      return func(*args)
     except integrations_errors.HttpError as error:
       last_error = error
-      if error.status == 429:
+      if sync_engine.is_retriable(error, idempotent):
         logger.warning(
-            'The request updating ticket ID=%s was '
-            'rate limited and will be re-tried: %s', issue_id, error)
-        time.sleep(constants.REQUEST_TIMEOUT)
+            'The request %s was rate limited or failed and will be '
+            're-tried: %s', description, error)
+        if attempt + 1 < constants.MAX_REQUEST_ATTEMPTS:
+          time.sleep(sync_engine.get_backoff(attempt))
         continue
     break
   else:
@@ -142,30 +145,20 @@ def update_issue(cli, issue_id, params):
         "Attempts limit(%s) was reached.",
         constants.MAX_REQUEST_ATTEMPTS
     )
-    raise last_error
+  raise last_error
+
+
+def update_issue(cli, issue_id, params):
+  """Performs issue update request."""
+  return _send_request(cli.update_issue,
+                       "updating ticket ID={}".format(issue_id),
+                       (issue_id, params))
 
 
 def create_issue(cli, params):
   """Performs issue create request."""
-  last_error = integrations_errors.Error
-  for _ in range(constants.MAX_REQUEST_ATTEMPTS):
-    try:
-      return cli.create_issue(params)
-    except integrations_errors.HttpError as error:
-      last_error = error
-      if error.status == 429:
-        logger.warning(
-            'The request creating ticket was rate limited and '
-            'will be re-tried: %s', error)
-        time.sleep(constants.REQUEST_TIMEOUT)
-        continue
-    break
-  else:
-    logger.warning(
-        "Attempts limit(%s) was reached.",
-        constants.MAX_REQUEST_ATTEMPTS
-    )
-  raise last_error
+  return _send_request(cli.create_issue, "creating ticket", (params,),
+                       idempotent=False)
 
 
 def parse_due_date(custom_fields_issuetracker):
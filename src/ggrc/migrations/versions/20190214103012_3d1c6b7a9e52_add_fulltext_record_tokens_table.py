@@ -0,0 +1,40 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext_record_tokens table
+
+Create Date: 2019-02-14 10:30:12.481923
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3d1c6b7a9e52'
+down_revision = '57b14cb4a7b4'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'fulltext_record_tokens',
+      sa.Column('token', sa.String(length=3), nullable=False),
+      sa.Column('type', sa.String(length=64), nullable=False),
+      sa.Column('key', sa.Integer(), autoincrement=False, nullable=False),
+      sa.Column('property', sa.String(length=250), nullable=False),
+      sa.PrimaryKeyConstraint('token', 'type', 'key', 'property'),
+      mysql_default_charset=u'utf8',
+      mysql_engine=u'InnoDB',
+  )
+  op.create_index('ix_fulltext_record_tokens_type_key',
+                  'fulltext_record_tokens', ['type', 'key'], unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_record_tokens')
@@ -0,0 +1,43 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add reindex_checkpoints table
+
+Create Date: 2019-02-15 09:45:18.203114
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2e41c7d0a3'
+down_revision = '3d1c6b7a9e52'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'reindex_checkpoints',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('job_name', sa.String(length=250), nullable=False),
+      sa.Column('object_type', sa.String(length=64), nullable=False),
+      sa.Column('min_id', sa.Integer(), nullable=False),
+      sa.Column('max_id', sa.Integer(), nullable=False),
+      sa.Column('count', sa.Integer(), nullable=False),
+      sa.Column('done', sa.Boolean(), nullable=False),
+      sa.Column('created_at', sa.DateTime(), nullable=False),
+      sa.Column('updated_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('id'),
+  )
+  op.create_index('ix_reindex_checkpoints_job_name_done',
+                  'reindex_checkpoints', ['job_name', 'done'], unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('reindex_checkpoints')
@@ -0,0 +1,48 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add background_task_queue table
+
+Create Date: 2019-02-18 11:20:47.639215
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a9d3e1f764'
+down_revision = '8f2e41c7d0a3'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'background_task_queue',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('bg_task_name', sa.String(length=250), nullable=False),
+      sa.Column('queue', sa.String(length=250), nullable=False),
+      sa.Column('url', sa.String(length=250), nullable=False),
+      sa.Column('method', sa.String(length=16), nullable=False),
+      sa.Column('retry_options', sa.Text(), nullable=True),
+      sa.Column('status', sa.String(length=16), nullable=False),
+      sa.Column('attempts', sa.Integer(), nullable=False),
+      sa.Column('eta', sa.DateTime(), nullable=False),
+      sa.Column('lease_owner', sa.String(length=250), nullable=True),
+      sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+      sa.Column('last_error', sa.Text(), nullable=True),
+      sa.Column('created_at', sa.DateTime(), nullable=False),
+      sa.Column('updated_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('id'),
+  )
+  op.create_index('ix_background_task_queue_status_eta',
+                  'background_task_queue', ['status', 'eta'], unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('background_task_queue')
@@ -0,0 +1,41 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add import_export_chunks table
+
+Create Date: 2019-02-19 14:35:21.418236
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7e9f4c1d86'
+down_revision = 'c5a9d3e1f764'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'import_export_chunks',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('import_export_id', sa.Integer(), nullable=False),
+      sa.Column('position', sa.Integer(), nullable=False),
+      sa.Column('content', mysql.MEDIUMTEXT(), nullable=False),
+      sa.ForeignKeyConstraint(['import_export_id'], ['import_exports.id'],
+                              ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('id'),
+      sa.UniqueConstraint('import_export_id', 'position',
+                          name='uq_import_export_chunks'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('import_export_chunks')
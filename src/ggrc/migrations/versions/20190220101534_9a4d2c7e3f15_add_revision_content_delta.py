@@ -0,0 +1,79 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add delta encoded content columns to revisions
+
+Create Date: 2019-02-20 10:15:34.205417
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import json
+import zlib
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4d2c7e3f15'
+down_revision = '2b7e9f4c1d86'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column('revisions', sa.Column('content_delta', mysql.LONGBLOB(),
+                                       nullable=True))
+  op.add_column('revisions', sa.Column('content_keyframe_id', sa.Integer(),
+                                       nullable=True))
+  op.alter_column('revisions', 'content', existing_type=mysql.LONGTEXT(),
+                  nullable=True)
+
+
+def _apply_delta(content, delta):
+  """Apply delta stored in content_delta column to content."""
+  result = dict(content)
+  for key in delta.get("unset", []):
+    result.pop(key, None)
+  result.update(delta.get("set", {}))
+  return result
+
+
+def _expand_compacted_revisions(connection):
+  """Store full content in all delta encoded revisions."""
+  resources = connection.execute("""
+      SELECT DISTINCT resource_type, resource_id
+      FROM revisions
+      WHERE content_delta IS NOT NULL
+  """).fetchall()
+  for resource_type, resource_id in resources:
+    rows = connection.execute(sa.text("""
+        SELECT id, content, content_delta
+        FROM revisions
+        WHERE resource_type = :type AND resource_id = :id
+        ORDER BY id
+    """), type=resource_type, id=resource_id).fetchall()
+    content = None
+    for id_, stored_content, delta in rows:
+      if delta is None:
+        content = json.loads(stored_content)
+        continue
+      content = _apply_delta(content, json.loads(zlib.decompress(delta)))
+      connection.execute(sa.text("""
+          UPDATE revisions
+          SET content = :content, content_delta = NULL,
+              content_keyframe_id = NULL
+          WHERE id = :id
+      """), content=json.dumps(content), id=id_)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  _expand_compacted_revisions(op.get_bind())
+  op.alter_column('revisions', 'content', existing_type=mysql.LONGTEXT(),
+                  nullable=False)
+  op.drop_column('revisions', 'content_keyframe_id')
+  op.drop_column('revisions', 'content_delta')
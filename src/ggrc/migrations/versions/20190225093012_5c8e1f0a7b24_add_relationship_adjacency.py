@@ -0,0 +1,56 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add relationship adjacency table
+
+Create Date: 2019-02-25 09:30:12.418276
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e1f0a7b24'
+down_revision = '9a4d2c7e3f15'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'relationship_adjacency',
+      sa.Column('object_type', sa.String(length=250), nullable=False),
+      sa.Column('object_id', sa.Integer(), nullable=False),
+      sa.Column('neighbor_type', sa.String(length=250), nullable=False),
+      sa.Column('neighbor_id', sa.Integer(), nullable=False),
+      sa.Column('relationship_id', sa.Integer(), nullable=False),
+      sa.ForeignKeyConstraint(['relationship_id'], ['relationships.id'],
+                              ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('object_type', 'object_id', 'neighbor_type',
+                              'neighbor_id', 'relationship_id'),
+  )
+  op.create_index('ix_relationship_adjacency_relationship',
+                  'relationship_adjacency', ['relationship_id'])
+  op.execute("""
+      INSERT IGNORE INTO relationship_adjacency (
+          object_type, object_id, neighbor_type, neighbor_id, relationship_id
+      )
+      SELECT source_type, source_id, destination_type, destination_id, id
+      FROM relationships
+  """)
+  op.execute("""
+      INSERT IGNORE INTO relationship_adjacency (
+          object_type, object_id, neighbor_type, neighbor_id, relationship_id
+      )
+      SELECT destination_type, destination_id, source_type, source_id, id
+      FROM relationships
+  """)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('relationship_adjacency')
@@ -0,0 +1,37 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext_dirty_objects table
+
+Create Date: 2019-02-27 14:16:08.530914
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a9b6e2f417'
+down_revision = '5c8e1f0a7b24'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'fulltext_dirty_objects',
+      sa.Column('object_type', sa.String(length=250), nullable=False),
+      sa.Column('object_id', sa.Integer(), nullable=False),
+      sa.Column('enqueued_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('object_type', 'object_id'),
+  )
+  op.create_index('ix_fulltext_dirty_objects_enqueued_at',
+                  'fulltext_dirty_objects', ['enqueued_at'], unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_dirty_objects')
@@ -0,0 +1,44 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add person_object_counts table
+
+Create Date: 2019-03-04 10:15:22.318457
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7b1e4c9d2a68'
+down_revision = 'd3a9b6e2f417'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'person_object_counts',
+      sa.Column('person_id', sa.Integer(), nullable=False),
+      sa.Column('counter', sa.String(length=32), nullable=False),
+      sa.Column('object_type', sa.String(length=250), nullable=False),
+      sa.Column('value', sa.Integer(), nullable=False),
+      sa.Column('computed_at', sa.DateTime(), nullable=False),
+      sa.ForeignKeyConstraint(['person_id'], ['people.id'],
+                              ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('person_id', 'counter', 'object_type'),
+  )
+  op.create_index('ix_person_object_counts_counter_type',
+                  'person_object_counts', ['counter', 'object_type'],
+                  unique=False)
+  op.create_index('ix_person_object_counts_computed_at',
+                  'person_object_counts', ['computed_at'], unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('person_object_counts')
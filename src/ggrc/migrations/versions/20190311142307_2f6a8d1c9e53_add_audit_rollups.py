@@ -0,0 +1,39 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add audit_rollups table
+
+Create Date: 2019-03-11 14:23:07.541093
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6a8d1c9e53'
+down_revision = '7b1e4c9d2a68'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'audit_rollups',
+      sa.Column('audit_id', sa.Integer(), autoincrement=False,
+                nullable=False),
+      sa.Column('summary', sa.Text(), nullable=True),
+      sa.Column('snapshot_counts', sa.Text(), nullable=True),
+      sa.Column('updated_at', sa.DateTime(), nullable=False),
+      sa.ForeignKeyConstraint(['audit_id'], ['audits.id'],
+                              ondelete='CASCADE'),
+      sa.PrimaryKeyConstraint('audit_id'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('audit_rollups')
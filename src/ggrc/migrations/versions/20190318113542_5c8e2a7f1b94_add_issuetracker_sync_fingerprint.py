@@ -0,0 +1,35 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add 'sync_fingerprint' column in IssueTrackerIssue
+
+Create Date: 2019-03-18 11:35:42.318206
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5c8e2a7f1b94'
+down_revision = '2f6a8d1c9e53'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      'issuetracker_issues',
+      sa.Column(
+          'sync_fingerprint',
+          sa.String(length=40),
+          nullable=True
+      )
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_column('issuetracker_issues', 'sync_fingerprint')
@@ -0,0 +1,36 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add 'generation' column in audit_rollups
+
+Create Date: 2019-03-20 09:44:15.604127
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4e7b1d9a6c32'
+down_revision = '5c8e2a7f1b94'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      'audit_rollups',
+      sa.Column(
+          'generation',
+          sa.Integer(),
+          nullable=False,
+          server_default='0',
+      )
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_column('audit_rollups', 'generation')
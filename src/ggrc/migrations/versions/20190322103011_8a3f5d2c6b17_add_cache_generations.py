@@ -0,0 +1,34 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add cache_generations table
+
+Create Date: 2019-03-22 10:30:11.264918
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8a3f5d2c6b17'
+down_revision = '4e7b1d9a6c32'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'cache_generations',
+      sa.Column('name', sa.String(length=64), nullable=False),
+      sa.Column('generation', sa.BigInteger(), nullable=False),
+      sa.PrimaryKeyConstraint('name'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('cache_generations')
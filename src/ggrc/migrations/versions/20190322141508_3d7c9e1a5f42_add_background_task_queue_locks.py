@@ -0,0 +1,33 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add background_task_queue_locks table
+
+Create Date: 2019-03-22 14:15:08.731206
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7c9e1a5f42'
+down_revision = '8a3f5d2c6b17'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'background_task_queue_locks',
+      sa.Column('queue', sa.String(length=250), nullable=False),
+      sa.PrimaryKeyConstraint('queue'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('background_task_queue_locks')
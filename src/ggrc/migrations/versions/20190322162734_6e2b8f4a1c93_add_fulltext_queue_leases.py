@@ -0,0 +1,44 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add claim leases to fulltext_dirty_objects and fulltext_drain_state table
+
+Create Date: 2019-03-22 16:27:34.815042
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2b8f4a1c93'
+down_revision = '3d7c9e1a5f42'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      'fulltext_dirty_objects',
+      sa.Column('claim_id', sa.String(length=32), nullable=True),
+  )
+  op.add_column(
+      'fulltext_dirty_objects',
+      sa.Column('claimed_until', sa.DateTime(), nullable=True),
+  )
+  op.create_table(
+      'fulltext_drain_state',
+      sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+      sa.Column('leased_until', sa.DateTime(), nullable=True),
+      sa.PrimaryKeyConstraint('id'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_drain_state')
+  op.drop_column('fulltext_dirty_objects', 'claimed_until')
+  op.drop_column('fulltext_dirty_objects', 'claim_id')
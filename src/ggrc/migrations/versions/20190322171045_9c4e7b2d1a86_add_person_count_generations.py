@@ -0,0 +1,36 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add person_count_generations table
+
+Create Date: 2019-03-22 17:10:45.271904
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e7b2d1a86'
+down_revision = '6e2b8f4a1c93'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'person_count_generations',
+      sa.Column('person_id', sa.Integer(), autoincrement=False,
+                nullable=False),
+      sa.Column('generation', sa.Integer(), nullable=False,
+                server_default='0'),
+      sa.PrimaryKeyConstraint('person_id'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('person_count_generations')
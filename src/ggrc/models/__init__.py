@@ -79,15 +79,21 @@ def init_session_monitor_cache():
       if cache:
         cache.update_after_flush(session, flush_context)
 
-  def clear_cache(session):
+  def update_cache_after_commit(session):
+    if session.transaction.nested:
+      # Objects of a released savepoint are committed with the transaction.
+      return
     cache = Cache.get_cache()
     if cache:
+      cache.update_after_commit()
       cache.clear()
 
+  event.listen(Session, 'after_transaction_create', Cache.save_savepoint)
+  event.listen(Session, 'after_transaction_end', Cache.drop_savepoint)
   event.listen(Session, 'before_flush', update_cache_before_flush)
   event.listen(Session, 'after_flush', update_cache_after_flush)
-  event.listen(Session, 'after_commit', clear_cache)
-  event.listen(Session, 'after_rollback', clear_cache)
+  event.listen(Session, 'after_commit', update_cache_after_commit)
+  event.listen(Session, 'after_rollback', Cache.clear_after_rollback)
 
 
 def init_sanitization_hooks():
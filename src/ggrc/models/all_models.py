@@ -20,6 +20,7 @@ from ggrc.models.access_group import AccessGroup
 from ggrc.models.assessment import Assessment
 from ggrc.models.assessment_template import AssessmentTemplate
 from ggrc.models.audit import Audit
+from ggrc.models.audit_rollup import AuditRollup  # noqa # pylint: disable=unused-import
 from ggrc.models.automapping import Automapping
 from ggrc.models.background_operation_type import BackgroundOperationType
 from ggrc.models.background_task import BackgroundTask
@@ -45,6 +46,7 @@ from ggrc.models.event import Event
 from ggrc.models.evidence import Evidence
 from ggrc.models.facility import Facility
 from ggrc.models.import_export import ImportExport
+from ggrc.models.import_export import ImportExportChunk  # noqa # pylint: disable=unused-import
 from ggrc.models.issue import Issue
 from ggrc.models.issuetracker_issue import IssuetrackerIssue
 from ggrc.models.key_report import KeyReport
@@ -62,6 +64,7 @@ from ggrc.models.objective import Objective
 from ggrc.models.option import Option
 from ggrc.models.org_group import OrgGroup
 from ggrc.models.person import Person
+from ggrc.models.person_counters import PersonObjectCount  # noqa # pylint: disable=unused-import
 from ggrc.models.person_profile import PersonProfile
 from ggrc.models.product import Product
 from ggrc.models.product_group import ProductGroup
@@ -69,6 +72,7 @@ from ggrc.models.program import Program
 from ggrc.models.project import Project
 from ggrc.models.proposal import Proposal
 from ggrc.models.relationship import Relationship
+from ggrc.models.relationship_adjacency import RelationshipAdjacency  # noqa # pylint: disable=unused-import
 from ggrc.models.requirement import Requirement
 from ggrc.models.revision import Revision
 from ggrc.models.risk import Risk
@@ -0,0 +1,344 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Materialized data of audit summary and snapshot counts endpoints.
+
+Every audit has at most one row in the audit_rollups table with two parts:
+
+  - summary: numbers of assessments and mapped evidence grouped by status and
+    verified flag of the assessments, as returned by /api/audits/<id>/summary;
+  - snapshot_counts: numbers of snapshots mapped to the audit grouped by
+    child type, as returned by /api/audits/<id>/snapshot_counts.
+
+A missing part is computed and stored when it is requested, so both
+endpoints are served with a single row read in most cases.
+
+Changes that affect a part set it to NULL and increment the generation of
+the row in the same transaction, see ggrc.models.hooks.audit_rollup:
+  - created, deleted and moved assessments and changes of their status or
+    verified flag drop the summary of their audits;
+  - created and deleted Assessment-Evidence relationships drop the summary
+    of the audit of the assessment;
+  - created and deleted snapshots and Audit-Snapshot relationships drop the
+    snapshot counts of the audit.
+Snapshots and their audit relationships inserted by the snapshotter with
+plain SQL drop snapshot counts explicitly.
+
+A part is computed from the transaction snapshot, which can be older than
+a concurrently committed invalidation. For that reason the part is stored
+only if the generation of the row is still the one read together with the
+missing part, so a stale value never replaces an invalidated one. The
+invalidation creates the row if it doesn't exist yet for the same reason.
+
+Parts are recomputed instead of being patched with deltas, because evidence
+numbers are distinct counts over all assessments of a group. All rollups
+can be rebuilt from scratch with the /admin/rebuild_audit_rollups endpoint.
+"""
+
+import collections
+import datetime
+import json
+import logging
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.models import types
+from ggrc.utils import benchmark
+
+
+logger = logging.getLogger(__name__)
+
+SUMMARY = "summary"
+SNAPSHOT_COUNTS = "snapshot_counts"
+
+# Number of audits rebuilt in a single transaction.
+REBUILD_BATCH_SIZE = 100
+
+
+# pylint: disable=too-few-public-methods
+class AuditRollup(db.Model):
+  """Stored summary and snapshot counts of an audit."""
+
+  __tablename__ = "audit_rollups"
+
+  audit_id = db.Column(
+      db.Integer,
+      db.ForeignKey("audits.id", ondelete="CASCADE"),
+      primary_key=True,
+      autoincrement=False,
+  )
+  summary = db.Column(types.JsonType, nullable=True)
+  snapshot_counts = db.Column(types.JsonType, nullable=True)
+  generation = db.Column(db.Integer, nullable=False, default=0)
+  updated_at = db.Column(db.DateTime, nullable=False)
+
+
+def compute_summary(audit_id):
+  """Count assessments and evidence of an audit by assessment status."""
+  # pylint: disable=too-many-locals
+  from ggrc.models import all_models
+  relationship = all_models.Relationship
+  evidence = all_models.Evidence
+  assessment = all_models.Assessment
+
+  #  evidence_relationship => evidence destination
+  evidence_relationship_ds = db.session.query(
+      relationship.source_id.label("cp_id"),
+      relationship.source_type.label("cp_type"),
+      evidence.id.label("evidence_id"),
+  ).join(
+      evidence,
+      sa.and_(
+          relationship.destination_id == evidence.id,
+          relationship.destination_type == "Evidence"
+      )
+  ).subquery()
+  #  evidence_relationship => evidence source
+  evidence_relationship_sd = db.session.query(
+      relationship.destination_id.label("cp_id"),
+      relationship.destination_type.label("cp_type"),
+      evidence.id.label("evidence_id"),
+  ).join(
+      evidence,
+      sa.and_(
+          relationship.source_id == evidence.id,
+          relationship.source_type == "Evidence"
+      )
+  ).subquery()
+
+  assessment_evidences = db.session.query(
+      assessment.id.label("id"),
+      assessment.status.label("status"),
+      assessment.verified.label("verified"),
+      evidence_relationship_ds.c.evidence_id,
+  ).outerjoin(
+      evidence_relationship_ds,
+      sa.and_(
+          evidence_relationship_ds.c.cp_id == assessment.id,
+          evidence_relationship_ds.c.cp_type == "Assessment",
+      )
+  ).filter(
+      assessment.audit_id == audit_id,
+  ).union_all(
+      db.session.query(
+          assessment.id.label("id"),
+          assessment.status.label("status"),
+          assessment.verified.label("verified"),
+          evidence_relationship_sd.c.evidence_id,
+      ).outerjoin(
+          evidence_relationship_sd,
+          sa.and_(
+              evidence_relationship_sd.c.cp_id == assessment.id,
+              evidence_relationship_sd.c.cp_type == "Assessment",
+          )
+      ).filter(assessment.audit_id == audit_id)
+  )
+
+  statuses_data = collections.defaultdict(lambda: collections.defaultdict(set))
+  all_assessment_ids = set()
+  all_evidence_ids = set()
+  for id_, status, verified, evidence_id in assessment_evidences:
+    if id_:
+      statuses_data[(status, verified)]["assessments"].add(id_)
+      all_assessment_ids.add(id_)
+    if evidence_id:
+      statuses_data[(status, verified)]["evidence"].add(evidence_id)
+      all_evidence_ids.add(evidence_id)
+
+  statuses_json = []
+  for (status, verified), data in statuses_data.items():
+    statuses_json.append({
+        "name": status,
+        "verified": verified,
+        "assessments": len(data["assessments"]),
+        "evidence": len(data["evidence"]),
+    })
+  statuses_json.sort(key=lambda k: (k["name"], k["verified"]))
+  return {
+      "statuses": statuses_json,
+      "total": {
+          "assessments": len(all_assessment_ids),
+          "evidence": len(all_evidence_ids),
+      },
+  }
+
+
+def compute_snapshot_counts(audit_id):
+  """Count snapshots mapped to an audit by child type."""
+  from ggrc.models import all_models
+  snapshot = all_models.Snapshot
+  relationship = all_models.Relationship
+
+  snapshots_dest = db.session.query(
+      snapshot.child_type.label("child_type"),
+      snapshot.id.label("id")
+  ).join(
+      relationship,
+      relationship.destination_id == snapshot.id
+  ).filter(
+      relationship.destination_type == "Snapshot",
+      relationship.source_type == "Audit",
+      relationship.source_id == audit_id
+  )
+
+  snapshots_source = db.session.query(
+      snapshot.child_type.label("child_type"),
+      snapshot.id.label("id")
+  ).join(
+      relationship,
+      relationship.source_id == snapshot.id
+  ).filter(
+      relationship.source_type == "Snapshot",
+      relationship.destination_type == "Audit",
+      relationship.destination_id == audit_id
+  )
+
+  snapshot_counts = snapshots_dest.union(
+      snapshots_source
+  ).with_entities(
+      snapshot.child_type,
+      sa.func.count("*")
+  ).group_by(
+      snapshot.child_type
+  )
+  return dict(snapshot_counts)
+
+
+_COMPUTE = {
+    SUMMARY: compute_summary,
+    SNAPSHOT_COUNTS: compute_snapshot_counts,
+}
+
+
+def _store(audit_id, values, generation):
+  """Insert or update parts of the rollup of an audit.
+
+  Existing rows are updated only if they still have the given generation,
+  i.e. they were not invalidated after the values were computed.
+
+  Args:
+    audit_id: id of the audit.
+    values: {part: value} dict.
+    generation: generation of the row read before computing the values, 0 if
+        there was no row.
+  """
+  columns = sorted(values)
+  db.session.execute(
+      sa.text("""
+          INSERT INTO audit_rollups (audit_id, generation, updated_at,
+                                     {columns})
+          VALUES (:audit_id, :generation, :updated_at, {params})
+          ON DUPLICATE KEY UPDATE {updates}
+      """.format(
+          columns=", ".join(columns),
+          params=", ".join(":" + column for column in columns),
+          updates=", ".join(
+              "{0} = IF(generation = :generation, VALUES({0}), {0})".format(
+                  column)
+              for column in columns + ["updated_at"]
+          ),
+      )),
+      dict(
+          {column: json.dumps(values[column]) for column in columns},
+          audit_id=audit_id,
+          generation=generation,
+          updated_at=datetime.datetime.utcnow(),
+      ),
+  )
+
+
+def _get_generations(audit_ids):
+  """Get {audit id: generation} dict of stored rollups."""
+  table = AuditRollup.__table__
+  return dict(db.session.query(table.c.audit_id, table.c.generation).filter(
+      table.c.audit_id.in_(audit_ids),
+  ))
+
+
+def _get(audit_id, part):
+  """Get a stored part of an audit rollup, computing it if it is missing."""
+  table = AuditRollup.__table__
+  row = db.session.query(table.c[part], table.c.generation).filter(
+      table.c.audit_id == audit_id,
+  ).first()
+  value, generation = row if row else (None, 0)
+  if value is None:
+    with benchmark("Compute audit {}".format(part)):
+      value = _COMPUTE[part](audit_id)
+    _store(audit_id, {part: value}, generation)
+    db.session.plain_commit()
+    # Return the value in the same shape as the stored one.
+    value = json.loads(json.dumps(value))
+  return value
+
+
+def get_summary(audit_id):
+  """Get summary data of an audit."""
+  return _get(audit_id, SUMMARY)
+
+
+def get_snapshot_counts(audit_id):
+  """Get {child type: count} dict of snapshots mapped to an audit."""
+  return _get(audit_id, SNAPSHOT_COUNTS)
+
+
+def _invalidate(part, audit_ids):
+  """Drop a stored part of rollups of audits and increment generations."""
+  audit_ids = {int(audit_id) for audit_id in audit_ids if audit_id}
+  if not audit_ids:
+    return
+  db.session.execute(
+      sa.text("""
+          INSERT INTO audit_rollups (audit_id, generation, updated_at)
+          SELECT id, 1, :updated_at FROM audits WHERE id IN ({audit_ids})
+          ON DUPLICATE KEY UPDATE
+              generation = generation + 1,
+              {part} = NULL
+      """.format(
+          audit_ids=", ".join(str(audit_id) for audit_id in audit_ids),
+          part=part,
+      )),
+      {"updated_at": datetime.datetime.utcnow()},
+  )
+
+
+def invalidate_summary(audit_ids):
+  """Drop stored summaries of audits."""
+  _invalidate(SUMMARY, audit_ids)
+
+
+def invalidate_snapshot_counts(audit_ids):
+  """Drop stored snapshot counts of audits."""
+  _invalidate(SNAPSHOT_COUNTS, audit_ids)
+
+
+def rebuild(audit_ids=None, batch_size=REBUILD_BATCH_SIZE):
+  """Recompute and store rollups of audits.
+
+  Args:
+    audit_ids: ids of audits to rebuild, all audits if None.
+    batch_size: number of audits rebuilt in a single transaction.
+
+  Returns:
+    number of rebuilt rollups.
+  """
+  from ggrc.models import all_models
+  query = db.session.query(all_models.Audit.id)
+  if audit_ids is not None:
+    if not audit_ids:
+      return 0
+    query = query.filter(all_models.Audit.id.in_(audit_ids))
+  audit_ids = [audit_id for audit_id, in query.order_by(all_models.Audit.id)]
+
+  for start in range(0, len(audit_ids), batch_size):
+    with benchmark("Rebuild audit rollups"):
+      batch = audit_ids[start:start + batch_size]
+      generations = _get_generations(batch)
+      for audit_id in batch:
+        _store(audit_id, {part: compute(audit_id)
+                          for part, compute in _COMPUTE.iteritems()},
+               generations.get(audit_id, 0))
+      db.session.plain_commit()
+  logger.info("Rebuilt rollups of %s audits", len(audit_ids))
+  return len(audit_ids)
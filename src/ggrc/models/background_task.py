@@ -230,6 +230,7 @@ def _enqueue_task(name, url, bg_task=None, queued_callback=None,
                   parameters=None, method="POST", payload=None,
                   queue=DEFAULT_QUEUE, retry_options=None):
   """Create task in queue if running in AppEngine,
+  store it for local workers if worker executor is enabled,
   otherwise execute queued_callback() """
   parameters = parameters or dict()
   retry_options = retry_options or RETRY_OPTIONS
@@ -256,6 +257,9 @@ def _enqueue_task(name, url, bg_task=None, queued_callback=None,
       # On local SDK development appserver we need to wait result to
       # enqueue task. In Google Cloud async adding tasks works properly.
       queue_task.get_result()
+  elif bg_task and _worker_executor_enabled():
+    from ggrc.models import background_task_queue
+    background_task_queue.enqueue(bg_task, url, method, queue, retry_options)
   elif queued_callback:
     if bg_task:
       queued_callback(bg_task)
@@ -266,6 +270,11 @@ def _enqueue_task(name, url, bg_task=None, queued_callback=None,
                      "or APP_ENGINE set to true.")
 
 
+def _worker_executor_enabled():
+  """Check if background tasks should be executed by local workers."""
+  return getattr(settings, "BACKGROUND_TASK_EXECUTOR", "inline") == "worker"
+
+
 def create_bg_operation(operation_type, object_type, object_id):
   """Create background task operation instance."""
   bg_operation = None
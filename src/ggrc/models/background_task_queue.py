@@ -0,0 +1,272 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Durable queue for background tasks executed by local workers.
+
+When BACKGROUND_TASK_EXECUTOR setting is "worker", background tasks are not
+executed inside the request that created them. Instead a queue item is stored
+together with the BackgroundTask and a worker process (see ggrc.task_worker)
+claims it later.
+
+Items are claimed with a lease: a conditional UPDATE sets the lease owner and
+expiration time only if the item is still pending or the previous lease has
+expired, so every item is executed by a single worker at a time even without
+SELECT ... FOR UPDATE SKIP LOCKED support in the database. A worker that dies
+in the middle of a task loses the lease and the item is claimed again.
+
+The number of items running in a queue is limited by
+BACKGROUND_TASK_QUEUE_CONCURRENCY. Workers check the limit and claim an item
+while they hold a lock on the row of the queue in background_task_queue_locks,
+so concurrent claims can not exceed it.
+"""
+
+import datetime
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models.types import JsonType
+
+
+PENDING_STATUS = "Pending"
+LEASED_STATUS = "Leased"
+DONE_STATUS = "Done"
+FAILED_STATUS = "Failed"
+
+# Number of candidate items fetched on each claim attempt.
+CLAIM_BATCH_SIZE = 20
+
+
+# pylint: disable=too-few-public-methods
+class BackgroundTaskQueueItem(db.Model):
+  """Db model for background task waiting for a local worker."""
+  __tablename__ = 'background_task_queue'
+
+  id = db.Column(db.Integer, primary_key=True)
+  bg_task_name = db.Column(db.String(250), nullable=False)
+  queue = db.Column(db.String(250), nullable=False)
+  url = db.Column(db.String(250), nullable=False)
+  method = db.Column(db.String(16), nullable=False)
+  retry_options = db.Column(JsonType)
+  status = db.Column(db.String(16), nullable=False, default=PENDING_STATUS)
+  attempts = db.Column(db.Integer, nullable=False, default=0)
+  eta = db.Column(db.DateTime, nullable=False)
+  lease_owner = db.Column(db.String(250))
+  lease_expires_at = db.Column(db.DateTime)
+  last_error = db.Column(db.Text)
+  created_at = db.Column(db.DateTime, nullable=False)
+  updated_at = db.Column(db.DateTime, nullable=False)
+
+  __table_args__ = (
+      db.Index('ix_background_task_queue_status_eta', 'status', 'eta'),
+  )
+
+
+# pylint: disable=too-few-public-methods
+class BackgroundTaskQueueLock(db.Model):
+  """Db model for rows locked while claiming items of a queue."""
+  __tablename__ = 'background_task_queue_locks'
+
+  queue = db.Column(db.String(250), primary_key=True)
+
+
+def _now():
+  return datetime.datetime.utcnow()
+
+
+def get_queue_limit(queue):
+  """Get max number of concurrently running tasks for the queue."""
+  limits = getattr(settings, "BACKGROUND_TASK_QUEUE_CONCURRENCY", {})
+  return limits.get(queue, limits.get(None, 1))
+
+
+def get_backoff_seconds(retry_options, retry_count):
+  """Get delay before the given retry of a failed task.
+
+  The delay follows the App Engine push queue semantics: it starts at
+  min_backoff_seconds, doubles max_doublings times, then grows linearly and
+  never exceeds max_backoff_seconds.
+
+  Args:
+    retry_options: dict with RETRY_OPTIONS items.
+    retry_count: number of the retry, starting from 1.
+  Returns:
+    number of seconds.
+  """
+  min_backoff = retry_options.get("min_backoff_seconds", 0)
+  max_backoff = retry_options.get("max_backoff_seconds", min_backoff)
+  max_doublings = retry_options.get("max_doublings", 0)
+  steps = max(retry_count - 1, 0)
+  doublings = min(steps, max_doublings)
+  backoff = min_backoff * 2 ** doublings
+  if steps > max_doublings:
+    backoff += (steps - max_doublings) * min_backoff * 2 ** max_doublings
+  return min(backoff, max_backoff)
+
+
+def enqueue(bg_task, url, method, queue, retry_options):
+  """Store a queue item for the background task.
+
+  The item is added to the current session, so it becomes visible to workers
+  together with the task itself when the session is committed.
+  """
+  now = _now()
+  item = BackgroundTaskQueueItem(
+      bg_task_name=bg_task.name,
+      queue=queue,
+      url=url,
+      method=method,
+      retry_options=retry_options,
+      status=PENDING_STATUS,
+      attempts=0,
+      eta=now,
+      created_at=now,
+      updated_at=now,
+  )
+  db.session.add(item)
+  return item
+
+
+def _lock_queue(queue):
+  """Lock the queue row until the end of the current transaction.
+
+  This must be the first statement of the transaction, so that the following
+  reads see the claims committed by the previous owners of the lock.
+  """
+  lock = BackgroundTaskQueueLock
+  query = db.session.query(lock.queue).filter(
+      lock.queue == queue,
+  ).with_for_update()
+  if query.first() is not None:
+    return
+  # The row is created outside of the transaction to avoid deadlocks on gap
+  # locks of concurrent workers that create it at the same time.
+  db.session.rollback()
+  with db.engine.begin() as connection:
+    connection.execute(lock.__table__.insert().prefix_with("IGNORE"),
+                       queue=queue)
+  query.one()
+
+
+def _get_running_count(queue, now):
+  """Get number of items of the queue with active leases."""
+  table = BackgroundTaskQueueItem
+  return db.session.query(sa.func.count(table.id)).filter(
+      table.queue == queue,
+      table.status == LEASED_STATUS,
+      table.lease_expires_at >= now,
+  ).scalar()
+
+
+def _claimable_filter(now):
+  """Filter for items that are ready to be claimed."""
+  table = BackgroundTaskQueueItem
+  return sa.or_(
+      sa.and_(table.status == PENDING_STATUS, table.eta <= now),
+      sa.and_(table.status == LEASED_STATUS, table.lease_expires_at < now),
+  )
+
+
+def claim(worker_id, lease_seconds, queues=None):
+  """Claim a single item ready for execution.
+
+  Args:
+    worker_id: unique name of the worker that claims the item.
+    lease_seconds: time after which the item can be claimed by another worker
+      if the lease is not extended.
+    queues: optional list of queue names to claim items from.
+  Returns:
+    claimed BackgroundTaskQueueItem or None if there is nothing to do.
+  """
+  table = BackgroundTaskQueueItem
+  now = _now()
+  candidates = db.session.query(table.id, table.queue).filter(
+      _claimable_filter(now),
+  )
+  if queues:
+    candidates = candidates.filter(table.queue.in_(queues))
+  candidates = candidates.order_by(table.eta, table.id).limit(
+      CLAIM_BATCH_SIZE).all()
+  db.session.rollback()
+
+  full_queues = set()
+  for item_id, queue in candidates:
+    if queue in full_queues:
+      continue
+    _lock_queue(queue)
+    if _get_running_count(queue, now) >= get_queue_limit(queue):
+      full_queues.add(queue)
+      db.session.rollback()
+      continue
+    result = db.session.execute(
+        table.__table__.update().where(
+            sa.and_(table.id == item_id, _claimable_filter(now))
+        ).values(
+            status=LEASED_STATUS,
+            lease_owner=worker_id,
+            lease_expires_at=now + datetime.timedelta(seconds=lease_seconds),
+            attempts=table.attempts + 1,
+            updated_at=now,
+        )
+    )
+    db.session.commit()
+    if result.rowcount == 1:
+      return table.query.get(item_id)
+  return None
+
+
+def extend_lease(connection, item_id, worker_id, lease_seconds):
+  """Extend the lease of an item that is still owned by the worker.
+
+  This is executed on a separate connection so it can be called while the
+  task itself keeps its own session transaction open.
+  """
+  table = BackgroundTaskQueueItem.__table__
+  now = _now()
+  connection.execute(
+      table.update().where(sa.and_(
+          table.c.id == item_id,
+          table.c.lease_owner == worker_id,
+          table.c.status == LEASED_STATUS,
+      )).values(
+          lease_expires_at=now + datetime.timedelta(seconds=lease_seconds),
+          updated_at=now,
+      )
+  )
+
+
+def complete(item_id, worker_id, error=None):
+  """Mark item as done or schedule its retry.
+
+  Args:
+    item_id: id of the claimed item.
+    worker_id: name of the worker that owns the lease.
+    error: None for successful execution or error description.
+  Returns:
+    new status of the item.
+  """
+  table = BackgroundTaskQueueItem
+  item = table.query.get(item_id)
+  if item is None or item.lease_owner != worker_id:
+    db.session.rollback()
+    return None
+  now = _now()
+  item.updated_at = now
+  item.lease_owner = None
+  item.lease_expires_at = None
+  if error is None:
+    item.status = DONE_STATUS
+  else:
+    item.last_error = error
+    retry_options = item.retry_options or settings.RETRY_OPTIONS
+    retry_limit = retry_options.get("task_retry_limit", 0)
+    if item.attempts > retry_limit:
+      item.status = FAILED_STATUS
+    else:
+      item.status = PENDING_STATUS
+      item.eta = now + datetime.timedelta(
+          seconds=get_backoff_seconds(retry_options, item.attempts))
+  status = item.status
+  db.session.commit()
+  return status
@@ -4,10 +4,14 @@
 import logging
 from flask import g, has_app_context
 
+from ggrc.cache import representation_cache
 from ggrc.utils import benchmark
 
 logger = logging.getLogger(__name__)
 
+# Key of {savepoint: copy of the cache} dict in Session.info.
+SAVEPOINT_CACHES = "savepoint_caches"
+
 
 class Cache:
   """
@@ -38,7 +42,7 @@ class Cache:
     """
     After the flush, we know which objects were actually deleted, not just
     modified (deletes due to cascades are not known pre-flush), so fix up
-    cache.
+    cache and invalidate cached representations of flushed objects.
     """
     for o in self.dirty.keys():
       # SQLAlchemy magic to determine whether object was actually deleted due
@@ -47,17 +51,33 @@ class Cache:
       if flush_context.is_deleted(o._sa_instance_state):
         self.deleted[o] = self.dirty[o]
         del self.dirty[o]
+    with benchmark("invalidate cached representations"):
+      self.invalidated.update(representation_cache.invalidate(
+          session,
+          list(self.new) + list(self.dirty) + list(self.deleted),
+      ))
+
+  def update_after_commit(self):
+    """
+    Invalidate cached representations of committed objects once more, as
+    they could have been cached from old data between the flush and the
+    commit.
+    """
+    with benchmark("invalidate cached representations after commit"):
+      representation_cache.drop_stamps(self.invalidated)
 
   def clear(self):
     self.new = {}
     self.dirty = {}
     self.deleted = {}
+    self.invalidated = set()
 
   def copy(self):
     copied_cache = Cache()
     copied_cache.new = dict(self.new)
     copied_cache.dirty = dict(self.dirty)
     copied_cache.deleted = dict(self.deleted)
+    copied_cache.invalidated = set(self.invalidated)
     return copied_cache
 
   @staticmethod
@@ -76,6 +96,41 @@ class Cache:
       logger.warning("No app context - no cache created")
       return None
 
+  @staticmethod
+  def save_savepoint(session, transaction):
+    """Remember tracked objects to restore them if the savepoint is reverted.
+
+    Listener of the after_transaction_create session event.
+    """
+    if not transaction.nested:
+      return
+    cache = Cache.get_cache()
+    if cache:
+      session.info.setdefault(SAVEPOINT_CACHES, {})[transaction] = \
+          cache.copy()
+
+  @staticmethod
+  def drop_savepoint(session, transaction):
+    """Forget tracked objects saved for an ended savepoint."""
+    session.info.get(SAVEPOINT_CACHES, {}).pop(transaction, None)
+
+  @staticmethod
+  def clear_after_rollback(session):
+    """Drop objects tracked in the reverted transaction or savepoint.
+
+    Listener of the after_rollback session event.
+    """
+    cache = Cache.get_cache()
+    if not cache:
+      return
+    saved = None
+    if session.transaction.nested:
+      saved = session.info.get(SAVEPOINT_CACHES, {}).get(session.transaction)
+    if saved:
+      g.cache = saved
+    else:
+      cache.clear()
+
   @staticmethod
   def add_to_cache(obj, state="dirty"):
     """Add object to cache."""
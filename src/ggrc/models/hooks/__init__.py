@@ -6,6 +6,8 @@
 from ggrc.models.hooks import common
 from ggrc.models.hooks import assessment
 from ggrc.models.hooks import audit
+from ggrc.models.hooks import audit_rollup
+from ggrc.models.hooks import change_feed
 from ggrc.models.hooks import comment
 from ggrc.models.hooks import custom_attribute_definition
 from ggrc.models.hooks import issue
@@ -14,17 +16,21 @@ from ggrc.models.hooks import relationship
 from ggrc.models.hooks import acl
 from ggrc.models.hooks import proposal
 from ggrc.models.hooks import access_control_role
+from ggrc.models.hooks import person_counters
 
 
 ALL_HOOKS = [
     access_control_role,
     assessment,
     audit,
+    audit_rollup,
     comment,
     issue,
     relationship,
     custom_attribute_definition,
     acl,
+    person_counters,
+    change_feed,
     common,
 
     # Keep IssueTracker at the end of list to make sure that all other hooks
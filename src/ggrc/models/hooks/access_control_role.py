@@ -28,6 +28,7 @@ import sqlalchemy as sa
 
 from ggrc import db
 from ggrc import utils
+from ggrc.access_control import propagation_graph
 from ggrc.models import all_models
 from ggrc.models import inflector
 from ggrc.services import signals
@@ -108,3 +109,12 @@ def init_hook():
     # pylint: disable=unused-argument
     # Arguments here have to be listed for the hooks to work.
     handle_role_acls(obj)
+
+  # pylint: disable=unused-argument
+  def invalidate_propagation_graph(mapper, connection, target):
+    """Rebuild propagation graph after any role change."""
+    propagation_graph.invalidate()
+
+  for event_name in ("after_insert", "after_update", "after_delete"):
+    sa.event.listen(all_models.AccessControlRole, event_name,
+                    invalidate_propagation_graph)
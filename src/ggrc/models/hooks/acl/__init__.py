@@ -14,6 +14,7 @@ import sqlalchemy as sa
 from sqlalchemy.orm.session import Session
 
 from ggrc.models import all_models
+from ggrc.models.hooks.acl import permissions
 from ggrc.models.hooks.acl import propagation
 from ggrc.utils import benchmark
 
@@ -81,11 +82,17 @@ def after_flush(session, _):
     _add_or_update("new_relationship_ids", relationship_ids)
     _add_or_update("deleted_objects", deleted)
 
+    permissions.collect_changes(session)
+
 
 def after_commit():
   """ACL propagation after commit action."""
+  new_acl_ids = set(getattr(flask.g, "new_acl_ids", set()))
+  last_acl_id = permissions.get_last_acl_id()
   with benchmark("General acl propagation"):
     propagation.propagate()
+  with benchmark("Update permissions cache"):
+    permissions.update_cache(new_acl_ids, last_acl_id)
 
 
 def init_hook():
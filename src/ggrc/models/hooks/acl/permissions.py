@@ -0,0 +1,154 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Updates of cached user permissions caused by ACL changes.
+
+Changes that can only take permissions away or that affect unknown sets of
+objects invalidate the smallest possible part of the permissions cache:
+  - people added to or removed from roles lose all their cached permissions;
+  - removed relationships invalidate cached permissions for object types
+    that can get propagated roles;
+  - changed role definitions invalidate the whole cache.
+
+New ACL entries, including the ones created by propagation, only add
+permissions, so ids of their objects are added to cached permissions.
+"""
+
+import flask
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.cache import memcache
+from ggrc.cache import permissions_cache
+from ggrc.models import all_models
+
+
+def _add_or_update(name, value):
+  """Add or update flask.g attribute."""
+  if hasattr(flask.g, name):
+    getattr(flask.g, name).update(value)
+  else:
+    setattr(flask.g, name, value)
+
+
+def add_changed_people(person_ids):
+  """Mark people whose cached permissions must be dropped after commit."""
+  _add_or_update("permissions_changed_people", set(person_ids))
+
+
+def mark_roles_changed():
+  """Mark that cached permissions of all users must be dropped after commit."""
+  flask.g.permissions_roles_changed = True
+
+
+def collect_changes(session):
+  """Collect changes from the flushed session that affect permissions."""
+  people = set()
+  relationships_deleted = False
+  roles_changed = False
+  for obj in session.new | session.dirty | session.deleted:
+    if isinstance(obj, all_models.AccessControlPerson):
+      people.add(obj.person_id)
+    elif isinstance(obj, all_models.AccessControlRole):
+      roles_changed = True
+  for obj in session.deleted:
+    if isinstance(obj, all_models.Relationship):
+      relationships_deleted = True
+  add_changed_people(people)
+  flask.g.permissions_relationships_deleted = (
+      relationships_deleted or
+      getattr(flask.g, "permissions_relationships_deleted", False)
+  )
+  if roles_changed:
+    mark_roles_changed()
+
+
+def get_last_acl_id():
+  """Get the biggest id of existing ACL entries if propagation can add any.
+
+  Returns:
+    the biggest ACL id or None if no new ACL entries are expected.
+  """
+  if not memcache.has_memcache():
+    return None
+  if not (getattr(flask.g, "new_acl_ids", None) or
+          getattr(flask.g, "new_relationship_ids", None)):
+    return None
+  return db.session.query(
+      sa.func.max(all_models.AccessControlList.id)
+  ).scalar() or 0
+
+
+def _get_propagated_types():
+  """Get object types that can have propagated roles."""
+  acr = all_models.AccessControlRole
+  query = db.session.query(acr.object_type).filter(
+      acr.parent_id.isnot(None),
+  ).distinct()
+  return [object_type for object_type, in query]
+
+
+def _get_new_acl_permissions(new_acl_ids, last_acl_id):
+  """Get permissions given by ACL entries created in this transaction."""
+  acl_base = db.aliased(all_models.AccessControlList, name="acl_base")
+  acl_propagated = db.aliased(all_models.AccessControlList,
+                              name="acl_propagated")
+  acr = all_models.AccessControlRole
+  acp = all_models.AccessControlPerson
+  new_entries = acl_propagated.id > last_acl_id
+  if new_acl_ids:
+    new_entries = sa.or_(new_entries, acl_propagated.id.in_(new_acl_ids))
+  return db.session.query(
+      acp.person_id,
+      acl_propagated.object_type,
+      acl_propagated.object_id,
+      acr.read,
+      acr.update,
+      acr.delete,
+  ).filter(
+      acp.ac_list_id == acl_base.id,
+      acl_base.id == acl_propagated.base_id,
+      acl_propagated.ac_role_id == acr.id,
+      acl_propagated.object_type != all_models.Relationship.__name__,
+      new_entries,
+  )
+
+
+def _pop_changes():
+  """Get and reset changes collected in the current request."""
+  changes = (
+      getattr(flask.g, "permissions_changed_people", set()),
+      getattr(flask.g, "permissions_relationships_deleted", False),
+      getattr(flask.g, "permissions_roles_changed", False),
+  )
+  for name in ("permissions_changed_people",
+               "permissions_relationships_deleted",
+               "permissions_roles_changed"):
+    if hasattr(flask.g, name):
+      delattr(flask.g, name)
+  return changes
+
+
+def update_cache(new_acl_ids, last_acl_id):
+  """Update cached permissions after ACL propagation has finished.
+
+  Args:
+    new_acl_ids: ids of ACL entries created in the committed session.
+    last_acl_id: the biggest ACL id before the propagation started.
+  """
+  people, relationships_deleted, roles_changed = _pop_changes()
+  if not memcache.has_memcache():
+    return
+  from ggrc.cache import utils as cache_utils
+  client = cache_utils.get_cache_manager().cache_object.memcache_client
+  if roles_changed:
+    permissions_cache.bump_global_version(client)
+    return
+  permissions_cache.bump_user_versions(client, people)
+  if relationships_deleted:
+    permissions_cache.bump_type_versions(client, _get_propagated_types())
+  if last_acl_id is not None:
+    permissions_cache.add_acl_permissions(
+        client,
+        _get_new_acl_permissions(new_acl_ids, last_acl_id),
+    )
@@ -17,6 +17,7 @@ from ggrc import db
 from ggrc import login
 from ggrc import utils
 from ggrc.utils import helpers
+from ggrc.access_control import propagation_graph
 from ggrc.access_control import utils as acl_utils
 from ggrc.models import all_models
 from ggrc.models.hooks import access_control_role
@@ -29,24 +30,26 @@ logger = logging.getLogger(__name__)
 PROPAGATION_DEPTH_LIMIT = 50
 
 
-def _rel_parent(parent_acl_ids=None, relationship_ids=None, source=True,
-                user_id=None):
-  """Get left side of relationships mappings through source."""
+def _rel_parent(graph, parent_acl_ids=None, relationship_ids=None,
+                source=True, user_id=None):
+  """Get ACL entries propagated from objects to their relationships.
+
+  Args:
+    graph: propagation graph with edges between roles.
+    parent_acl_ids: ids of ACL entries to propagate, or ids of ACL entries
+      to skip if relationship_ids are given.
+    relationship_ids: ids of relationships to propagate existing ACL entries
+      to.
+    source: propagate from the source or the destination of relationships.
+    user_id: id of the user that made the change.
+
+  Returns:
+    list of select statements, one per layer of the propagation graph.
+  """
   rel_table = all_models.Relationship.__table__
   acl_table = all_models.AccessControlList.__table__
-  parent_acr = all_models.AccessControlRole.__table__.alias(
-      "parent_acr_{}".format(source)
-  )
-  child_acr = all_models.AccessControlRole.__table__.alias(
-      "child_acr_{}".format(source)
-  )
-  # The grandchild is only used to check the child part of the relationship. We
-  # might want to check if it would be more efficient to store grandchild info
-  # in the child ACR entry instead of making an extra join on our tables.
-  grandchild_acr = all_models.AccessControlRole.__table__.alias(
-      "grandchild_acr_{}".format(source)
-  )
   where_conditions = [
+      acl_table.c.ac_role_id.in_(graph.propagated_role_ids),
   ]
   if relationship_ids is not None:
     where_conditions.append(rel_table.c.id.in_(relationship_ids))
@@ -64,59 +67,49 @@ def _rel_parent(parent_acl_ids=None, relationship_ids=None, source=True,
     parent_object_type = rel_table.c.destination_type
     grandchild_object_type = rel_table.c.source_type
 
-  select_statement = sa.select([
-      child_acr.c.id.label("ac_role_id"),
-      rel_table.c.id.label("object_id"),
-      sa.literal(all_models.Relationship.__name__).label("object_type"),
-      sa.func.now().label("created_at"),
-      sa.literal(user_id).label("modified_by_id"),
-      sa.func.now().label("updated_at"),
-      acl_table.c.id.label("parent_id"),
-      acl_table.c.id.label("parent_id_nn"),
-      acl_table.c.base_id.label("base_id"),
-  ]).select_from(
-      sa.join(
-          sa.join(
-              sa.join(
-                  sa.join(
-                      rel_table,
-                      acl_table,
-                      sa.and_(
-                          acl_table.c.object_id == parent_object_id,
-                          acl_table.c.object_type == parent_object_type,
-                      )
-                  ),
-                  parent_acr,
-                  parent_acr.c.id == acl_table.c.ac_role_id
-              ),
-              child_acr,
-              sa.and_(
-                  child_acr.c.parent_id == parent_acr.c.id,
-                  child_acr.c.object_type == all_models.Relationship.__name__,
-              ),
-          ),
-          grandchild_acr,
-          sa.and_(
-              grandchild_acr.c.parent_id == child_acr.c.id,
-              grandchild_acr.c.object_type == grandchild_object_type,
-          )
-      )
-  ).where(
-      sa.and_(*where_conditions)
-  )
-  return select_statement
+  selects = []
+  role_mappings = graph.relationship_role_mappings(
+      acl_table.c.ac_role_id, grandchild_object_type)
+  for condition, child_role_id in role_mappings:
+    selects.append(sa.select([
+        child_role_id.label("ac_role_id"),
+        rel_table.c.id.label("object_id"),
+        sa.literal(all_models.Relationship.__name__).label("object_type"),
+        sa.func.now().label("created_at"),
+        sa.literal(user_id).label("modified_by_id"),
+        sa.func.now().label("updated_at"),
+        acl_table.c.id.label("parent_id"),
+        acl_table.c.id.label("parent_id_nn"),
+        acl_table.c.base_id.label("base_id"),
+    ]).select_from(
+        sa.join(
+            rel_table,
+            acl_table,
+            sa.and_(
+                acl_table.c.object_id == parent_object_id,
+                acl_table.c.object_type == parent_object_type,
+            )
+        )
+    ).where(
+        sa.and_(condition, *where_conditions)
+    ))
+  return selects
+
+
+def _rel_child(graph, parent_acl_ids, source=True, user_id=None):
+  """Get ACL entries propagated from relationships to mapped objects.
 
+  Args:
+    graph: propagation graph with edges between roles.
+    parent_acl_ids: ids of relationship ACL entries to propagate.
+    source: propagate to the destination or the source of relationships.
+    user_id: id of the user that made the change.
 
-def _rel_child(parent_acl_ids, source=True, user_id=None):
-  """Get left side of relationships mappings through source."""
+  Returns:
+    list of select statements, one per layer of the propagation graph.
+  """
   rel_table = all_models.Relationship.__table__
   acl_table = all_models.AccessControlList.__table__
-  parent_acr = all_models.AccessControlRole.__table__.alias(
-      "parent_acr_{}".format(source)
-  )
-  child_acr = all_models.AccessControlRole.__table__.alias(
-      "child_acr_{}".format(source)
-  )
 
   if source:
     object_id = rel_table.c.destination_id
@@ -130,37 +123,33 @@ def _rel_child(parent_acl_ids, source=True, user_id=None):
       acl_table.c.object_type == all_models.Relationship.__name__,
   )
 
-  select_statement = sa.select([
-      child_acr.c.id.label("ac_role_id"),
-      object_id.label("object_id"),
-      object_type.label("object_type"),
-      sa.func.now().label("created_at"),
-      sa.literal(user_id).label("modified_by_id"),
-      sa.func.now().label("updated_at"),
-      acl_table.c.id.label("parent_id"),
-      acl_table.c.id.label("parent_id_nn"),
-      acl_table.c.base_id.label("base_id"),
-  ]).select_from(
-      sa.join(
-          sa.join(
-              sa.join(
-                  rel_table,
-                  acl_table,
-                  acl_link
-              ),
-              parent_acr,
-              parent_acr.c.id == acl_table.c.ac_role_id
-          ),
-          child_acr,
-          child_acr.c.parent_id == parent_acr.c.id
-      )
-  ).where(
-      sa.and_(
-          acl_table.c.id.in_(parent_acl_ids),
-          child_acr.c.object_type == object_type,
-      )
-  )
-  return select_statement
+  selects = []
+  role_mappings = graph.child_role_mappings(acl_table.c.ac_role_id,
+                                            object_type)
+  for condition, child_role_id in role_mappings:
+    selects.append(sa.select([
+        child_role_id.label("ac_role_id"),
+        object_id.label("object_id"),
+        object_type.label("object_type"),
+        sa.func.now().label("created_at"),
+        sa.literal(user_id).label("modified_by_id"),
+        sa.func.now().label("updated_at"),
+        acl_table.c.id.label("parent_id"),
+        acl_table.c.id.label("parent_id_nn"),
+        acl_table.c.base_id.label("base_id"),
+    ]).select_from(
+        sa.join(
+            rel_table,
+            acl_table,
+            acl_link
+        )
+    ).where(
+        sa.and_(
+            acl_table.c.id.in_(parent_acl_ids),
+            condition,
+        )
+    ))
+  return selects
 
 
 def _get_relationship_acl_ids(relationship_ids):
@@ -170,70 +159,85 @@ def _get_relationship_acl_ids(relationship_ids):
   as _get_child_ids does in all higher levels.
 
   Args:
-    relationship_ids: list of parent acl entries or query with parent ids.
+    relationship_ids: list of relationship ids.
   Returns:
     list of ACL ids that belong to given relationships.
   """
   acl_table = all_models.AccessControlList.__table__
 
-  return sa.select([acl_table.c.id]).where(
-      sa.and_(
-          acl_table.c.object_type == all_models.Relationship.__name__,
-          acl_table.c.object_id.in_(relationship_ids),
+  return [row.id for row in db.session.execute(
+      sa.select([acl_table.c.id]).where(
+          sa.and_(
+              acl_table.c.object_type == all_models.Relationship.__name__,
+              acl_table.c.object_id.in_(relationship_ids),
+          )
       )
-  )
+  )]
 
 
 def _get_child_ids(parent_ids):
   """Get all acl ids for acl entries with the given parent ids
 
   Args:
-    parent_ids: list of parent acl entries or query with parent ids.
+    parent_ids: list of parent acl entries.
   Returns:
     list of ACL ids for all children from the given parents.
   """
+  if not parent_ids:
+    return []
   acl_table = all_models.AccessControlList.__table__
 
-  return sa.select([acl_table.c.id]).where(
-      acl_table.c.parent_id.in_(parent_ids)
-  )
+  return [row.id for row in db.session.execute(
+      sa.select([acl_table.c.id]).where(
+          acl_table.c.parent_id.in_(parent_ids)
+      )
+  )]
+
+
+def _insert_selects(selects):
+  """Insert ACL entries selected by all given statements."""
+  if selects:
+    acl_utils.insert_select_acls(sa.union(*selects))
 
 
-def _handle_propagation_parents(parent_acl_ids, user_id):
+def _handle_propagation_parents(graph, parent_acl_ids, user_id):
   """Propagate ACL records from parent objects to relationships."""
-  src_select = _rel_parent(parent_acl_ids, source=True, user_id=user_id)
-  dst_select = _rel_parent(parent_acl_ids, source=False, user_id=user_id)
-  select_statement = sa.union(src_select, dst_select)
-  acl_utils.insert_select_acls(select_statement)
+  _insert_selects(
+      _rel_parent(graph, parent_acl_ids, source=True, user_id=user_id) +
+      _rel_parent(graph, parent_acl_ids, source=False, user_id=user_id)
+  )
 
 
-def _handle_propagation_children(new_parent_ids, user_id):
+def _handle_propagation_children(graph, new_parent_ids, user_id):
   """Propagate ACL records from relationships to child objects."""
-  src_select = _rel_child(new_parent_ids, source=True, user_id=user_id)
-  dst_select = _rel_child(new_parent_ids, source=False, user_id=user_id)
-  select_statement = sa.union(src_select, dst_select)
-  acl_utils.insert_select_acls(select_statement)
+  if not new_parent_ids:
+    return
+  _insert_selects(
+      _rel_child(graph, new_parent_ids, source=True, user_id=user_id) +
+      _rel_child(graph, new_parent_ids, source=False, user_id=user_id)
+  )
 
 
-def _handle_propagation_rel(relationship_ids, new_acl_ids, user_id):
+def _handle_propagation_rel(graph, relationship_ids, new_acl_ids, user_id):
   """Handle propagation for relationship object."""
-  src_select = _rel_parent(
-      parent_acl_ids=new_acl_ids,
-      relationship_ids=relationship_ids,
-      source=True,
-      user_id=user_id,
-  )
-  dst_select = _rel_parent(
-      parent_acl_ids=new_acl_ids,
-      relationship_ids=relationship_ids,
-      source=False,
-      user_id=user_id,
+  _insert_selects(
+      _rel_parent(
+          graph,
+          parent_acl_ids=new_acl_ids,
+          relationship_ids=relationship_ids,
+          source=True,
+          user_id=user_id,
+      ) + _rel_parent(
+          graph,
+          parent_acl_ids=new_acl_ids,
+          relationship_ids=relationship_ids,
+          source=False,
+          user_id=user_id,
+      )
   )
-  select_statement = sa.union(src_select, dst_select)
-  acl_utils.insert_select_acls(select_statement)
 
 
-def _handle_acl_step(parent_acl_ids, user_id):
+def _handle_acl_step(graph, parent_acl_ids, user_id):
   """Handle role propagation through relationships.
 
   For handling relationships of type:
@@ -241,40 +245,45 @@ def _handle_acl_step(parent_acl_ids, user_id):
   The parent part of this function refers to propagation from Audit to
   Relationship. The child part refers to propagation from Relationship to
   Object (either Assessment, Issue, Document, Comment)
+
+  Returns:
+    ids of ACL entries created on the objects.
   """
 
-  _handle_propagation_parents(parent_acl_ids, user_id)
+  _handle_propagation_parents(graph, parent_acl_ids, user_id)
   new_parent_ids = _get_child_ids(parent_acl_ids)
-  _handle_propagation_children(new_parent_ids, user_id)
+  _handle_propagation_children(graph, new_parent_ids, user_id)
 
   return _get_child_ids(new_parent_ids)
 
 
-def _handle_relationship_step(relationship_ids, new_acl_ids, user_id):
+def _handle_relationship_step(graph, relationship_ids, new_acl_ids, user_id):
   """Propagate first level or ACLs caused by new relationships."""
 
-  _handle_propagation_rel(relationship_ids, new_acl_ids, user_id)
+  _handle_propagation_rel(graph, relationship_ids, new_acl_ids, user_id)
   new_parent_ids = _get_relationship_acl_ids(relationship_ids)
-  _handle_propagation_children(new_parent_ids, user_id)
+  _handle_propagation_children(graph, new_parent_ids, user_id)
 
   return _get_child_ids(new_parent_ids)
 
 
-def _propagate(parent_acl_ids, user_id):
-  """Propagate ACL entries through the entire propagation tree."""
+def _propagate(graph, parent_acl_ids, user_id):
+  """Propagate ACL entries through the entire propagation tree.
+
+  Every level of the tree is handled with set based statements for all
+  entries of the level. Ids of entries of the next level are loaded
+  explicitly, so statements don't nest subqueries of all previous levels.
+  """
 
   # The following for statement is a replacement for `while True` statement
   # with a safety cutoff limit.
+  if not parent_acl_ids:
+    return
   for _ in range(PROPAGATION_DEPTH_LIMIT):
 
-    child_ids = _handle_acl_step(parent_acl_ids, user_id)
-
-    count_query = child_ids.alias("counts").count()
-    child_id_count = db.session.execute(count_query).scalar()
+    parent_acl_ids = _handle_acl_step(graph, parent_acl_ids, user_id)
 
-    if child_id_count:
-      parent_acl_ids = child_ids
-    else:
+    if not parent_acl_ids:
       # Exit the loop when there are no more ACL entries to propagate
       return
 
@@ -284,7 +293,7 @@ def _propagate(parent_acl_ids, user_id):
                   "tree for cycles, invalid entries or too deep entries.")
 
 
-def _propagate_relationships(relationship_ids, new_acl_ids, user_id):
+def _propagate_relationships(graph, relationship_ids, new_acl_ids, user_id):
   """Start ACL propagation for newly created relationships.
 
   Note this function will only propagate old ACL entries. All newly created
@@ -292,8 +301,9 @@ def _propagate_relationships(relationship_ids, new_acl_ids, user_id):
   """
   if not relationship_ids:
     return
-  child_ids = _handle_relationship_step(relationship_ids, new_acl_ids, user_id)
-  _propagate(child_ids, user_id)
+  child_ids = _handle_relationship_step(
+      graph, relationship_ids, new_acl_ids, user_id)
+  _propagate(graph, child_ids, user_id)
 
 
 def _delete_orphan_acl_entries(deleted_objects):
@@ -366,19 +376,21 @@ def propagate():
   _set_empty_base_ids()
 
   current_user_id = login.get_current_user_id()
+  graph = propagation_graph.get_graph()
 
   # The order of propagation of relationships and other ACLs is important
   # because relationship code excludes other ACLs from propagating.
   if flask.g.new_relationship_ids:
     with utils.benchmark("Propagate ACLs for new relationships"):
       _propagate_relationships(
+          graph,
           flask.g.new_relationship_ids,
           flask.g.new_acl_ids,
           current_user_id,
       )
   if flask.g.new_acl_ids:
     with utils.benchmark("Propagate new ACL entries"):
-      _propagate(flask.g.new_acl_ids, current_user_id)
+      _propagate(graph, list(flask.g.new_acl_ids), current_user_id)
 
   del flask.g.new_acl_ids
   del flask.g.new_relationship_ids
@@ -0,0 +1,93 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Invalidation of stored audit summaries and snapshot counts.
+
+See ggrc.models.audit_rollup for the list of handled changes.
+"""
+
+import flask
+import sqlalchemy as sa
+from sqlalchemy.orm.session import Session
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import audit_rollup
+from ggrc.utils import benchmark
+
+
+# Assessment attributes shown in the audit summary.
+SUMMARY_ATTRS = ("status", "verified_date", "audit_id")
+
+
+def _get_history_values(obj, attr_name):
+  """Get current and previous values of an attribute."""
+  history = sa.inspect(obj).attrs[attr_name].history
+  return set(history.unchanged or ()) | set(history.added or ()) | \
+      set(history.deleted or ())
+
+
+def _has_changes(obj, attr_names):
+  """Check if any of the attributes was changed."""
+  state = sa.inspect(obj)
+  return any(state.attrs[attr_name].history.has_changes()
+             for attr_name in attr_names)
+
+
+def _get_assessment_audits(assessment_ids):
+  """Get ids of audits of assessments."""
+  if not assessment_ids:
+    return set()
+  query = db.session.query(all_models.Assessment.audit_id).filter(
+      all_models.Assessment.id.in_(assessment_ids),
+  ).distinct()
+  return {audit_id for audit_id, in query}
+
+
+def _collect_changes(session):
+  """Get audits whose rollups are affected by the flush.
+
+  Returns:
+    tuple of sets of audit ids with affected summaries and snapshot counts.
+  """
+  summaries = set()
+  snapshot_counts = set()
+  assessment_ids = set()
+  for obj in session.new | session.deleted:
+    if isinstance(obj, all_models.Snapshot):
+      if obj.parent_type == all_models.Audit.__name__:
+        snapshot_counts.add(obj.parent_id)
+    elif isinstance(obj, all_models.Relationship):
+      ends = {
+          obj.source_type: obj.source_id,
+          obj.destination_type: obj.destination_id,
+      }
+      if {"Assessment", "Evidence"} == set(ends):
+        assessment_ids.add(ends["Assessment"])
+      elif {"Audit", "Snapshot"} == set(ends):
+        snapshot_counts.add(ends["Audit"])
+
+  for obj in session.new | session.dirty | session.deleted:
+    if not isinstance(obj, all_models.Assessment):
+      continue
+    if obj in session.dirty and not _has_changes(obj, SUMMARY_ATTRS):
+      continue
+    summaries.update(_get_history_values(obj, "audit_id"))
+
+  summaries.update(_get_assessment_audits(assessment_ids))
+  return summaries, snapshot_counts
+
+
+def after_flush(session, _):
+  """Drop stored rollups affected by the flushed changes."""
+  if not flask.has_app_context():
+    return
+  with benchmark("Invalidate audit rollups"):
+    summaries, snapshot_counts = _collect_changes(session)
+    audit_rollup.invalidate_summary(summaries)
+    audit_rollup.invalidate_snapshot_counts(snapshot_counts)
+
+
+def init_hook():
+  """Initialize hooks that keep stored audit rollups up to date."""
+  sa.event.listen(Session, "after_flush", after_flush)
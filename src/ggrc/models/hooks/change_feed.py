@@ -0,0 +1,25 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Change feed file sink updates.
+
+The sink reads committed revisions from the database, so changes inserted with
+core queries are appended as well.
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.orm.session import Session
+
+from ggrc import settings
+from ggrc.utils import change_feed
+
+
+def update_file_sink(session):
+  """Append records of committed revisions to the change feed file."""
+  if settings.CHANGE_FEED_FILE and not session.transaction.nested:
+    change_feed.sync_file_sink()
+
+
+def init_hook():
+  """Initialize change feed hooks."""
+  sa.event.listen(Session, "after_commit", update_file_sink)
@@ -3,9 +3,14 @@
 
 """Custom Attribute Definition hooks"""
 
+import sqlalchemy as sa
+from sqlalchemy.orm.session import Session
+
 from ggrc import models, views
+from ggrc.cache import cad_registry
 from ggrc.services import signals
 from ggrc.models import custom_attribute_definition as cad
+from ggrc.models.mixins import customattributable
 
 
 def invalidate_cache(sender, obj, src=None, service=None):
@@ -21,8 +26,42 @@ def invalidate_cache(sender, obj, src=None, service=None):
         obj.definition_type)
 
 
+def mark_changed_cads(session, _):
+  """Bypass the CAD registry in sessions with flushed CAD changes."""
+  if any(isinstance(obj, models.all_models.CustomAttributeDefinition)
+         for obj in session.new | session.dirty | session.deleted):
+    cad_registry.mark_session_changed(session)
+
+
+def bump_registry_generation(session):
+  """Invalidate the CAD registry after CAD changes are committed."""
+  if session.transaction.nested:
+    return
+  cad_registry.end_transaction(session, committed=True)
+
+
+def drop_registry_session_data(session):
+  """Drop registry data of the session after a rollback.
+
+  Reverted savepoints keep the data, as CAD changes flushed before them are
+  still pending.
+  """
+  if session.transaction.nested:
+    return
+  cad_registry.end_transaction(session, committed=False)
+
+
 def init_hook():
   """Initialize CAD hooks"""
+  sa.event.listen(Session, "after_flush", mark_changed_cads)
+  sa.event.listen(Session, "after_commit", bump_registry_generation)
+  sa.event.listen(Session, "after_rollback", drop_registry_session_data)
+  attributable = customattributable.CustomAttributable
+  for model in models.all_models.all_models:
+    if (issubclass(model, attributable) and
+            model.__name__ not in attributable.MODELS_WITH_LOCAL_CADS):
+      sa.event.listen(model, "load", cad_registry.set_loaded_cads)
+
   # pylint: disable=unused-variable
   # pylint: disable=too-many-arguments
   @signals.Restful.model_put_after_commit.connect_via(
@@ -366,6 +366,57 @@ class AssessmentTrackerHandler(object):
             assessment_src
         )
 
+  def prepare_assessment_sync(self, assessment_src, issue_tracker_info):
+    """Prepare assessment synchronization with IssueTracker.
+
+    Args:
+        assessment_src: Dictionary with Issue Information from ggrc.
+        issue_tracker_info: Dictionary with Issue Information from tracker
+    Returns:
+        Tuple of issue db info and issue payload to be sent or None if
+        the ticket doesn't need synchronization.
+    """
+    assessment, issue_info = assessment_src["object"], assessment_src["state"]
+    if not self._is_tracker_enabled(assessment.audit):
+      return None
+    issue_db_info = self._collect_assessment_sync_info(
+        assessment,
+        issue_info
+    )
+    issue_payload = self._collect_payload_sync(
+        issue_db_info,
+        issue_tracker_info
+    )
+    if not self._is_need_sync(assessment.id, issue_payload,
+                              issue_tracker_info):
+      return None
+    return issue_db_info, issue_payload
+
+  def send_assessment_sync(self, issue_id, issue_payload):
+    """Send prepared synchronization payload to IssueTracker.
+
+    It doesn't use the database and can be called from worker threads.
+
+    Returns:
+        SyncResult object.
+    """
+    return self._send_issue_sync(issue_id, issue_payload)
+
+  def apply_assessment_sync(self, assessment, issue_db_info, sync_result):
+    """Store result of assessment synchronization with IssueTracker.
+
+    Args:
+        assessment: object from Assessment model
+        issue_db_info: issue db info returned by prepare_assessment_sync
+        sync_result: SyncResult returned by send_assessment_sync
+    """
+    self._ticket_warnings_for_sync(sync_result, assessment)
+    if sync_result.status == SyncResult.SyncResultStatus.SYNCED:
+      all_models.IssuetrackerIssue.create_or_update_from_dict(
+          assessment,
+          issue_db_info
+      )
+
   def handle_assessment_sync(self, assessment_src, issue_id,
                              issue_tracker_info):
     """Handle assessment synchronization with IssueTracker.
@@ -375,27 +426,13 @@ class AssessmentTrackerHandler(object):
         issue_id: issue id for Issue Tracker
         issue_tracker_info: Dictionary with Issue Information from tracker
     """
-    assessment, issue_info = assessment_src["object"], assessment_src["state"]
-    if self._is_tracker_enabled(assessment.audit):
-      issue_db_info = self._collect_assessment_sync_info(
-          assessment,
-          issue_info
-      )
-      issue_payload = self._collect_payload_sync(
-          issue_db_info,
-          issue_tracker_info
-      )
-      if self._is_need_sync(assessment.id, issue_payload, issue_tracker_info):
-        sync_result = self._send_issue_sync(
-            issue_id,
-            issue_payload
-        )
-        self._ticket_warnings_for_sync(sync_result, assessment)
-        if sync_result.status == SyncResult.SyncResultStatus.SYNCED:
-          all_models.IssuetrackerIssue.create_or_update_from_dict(
-              assessment,
-              issue_db_info
-          )
+    prepared = self.prepare_assessment_sync(assessment_src,
+                                            issue_tracker_info)
+    if prepared is not None:
+      issue_db_info, issue_payload = prepared
+      sync_result = self.send_assessment_sync(issue_id, issue_payload)
+      self.apply_assessment_sync(assessment_src["object"], issue_db_info,
+                                 sync_result)
 
   def handle_audit_create(self, audit, audit_src):
     """Handle audit create for Issue Tracker.
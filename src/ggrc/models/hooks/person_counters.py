@@ -0,0 +1,145 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Invalidation of stored "My Work" and "All Objects" counts.
+
+See ggrc.models.person_counters for the list of handled changes.
+"""
+
+import collections
+
+import flask
+import sqlalchemy as sa
+from sqlalchemy.orm.session import Session
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import person_counters
+from ggrc.utils import benchmark
+
+
+def _get_history_values(obj, attr_name):
+  """Get current and previous values of an attribute."""
+  history = sa.inspect(obj).attrs[attr_name].history
+  return set(history.unchanged or ()) | set(history.added or ()) | \
+      set(history.deleted or ())
+
+
+def _get_task_assignees(task_ids):
+  """Get ids of people with roles on cycle tasks."""
+  if not task_ids:
+    return set()
+  acl = all_models.AccessControlList
+  acp = all_models.AccessControlPerson
+  query = db.session.query(acp.person_id).join(
+      acl,
+      acl.id == acp.ac_list_id,
+  ).filter(
+      acl.object_type == all_models.CycleTaskGroupObjectTask.__name__,
+      acl.object_id.in_(task_ids),
+  ).distinct()
+  return {person_id for person_id, in query}
+
+
+def _collect_updates(session):
+  """Get counts affected by changes of roles, attributes and workflows.
+
+  Returns:
+    tuple of
+      - a set of ids of people whose counts must be dropped;
+      - {counter: set of object types} dict of counts dropped for everyone;
+      - a flag that all counts must be dropped.
+  """
+  people = set()
+  types = collections.defaultdict(set)
+  task_ids = set()
+  for obj in session.new | session.dirty | session.deleted:
+    if isinstance(obj, all_models.AccessControlRole):
+      return set(), {}, True
+    if isinstance(obj, (all_models.AccessControlPerson,
+                        all_models.UserRole)):
+      people.update(_get_history_values(obj, "person_id"))
+    elif isinstance(obj, all_models.CustomAttributeValue):
+      people.update(_get_history_values(obj, "attribute_object_id"))
+    elif isinstance(obj, all_models.CycleTaskGroupObjectTask):
+      if obj in session.deleted:
+        # Roles of deleted tasks could be already deleted.
+        types[person_counters.TASK_COUNT].update(
+            person_counters.TASK_COUNT_TYPES)
+      else:
+        task_ids.add(obj.id)
+    elif isinstance(obj, all_models.Cycle):
+      types[person_counters.TASK_COUNT].update(
+          person_counters.TASK_COUNT_TYPES)
+      types[person_counters.MY_WORK].add(
+          all_models.CycleTaskGroupObjectTask.__name__)
+  people.update(_get_task_assignees(task_ids))
+  return people, types, False
+
+
+def _collect_objects(session):
+  """Get counts affected by created and deleted objects.
+
+  Returns:
+    tuple of
+      - {counter: set of object types} dict of counts dropped for people with
+        roles on the changed objects;
+      - a set of (type, id) pairs of the changed objects.
+  """
+  object_types = collections.defaultdict(set)
+  objects = set()
+  for obj in session.new | session.deleted:
+    type_ = obj.__class__.__name__
+    if isinstance(obj, all_models.Relationship):
+      end_types = {obj.source_type, obj.destination_type}
+      object_types[person_counters.ALL_OBJECTS].update(end_types)
+      object_types[person_counters.MY_WORK].update(end_types)
+      objects.add((obj.source_type, obj.source_id))
+      objects.add((obj.destination_type, obj.destination_id))
+    elif type_ in person_counters.ALL_MODELS:
+      object_types[person_counters.ALL_OBJECTS].add(type_)
+      if obj in session.deleted and type_ in person_counters.MY_WORK_MODELS:
+        object_types[person_counters.MY_WORK].add(type_)
+      objects.add((type_, obj.id))
+  return object_types, objects
+
+
+def _get_global_readers():
+  """Get ids of people with system wide read access once per request."""
+  if not hasattr(flask.g, "person_counters_global_readers"):
+    flask.g.person_counters_global_readers = \
+        person_counters.get_global_readers()
+  return flask.g.person_counters_global_readers
+
+
+def after_flush(session, _):
+  """Drop stored counts affected by the flushed changes.
+
+  Counts of created and deleted objects are dropped only for the affected
+  people, so concurrent writers don't lock the counts of everyone.
+  """
+  if not flask.has_app_context():
+    return
+  with benchmark("Invalidate person object counts"):
+    people, types, everything = _collect_updates(session)
+    if everything:
+      person_counters.invalidate_all()
+      return
+    object_types, objects = _collect_objects(session)
+    person_counters.invalidate_people(people)
+    for counter, counter_types in types.iteritems():
+      person_counters.invalidate_types(counter, counter_types)
+    if not object_types:
+      return
+    object_people = person_counters.get_object_people(objects) - people
+    for counter, counter_types in object_types.iteritems():
+      affected = object_people
+      if counter == person_counters.ALL_OBJECTS:
+        affected = affected | _get_global_readers()
+      person_counters.invalidate_types(counter, counter_types - types[counter],
+                                       affected)
+
+
+def init_hook():
+  """Initialize hooks that keep stored counts up to date."""
+  sa.event.listen(Session, "after_flush", after_flush)
@@ -14,6 +14,7 @@ from ggrc import db
 from ggrc.models.hooks import assessment
 from ggrc.services import signals
 from ggrc.models import all_models
+from ggrc.models import relationship_adjacency
 from ggrc.models.comment import Commentable
 from ggrc.models.mixins.base import ChangeTracked
 from ggrc.models import exceptions
@@ -303,6 +304,7 @@ def copy_snapshot_test_plan(objects):
 def init_hook():  # noqa
   """Initialize Relationship-related hooks."""
   # pylint: disable=unused-variable
+  relationship_adjacency.init_hooks()
 
   @signals.Restful.collection_posted.connect_via(all_models.Relationship)
   def handle_comment_mapping(sender, objects=None, **kwargs):
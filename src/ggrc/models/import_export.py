@@ -85,6 +85,90 @@ class ImportExport(Identifiable, db.Model):
     return res
 
 
+# pylint: disable=too-few-public-methods
+class ImportExportChunk(db.Model):
+  """Part of the ImportExport content stored in a separate row.
+
+  Exports are written in chunks so the whole file never has to be kept in
+  memory or written to the database as a single value.
+  """
+
+  __tablename__ = 'import_export_chunks'
+
+  id = db.Column(db.Integer, primary_key=True)
+  import_export_id = db.Column(
+      db.Integer,
+      db.ForeignKey('import_exports.id', ondelete='CASCADE'),
+      nullable=False,
+  )
+  position = db.Column(db.Integer, nullable=False)
+  content = db.Column(mysql.MEDIUMTEXT, nullable=False)
+
+  __table_args__ = (
+      db.UniqueConstraint('import_export_id', 'position',
+                          name='uq_import_export_chunks'),
+  )
+
+
+class ContentChunkWriter(object):
+  """Callable that stores export content chunks of a single job.
+
+  Every chunk is inserted and committed on a separate connection, so writing
+  does not interfere with objects and open queries of the current session.
+  """
+
+  def __init__(self, ie_id):
+    self.ie_id = ie_id
+    self.position = 0
+
+  def __call__(self, content):
+    if isinstance(content, str):
+      content = content.decode("utf-8")
+    with db.engine.begin() as connection:
+      connection.execute(ImportExportChunk.__table__.insert(), {
+          "import_export_id": self.ie_id,
+          "position": self.position,
+          "content": content,
+      })
+    self.position += 1
+
+
+def has_content_chunks(ie_id):
+  """Check if content of the job is stored in chunks."""
+  return db.session.query(ImportExportChunk.query.filter(
+      ImportExportChunk.import_export_id == ie_id
+  ).exists()).scalar()
+
+
+def iter_content_chunks(ie_id):
+  """Generate content chunks of the job one by one in their order."""
+  chunk_ids = [id_ for id_, in db.session.query(ImportExportChunk.id).filter(
+      ImportExportChunk.import_export_id == ie_id
+  ).order_by(ImportExportChunk.position)]
+  for chunk_id in chunk_ids:
+    content, = db.session.query(ImportExportChunk.content).filter(
+        ImportExportChunk.id == chunk_id
+    ).one()
+    yield content
+
+
+def get_content(ie_job):
+  """Get the whole content of the job.
+
+  An export without any blocks writes no chunks, its content is empty.
+  """
+  if has_content_chunks(ie_job.id):
+    return u"".join(iter_content_chunks(ie_job.id))
+  return ie_job.content or u""
+
+
+def delete_content_chunks(ie_id):
+  """Delete all content chunks of the job."""
+  ImportExportChunk.query.filter(
+      ImportExportChunk.import_export_id == ie_id
+  ).delete(synchronize_session=False)
+
+
 def create_import_export_entry(**kwargs):
   """Create ImportExport entry"""
   meta = json.dumps(kwargs['gdrive_metadata']) if 'gdrive_metadata' in kwargs \
@@ -39,6 +39,10 @@ class IssuetrackerIssue(base.ContextRBAC, Base, db.Model):
   issue_id = db.Column(db.String(50), nullable=True)
   issue_url = db.Column(db.String(250), nullable=True)
 
+  # Fingerprint of the last payload sent by bulk update, see
+  # ggrc.integrations.synchronization_jobs.sync_engine.
+  sync_fingerprint = db.Column(db.String(40), nullable=True)
+
   issue_tracked_obj = utils.PolymorphicRelationship("object_id", "object_type",
                                                     "{}_issue_tracked")
 
@@ -188,6 +192,9 @@ class IssuetrackerIssue(base.ContextRBAC, Base, db.Model):
     self.issue_id = info['issue_id']
     self.issue_url = info['issue_url']
 
+    # The ticket may be changed by other means than bulk update.
+    self.sync_fingerprint = None
+
     if info.get('due_date'):
       self.due_date = info.get('due_date')
 
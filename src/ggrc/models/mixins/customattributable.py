@@ -438,10 +438,17 @@ class CustomAttributable(object):
   @classmethod
   def eager_query(cls):
     """Define fields to be loaded eagerly to lower the count of DB queries."""
+    from ggrc.cache import cad_registry
     query = super(CustomAttributable, cls).eager_query()
+    # Global CADs of models without local CADs are set from the registry
+    # when the objects are loaded.
+    if (cls.__name__ in cls.MODELS_WITH_LOCAL_CADS or
+            not cad_registry.warm_session(cls._inflector.table_singular)):
+      query = query.options(
+          orm.subqueryload('custom_attribute_definitions')
+             .undefer_group('CustomAttributeDefinition_complete'),
+      )
     query = query.options(
-        orm.subqueryload('custom_attribute_definitions')
-           .undefer_group('CustomAttributeDefinition_complete'),
         orm.subqueryload('_custom_attribute_values')
            .undefer_group('CustomAttributeValue_complete')
            .subqueryload('{0}_custom_attributable'.format(cls.__name__)),
@@ -459,6 +466,7 @@ class CustomAttributable(object):
   def log_json(self):
     """Log custom attribute values."""
     # pylint: disable=not-an-iterable
+    from ggrc.cache import cad_registry
     from ggrc.models.custom_attribute_definition import \
         CustomAttributeDefinition
 
@@ -467,18 +475,23 @@ class CustomAttributable(object):
     if self.custom_attribute_values:
       res["custom_attribute_values"] = [
           value.log_json() for value in self.custom_attribute_values]
-      # fetch definitions form database because `self.custom_attribute`
-      # may not be populated
-      defs = CustomAttributeDefinition.query.filter(
-          CustomAttributeDefinition.definition_type == self._inflector.table_singular,  # noqa # pylint: disable=protected-access
-          CustomAttributeDefinition.id.in_([
-              value.custom_attribute_id
-              for value in self.custom_attribute_values
-          ])
-      )
+      # take definitions from the registry or the database because
+      # `self.custom_attribute` may not be populated
+      definition_type = self._inflector.table_singular  # noqa # pylint: disable=protected-access
+      global_defs = cad_registry.get_log_jsons(definition_type)
+      cad_ids = {value.custom_attribute_id
+                 for value in self.custom_attribute_values}
+      def_jsons = [dict(global_defs[cad_id])
+                   for cad_id in sorted(cad_ids) if cad_id in global_defs]
+      local_ids = cad_ids - set(global_defs)
+      if local_ids:
+        defs = CustomAttributeDefinition.query.filter(
+            CustomAttributeDefinition.definition_type == definition_type,
+            CustomAttributeDefinition.id.in_(local_ids)
+        )
+        def_jsons.extend(definition.log_json() for definition in defs)
       # also log definitions to freeze field names in time
-      res["custom_attribute_definitions"] = [
-          definition.log_json() for definition in defs]
+      res["custom_attribute_definitions"] = def_jsons
     else:
       res["custom_attribute_definitions"] = []
       res["custom_attribute_values"] = []
@@ -0,0 +1,498 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Materialized object counters of "My Work" and "All Objects" pages.
+
+Counts shown on dashboard pages of a person are stored in the
+person_object_counts table:
+
+  - my_work: number of readable objects of each type on the My Work page;
+  - all_objects: number of readable objects of each type;
+  - task_count: number of open and overdue cycle tasks of the person.
+
+Counts are computed with permissions of the person, so they are computed
+only in requests of that person or with _as_user. Missing counts are
+computed and stored when they are requested.
+
+Changes that affect counts delete the stored ones in the same transaction,
+see ggrc.models.hooks.person_counters:
+  - added or removed roles and global roles drop all counts of the person;
+  - created and deleted objects drop counts of their type for people with
+    roles on them and All Objects counts of their type for people with
+    system wide read access;
+  - relationships drop counts of the types of both ends the same way for
+    people with roles on either end, as they can propagate permissions;
+  - changed cycle tasks drop task counts of their assignees;
+  - changed role definitions and cycles drop counts affected by them for
+    everyone.
+Task counts computed on another day are treated as missing, because tasks
+become overdue without any changes.
+
+Missing counts are computed from the transaction snapshot, which can be older
+than a concurrently committed invalidation. For that reason invalidations
+increment generations in person_count_generations: the ones of the affected
+people, or the global one if counts of everyone are dropped. Computed counts
+are stored only if both generations are still the ones read together with
+the missing counts, so stale counts never replace invalidated ones.
+
+A nightly job recomputes stored counts of people with the oldest counts
+and reports the ones that drifted away from the computed value.
+"""
+
+import collections
+import contextlib
+import datetime
+import logging
+
+import flask
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.utils import benchmark
+
+
+logger = logging.getLogger(__name__)
+
+MY_WORK = "my_work"
+ALL_OBJECTS = "all_objects"
+TASK_COUNT = "task_count"
+
+# Object types of task_count counter.
+OPEN_TASKS = "open"
+OVERDUE_TASKS = "overdue"
+TASK_COUNT_TYPES = (OPEN_TASKS, OVERDUE_TASKS)
+
+ALL_MODELS = {
+    "Issue", "AccessGroup", "Assessment", "Audit", "Contract", "Control",
+    "DataAsset", "Document", "Evidence", "Facility", "Market", "Objective",
+    "OrgGroup", "Policy", "Process", "Product", "Program", "Project",
+    "Regulation", "Risk", "Requirement", "Standard", "System",
+    "TechnologyEnvironment", "Threat", "Vendor", "CycleTaskGroupObjectTask",
+    "Workflow", "Metric", "ProductGroup", "KeyReport",
+}
+
+MY_WORK_MODELS = ALL_MODELS - {"Workflow"}
+
+# Number of people whose counts are checked by a single reconcile run.
+RECONCILE_BATCH_SIZE = 200
+
+# Key of the generation of counts of everyone in person_count_generations.
+GLOBAL_GENERATION_ID = 0
+
+
+# pylint: disable=too-few-public-methods
+class PersonObjectCount(db.Model):
+  """Stored count of objects of a type for a person."""
+
+  __tablename__ = "person_object_counts"
+
+  person_id = db.Column(
+      db.Integer,
+      db.ForeignKey("people.id", ondelete="CASCADE"),
+      primary_key=True,
+      autoincrement=False,
+  )
+  counter = db.Column(db.String(32), primary_key=True)
+  object_type = db.Column(db.String(250), primary_key=True)
+  value = db.Column(db.Integer, nullable=False)
+  computed_at = db.Column(db.DateTime, nullable=False)
+
+  __table_args__ = (
+      db.Index("ix_person_object_counts_counter_type",
+               "counter", "object_type"),
+      db.Index("ix_person_object_counts_computed_at", "computed_at"),
+  )
+
+
+class PersonCountGeneration(db.Model):
+  """Generation of stored counts of a person or of everyone."""
+
+  __tablename__ = "person_count_generations"
+
+  person_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  generation = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _count_readable(model, *filters):
+  """Count objects of model that the current user can read."""
+  from ggrc.query import builder
+  # pylint: disable=protected-access
+  permission_filter = builder.QueryHelper._get_type_query(model, "read")
+  if permission_filter is not None:
+    filters += (permission_filter,)
+  return model.query.filter(*filters).count()
+
+
+def _compute_my_work(person_id, types):
+  """Count readable objects of types on the My Work page of the person."""
+  from ggrc import models
+  from ggrc.query import my_objects
+  aliased = my_objects.get_myobjects_query(types=types,
+                                           contact_id=person_id)
+  all_ids = collections.defaultdict(set)
+  for type_, id_ in db.session.query(aliased.c.type, aliased.c.id):
+    all_ids[type_].add(id_)
+
+  counts = {type_: 0 for type_ in types}
+  for type_, ids in all_ids.iteritems():
+    model = models.get_model(type_)
+    counts[type_] = _count_readable(model, model.id.in_(ids))
+  return counts
+
+
+def _compute_all_objects(_, types):
+  """Count readable objects of types."""
+  from ggrc import models
+  return {type_: _count_readable(models.get_model(type_)) for type_ in types}
+
+
+def _compute_task_count(person_id, _):
+  """Count open and overdue cycle tasks assigned to the person."""
+  # query below ignores acr.read flag because this is done on a
+  # non_editable role that has read rights:
+  counts_query = db.session.execute(
+      """
+      SELECT
+          overdue,
+          sum(task_count)
+      FROM (
+          SELECT
+              ct.end_date < :today AS overdue,
+              count(DISTINCT ct.id) AS task_count
+          FROM cycle_task_group_object_tasks AS ct
+          JOIN cycles AS c ON
+              c.id = ct.cycle_id
+          JOIN access_control_list AS acl
+              ON acl.object_id = ct.id
+              AND acl.object_type = "CycleTaskGroupObjectTask"
+          JOIN access_control_people AS acp
+              ON acp.ac_list_id = acl.id
+          JOIN access_control_roles as acr
+              ON acl.ac_role_id = acr.id
+          WHERE
+              ct.status != "Verified" AND
+              c.is_verification_needed = 1 AND
+              c.is_current = 1 AND
+              acp.person_id = :person_id AND
+              acr.name IN ("Task Assignees", "Task Secondary Assignees")
+          GROUP BY overdue
+
+          UNION ALL
+
+          SELECT
+              ct.end_date < :today AS overdue,
+              count(DISTINCT ct.id) AS task_count
+          FROM cycle_task_group_object_tasks AS ct
+          JOIN cycles AS c ON
+              c.id = ct.cycle_id
+          JOIN access_control_list AS acl
+              ON acl.object_id = ct.id
+              AND acl.object_type = "CycleTaskGroupObjectTask"
+          JOIN access_control_people AS acp
+              ON acp.ac_list_id = acl.id
+          JOIN access_control_roles as acr
+              ON acl.ac_role_id = acr.id
+          WHERE
+              ct.status != "Finished" AND
+              c.is_verification_needed = 0 AND
+              c.is_current = 1 AND
+              acp.person_id = :person_id AND
+              acr.name IN ("Task Assignees", "Task Secondary Assignees")
+          GROUP BY overdue
+      ) as temp
+      GROUP BY overdue
+      """,
+      {
+          # Using today instead of DATE(NOW()) for easier testing with
+          # freeze gun.
+          "today": datetime.date.today(),
+          "person_id": person_id,
+      }
+  )
+  counts = dict(counts_query.fetchall())
+  return {
+      OPEN_TASKS: int(sum(counts.values())),
+      OVERDUE_TASKS: int(counts.get(1, 0)),
+  }
+
+
+_COMPUTE = {
+    MY_WORK: _compute_my_work,
+    ALL_OBJECTS: _compute_all_objects,
+    TASK_COUNT: _compute_task_count,
+}
+
+
+def _today_start():
+  return datetime.datetime.combine(datetime.datetime.utcnow().date(),
+                                   datetime.time())
+
+
+def _get_generations(person_id, lock=False):
+  """Get generations of stored counts of a person.
+
+  Args:
+    person_id: id of the person.
+    lock: read the latest committed generations with a shared lock that
+        blocks invalidations until the end of the transaction.
+
+  Returns:
+    tuple of the generation of the person and the global generation.
+  """
+  table = PersonCountGeneration.__table__
+  query = db.session.query(table.c.person_id, table.c.generation).filter(
+      table.c.person_id.in_([person_id, GLOBAL_GENERATION_ID]),
+  )
+  if lock:
+    query = query.with_for_update(read=True)
+  generations = dict(query)
+  return (generations.get(person_id, 0),
+          generations.get(GLOBAL_GENERATION_ID, 0))
+
+
+def _bump_generations(person_ids):
+  """Increment generations of people or the global one."""
+  db.session.execute(
+      sa.text("""
+          INSERT INTO person_count_generations (person_id, generation)
+          VALUES (:person_id, 1)
+          ON DUPLICATE KEY UPDATE generation = generation + 1
+      """),
+      [{"person_id": person_id} for person_id in sorted(person_ids)],
+  )
+
+
+def _store(person_id, counter, counts, generations):
+  """Replace stored counts of a person if they were not invalidated.
+
+  Args:
+    person_id: id of the person.
+    counter: MY_WORK, ALL_OBJECTS or TASK_COUNT.
+    counts: {object type: value} dict of computed counts.
+    generations: generations read before the counts were computed.
+  """
+  if not counts:
+    return
+  if _get_generations(person_id, lock=True) != generations:
+    return
+  table = PersonObjectCount.__table__
+  now = datetime.datetime.utcnow()
+  db.session.execute(table.delete().where(sa.and_(
+      table.c.person_id == person_id,
+      table.c.counter == counter,
+      table.c.object_type.in_(counts.keys()),
+  )))
+  # A concurrent request could have stored the same counts in the meantime.
+  db.session.execute(table.insert().prefix_with("IGNORE"), [
+      {
+          "person_id": person_id,
+          "counter": counter,
+          "object_type": object_type,
+          "value": value,
+          "computed_at": now,
+      }
+      for object_type, value in counts.iteritems()
+  ])
+
+
+def get_counts(person_id, counter, types):
+  """Get counts of the current user, computing the missing ones.
+
+  Args:
+    person_id: id of the current user.
+    counter: MY_WORK, ALL_OBJECTS or TASK_COUNT.
+    types: object types to count, TASK_COUNT_TYPES for TASK_COUNT.
+
+  Returns:
+    {object type: count} dict.
+  """
+  table = PersonObjectCount.__table__
+  generations = _get_generations(person_id)
+  query = db.session.query(table.c.object_type, table.c.value).filter(
+      table.c.person_id == person_id,
+      table.c.counter == counter,
+      table.c.object_type.in_(types),
+  )
+  if counter == TASK_COUNT:
+    today_start = _today_start()
+    query = query.filter(
+        table.c.computed_at >= today_start,
+        table.c.computed_at < today_start + datetime.timedelta(days=1),
+    )
+  counts = dict(query)
+  missing = set(types) - set(counts)
+  if missing:
+    with benchmark("Compute missing {} counts".format(counter)):
+      computed = _COMPUTE[counter](person_id, missing)
+    _store(person_id, counter, computed, generations)
+    db.session.plain_commit()
+    counts.update(computed)
+  return counts
+
+
+def invalidate_people(person_ids):
+  """Drop all stored counts of people."""
+  person_ids = {person_id for person_id in person_ids if person_id}
+  if not person_ids:
+    return
+  _bump_generations(person_ids)
+  table = PersonObjectCount.__table__
+  db.session.execute(table.delete().where(
+      table.c.person_id.in_(person_ids)
+  ))
+
+
+def invalidate_types(counter, object_types, person_ids=None):
+  """Drop stored counts of object types.
+
+  Args:
+    counter: MY_WORK, ALL_OBJECTS or TASK_COUNT.
+    object_types: object types of dropped counts.
+    person_ids: ids of people whose counts are dropped, everyone if None.
+  """
+  object_types = {object_type for object_type in object_types if object_type}
+  if not object_types:
+    return
+  table = PersonObjectCount.__table__
+  condition = sa.and_(
+      table.c.counter == counter,
+      table.c.object_type.in_(object_types),
+  )
+  if person_ids is not None:
+    person_ids = {person_id for person_id in person_ids if person_id}
+    if not person_ids:
+      return
+    # The primary key starts with person_id, so only the rows of these
+    # people are locked.
+    condition = sa.and_(table.c.person_id.in_(person_ids), condition)
+    _bump_generations(person_ids)
+  else:
+    _bump_generations([GLOBAL_GENERATION_ID])
+  db.session.execute(table.delete().where(condition))
+
+
+def get_object_people(objects):
+  """Get ids of people with direct or propagated roles on objects.
+
+  Args:
+    objects: set of (type, id) pairs.
+  """
+  if not objects:
+    return set()
+  from ggrc.models import all_models
+  acl = all_models.AccessControlList
+  acp = all_models.AccessControlPerson
+  query = db.session.query(acp.person_id).join(
+      acl,
+      acp.ac_list_id == sa.func.coalesce(acl.base_id, acl.id),
+  ).filter(
+      sa.tuple_(acl.object_type, acl.object_id).in_(objects),
+  ).distinct()
+  return {person_id for person_id, in query}
+
+
+def get_global_readers():
+  """Get ids of people with system wide read access.
+
+  They can read all objects, so any created or deleted object changes their
+  All Objects counts.
+  """
+  from email.utils import parseaddr
+  from ggrc import settings
+  from ggrc.models import all_models
+  from ggrc.rbac import SystemWideRoles
+  from ggrc_basic_permissions.models import Role, UserRole
+  emails = set(getattr(settings, "BOOTSTRAP_ADMIN_USERS", []))
+  external_app_email = parseaddr(settings.EXTERNAL_APP_USER or "")[1]
+  if external_app_email:
+    emails.add(external_app_email)
+  query = db.session.query(UserRole.person_id).join(Role).filter(
+      Role.name.in_(SystemWideRoles.read_roles),
+  )
+  if emails:
+    query = query.union(db.session.query(all_models.Person.id).filter(
+        all_models.Person.email.in_(emails),
+    ))
+  return {person_id for person_id, in query}
+
+
+def invalidate_all():
+  """Drop all stored counts."""
+  _bump_generations([GLOBAL_GENERATION_ID])
+  db.session.execute(PersonObjectCount.__table__.delete())
+
+
+@contextlib.contextmanager
+def _as_user(person):
+  """Use person as the current user for permission checks."""
+  saved = {name: getattr(flask.g, name)
+           for name in ("_current_user", "_request_permissions")
+           if hasattr(flask.g, name)}
+  flask.g._current_user = person  # pylint: disable=protected-access
+  flask.g._request_permissions = None  # pylint: disable=protected-access
+  try:
+    yield
+  finally:
+    for name in ("_current_user", "_request_permissions"):
+      if name in saved:
+        setattr(flask.g, name, saved[name])
+      elif hasattr(flask.g, name):
+        delattr(flask.g, name)
+
+
+def reconcile(batch_size=RECONCILE_BATCH_SIZE):
+  """Recompute stored counts of people with the oldest counts.
+
+  Counts that differ from the computed ones are fixed and reported.
+
+  Returns:
+    number of drifted counts.
+  """
+  from ggrc.models import all_models
+  table = PersonObjectCount.__table__
+  db.session.execute(table.delete().where(sa.and_(
+      table.c.counter == TASK_COUNT,
+      table.c.computed_at < _today_start(),
+  )))
+  person_ids = [person_id for person_id, in db.session.query(
+      table.c.person_id,
+  ).group_by(
+      table.c.person_id,
+  ).order_by(
+      sa.func.min(table.c.computed_at),
+  ).limit(batch_size)]
+  if not person_ids:
+    db.session.plain_commit()
+    return 0
+
+  generations = {person_id: _get_generations(person_id)
+                 for person_id in person_ids}
+  stored = collections.defaultdict(dict)
+  for person_id, counter, object_type, value in db.session.query(
+      table.c.person_id, table.c.counter, table.c.object_type, table.c.value,
+  ).filter(table.c.person_id.in_(person_ids)):
+    stored[(person_id, counter)][object_type] = value
+
+  drifted = 0
+  people = all_models.Person.query.filter(
+      all_models.Person.id.in_(person_ids)
+  )
+  for person in people:
+    with _as_user(person):
+      for counter in _COMPUTE:
+        counts = stored.get((person.id, counter))
+        if not counts:
+          continue
+        computed = _COMPUTE[counter](person.id, counts.keys())
+        for object_type, value in counts.iteritems():
+          if computed[object_type] != value:
+            drifted += 1
+            logger.warning(
+                "Drifted %s count of %s for person %s: stored %s, "
+                "computed %s", counter, object_type, person.id, value,
+                computed[object_type])
+        _store(person.id, counter, computed, generations[person.id])
+    db.session.plain_commit()
+  logger.info("Reconciled counts of %s people, %s drifted counts",
+              len(person_ids), drifted)
+  return drifted
@@ -294,36 +294,22 @@ class RelationshipsCache(object):
 
   def populate_cache(self, stubs):
     """Fetch all mappings for objects in stubs, cache them in self.cache."""
-    # Union is here to convince mysql to use two separate indices and
-    # merge te results. Just using `or` results in a full-table scan
-    # Manual column list avoids loading the full object which would also try to
-    # load related objects
-    cols = db.session.query(
-        Relationship.source_type, Relationship.source_id,
-        Relationship.destination_type, Relationship.destination_id)
-    relationships = cols.filter(
+    # pylint: disable=cyclic-import
+    from ggrc.models.relationship_adjacency import RelationshipAdjacency
+    adjacency = RelationshipAdjacency
+    # The adjacency table holds both directions of every relationship, so
+    # the complete neighborhood is fetched with a single primary key lookup.
+    # Manual column list avoids loading the full object.
+    neighbors = db.session.query(
+        adjacency.object_type, adjacency.object_id,
+        adjacency.neighbor_type, adjacency.neighbor_id,
+    ).filter(
         sa.tuple_(
-            Relationship.source_type,
-            Relationship.source_id
+            adjacency.object_type,
+            adjacency.object_id,
         ).in_(
             [(s.type, s.id) for s in stubs]
         )
-    ).union_all(
-        cols.filter(
-            sa.tuple_(
-                Relationship.destination_type,
-                Relationship.destination_id
-            ).in_(
-                [(s.type, s.id) for s in stubs]
-            )
-        )
     ).all()
-    for (src_type, src_id, dst_type, dst_id) in relationships:
-      src = Stub(src_type, src_id)
-      dst = Stub(dst_type, dst_id)
-      # only store a neighbor if we queried for it since this way we know
-      # we'll be storing complete neighborhood by the end of the loop
-      if src in stubs:
-        self.cache[src].add(dst)
-      if dst in stubs:
-        self.cache[dst].add(src)
+    for (obj_type, obj_id, neighbor_type, neighbor_id) in neighbors:
+      self.cache[Stub(obj_type, obj_id)].add(Stub(neighbor_type, neighbor_id))
@@ -0,0 +1,294 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Bidirectional adjacency index of relationships.
+
+A relationship is stored once, from source to destination, so finding all
+objects mapped to an object requires a query on source columns and another
+one on destination columns. The relationship_adjacency table stores every
+relationship twice, once for each of its ends:
+
+    (object_type, object_id) -> (neighbor_type, neighbor_id)
+
+so neighbors of an object are found with a single range scan of the primary
+key.
+
+Rows are inserted by the Relationship mapper hooks for relationships created
+through the ORM. Code that inserts relationships with plain SQL must wrap
+the insert into sync_inserted(). Rows are removed together with their
+relationship by the foreign key.
+
+Consistency of the table is checked and the table is rebuilt with:
+
+    python -m ggrc.models.relationship_adjacency check
+    python -m ggrc.models.relationship_adjacency rebuild
+"""
+
+import argparse
+import contextlib
+import logging
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.models.relationship import Relationship
+from ggrc.utils import benchmark
+
+
+logger = logging.getLogger(__name__)
+
+# Number of relationships handled by a single rebuild statement.
+REBUILD_CHUNK_SIZE = 10000
+
+
+# pylint: disable=too-few-public-methods
+class RelationshipAdjacency(db.Model):
+  """One direction of a relationship."""
+
+  __tablename__ = "relationship_adjacency"
+
+  object_type = db.Column(db.String(250), primary_key=True)
+  object_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  neighbor_type = db.Column(db.String(250), primary_key=True)
+  neighbor_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  relationship_id = db.Column(
+      db.Integer,
+      db.ForeignKey("relationships.id", ondelete="CASCADE"),
+      primary_key=True,
+      autoincrement=False,
+  )
+
+  __table_args__ = (
+      db.Index("ix_relationship_adjacency_relationship", "relationship_id"),
+  )
+
+
+def neighbors_query(object_type, object_ids, neighbor_type=None):
+  """Get query for neighbors of the given objects.
+
+  Args:
+    object_type: type of the objects.
+    object_ids: list of object ids or a select statement with them.
+    neighbor_type: optional type of the neighbors.
+
+  Returns:
+    query with neighbor_id column, with neighbor_type column as well if
+    neighbor_type is not given.
+  """
+  adjacency = RelationshipAdjacency
+  columns = [adjacency.neighbor_id]
+  if neighbor_type is None:
+    columns = [adjacency.neighbor_type, adjacency.neighbor_id]
+  query = db.session.query(*columns).filter(
+      adjacency.object_type == object_type,
+      adjacency.object_id.in_(object_ids),
+  )
+  if neighbor_type is not None:
+    query = query.filter(adjacency.neighbor_type == neighbor_type)
+  return query
+
+
+def _directions(relationships):
+  """Get select statements for both directions of the relationships.
+
+  Args:
+    relationships: relationships table or alias filtered in the where clause
+      of the returned statements.
+  """
+  return [
+      sa.select([
+          relationships.c.source_type,
+          relationships.c.source_id,
+          relationships.c.destination_type,
+          relationships.c.destination_id,
+          relationships.c.id,
+      ]),
+      sa.select([
+          relationships.c.destination_type,
+          relationships.c.destination_id,
+          relationships.c.source_type,
+          relationships.c.source_id,
+          relationships.c.id,
+      ]),
+  ]
+
+
+def sync_relationships(condition, connection=None):
+  """Insert adjacency rows for relationships matching the condition.
+
+  Args:
+    condition: filter on the relationships table.
+    connection: connection to use, db.session by default.
+  """
+  if connection is None:
+    connection = db.session
+  table = RelationshipAdjacency.__table__
+  relationships = Relationship.__table__
+  columns = ["object_type", "object_id", "neighbor_type", "neighbor_id",
+             "relationship_id"]
+  for select in _directions(relationships):
+    connection.execute(
+        table.insert().prefix_with("IGNORE").from_select(
+            columns, select.where(condition)
+        )
+    )
+
+
+def _get_last_relationship_id():
+  return db.session.query(sa.func.max(Relationship.id)).scalar() or 0
+
+
+@contextlib.contextmanager
+def sync_inserted():
+  """Add adjacency rows for relationships inserted with plain SQL.
+
+  Usage:
+
+    with sync_inserted():
+      db.session.execute(relationships_table.insert()...)
+  """
+  last_id = _get_last_relationship_id()
+  yield
+  sync_relationships(Relationship.__table__.c.id > last_id)
+
+
+def _delete_for(connection, relationship_id):
+  """Delete adjacency rows of a single relationship."""
+  table = RelationshipAdjacency.__table__
+  connection.execute(
+      table.delete().where(table.c.relationship_id == relationship_id)
+  )
+
+
+# pylint: disable=unused-argument
+def _handle_insert(mapper, connection, target):
+  """Add adjacency rows for a relationship inserted through the ORM."""
+  table = RelationshipAdjacency.__table__
+  connection.execute(table.insert().prefix_with("IGNORE"), [
+      {
+          "object_type": target.source_type,
+          "object_id": target.source_id,
+          "neighbor_type": target.destination_type,
+          "neighbor_id": target.destination_id,
+          "relationship_id": target.id,
+      },
+      {
+          "object_type": target.destination_type,
+          "object_id": target.destination_id,
+          "neighbor_type": target.source_type,
+          "neighbor_id": target.source_id,
+          "relationship_id": target.id,
+      },
+  ])
+
+
+def _handle_update(mapper, connection, target):
+  """Rewrite adjacency rows of a relationship with changed ends."""
+  columns = ("source_type", "source_id", "destination_type", "destination_id")
+  state = sa.inspect(target)
+  if not any(state.attrs[column].history.has_changes()
+             for column in columns):
+    return
+  _delete_for(connection, target.id)
+  _handle_insert(mapper, connection, target)
+
+
+def init_hooks():
+  """Keep adjacency rows in sync with relationships."""
+  sa.event.listen(Relationship, "after_insert", _handle_insert)
+  sa.event.listen(Relationship, "after_update", _handle_update)
+
+
+def _missing_query():
+  """Get query for relationship directions missing in the adjacency table."""
+  relationships = Relationship.__table__
+  adjacency = RelationshipAdjacency.__table__
+  queries = []
+  for select in _directions(relationships):
+    columns = list(select.inner_columns)
+    queries.append(select.where(~sa.exists().where(sa.and_(
+        adjacency.c.object_type == columns[0],
+        adjacency.c.object_id == columns[1],
+        adjacency.c.neighbor_type == columns[2],
+        adjacency.c.neighbor_id == columns[3],
+        adjacency.c.relationship_id == columns[4],
+    ))))
+  return sa.union_all(*queries)
+
+
+def _stale_query():
+  """Get query for adjacency rows that don't match any relationship."""
+  relationships = Relationship.__table__
+  adjacency = RelationshipAdjacency.__table__
+  return sa.select([adjacency]).where(~sa.exists().where(sa.and_(
+      relationships.c.id == adjacency.c.relationship_id,
+      sa.or_(
+          sa.and_(
+              relationships.c.source_type == adjacency.c.object_type,
+              relationships.c.source_id == adjacency.c.object_id,
+              relationships.c.destination_type == adjacency.c.neighbor_type,
+              relationships.c.destination_id == adjacency.c.neighbor_id,
+          ),
+          sa.and_(
+              relationships.c.destination_type == adjacency.c.object_type,
+              relationships.c.destination_id == adjacency.c.object_id,
+              relationships.c.source_type == adjacency.c.neighbor_type,
+              relationships.c.source_id == adjacency.c.neighbor_id,
+          ),
+      ),
+  )))
+
+
+def check_consistency():
+  """Compare the adjacency table with relationships.
+
+  Returns:
+    dict with counts of "missing" relationship directions and "stale"
+    adjacency rows.
+  """
+  with benchmark("Check relationship adjacency consistency"):
+    missing = db.session.execute(
+        sa.select([sa.func.count()]).select_from(
+            _missing_query().alias("missing"))
+    ).scalar()
+    stale = db.session.execute(
+        sa.select([sa.func.count()]).select_from(
+            _stale_query().alias("stale"))
+    ).scalar()
+  return {"missing": missing, "stale": stale}
+
+
+def rebuild():
+  """Fill the adjacency table from relationships from scratch."""
+  table = RelationshipAdjacency.__table__
+  relationships = Relationship.__table__
+  db.session.execute(table.delete())
+  db.session.plain_commit()
+  last_id = _get_last_relationship_id()
+  for start in range(0, last_id, REBUILD_CHUNK_SIZE):
+    with benchmark("Rebuild relationship adjacency chunk"):
+      sync_relationships(sa.and_(
+          relationships.c.id > start,
+          relationships.c.id <= start + REBUILD_CHUNK_SIZE,
+      ))
+      db.session.plain_commit()
+    logger.info("Rebuilt adjacency of relationships: %s / %s",
+                min(start + REBUILD_CHUNK_SIZE, last_id), last_id)
+
+
+def main():
+  """Check or rebuild the adjacency table."""
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("command", choices=("check", "rebuild"))
+  args = parser.parse_args()
+
+  from ggrc.app import app
+  with app.app_context():
+    if args.command == "rebuild":
+      rebuild()
+    print check_consistency()
+
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO)
+  main()
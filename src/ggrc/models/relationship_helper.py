@@ -11,7 +11,9 @@ from ggrc.extensions import get_extension_modules
 from ggrc import models
 from ggrc.models import Snapshot
 from ggrc.models import all_models
+from ggrc.models import relationship_adjacency
 from ggrc.models.relationship import Relationship
+from ggrc.models.relationship_adjacency import RelationshipAdjacency
 from ggrc.snapshotter.rules import Types
 
 
@@ -100,30 +102,17 @@ def _array_union(queries):
 def _assessment_object_mappings(object_type, related_type, related_ids):
   """Get Object ids for audit scope objects and snapshotted objects."""
 
+  adjacency = RelationshipAdjacency
   if (object_type in Types.scoped | Types.trans_scope and
           related_type in Types.all):
-
-    source_query = db.session.query(
-        Relationship.destination_id.label("result_id"),
+    query = db.session.query(
+        adjacency.neighbor_id.label("result_id"),
     ).join(
         Snapshot,
         and_(
-            Relationship.source_id == Snapshot.id,
-            Relationship.source_type == Snapshot.__name__,
-            Relationship.destination_type == object_type,
-            Snapshot.child_type == related_type,
-            Snapshot.child_id.in_(related_ids),
-        )
-    )
-
-    destination_query = db.session.query(
-        Relationship.source_id.label("result_id"),
-    ).join(
-        Snapshot,
-        and_(
-            Relationship.destination_id == Snapshot.id,
-            Relationship.destination_type == Snapshot.__name__,
-            Relationship.source_type == object_type,
+            adjacency.object_id == Snapshot.id,
+            adjacency.object_type == Snapshot.__name__,
+            adjacency.neighbor_type == object_type,
             Snapshot.child_type == related_type,
             Snapshot.child_id.in_(related_ids),
         )
@@ -131,28 +120,15 @@ def _assessment_object_mappings(object_type, related_type, related_ids):
 
   elif (object_type in Types.all and
         related_type in Types.scoped | Types.trans_scope):
-    source_query = db.session.query(
-        Snapshot.child_id.label("result_id"),
-    ).join(
-        Relationship,
-        and_(
-            Relationship.source_id == Snapshot.id,
-            Relationship.source_type == Snapshot.__name__,
-            Relationship.destination_type == related_type,
-            Relationship.destination_id.in_(related_ids),
-            Snapshot.child_type == object_type,
-        )
-    )
-
-    destination_query = db.session.query(
+    query = db.session.query(
         Snapshot.child_id.label("result_id"),
     ).join(
-        Relationship,
+        adjacency,
         and_(
-            Relationship.destination_id == Snapshot.id,
-            Relationship.destination_type == Snapshot.__name__,
-            Relationship.source_type == related_type,
-            Relationship.source_id.in_(related_ids),
+            adjacency.neighbor_id == Snapshot.id,
+            adjacency.neighbor_type == Snapshot.__name__,
+            adjacency.object_type == related_type,
+            adjacency.object_id.in_(related_ids),
             Snapshot.child_type == object_type,
         )
     )
@@ -163,7 +139,7 @@ def _assessment_object_mappings(object_type, related_type, related_ids):
         "object types: '{}' - '{}'".format(object_type, related_type)
     )
 
-  return source_query.union_all(destination_query)
+  return query
 
 
 def _parent_object_mappings(object_type, related_type, related_ids):
@@ -213,22 +189,9 @@ def get_ids_related_to(object_type, related_type, related_ids=None):
     return _parent_object_mappings(
         object_type, related_type, related_ids)
 
-  destination_ids = db.session.query(Relationship.destination_id).filter(
-      and_(
-          Relationship.destination_type == object_type,
-          Relationship.source_type == related_type,
-          Relationship.source_id.in_(related_ids),
-      )
-  )
-  source_ids = db.session.query(Relationship.source_id).filter(
-      and_(
-          Relationship.source_type == object_type,
-          Relationship.destination_type == related_type,
-          Relationship.destination_id.in_(related_ids),
-      )
-  )
-
-  queries = [destination_ids, source_ids]
+  queries = [relationship_adjacency.neighbors_query(
+      related_type, related_ids, object_type,
+  )]
   queries.extend(get_extension_mappings(
       object_type, related_type, related_ids))
   queries.extend(get_special_mappings(
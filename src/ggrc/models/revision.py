@@ -3,6 +3,8 @@
 
 """Defines a Revision model for storing snapshots."""
 
+from sqlalchemy.ext.hybrid import hybrid_property
+
 from ggrc import builder
 from ggrc import db
 from ggrc.models.mixins import base
@@ -10,12 +12,164 @@ from ggrc.models.mixins import Base
 from ggrc.models.mixins.filterable import Filterable
 from ggrc.models import reflection
 from ggrc.access_control import role
+from ggrc.models.types import CompressedJsonType
 from ggrc.models.types import LongJsonType
 from ggrc.utils.revisions_diff import builder as revisions_diff
 from ggrc.utils import referenced_objects
+from ggrc.utils import revision_storage
 from ggrc.utils.revisions_diff import meta_info
 
 
+# Fields of old revisions with people of roles, mapped to role names.
+LEGACY_ROLE_FIELDS = {
+    "principal_assessor": "Principal Assignees",
+    "secondary_assessor": "Secondary Assignees",
+    "contact": "Primary Contacts",
+    "secondary_contact": "Secondary Contacts",
+    "owners": "Admin",
+}
+
+# Control does not have Primary and Secondary Contacts roles.
+CONTROL_LEGACY_ROLE_FIELDS = dict(
+    LEGACY_ROLE_FIELDS,
+    contact="Control Operators",
+    secondary_contact="Control Owners",
+)
+
+WORKFLOW_STATUS_TYPES = {
+    "Cycle",
+    "CycleTaskGroup",
+    "CycleTaskGroupObjectTask",
+}
+
+WORKFLOW_STATUSES = {
+    "InProgress": "In Progress",
+}
+
+LEGACY_STATUS_TYPES = {
+    "AccessGroup",
+    "Control",
+    "DataAsset",
+    "Directive",
+    "Facility",
+    "Issue",
+    "KeyReport",
+    "Market",
+    "Objective",
+    "OrgGroup",
+    "Product",
+    "Program",
+    "Project",
+    "Requirement",
+    "System",
+    "Vendor",
+    "Risk",
+    "Threat",
+}
+
+LEGACY_STATUSES = {
+    "Active": "Active",
+    "Deprecated": "Deprecated",
+    "Effective": "Active",
+    "Final": "Active",
+    "In Scope": "Active",
+    "Ineffective": "Active",
+    "Launched": "Active",
+}
+
+
+def get_legacy_acl(content, resource_type, role_ids):
+  """Get people of roles stored in fields of old revision content.
+
+  Args:
+    content: raw revision content.
+    resource_type: type of the revision resource.
+    role_ids: {name: id} dict of roles of the resource type.
+  Returns:
+    list of (role id, person id) tuples for roles that are missing in the
+    access control list of the content.
+  """
+  is_control = resource_type == "Control" or (
+      resource_type == "Snapshot" and content.get("child_type") == "Control"
+  )
+  fields = CONTROL_LEGACY_ROLE_FIELDS if is_control else LEGACY_ROLE_FIELDS
+  access_control_list = content.get("access_control_list") or []
+  existing_role_ids = {acl["ac_role_id"] for acl in access_control_list}
+  result = []
+  for field, role_name in fields.iteritems():
+    role_id = role_ids.get(role_name)
+    if role_id is None or role_id in existing_role_ids:
+      continue
+    field_content = content.get(field)
+    if not field_content:
+      continue
+    if not isinstance(field_content, list):
+      field_content = [field_content]
+    person_ids = {fc.get("id") for fc in field_content if fc.get("id")}
+    result.extend((role_id, person_id) for person_id in person_ids)
+  return result
+
+
+def get_legacy_status(content, resource_type):
+  """Get status of old revision content.
+
+  Returns:
+    {"status": status} dict or an empty dict if the status is kept.
+  """
+  status = WORKFLOW_STATUSES.get(content.get("status"))
+  if resource_type in WORKFLOW_STATUS_TYPES and status:
+    return {"status": status}
+  if resource_type not in LEGACY_STATUS_TYPES:
+    return {}
+  return {"status": LEGACY_STATUSES.get(content.get("status"), "Draft")}
+
+
+def get_content_cavs(content):
+  """Return cavs values from content."""
+  if "custom_attribute_values" in content:
+    return content["custom_attribute_values"]
+  if "custom_attributes" in content:
+    return content["custom_attributes"]
+  return []
+
+
+def get_populated_cavs(content, cads, resource_type, resource_id):
+  """Get custom attribute values of content with values of all CADs.
+
+  Args:
+    content: raw revision content.
+    cads: iterable of (id, attribute type, default value) tuples of CADs
+      associated with the revision resource.
+    resource_type: type of the revision resource.
+    resource_id: id of the revision resource.
+  Returns:
+    list of custom attribute value dicts.
+  """
+  cavs = {int(cav["custom_attribute_id"]): cav
+          for cav in get_content_cavs(content)}
+  for cad_id, attribute_type, default_value in cads:
+    cad_id = int(cad_id)
+    cav = cavs.get(cad_id)
+    if cav is not None:
+      # Old revisions can contain falsy values for a Checkbox
+      if attribute_type == "Checkbox" and not cav["attribute_value"]:
+        cavs[cad_id] = dict(cav, attribute_value=default_value)
+      continue
+    cavs[cad_id] = {
+        "attribute_value": ("Person" if attribute_type == "Map:Person"
+                            else default_value),
+        "attribute_object_id": None,
+        "custom_attribute_id": cad_id,
+        "attributable_id": resource_id,
+        "attributable_type": resource_type,
+        "display_name": "",
+        "attribute_object": None,
+        "type": "CustomAttributeValue",
+        "context_id": None,
+    }
+  return cavs.values()
+
+
 class Revision(Filterable, base.ContextRBAC, Base, db.Model):
   """Revision object holds a JSON snapshot of the object at a time."""
 
@@ -26,7 +180,12 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
   event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
   action = db.Column(db.Enum(u'created', u'modified', u'deleted'),
                      nullable=False)
-  _content = db.Column('content', LongJsonType, nullable=False)
+  _stored_content = db.Column('content', LongJsonType, nullable=True)
+  # Delta encoded content, see ggrc.utils.revision_storage
+  _content_delta = db.Column('content_delta', CompressedJsonType,
+                             nullable=True)
+  _content_keyframe_id = db.Column('content_keyframe_id', db.Integer,
+                                   nullable=True)
 
   resource_slug = db.Column(db.String, nullable=True)
   source_type = db.Column(db.String, nullable=True)
@@ -104,6 +263,29 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
                  "destination_id"]:
       setattr(self, attr, getattr(obj, attr, None))
 
+  @hybrid_property
+  def _content(self):
+    """Saved content dict, reconstructed for delta encoded revisions."""
+    if self._content_delta is None:
+      return self._stored_content
+    reconstructed = getattr(self, "_reconstructed_content", None)
+    if reconstructed is None:
+      reconstructed = revision_storage.reconstruct_content(self)
+      self._reconstructed_content = reconstructed
+    return reconstructed
+
+  @_content.setter
+  def _content(self, value):
+    """Store content in full format."""
+    self._stored_content = value
+    self._content_delta = None
+    self._content_keyframe_id = None
+    self._reconstructed_content = None
+
+  @_content.expression
+  def _content(cls):  # pylint: disable=no-self-argument
+    return cls._stored_content
+
   @builder.callable_property
   def diff_with_current(self):
     """Callable lazy property for revision."""
@@ -246,58 +428,29 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
     roles_dict = role.get_custom_roles_for(self.resource_type)
     reverted_roles_dict = {n: i for i, n in roles_dict.iteritems()}
     access_control_list = self._content.get("access_control_list") or []
-    map_field_to_role = {
-        "principal_assessor": reverted_roles_dict.get("Principal Assignees"),
-        "secondary_assessor": reverted_roles_dict.get("Secondary Assignees"),
-        "contact": reverted_roles_dict.get("Primary Contacts"),
-        "secondary_contact": reverted_roles_dict.get("Secondary Contacts"),
-        "owners": reverted_roles_dict.get("Admin"),
-    }
-
-    is_control = bool(self.resource_type == "Control")
-    is_control_snapshot = bool(self.resource_type == "Snapshot" and
-                               self._content["child_type"] == "Control")
-    # for Control type we do not have Primary and Secondary Contacts roles.
-    if is_control or is_control_snapshot:
-      map_field_to_role.update({
-          "contact": reverted_roles_dict.get("Control Operators"),
-          "secondary_contact": reverted_roles_dict.get("Control Owners")
+    legacy_acl = get_legacy_acl(self._content, self.resource_type,
+                                reverted_roles_dict)
+    for role_id, person_id in legacy_acl:
+      access_control_list.append({
+          "display_name": roles_dict[role_id],
+          "ac_role_id": role_id,
+          "context_id": None,
+          "created_at": None,
+          "object_type": self.resource_type,
+          "updated_at": None,
+          "object_id": self.resource_id,
+          "modified_by_id": None,
+          "person_id": person_id,
+          # Frontend require data in such format
+          "person": {
+              "id": person_id,
+              "type": "Person",
+              "href": "/api/people/{}".format(person_id)
+          },
+          "modified_by": None,
+          "id": None,
       })
 
-    exists_roles = {i["ac_role_id"] for i in access_control_list}
-
-    for field, role_id in map_field_to_role.items():
-      if role_id in exists_roles or role_id is None:
-        continue
-      if field not in self._content:
-        continue
-      field_content = self._content.get(field) or {}
-      if not field_content:
-        continue
-      if not isinstance(field_content, list):
-        field_content = [field_content]
-      person_ids = {fc.get("id") for fc in field_content if fc.get("id")}
-      for person_id in person_ids:
-        access_control_list.append({
-            "display_name": roles_dict[role_id],
-            "ac_role_id": role_id,
-            "context_id": None,
-            "created_at": None,
-            "object_type": self.resource_type,
-            "updated_at": None,
-            "object_id": self.resource_id,
-            "modified_by_id": None,
-            "person_id": person_id,
-            # Frontend require data in such format
-            "person": {
-                "id": person_id,
-                "type": "Person",
-                "href": "/api/people/{}".format(person_id)
-            },
-            "modified_by": None,
-            "id": None,
-        })
-
     acl_with_people = self._populate_acl_with_people(access_control_list)
     filtered_acl = self._filter_internal_acls(acl_with_people)
     result_acl = [
@@ -324,52 +477,7 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
 
   def populate_status(self):
     """Update status for older revisions or add it if status does not exist."""
-    workflow_models = {
-        "Cycle",
-        "CycleTaskGroup",
-        "CycleTaskGroupObjectTask",
-    }
-    statuses_mapping = {
-        "InProgress": "In Progress"
-    }
-    status = statuses_mapping.get(self._content.get("status"))
-    if self.resource_type in workflow_models and status:
-      return {"status": status}
-
-    pop_models = {
-        # ggrc
-        "AccessGroup",
-        "Control",
-        "DataAsset",
-        "Directive",
-        "Facility",
-        "Issue",
-        "KeyReport",
-        "Market",
-        "Objective",
-        "OrgGroup",
-        "Product",
-        "Program",
-        "Project",
-        "Requirement",
-        "System",
-        "Vendor",
-        "Risk",
-        "Threat",
-    }
-    if self.resource_type not in pop_models:
-      return {}
-    statuses_mapping = {
-        "Active": "Active",
-        "Deprecated": "Deprecated",
-        "Effective": "Active",
-        "Final": "Active",
-        "In Scope": "Active",
-        "Ineffective": "Active",
-        "Launched": "Active",
-    }
-    return {"status": statuses_mapping.get(self._content.get("status"),
-                                           "Draft")}
+    return get_legacy_status(self._content, self.resource_type)
 
   def populate_review_status(self):
     """Replace os_state with review state for old revisions"""
@@ -427,14 +535,6 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
         result.append(categorization)
     return {key_name: result}
 
-  def _get_cavs(self):
-    """Return cavs values from content."""
-    if "custom_attribute_values" in self._content:
-      return self._content["custom_attribute_values"]
-    if "custom_attributes" in self._content:
-      return self._content["custom_attributes"]
-    return []
-
   def populate_cavs(self):
     """Setup cads in cav list if they are not presented in content
 
@@ -442,31 +542,14 @@ class Revision(Filterable, base.ContextRBAC, Base, db.Model):
     from ggrc.models import custom_attribute_definition
     cads = custom_attribute_definition.get_custom_attributes_for(
         self.resource_type, self.resource_id)
-    cavs = {int(i["custom_attribute_id"]): i for i in self._get_cavs()}
-    for cad in cads:
-      custom_attribute_id = int(cad["id"])
-      if custom_attribute_id in cavs:
-        # Old revisions can contain falsy values for a Checkbox
-        if cad["attribute_type"] == "Checkbox" \
-                and not cavs[custom_attribute_id]["attribute_value"]:
-          cavs[custom_attribute_id]["attribute_value"] = cad["default_value"]
-        continue
-      if cad["attribute_type"] == "Map:Person":
-        value = "Person"
-      else:
-        value = cad["default_value"]
-      cavs[custom_attribute_id] = {
-          "attribute_value": value,
-          "attribute_object_id": None,
-          "custom_attribute_id": custom_attribute_id,
-          "attributable_id": self.resource_id,
-          "attributable_type": self.resource_type,
-          "display_name": "",
-          "attribute_object": None,
-          "type": "CustomAttributeValue",
-          "context_id": None,
-      }
-    return {"custom_attribute_values": cavs.values(),
+    cavs = get_populated_cavs(
+        self._content,
+        [(cad["id"], cad["attribute_type"], cad["default_value"])
+         for cad in cads],
+        self.resource_type,
+        self.resource_id,
+    )
+    return {"custom_attribute_values": cavs,
             "custom_attribute_definitions": cads}
 
   def populate_cad_default_values(self):
@@ -23,6 +23,7 @@ from ggrc.login import get_current_user_id
 from ggrc.models import mixins
 from ggrc.models import reflection
 from ggrc.models import relationship
+from ggrc.models import relationship_adjacency
 from ggrc.models import revision
 from ggrc.models.deferred import deferred
 from ggrc.models.mixins import base
@@ -327,25 +328,26 @@ def _insert_program_relationships(relationship_stubs):
   # and we can safely ignore it.
   inserter = relationship.Relationship.__table__.insert().prefix_with(
       "IGNORE")
-  db.session.execute(
-      inserter.values([
-          {
-              "id": None,
-              "modified_by_id": current_user_id,
-              "created_at": now,
-              "updated_at": now,
-              "source_type": relationship_stub.source_type,
-              "source_id": relationship_stub.source_id,
-              "destination_type": relationship_stub.destination_type,
-              "destination_id": relationship_stub.destination_id,
-              "context_id": None,
-              "status": None,
-              "parent_id": None,
-              "is_external": False,
-          }
-          for relationship_stub in relationship_stubs
-      ])
-  )
+  with relationship_adjacency.sync_inserted():
+    db.session.execute(
+        inserter.values([
+            {
+                "id": None,
+                "modified_by_id": current_user_id,
+                "created_at": now,
+                "updated_at": now,
+                "source_type": relationship_stub.source_type,
+                "source_id": relationship_stub.source_id,
+                "destination_type": relationship_stub.destination_type,
+                "destination_id": relationship_stub.destination_id,
+                "context_id": None,
+                "status": None,
+                "parent_id": None,
+                "is_external": False,
+            }
+            for relationship_stub in relationship_stubs
+        ])
+    )
 
 
 def _set_latest_revisions(objects):
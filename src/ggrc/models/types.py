@@ -8,6 +8,7 @@ Add Json and Compressed type declaration for use in ORM models.
 
 import json
 import pickle
+import zlib
 import sqlalchemy.types as types
 from ggrc import utils
 from ggrc.models import exceptions
@@ -84,3 +85,24 @@ class CompressedType(types.TypeDecorator):
     if len(value) > self.MAX_BINARY_LENGTH:
       raise exceptions.ValidationError("Log record content too long")
     return value
+
+
+class CompressedJsonType(types.TypeDecorator):
+  # pylint: disable=W0223
+  """Custom compressed Json data type.
+
+  Custom type for storing Json objects in our database as zlib compressed
+  serialized text.
+  """
+  MAX_BINARY_LENGTH = 4294967295
+  impl = types.LargeBinary(length=MAX_BINARY_LENGTH)
+
+  def process_result_value(self, value, dialect):
+    if value is not None:
+      value = json.loads(zlib.decompress(value))
+    return value
+
+  def process_bind_param(self, value, dialect):
+    if value is not None:
+      value = zlib.compress(utils.as_json(value))
+    return value
@@ -8,6 +8,7 @@ This class is used to build SqlAlchemy queries and fetch the result ids.
 
 # flake8: noqa
 import collections
+import copy
 import datetime
 
 import sqlalchemy as sa
@@ -19,6 +20,7 @@ from ggrc.utils import benchmark
 from ggrc.rbac import permissions
 from ggrc.query import custom_operators
 from ggrc.query import pagination
+from ggrc.query import planner
 from ggrc.query.exceptions import BadQueryException
 
 
@@ -43,6 +45,12 @@ class QueryHelper(object):
         }
       ]
       limit: [from, to] - limit the result list to a slice result[from, to]
+      page: {
+        "size": the number of objects in the page,
+        "after": optional; "next_page" token returned for the previous page
+      } - keyset pagination, used instead of limit for deep paging
+      total_mode: "exact" (default), "approximate" or "none" - the way to
+                  count all objects matching the filters
       filters: {
         relevant_filters:
           these filters will return all ids of the "search class name" object
@@ -72,6 +80,9 @@ class QueryHelper(object):
       object_name: search class name,
       (all other object query fields)
       ids: [ list of filtered objects ids ]
+      total: the number of filtered objects, None if total_mode is "none"
+      next_page: token of the next page if "page" is given, None if this is
+                 the last page
     }
   ]
 
@@ -82,6 +93,7 @@ class QueryHelper(object):
 
   def __init__(self, query):
     self.query = self._clean_query(query)
+    planner.reset_cache()
 
   def _get_snapshot_child_type(self, object_query):
     """Return child_type for snapshot from a query"""
@@ -251,16 +263,46 @@ class QueryHelper(object):
     return objects
 
   def _get_ids(self, object_query):
-    """Get a set of ids of objects described in the filters."""
+    """Get a set of ids of objects described in the filters.
 
+    Results of identical object queries are computed only once.
+    """
+    key = planner.get_ids_key(object_query)
+    ids, results = planner.cached(
+        "ids", key, lambda: self._get_ids_with_results(object_query))
+    object_query.update(results)
+    return copy.copy(ids)
+
+  def _get_ids_with_results(self, object_query):
+    """Get ids and result fields set on the object query by _build_ids."""
+    ids = self._build_ids(object_query)
+    results = {field: object_query[field] for field in ("total", "next_page")
+               if field in object_query}
+    return ids, results
+
+  def _get_cached_type_query(self, object_class, permission_type):
+    """Get permissions filter, computed once per model and permission."""
+    return planner.cached(
+        "type_query",
+        (object_class.__name__, permission_type),
+        lambda: self._get_type_query(object_class, permission_type),
+    )
+
+  def _build_query(self, object_query):
+    """Build a filtered query of object ids without ordering and limits.
+
+    Returns:
+      tuple of query, object class and target class or None if the object
+      query can not match any objects.
+    """
     object_name = object_query["object_name"]
     expression = object_query.get("filters", {}).get("expression")
 
     if expression is None:
-      return set()
+      return None
     object_class = inflector.get_model(object_name)
     if object_class is None:
-      return set()
+      return None
     query = db.session.query(object_class.id)
 
     tgt_class = object_class
@@ -270,7 +312,8 @@ class QueryHelper(object):
 
     requested_permissions = object_query.get("permissions", "read")
     with benchmark("Get permissions: _get_ids > _get_type_query"):
-      type_query = self._get_type_query(object_class, requested_permissions)
+      type_query = self._get_cached_type_query(object_class,
+                                               requested_permissions)
       if type_query is not None:
         query = query.filter(type_query)
     with benchmark("Parse filter query: _get_ids > _build_expression"):
@@ -282,6 +325,26 @@ class QueryHelper(object):
       )
       if filter_expression is not None:
         query = query.filter(filter_expression)
+    return query, object_class, tgt_class
+
+  def _build_ids(self, object_query):
+    """Get ids of objects described in the filters."""
+    built = self._build_query(object_query)
+    if built is None:
+      return set()
+    query, object_class, tgt_class = built
+    if object_query.get("page") is not None:
+      with benchmark("Apply keyset pagination"):
+        ids, next_page = pagination.apply_keyset_page(
+            object_class,
+            query,
+            object_query,
+            tgt_class,
+        )
+        object_query["next_page"] = next_page
+        object_query["total"] = pagination.get_total(
+            query, object_query.get("total_mode", pagination.TOTAL_EXACT))
+      return ids
     if object_query.get("order_by"):
       with benchmark("Sorting: _get_ids > order_by"):
         query = pagination.apply_order_by(
@@ -294,7 +357,8 @@ class QueryHelper(object):
       limit = object_query.get("limit")
       if limit:
         limit_query = pagination.apply_limit(query, limit)
-        total = pagination.get_total_count(query)
+        total = pagination.get_total(
+            query, object_query.get("total_mode", pagination.TOTAL_EXACT))
         ids = [obj.id for obj in limit_query]
       else:
         ids = [obj.id for obj in query]
@@ -303,6 +367,27 @@ class QueryHelper(object):
 
     return ids
 
+  def _get_merged_counts(self):
+    """Count objects of all independent "count" queries at once.
+
+    Returns:
+      {index of object query: count} dict.
+    """
+    queries = {}
+    keys = {}
+    for index, object_query in enumerate(self.query):
+      if not planner.is_mergeable_count(object_query):
+        continue
+      key = planner.get_ids_key(object_query)
+      if key not in queries:
+        built = self._build_query(object_query)
+        if built is None:
+          continue
+        queries[key] = built[0]
+      keys[index] = key
+    counts = planner.count_queries(queries)
+    return {index: counts[key] for index, key in keys.iteritems()}
+
   @staticmethod
   def _slugs_to_ids(object_name, slugs):
     """Convert SLUG to proper ids for the given objec."""
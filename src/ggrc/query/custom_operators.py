@@ -13,12 +13,15 @@ from sqlalchemy.orm import load_only
 
 from ggrc import db
 from ggrc.models import all_models
+from ggrc.fulltext.mysql import MysqlIndexer
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.models import inflector
+from ggrc.models import relationship_adjacency
 from ggrc.models import relationship_helper
 from ggrc.models.mixins.filterable import Filterable
 from ggrc.query import autocast
 from ggrc.query import my_objects
+from ggrc.query import planner
 from ggrc.query.exceptions import BadQueryException
 from ggrc.snapshotter import rules
 from ggrc.utils import revisions_diff
@@ -213,12 +216,17 @@ def text_search(exp, object_class, target_class, query):
     sqlalchemy.sql.elements.BinaryExpression if an object of `object_class`
     has an indexed property that contains `text`.
   """
+  filters = [
+      Record.type == object_class.__name__,
+      Record.subproperty != '__sort__',
+      Record.content.ilike(u"%{}%".format(exp['text'])),
+  ]
+  candidates_filter = MysqlIndexer.get_candidates_filter(exp['text'],
+                                                         object_class)
+  if candidates_filter is not None:
+    filters.append(candidates_filter)
   return object_class.id.in_(
-      db.session.query(Record.key).filter(
-          Record.type == object_class.__name__,
-          Record.subproperty != '__sort__',
-          Record.content.ilike(u"%{}%".format(exp['text'])),
-      ),
+      db.session.query(Record.key).filter(*filters),
   )
 
 
@@ -246,10 +254,9 @@ def similar(exp, object_class, target_class, query):
       id_=exp['ids'][0],
       type_=object_class.__name__,
   )
-  similar_objects_ids = {obj[0] for obj in similar_objects_query}
-  if similar_objects_ids:
-    return object_class.id.in_(similar_objects_ids)
-  return sqlalchemy.sql.false()
+  if not similar_objects_query:
+    return sqlalchemy.sql.false()
+  return planner.ids_filter(object_class.id, similar_objects_query)
 
 
 @validate("object_name", "ids")
@@ -259,6 +266,20 @@ def relevant(exp, object_class, target_class, query):
     exp = query[exp['ids'][0]]
   object_name = exp['object_name']
   ids = exp['ids']
+  if not ids:
+    return sqlalchemy.sql.false()
+  return planner.cached(
+      "relevant",
+      planner.make_key([object_class.__name__, object_name, sorted(ids)]),
+      lambda: planner.ids_filter(
+          object_class.id,
+          _get_relevant_ids_query(object_class, object_name, ids),
+      ),
+  )
+
+
+def _get_relevant_ids_query(object_class, object_name, ids):
+  """Get query for ids of objects relevant to the given objects."""
   check_snapshots = (
       object_class.__name__ in rules.Types.scoped | rules.Types.trans_scope and
       object_name in rules.Types.all
@@ -266,10 +287,10 @@ def relevant(exp, object_class, target_class, query):
   check_direct = (not check_snapshots or
                   object_class.__name__ in rules.Types.trans_scope)
 
-  result = set()
+  queries = []
 
   if check_direct:
-    result.update(*relationship_helper.get_ids_related_to(
+    queries.append(relationship_helper.get_ids_related_to(
         object_class.__name__,
         object_name,
         ids,
@@ -286,26 +307,17 @@ def relevant(exp, object_class, target_class, query):
     ).subquery(
         "snapshot"
     )
-    dest_qs = db.session.query(all_models.Relationship.source_id).filter(
-        all_models.Relationship.destination_id == snapshot_qs.c.id,
-        all_models.Relationship.destination_type ==
+    ids_qs = relationship_adjacency.neighbors_query(
         all_models.Snapshot.__name__,
-        all_models.Relationship.source_type == object_class.__name__,
-    )
-    source_qs = db.session.query(
-        all_models.Relationship.destination_id
-    ).filter(
-        all_models.Relationship.source_id == snapshot_qs.c.id,
-        all_models.Relationship.source_type == all_models.Snapshot.__name__,
-        all_models.Relationship.destination_type == object_class.__name__,
-    )
-    ids_qs = dest_qs.union(source_qs)
-    result.update(*ids_qs.all())
-
-  if not result:
-    return sqlalchemy.sql.false()
+        sqlalchemy.select([snapshot_qs.c.id]),
+        object_class.__name__,
+    ).distinct()
+    queries.append(ids_qs)
 
-  return object_class.id.in_(result)
+  query = queries.pop()
+  if queries:
+    query = query.union(*queries)
+  return query
 
 
 @validate("object_name", "ids")
@@ -342,8 +354,7 @@ def related_evidence(exp, object_class, target_class, query):
       all_models.Assessment.audit_id.in_(ids)
   )
 
-  result = evid_dest.union(evid_source)
-  return object_class.id.in_(result)
+  return planner.ids_filter(object_class.id, evid_dest.union(evid_source))
 
 
 def build_expression(exp, object_class, target_class, query):
@@ -3,7 +3,7 @@
 
 """This module contains special query helper class for query API."""
 
-from ggrc.builder import json
+from ggrc.cache import representation_cache
 from ggrc.query.builder import QueryHelper
 from ggrc.models import inflector
 from ggrc.utils import benchmark
@@ -32,6 +32,7 @@ class DefaultHandler(QueryHelper):
       ids: [ ids of filtered objects ] (present if type is "ids")
       count: the number of objects filtered, after "limit" is applied
       total: the number of objects filtered, before "limit" is applied
+      next_page: token of the next page if "page" is given
   """
 
   def get_results(self):
@@ -44,13 +45,18 @@ class DefaultHandler(QueryHelper):
       list of dicts: same query as the input with requested results that match
                      the filter.
     """
-    for object_query in self.query:
+    with benchmark("Get merged counts: get_results > _get_merged_counts"):
+      merged_counts = self._get_merged_counts()
+    for index, object_query in enumerate(self.query):
       query_type = object_query.get("type", "values")
       if query_type not in {"values", "ids", "count"}:
         raise NotImplementedError("Only 'values', 'ids' and 'count' queries "
                                   "are supported now")
       model = inflector.get_model(object_query["object_name"])
-      if query_type == "values":
+      if index in merged_counts:
+        object_query["count"] = object_query["total"] = merged_counts[index]
+        object_query["last_modified"] = None  # synonymous to now()
+      elif query_type == "values":
         with benchmark("Get result set: get_results > _get_objects"):
           objects = self._get_objects(object_query)
         object_query["count"] = len(objects)
@@ -74,8 +80,10 @@ class DefaultHandler(QueryHelper):
   @staticmethod
   def _transform_to_json(objects, fields=None):
     """Make a JSON representation of objects from the list."""
-    objects_json = [json.publish(obj) for obj in objects]
-    objects_json = json.publish_representation(objects_json)
+    objects_json = representation_cache.publish_objects(
+        objects,
+        attribute_whitelist=fields,
+    )
     if fields:
       objects_json = [{f: o.get(f) for f in fields}
                       for o in objects_json]
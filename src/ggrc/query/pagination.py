@@ -1,9 +1,23 @@
 # Copyright (C) 2019 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
-"""Pagination helpers module for query generation."""
+"""Pagination helpers module for query generation.
+
+Two pagination modes are supported:
+  - "limit": [from, to] - offset based pagination, the cost of a page grows
+    with its offset;
+  - "page": {"size": N, "after": token} - keyset (seek) pagination, the next
+    page is found by the values of the sort keys of the last object of the
+    previous page, so every page costs the same.
+"""
+
+import base64
+import datetime
+import decimal
+import json
 
 import sqlalchemy as sa
+from sqlalchemy.ext.compiler import compiles
 
 from ggrc import models
 from ggrc import db
@@ -50,6 +64,26 @@ def apply_limit(query, limit):
   return limit_query
 
 
+TOTAL_EXACT = "exact"
+TOTAL_APPROXIMATE = "approximate"
+TOTAL_NONE = "none"
+
+TOTAL_MODES = (TOTAL_EXACT, TOTAL_APPROXIMATE, TOTAL_NONE)
+
+
+class _Explain(sa.sql.expression.Executable, sa.sql.expression.ClauseElement):
+  """EXPLAIN statement for a select query."""
+  # pylint: disable=abstract-method
+
+  def __init__(self, statement):
+    self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element, compiler, **kwargs):
+  return "EXPLAIN " + compiler.process(element.statement, **kwargs)
+
+
 def get_total_count(query):
   """Get count of all objects in the query."""
   with benchmark("Apply limit: apply_limit > query_count"):
@@ -61,6 +95,47 @@ def get_total_count(query):
   return total
 
 
+def get_approximate_count(query):
+  """Get estimated count of objects in the query from index statistics.
+
+  The estimate is taken from the query plan of the driving table, so no rows
+  are read. It can be far from the real count for queries with selective
+  filters on joined tables.
+  """
+  with benchmark("Apply limit: get_approximate_count"):
+    plan = db.session.execute(
+        _Explain(query.statement.order_by(None))
+    ).fetchone()
+  if plan is None:
+    return 0
+  plan = dict(plan.items())
+  rows = plan.get("rows") or 0
+  filtered = plan.get("filtered")
+  if filtered is None:
+    filtered = 100
+  return int(rows * float(filtered) / 100)
+
+
+def get_total(query, mode):
+  """Get count of objects in the query with the requested precision.
+
+  Args:
+    query: filter query;
+    mode: one of TOTAL_MODES.
+
+  Returns:
+    count of objects or None if no count was requested.
+  """
+  if mode == TOTAL_EXACT:
+    return get_total_count(query)
+  if mode == TOTAL_APPROXIMATE:
+    return get_approximate_count(query)
+  if mode == TOTAL_NONE:
+    return None
+  raise BadQueryException(u"Invalid total mode '{}'. Expected one of: {}"
+                          .format(mode, ", ".join(TOTAL_MODES)))
+
+
 def _joins_and_order(counter, clause, model, tgt_class):
   """Get join operations and ordering field from item of order_by list.
 
@@ -70,9 +145,9 @@ def _joins_and_order(counter, clause, model, tgt_class):
 
   Returns:
     ([joins], order) - a tuple of joins required for this ordering to work
-                        and ordering clause itself; join is None if no join
-                        required or [(aliased entity, relationship field)]
-                        if joins required.
+                        and the ordered column itself; join is None if no
+                        join required or [(aliased entity, relationship
+                        field)] if joins required.
   """
 
   def by_fulltext():
@@ -116,12 +191,26 @@ def _joins_and_order(counter, clause, model, tgt_class):
     # Snapshot or non object attributes are treated as custom attributes
     joins, order = by_fulltext()
 
-  if clause.get("desc", False):
-    order = order.desc()
-
   return joins, order
 
 
+def _get_orders(model, order_by, tgt_class):
+  """Get joins and ordering columns for the order_by list.
+
+  Returns:
+    ([joins], [(column, desc)]) - lists of joins required for the ordering
+                                  and columns with their sort direction.
+  """
+  join_lists = []
+  columns = []
+  for counter, clause in enumerate(order_by):
+    joins, column = _joins_and_order(counter, clause, model, tgt_class)
+    if joins is not None:
+      join_lists.append(joins)
+    columns.append((column, bool(clause.get("desc", False))))
+  return join_lists, columns
+
+
 def apply_order_by(model, query, order_by, tgt_class):
   """Add ordering parameters to a query for objects.
 
@@ -146,13 +235,171 @@ def apply_order_by(model, query, order_by, tgt_class):
     the query with sorting parameters.
   """
 
-  join_pairs = [
-      _joins_and_order(counter, clause, model, tgt_class)
-      for counter, clause in enumerate(order_by)
-  ]
-  join_lists, orders = zip(*join_pairs)
-  join_lists = [join_list for join_list in join_lists if join_list is not None]
+  join_lists, columns = _get_orders(model, order_by, tgt_class)
   for join_list in join_lists:
     query = query.outerjoin(*join_list)
 
-  return query.order_by(*orders)
+  return query.order_by(*[
+      column.desc() if desc else column for column, desc in columns
+  ])
+
+
+def _encode_value(value):
+  """Make JSON serializable representation of a sort key value."""
+  if isinstance(value, datetime.datetime):
+    return {"datetime": value.strftime("%Y-%m-%dT%H:%M:%S.%f")}
+  if isinstance(value, datetime.date):
+    return {"date": value.isoformat()}
+  if isinstance(value, decimal.Decimal):
+    return {"decimal": str(value)}
+  return value
+
+
+def _decode_value(value):
+  """Get sort key value from its representation made by _encode_value."""
+  if not isinstance(value, dict):
+    return value
+  if "datetime" in value:
+    return datetime.datetime.strptime(value["datetime"],
+                                      "%Y-%m-%dT%H:%M:%S.%f")
+  if "date" in value:
+    return datetime.datetime.strptime(value["date"], "%Y-%m-%d").date()
+  if "decimal" in value:
+    return decimal.Decimal(value["decimal"])
+  raise BadQueryException("Invalid page token.")
+
+
+def _get_order_signature(object_name, order_by):
+  """Get a value identifying the ordering a page token was made for."""
+  return [object_name] + [
+      [clause.get("name", ""), bool(clause.get("desc", False))]
+      for clause in order_by
+  ]
+
+
+def make_page_token(object_name, order_by, values):
+  """Make an opaque continuation token from sort keys of the last object.
+
+  Args:
+    object_name: name of the queried model;
+    order_by: order_by list of the query;
+    values: values of the order_by keys and the id of the last object.
+
+  Returns:
+    url safe token string.
+  """
+  token = {
+      "o": _get_order_signature(object_name, order_by),
+      "v": [_encode_value(value) for value in values],
+  }
+  return base64.urlsafe_b64encode(json.dumps(token, separators=(",", ":")))
+
+
+def parse_page_token(token, object_name, order_by):
+  """Get sort key values from a page token made by make_page_token."""
+  try:
+    data = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    values = [_decode_value(value) for value in data["v"]]
+    signature = data["o"]
+  except (TypeError, ValueError, KeyError, AttributeError, UnicodeError):
+    raise BadQueryException("Invalid page token.")
+  if signature != _get_order_signature(object_name, order_by):
+    raise BadQueryException("Page token does not match the query ordering.")
+  if len(values) != len(order_by) + 1:
+    raise BadQueryException("Invalid page token.")
+  return values
+
+
+def _get_page_size(page):
+  """Get page size from the page parameter of the query."""
+  if not isinstance(page, dict):
+    raise BadQueryException("Invalid page operator. Object expected.")
+  try:
+    size = int(page.get("size"))
+  except (ValueError, TypeError):
+    raise BadQueryException("Invalid page size. Integer expected.")
+  if size <= 0:
+    raise BadQueryException("Page size should be a positive number.")
+  return size
+
+
+def _after(column, desc, value):
+  """Get condition for column values placed after the value.
+
+  MySQL places NULL values first in ascending and last in descending order.
+  """
+  if value is None:
+    return sa.sql.false() if desc else column.isnot(None)
+  if desc:
+    return sa.or_(column < value, column.is_(None))
+  return column > value
+
+
+def _equal(column, value):
+  """Get null safe equality condition."""
+  if value is None:
+    return column.is_(None)
+  return column == value
+
+
+def _keyset_filter(columns, values):
+  """Get condition for rows placed after the given sort key values.
+
+  For keys (a, b, id) the condition is:
+    a > A OR (a = A AND b > B) OR (a = A AND b = B AND id > ID)
+  """
+  conditions = []
+  for index, ((column, desc), value) in enumerate(zip(columns, values)):
+    equal_prefix = [
+        _equal(prev_column, prev_value)
+        for (prev_column, _), prev_value in zip(columns[:index],
+                                                values[:index])
+    ]
+    conditions.append(sa.and_(*(equal_prefix + [_after(column, desc, value)])))
+  return sa.or_(*conditions)
+
+
+def apply_keyset_page(model, query, object_query, tgt_class):
+  """Get a page of object ids with keyset pagination.
+
+  The objects are ordered by order_by keys and id, the page starts right
+  after the object whose sort keys are stored in the "after" token.
+
+  Args:
+    model: the model instances of which are requested in query;
+    query: filter query without ordering;
+    object_query: query object with "page" and optional "order_by" items;
+    tgt_class: the snapshotted model if `model` is Snapshot else `model`.
+
+  Returns:
+    list of ids in the page and the token of the next page or None if this
+    is the last page.
+  """
+  page = object_query["page"]
+  size = _get_page_size(page)
+  order_by = object_query.get("order_by") or []
+  object_name = object_query["object_name"]
+
+  join_lists, columns = _get_orders(model, order_by, tgt_class)
+  for join_list in join_lists:
+    query = query.outerjoin(*join_list)
+  columns.append((model.id, False))
+
+  if page.get("after"):
+    values = parse_page_token(page["after"], object_name, order_by)
+    query = query.filter(_keyset_filter(columns, values))
+
+  query = query.add_columns(
+      *[column for column, _ in columns]
+  ).order_by(
+      *[column.desc() if desc else column for column, desc in columns]
+  ).limit(size + 1)
+
+  with benchmark("Apply limit: apply_keyset_page > query_page"):
+    rows = query.all()
+
+  next_page = None
+  if len(rows) > size:
+    rows = rows[:size]
+    next_page = make_page_token(object_name, order_by, rows[-1][1:])
+  return [row[0] for row in rows], next_page
@@ -0,0 +1,155 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Planning of object queries sent in a single /query request.
+
+A single request usually contains many object queries that share the same
+filters, for example tree view counts of all types mapped to one object. The
+planner helps to execute them with fewer SQL round trips:
+  - results of identical object queries and filter subtrees are cached for
+    the lifetime of a query helper;
+  - "count" queries that do not depend on other queries are counted with a
+    single UNION ALL statement;
+  - filters by ids computed with SQL send small id sets as literal IN lists
+    and keep big ones as subqueries in the database.
+"""
+
+import json
+
+import flask
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc.utils import benchmark
+
+
+CACHE_ATTR = "query_planner_cache"
+
+# Object query items that affect the resulting ids.
+IDS_KEY_FIELDS = (
+    "object_name",
+    "filters",
+    "permissions",
+    "order_by",
+    "limit",
+    "page",
+    "total_mode",
+)
+
+PREVIOUS = "__previous__"
+
+# Id sets up to this size are sent to the database as literal IN lists,
+# bigger ones are filtered by a subquery.
+IN_LIST_LIMIT = 1000
+
+
+def reset_cache():
+  """Start a new cache for the current query helper."""
+  if flask.has_app_context():
+    setattr(flask.g, CACHE_ATTR, {})
+
+
+def cached(namespace, key, loader):
+  """Get a cached value or load and cache it.
+
+  Values are cached only while a query helper is active, i.e. after
+  reset_cache was called in the current application context.
+
+  Args:
+    namespace: name of the group of cached values;
+    key: hashable key of the value in the namespace;
+    loader: callable that returns the value if it is not cached.
+  """
+  cache = None
+  if flask.has_app_context():
+    cache = getattr(flask.g, CACHE_ATTR, None)
+  if cache is None:
+    return loader()
+  full_key = (namespace, key)
+  if full_key not in cache:
+    cache[full_key] = loader()
+  return cache[full_key]
+
+
+def make_key(value):
+  """Make a hashable key from a JSON like value."""
+  return json.dumps(value, sort_keys=True, default=unicode)
+
+
+def get_ids_key(object_query):
+  """Get a key that is equal for object queries with the same ids."""
+  return make_key({field: object_query.get(field)
+                   for field in IDS_KEY_FIELDS})
+
+
+def has_previous_reference(object_query):
+  """Check if the object query filters depend on other object queries."""
+  return PREVIOUS in make_key(object_query.get("filters"))
+
+
+def is_mergeable_count(object_query):
+  """Check if the object query can be counted together with others."""
+  return (
+      object_query.get("type") == "count" and
+      object_query.get("filters", {}).get("expression") is not None and
+      not object_query.get("limit") and
+      object_query.get("page") is None and
+      not has_previous_reference(object_query)
+  )
+
+
+def count_queries(queries):
+  """Count objects of many queries with a single statement.
+
+  Args:
+    queries: {key: sqlalchemy query} dict.
+
+  Returns:
+    {key: count} dict.
+  """
+  if not queries:
+    return {}
+  keys = list(queries)
+  selects = [
+      sa.select([
+          sa.literal(index).label("query_index"),
+          sa.func.count().label("query_count"),
+      ]).select_from(
+          queries[key].statement.alias("query_{}".format(index))
+      )
+      for index, key in enumerate(keys)
+  ]
+  statement = selects[0] if len(selects) == 1 else sa.union_all(*selects)
+  with benchmark("Count {} merged queries".format(len(selects))):
+    rows = db.session.execute(statement).fetchall()
+  return {keys[index]: count for index, count in rows}
+
+
+def ids_filter(column, ids_query, limit=None):
+  """Get filter of column by ids selected with a query.
+
+  At most limit + 1 distinct ids are fetched to find out the size of the id
+  set, so duplicate rows of the query can't hide ids over the limit. Small
+  sets are returned as a literal IN list, so MySQL can use the primary key
+  for them. Bigger sets are never transferred: the query is used as a
+  derived table, which MySQL materializes once instead of running a
+  dependent subquery for each row.
+
+  Args:
+    column: column to filter;
+    ids_query: query that selects ids in its first column;
+    limit: maximal size of a literal IN list, IN_LIST_LIMIT by default.
+
+  Returns:
+    filter expression.
+  """
+  if limit is None:
+    limit = IN_LIST_LIMIT
+  with benchmark("Probe size of id set"):
+    ids = {row[0] for row in ids_query.distinct().limit(limit + 1)}
+  if not ids:
+    return sa.sql.false()
+  if len(ids) <= limit:
+    return column.in_(ids)
+  ids_table = ids_query.subquery()
+  return column.in_(sa.select([list(ids_table.c)[0]]))
@@ -46,6 +46,7 @@ from ggrc.services import signals
 from ggrc.models.background_task import BackgroundTask, create_task
 from ggrc.query import utils as query_utils
 from ggrc import settings
+from ggrc.cache import representation_cache
 from ggrc.cache import utils as cache_utils
 from ggrc.utils import errors as ggrc_errors
 
@@ -498,7 +499,7 @@ class Resource(ModelView):
       if not permissions.is_allowed_read_for(obj):
         raise Forbidden()
     with benchmark("Serialize object"):
-      object_for_json = self.object_for_json(obj)
+      object_for_json = self.object_for_json(obj, use_cache=True)
 
     obj_etag = etag(self.modified_at(obj), get_info(obj))
     if 'If-None-Match' in self.request.headers and \
@@ -761,7 +762,7 @@ class Resource(ModelView):
 
     database_objs = {}
     if database_matches:
-      database_objs = self.get_resources_from_database(matches)
+      database_objs = self.get_resources_from_database(database_matches)
       if self.has_cache():
         with benchmark("Add resources to cache"):
           self.add_resources_to_cache(database_objs)
@@ -847,15 +848,14 @@ class Resource(ModelView):
       return resources
     # Skip right to memcache
     memcache_client = self.request.cache_manager.cache_object.memcache_client
-    for match in matches:
-      key = cache_utils.get_cache_key(None, id_=match[0], type_=match[1])
-      val = memcache_client.get(key)
-      if val:
-        val = json.loads(val)
-      else:
-        val = {}
+    keys = {
+        cache_utils.get_cache_key(None, id_=match[0], type_=match[1]): match
+        for match in matches
+    }
+    for key, val in memcache_client.get_multi(keys.keys()).iteritems():
+      val = json.loads(val) if val else {}
       if "selfLink" in val:
-        resources[match] = val
+        resources[keys[key]] = val
     return resources
 
   def add_resources_to_cache(self, match_obj_pairs):
@@ -863,11 +863,12 @@ class Resource(ModelView):
     # Skip right to memcache
     cache_manager = self.request.cache_manager
     memcache_client = cache_manager.cache_object.memcache_client
-    for match, obj in match_obj_pairs.items():
-      if obj.__class__.__name__ in cache_manager.supported_classes:
-        memcache_client.add(
-            cache_utils.get_cache_key(None, id_=match[0], type_=match[1]),
-            as_json(obj))
+    memcache_client.add_multi({
+        cache_utils.get_cache_key(None, id_=match[0], type_=match[1]):
+            as_json(obj)
+        for match, obj in match_obj_pairs.items()
+        if obj.__class__.__name__ in cache_manager.supported_classes
+    })
 
   def invalidate_cache_to(self, obj):
     """Invalidate api cache for sent object."""
@@ -1365,20 +1366,45 @@ class Resource(ModelView):
     if model.__name__ == "Event":
       with benchmark("Query database for events"):
         resources = self.get_events_resources(model, ids)
-    else:
-      with benchmark("Query database for matches"):
-        query = model.eager_query()
-        # We force the query here so that we can benchmark it
-        objs = query.filter(model.id.in_(ids.keys())).all()
-        with benchmark("Publish objects"):
-          resources = {}
-          includes = self.get_properties_to_include(
-              request.args.get('__include')
-          )
-          for obj in objs:
-            resources[ids[obj.id]] = ggrc.builder.json.publish(obj, includes)
+      with benchmark("Publish representation"):
+        ggrc.builder.json.publish_representation(resources)
+      return resources
+
+    includes = self.get_properties_to_include(request.args.get('__include'))
+    backend = representation_cache.get_backend()
+    cached, keys = {}, {}
+    if backend is not None and hasattr(model, "updated_at"):
+      with benchmark("Query representation cache"):
+        cached, keys = representation_cache.lookup(
+            backend,
+            [(m.type, m.id, m.updated_at) for m in matches],
+            representation_cache.get_fields_digest(includes),
+        )
+    resources = {m: cached[(m.type, m.id)]
+                 for m in matches if (m.type, m.id) in cached}
+    missing_ids = [m.id for m in matches if m not in resources]
+    if not missing_ids:
+      return resources
+
+    with benchmark("Query database for matches"):
+      query = model.eager_query()
+      # We force the query here so that we can benchmark it
+      objs = query.filter(model.id.in_(missing_ids)).all()
+      with benchmark("Publish objects"):
+        published = {}
+        for obj in objs:
+          published[ids[obj.id]] = ggrc.builder.json.publish(obj, includes)
     with benchmark("Publish representation"):
-      ggrc.builder.json.publish_representation(resources)
+      ggrc.builder.json.publish_representation(published)
+    if backend is not None and keys:
+      with benchmark("Add representations to cache"):
+        matches_by_key = {(m.type, m.id): m for m in published}
+        stored = representation_cache.store(backend, keys, {
+            key: published[m] for key, m in matches_by_key.iteritems()
+        })
+        published = {matches_by_key[key]: representation
+                     for key, representation in stored.iteritems()}
+    resources.update(published)
     return resources
 
   def build_collection_representation(self, objs, extras=None):
@@ -1394,8 +1420,22 @@ class Resource(ModelView):
       resource[collection_name].update(extras)
     return resource
 
-  def object_for_json(self, obj, model_name=None, properties_to_include=None):
+  def object_for_json(self, obj, model_name=None, properties_to_include=None,
+                      use_cache=False):
+    """Get JSON representation of obj.
+
+    Representation cache is used only if use_cache is set and there are no
+    inclusions, which depend on permissions of the current user. Models with
+    _include_links always include linked objects that pass inclusion_filter,
+    so their cached representations are used only for users with system wide
+    read access, for whom the filter accepts every object.
+    """
     model_name = model_name or self.model._inflector.table_singular
+    if use_cache and not properties_to_include and (
+            not ggrc.builder.json.get_json_builder(obj)._include_links or
+            permissions.has_system_wide_read()):
+      json_obj = representation_cache.publish_objects([obj])[0]
+      return {model_name: json_obj}
     json_obj = ggrc.builder.json.publish(
         obj, properties_to_include or [], inclusion_filter)
     ggrc.builder.json.publish_representation(json_obj)
@@ -4,7 +4,6 @@
 """Resource for handling special endpoints for people."""
 
 import datetime
-import collections
 import functools
 
 from logging import getLogger
@@ -18,30 +17,17 @@ from dateutil import parser as date_parser
 
 from ggrc import db
 from ggrc import login
-from ggrc import models
 from ggrc.utils import benchmark
 from ggrc.utils.log_event import log_event
 from ggrc.services import common
 from ggrc.views import converters
-from ggrc.query import my_objects
-from ggrc.query import builder
 from ggrc.models import all_models
+from ggrc.models import person_counters
 
 
 # pylint: disable=invalid-name
 logger = getLogger(__name__)
 
-ALL_MODELS = {
-    "Issue", "AccessGroup", "Assessment", "Audit", "Contract", "Control",
-    "DataAsset", "Document", "Evidence", "Facility", "Market", "Objective",
-    "OrgGroup", "Policy", "Process", "Product", "Program", "Project",
-    "Regulation", "Risk", "Requirement", "Standard", "System",
-    "TechnologyEnvironment", "Threat", "Vendor", "CycleTaskGroupObjectTask",
-    "Workflow", "Metric", "ProductGroup", "KeyReport",
-}
-
-MY_WORK_MODELS = ALL_MODELS - {"Workflow"}
-
 
 class PersonResource(common.ExtendedResource):
   """Resource handler for people."""
@@ -49,9 +35,9 @@ class PersonResource(common.ExtendedResource):
   # method post is abstract and not used.
   # pylint: disable=abstract-method
 
-  MY_WORK_OBJECTS = {item: 0 for item in MY_WORK_MODELS}
+  MY_WORK_OBJECTS = {item: 0 for item in person_counters.MY_WORK_MODELS}
 
-  ALL_OBJECTS = {item: 0 for item in ALL_MODELS}
+  ALL_OBJECTS = {item: 0 for item in person_counters.ALL_MODELS}
 
   @classmethod
   def add_to(cls, app, url, model_class=None, decorators=()):
@@ -170,106 +156,26 @@ class PersonResource(common.ExtendedResource):
     # id name is used as a kw argument and can't be changed here
     # pylint: disable=invalid-name,redefined-builtin
     with benchmark("Make response"):
-      # query below ignores acr.read flag because this is done on a
-      # non_editable role that has read rights:
-      counts_query = db.session.execute(
-          """
-          SELECT
-              overdue,
-              sum(task_count)
-          FROM (
-              SELECT
-                  ct.end_date < :today AS overdue,
-                  count(DISTINCT ct.id) AS task_count
-              FROM cycle_task_group_object_tasks AS ct
-              JOIN cycles AS c ON
-                  c.id = ct.cycle_id
-              JOIN access_control_list AS acl
-                  ON acl.object_id = ct.id
-                  AND acl.object_type = "CycleTaskGroupObjectTask"
-              JOIN access_control_people AS acp
-                  ON acp.ac_list_id = acl.id
-              JOIN access_control_roles as acr
-                  ON acl.ac_role_id = acr.id
-              WHERE
-                  ct.status != "Verified" AND
-                  c.is_verification_needed = 1 AND
-                  c.is_current = 1 AND
-                  acp.person_id = :person_id AND
-                  acr.name IN ("Task Assignees", "Task Secondary Assignees")
-              GROUP BY overdue
-
-              UNION ALL
-
-              SELECT
-                  ct.end_date < :today AS overdue,
-                  count(DISTINCT ct.id) AS task_count
-              FROM cycle_task_group_object_tasks AS ct
-              JOIN cycles AS c ON
-                  c.id = ct.cycle_id
-              JOIN access_control_list AS acl
-                  ON acl.object_id = ct.id
-                  AND acl.object_type = "CycleTaskGroupObjectTask"
-              JOIN access_control_people AS acp
-                  ON acp.ac_list_id = acl.id
-              JOIN access_control_roles as acr
-                  ON acl.ac_role_id = acr.id
-              WHERE
-                  ct.status != "Finished" AND
-                  c.is_verification_needed = 0 AND
-                  c.is_current = 1 AND
-                  acp.person_id = :person_id AND
-                  acr.name IN ("Task Assignees", "Task Secondary Assignees")
-              GROUP BY overdue
-          ) as temp
-          GROUP BY overdue
-          """,
-          {
-              # Using today instead of DATE(NOW()) for easier testing with
-              # freeze gun.
-              "today": datetime.date.today(),
-              "person_id": id,
-          }
+      counts = person_counters.get_counts(
+          id,
+          person_counters.TASK_COUNT,
+          person_counters.TASK_COUNT_TYPES,
       )
-      counts = dict(counts_query.fetchall())
       response_object = {
-          "open_task_count": int(sum(counts.values())),
-          "has_overdue": bool(counts.get(1, 0)),
+          "open_task_count": counts[person_counters.OPEN_TASKS],
+          "has_overdue": bool(counts[person_counters.OVERDUE_TASKS]),
       }
       return self.json_success_response(response_object, )
 
   def _my_work_count(self, **kwargs):  # pylint: disable=unused-argument
     """Get object counts for my work page."""
     with benchmark("Make response"):
-      aliased = my_objects.get_myobjects_query(
-          types=self.MY_WORK_OBJECTS.keys(),
-          contact_id=login.get_current_user_id()
-      )
-      all_ = db.session.query(
-          aliased.c.type,
-          aliased.c.id,
-      )
-
-      all_ids = collections.defaultdict(set)
-      for type_, id_ in all_:
-        all_ids[type_].add(id_)
-
       response_object = self.MY_WORK_OBJECTS.copy()
-      for type_, ids in all_ids.items():
-        model = models.get_model(type_)
-        # pylint: disable=protected-access
-        # We must move the type permissions query to a proper utility function
-        # but we will not do that for a patch release
-        permission_filter = builder.QueryHelper._get_type_query(model, "read")
-        if permission_filter is not None:
-          count = model.query.filter(
-              model.id.in_(ids),
-              permission_filter,
-          ).count()
-        else:
-          count = model.query.filter(model.id.in_(ids)).count()
-        response_object[type_] = count
-
+      response_object.update(person_counters.get_counts(
+          login.get_current_user_id(),
+          person_counters.MY_WORK,
+          self.MY_WORK_OBJECTS.keys(),
+      ))
       return self.json_success_response(response_object, )
 
   def _my_workflows(self, id):
@@ -384,20 +290,12 @@ class PersonResource(common.ExtendedResource):
   def _all_objects_count(self, **kwargs):  # pylint: disable=unused-argument
     """Get object counts for all objects page."""
     with benchmark("Make response"):
-
       response_object = self.ALL_OBJECTS.copy()
-      for model_type in response_object:
-        model = models.get_model(model_type)
-        # pylint: disable=protected-access
-        # We must move the type permissions query to a proper utility function
-        # but we will not do that for a patch release
-        permission_filter = builder.QueryHelper._get_type_query(model, "read")
-        if permission_filter is not None:
-          count = model.query.filter(permission_filter).count()
-        else:
-          count = model.query.count()
-        response_object[model_type] = count
-
+      response_object.update(person_counters.get_counts(
+          login.get_current_user_id(),
+          person_counters.ALL_OBJECTS,
+          self.ALL_OBJECTS.keys(),
+      ))
       return self.json_success_response(response_object, )
 
   @staticmethod
@@ -18,6 +18,14 @@ SQLALCHEMY_POOL_RECYCLE = 120
 AUTOBUILD_ASSETS = False
 DEBUG_ASSETS = False
 FULLTEXT_INDEXER = None
+# Trigram postings for fulltext search. Enable maintenance first, run a full
+# reindex and then enable search to roll the postings out on a deployment.
+FULLTEXT_TOKEN_INDEX_MAINTAIN = bool(
+    os.environ.get("GGRC_FULLTEXT_TOKEN_INDEX_MAINTAIN"))
+FULLTEXT_TOKEN_INDEX_SEARCH = bool(
+    os.environ.get("GGRC_FULLTEXT_TOKEN_INDEX_SEARCH"))
+# Number of worker processes used by reindex jobs, 1 disables the pool.
+REINDEX_PROCESSES = int(os.environ.get("GGRC_REINDEX_PROCESSES", "1"))
 USER_PERMISSIONS_PROVIDER = \
     'ggrc_basic_permissions.CompletePermissionsProvider'
 EXTENSIONS = [
@@ -91,6 +99,26 @@ SECRET_KEY = os.environ.get('GGRC_SECRET_KEY', 'Replace-with-something-secret')
 
 MEMCACHE_MECHANISM = True
 
+# Backend of the object representation cache: 'local', 'memcache' or empty
+# to disable the cache. Disabled by default, as changes of objects that are
+# referenced further away than the invalidated parents become visible only
+# after the cached representations expire.
+REPRESENTATION_CACHE = os.environ.get('GGRC_REPRESENTATION_CACHE', '')
+
+# Keep global custom attribute definitions in process memory, see
+# ggrc.cache.cad_registry.
+CAD_REGISTRY = not bool(os.environ.get('GGRC_DISABLE_CAD_REGISTRY'))
+
+# Change feed of events and revisions, see ggrc.utils.change_feed.
+# Revisions created less than CHANGE_FEED_LAG seconds before the start of the
+# oldest running transaction are not returned by the feed yet.
+CHANGE_FEED_LAG = int(os.environ.get('GGRC_CHANGE_FEED_LAG', '60'))
+CHANGE_FEED_PAGE_SIZE = int(
+    os.environ.get('GGRC_CHANGE_FEED_PAGE_SIZE', '1000'))
+CHANGE_FEED_MAX_PAGE_SIZE = 10000
+# Path of a local file to append change records to, empty to disable.
+CHANGE_FEED_FILE = os.environ.get('GGRC_CHANGE_FEED_FILE', '')
+
 # AppEngine Email
 APPENGINE_EMAIL = os.environ.get('APPENGINE_EMAIL', '')
 
@@ -129,6 +157,17 @@ EMAIL_BULK_SYNC_EXCEPTION = JINJA2.get_template(
 
 USE_APP_ENGINE_ASSETS_SUBDOMAIN = False
 
+# Number of import rows committed in a single transaction with a single
+# event. 1 commits every row separately.
+IMPORT_BATCH_SIZE = int(os.environ.get("GGRC_IMPORT_BATCH_SIZE", "1"))
+
+# Approximate size in bytes of a single stored chunk of background export.
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# Max number of revisions in a keyframe and delta chain of compacted
+# revisions, see ggrc.utils.revision_storage.
+REVISION_KEYFRAME_INTERVAL = 20
+
 BACKGROUND_COLLECTION_POST_SLEEP = 0
 
 
@@ -163,6 +202,14 @@ LOGGING_LOGGERS = {
 
 DEBUG_BENCHMARK = os.environ.get("GGRC_BENCHMARK")
 
+# Request profiler, see ggrc.utils.profiler
+QUERY_PROFILER = not bool(os.environ.get("GGRC_DISABLE_QUERY_PROFILER"))
+# Number of recent requests kept by the request profiler
+QUERY_PROFILER_SIZE = int(os.environ.get("GGRC_QUERY_PROFILER_SIZE", "500"))
+# Statement shapes repeated more times in a request are reported as N+1
+QUERY_PROFILER_REPEAT_THRESHOLD = int(
+    os.environ.get("GGRC_QUERY_PROFILER_REPEAT_THRESHOLD", "20"))
+
 # GGRCQ integration
 GGRC_Q_INTEGRATION_URL = os.environ.get('GGRC_Q_INTEGRATION_URL', '')
 
@@ -184,6 +231,14 @@ ISSUE_TRACKER_BUG_URL_TMPL = os.environ.get('ISSUE_TRACKER_BUG_URL_TMPL')
 # Flag defining whether we need to mock issue tracker responses
 ISSUE_TRACKER_MOCK = bool(os.environ.get('ISSUE_TRACKER_MOCK'))
 
+# Max number of concurrent requests of bulk Issue Tracker synchronization.
+ISSUE_TRACKER_SYNC_WORKERS = int(
+    os.environ.get('ISSUE_TRACKER_SYNC_WORKERS', '8'))
+
+# Max number of Issue Tracker requests per second sent by the instance.
+ISSUE_TRACKER_SYNC_RATE = float(
+    os.environ.get('ISSUE_TRACKER_SYNC_RATE', '10'))
+
 # Dashboard integration
 _DEFAULT_DASHBOARD_INTEGRATION_CONFIG = {
     "ca_name_regexp": r"^Dashboard_(.*)$",
@@ -245,5 +300,22 @@ RETRY_OPTIONS = {
 }
 DEFAULT_QUEUE = "ggrc"
 
+# Executor for background tasks outside of AppEngine. "inline" runs tasks in
+# the request that created them, "worker" stores them for the worker pool
+# started with `python -m ggrc.task_worker`.
+BACKGROUND_TASK_EXECUTOR = os.environ.get("GGRC_BACKGROUND_TASK_EXECUTOR",
+                                          "inline")
+BACKGROUND_TASK_WORKERS = int(os.environ.get("GGRC_BACKGROUND_TASK_WORKERS",
+                                             "2"))
+BACKGROUND_TASK_LEASE_SECONDS = 300
+BACKGROUND_TASK_POLL_SECONDS = 1
+# Max number of concurrently running tasks per queue, the None key is used
+# for queues that are not listed.
+BACKGROUND_TASK_QUEUE_CONCURRENCY = {
+    "ggrc": 5,
+    "ggrcImport": 5,
+    None: 1,
+}
+
 APPENGINE_INSTANCE = os.environ.get('APPENGINE_INSTANCE')
 APPENGINE_LOCATION = os.environ.get('APPENGINE_LOCATION', 'us-central1')
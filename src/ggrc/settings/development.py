@@ -19,6 +19,7 @@ AUTOBUILD_ASSETS = True
 # DEBUG_ASSETS = True
 USE_APP_ENGINE_ASSETS_SUBDOMAIN = False
 MEMCACHE_MECHANISM = False
+REPRESENTATION_CACHE = 'local'
 APPENGINE_EMAIL = "user@example.com"
 
 LOGGING_FORMATTER = {
@@ -2,3 +2,4 @@
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
 MEMCACHE_MECHANISM = False
+REPRESENTATION_CACHE = ''
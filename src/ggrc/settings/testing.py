@@ -16,5 +16,9 @@ FULLTEXT_INDEXER = 'ggrc.fulltext.mysql.MysqlIndexer'
 LOGIN_MANAGER = 'ggrc.login.noop'
 # SQLALCHEMY_ECHO = True
 MEMCACHE_MECHANISM = False
+REPRESENTATION_CACHE = ''
 EXTERNAL_APP_USER = 'External App <external_app@example.com>'
 ENABLE_RELEASE_NOTES = False
+ISSUE_TRACKER_SYNC_WORKERS = 1
+ISSUE_TRACKER_SYNC_RATE = 1000
+CHANGE_FEED_LAG = 0
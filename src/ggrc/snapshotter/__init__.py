@@ -19,6 +19,8 @@ from ggrc import models
 from ggrc.models.hooks import acl
 from ggrc.login import get_current_user_id
 from ggrc.models import all_models
+from ggrc.models import audit_rollup
+from ggrc.models import relationship_adjacency
 from ggrc.utils import benchmark
 
 from ggrc.snapshotter.datastructures import Attr
@@ -459,10 +461,11 @@ class SnapshotGenerator(object):
               snap_1.parent_id = :parent_id AND
               snap_2.parent_id = :parent_id
           """
-      db.session.execute(query, {
-          "user_id": get_current_user_id(),
-          "parent_id": parent.id
-      })
+      with relationship_adjacency.sync_inserted():
+        db.session.execute(query, {
+            "user_id": get_current_user_id(),
+            "parent_id": parent.id
+        })
 
   @classmethod
   def _get_audit_relationships(cls, audit_ids):
@@ -526,24 +529,27 @@ class SnapshotGenerator(object):
         snapshot_table.c.parent_id.in_(audit_ids)
     )
 
-    db.session.execute(
-        inserter.from_select(
-            [
-                relationships_table.c.modified_by_id,
-                relationships_table.c.created_at,
-                relationships_table.c.updated_at,
-                relationships_table.c.source_id,
-                relationships_table.c.source_type,
-                relationships_table.c.destination_id,
-                relationships_table.c.destination_type,
-            ],
-            select_statement
-        )
-    )
+    with relationship_adjacency.sync_inserted():
+      db.session.execute(
+          inserter.from_select(
+              [
+                  relationships_table.c.modified_by_id,
+                  relationships_table.c.created_at,
+                  relationships_table.c.updated_at,
+                  relationships_table.c.source_id,
+                  relationships_table.c.source_type,
+                  relationships_table.c.destination_id,
+                  relationships_table.c.destination_type,
+              ],
+              select_statement
+          )
+      )
 
     new_ids = self._get_audit_relationships(audit_ids)
     created_ids = new_ids.difference(old_ids)
     acl.add_relationships(created_ids)
+    if created_ids:
+      audit_rollup.invalidate_snapshot_counts(audit_ids)
 
   def _remove_lost_snapshot_mappings(self):
     """Remove mappings between snapshots if base objects were unmapped."""
@@ -9,17 +9,19 @@ from functools import partial
 import itertools
 
 import flask
-from sqlalchemy.sql.expression import tuple_
-from sqlalchemy import orm
+from sqlalchemy.sql.expression import and_, bindparam, tuple_
 
 from ggrc import db
 from ggrc import models
 from ggrc.app import app
+from ggrc.cache import cad_registry
 from ggrc.models import all_models, background_task
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.fulltext import get_indexer
 from ggrc.models.reflection import AttributeInfo
-from ggrc.utils import generate_query_chunks, helpers
+from ggrc.models.revision import get_legacy_acl, get_legacy_status
+from ggrc.models.revision import get_populated_cavs
+from ggrc.utils import generate_query_chunks, helpers, list_chunks
 
 from ggrc.snapshotter.rules import Types
 from ggrc.snapshotter.datastructures import Pair
@@ -72,14 +74,10 @@ def _get_custom_attribute_dict():
       getattr(all_models, c)._inflector.table_singular: c for c in Types.all
   }
 
-  query = models.CustomAttributeDefinition.query.filter(
-      models.CustomAttributeDefinition.definition_type.in_(
-          cadef_klass_names.keys()
-      )
-  ).options(orm.undefer('title'))
   cads = defaultdict(list)
-  for cad in query:
-    cads[cadef_klass_names[cad.definition_type]].append(cad)
+  global_cads = cad_registry.get_global_cads(*cadef_klass_names)
+  for definition_type, definitions in global_cads.iteritems():
+    cads[cadef_klass_names[definition_type]] = definitions
   return cads
 
 
@@ -141,9 +139,9 @@ def reindex():
   all_count = columns.count()
   handled = 0
   for query_chunk in generate_query_chunks(columns):
-    handled += query_chunk.count()
-    logger.info("Snapshot: %s/%s", handled, all_count)
     pairs = {Pair.from_4tuple(p) for p in query_chunk}
+    handled += len(pairs)
+    logger.info("Snapshot: %s/%s", handled, all_count)
     reindex_pairs(pairs)
     db.session.commit()
 
@@ -349,59 +347,287 @@ def get_list_record_value(prop, rec, val):
   return itertools.chain(*results)
 
 
+def get_roles():
+  """Get access control roles for indexing of a chunk of snapshots.
+
+  The indexer role name cache is updated with the loaded roles.
+
+  Returns:
+    {object_type: {id: name}} dict of roles.
+  """
+  acr = all_models.AccessControlRole
+  roles = defaultdict(dict)
+  role_names = get_indexer().cache["ac_role_map"]
+  query = db.session.query(acr.id, acr.object_type, acr.name, acr.internal)
+  for id_, object_type, name, internal in query:
+    if object_type is not None:
+      roles[object_type][id_] = name
+    # Internal roles should not be indexed
+    role_names[id_] = None if internal else name
+  return roles
+
+
+def load_people(person_ids):
+  """Load names and emails of people missing in the indexer cache."""
+  people_map = get_indexer().cache["people_map"]
+  missing_ids = {id_ for id_ in person_ids if id_ not in people_map}
+  if not missing_ids:
+    return
+  person = all_models.Person
+  query = db.session.query(person.id, person.name, person.email).filter(
+      person.id.in_(missing_ids)
+  )
+  for id_, name, email in query:
+    people_map[id_] = (name, email)
+
+
+def get_person_ids(properties):
+  """Get ids of people referenced in snapshot properties."""
+  person_ids = set()
+  for value in properties.itervalues():
+    for item in value if isinstance(value, list) else [value]:
+      if not isinstance(item, dict):
+        continue
+      if item.get("type") == "Person" and item.get("id"):
+        person_ids.add(item["id"])
+      elif item.get("person_id"):
+        person_ids.add(item["person_id"])
+  return person_ids
+
+
+def _get_index_acl(content, resource_type, roles):
+  """Get access control list of revision content like Revision.populate_acl.
+
+  Args:
+    content: raw revision content.
+    resource_type: type of the revision resource.
+    roles: {id: name} dict of roles of the resource type.
+  """
+  # pylint: disable=protected-access
+  role_ids = {name: id_ for id_, name in roles.iteritems()}
+  access_control_list = list(content.get("access_control_list") or [])
+  for role_id, person_id in get_legacy_acl(content, resource_type, role_ids):
+    access_control_list.append({
+        "ac_role_id": role_id,
+        "person_id": person_id,
+        "person": {"id": person_id, "type": "Person"},
+    })
+  revision = all_models.Revision
+  access_control_list = revision._filter_internal_acls(
+      revision._populate_acl_with_people(access_control_list))
+  return [acl for acl in access_control_list if acl["ac_role_id"] in roles]
+
+
+def get_index_content(content, resource_type, roles, cads):
+  """Get revision content with populated values of indexed attributes.
+
+  Only the attributes used in the index are populated, see Revision.content
+  for the complete list. Unlike Revision.content this does not run any
+  queries, all data is taken from the arguments.
+
+  Args:
+    content: raw revision content.
+    resource_type: type of the revision resource.
+    roles: {id: name} dict of roles of the resource type.
+    cads: global CADs of the resource type.
+  Returns:
+    content dict.
+  """
+  content = content.copy()
+  content["access_control_list"] = _get_index_acl(content, resource_type,
+                                                  roles)
+  content["custom_attribute_values"] = get_populated_cavs(
+      content,
+      [(cad.id, cad.attribute_type, cad.default_value) for cad in cads],
+      resource_type,
+      content.get("id"),
+  )
+  if "folder" not in content:
+    content["folder"] = (content.get("folders") or [{"id": ""}])[0]["id"]
+  content.update(get_legacy_status(content, resource_type))
+  if content.get("os_state") is not None:
+    content["review_status"] = content["os_state"]
+  elif "os_state" in content:
+    content["review_status"] = all_models.Review.STATES.UNREVIEWED
+  if "document_evidence" in content:
+    content["documents_file"] = [
+        dict(evidence, display_name=u"{link} {title}".format(
+            link=evidence.get("link"),
+            title=evidence.get("title"),
+        ).strip())
+        for evidence in content["document_evidence"]
+    ]
+  if resource_type == "Control":
+    for key in ("categories", "assertions"):
+      content[key] = [
+          {
+              "id": item["category_id"],
+              "type": item["category_type"],
+              "name": item["display_name"],
+              "display_name": item["display_name"],
+          } if "category_id" in item else item
+          for item in content.get(key) or []
+      ]
+  return content
+
+
+def get_snapshots_content(pairs):
+  """Get snapshot fields and raw content of their revisions.
+
+  Args:
+    pairs: A list of parent-child pairs of snapshots.
+  Returns:
+    list of (snapshot dict, revision resource type, content) tuples.
+  """
+  snapshot = all_models.Snapshot
+  revision = all_models.Revision
+  # pylint: disable=protected-access
+  query = db.session.query(
+      snapshot.id,
+      snapshot.parent_type,
+      snapshot.parent_id,
+      snapshot.child_type,
+      snapshot.child_id,
+      revision.id.label("revision_id"),
+      revision.resource_type,
+      revision._stored_content.label("content"),
+      revision._content_keyframe_id.label("keyframe_id"),
+  ).join(
+      revision,
+      revision.id == snapshot.revision_id,
+  ).filter(
+      tuple_(
+          snapshot.parent_type,
+          snapshot.parent_id,
+          snapshot.child_type,
+          snapshot.child_id,
+      ).in_(
+          {pair.to_4tuple() for pair in pairs}
+      )
+  )
+  rows = query.all()
+  delta_ids = [row.revision_id for row in rows if row.keyframe_id is not None]
+  delta_content = {}
+  if delta_ids:
+    # Delta encoded revisions are reconstructed by the model
+    delta_content = {
+        rev.id: rev._content
+        for rev in revision.query.filter(revision.id.in_(delta_ids))
+    }
+  result = []
+  for row in rows:
+    snapshot_dict = {
+        "id": row.id,
+        "parent_type": row.parent_type,
+        "parent_id": row.parent_id,
+        "child_type": row.child_type,
+        "child_id": row.child_id,
+    }
+    content = delta_content.get(row.revision_id, row.content)
+    result.append((snapshot_dict, row.resource_type, content))
+  return result
+
+
+def get_existing_records(snapshot_ids):
+  """Get {(key, property, subproperty): (tags, content)} of snapshots."""
+  query = db.session.query(
+      Record.key,
+      Record.property,
+      Record.subproperty,
+      Record.tags,
+      Record.content,
+  ).filter(
+      Record.type == "Snapshot",
+      Record.key.in_(snapshot_ids),
+  )
+  return {(key, prop, subprop): (tags, content)
+          for key, prop, subprop, tags, content in query}
+
+
+def update_records(snapshot_ids, payload):
+  """Write records that differ from the existing ones of the snapshots.
+
+  Args:
+    snapshot_ids: ids of snapshots whose records are replaced by payload.
+    payload: list of dictionaries that represent records entries.
+  Returns:
+    tuple of numbers of inserted, updated and deleted records.
+  """
+  existing = get_existing_records(snapshot_ids)
+  new = {(rec["key"], rec["property"], rec["subproperty"]): rec
+         for rec in payload}
+  to_insert = []
+  to_update = []
+  for record_key, rec in new.iteritems():
+    old = existing.get(record_key)
+    if old is None:
+      to_insert.append(rec)
+    elif old != (rec["tags"], rec["content"]):
+      to_update.append(rec)
+  to_delete = [record_key for record_key in existing if record_key not in new]
+
+  table = Record.__table__
+  for chunk in list_chunks(to_delete):
+    db.session.execute(table.delete().where(and_(
+        table.c.type == "Snapshot",
+        tuple_(table.c.key, table.c.property, table.c.subproperty).in_(chunk),
+    )))
+  if to_update:
+    db.session.execute(
+        table.update().where(and_(
+            table.c.type == "Snapshot",
+            table.c.key == bindparam("key_"),
+            table.c.property == bindparam("property_"),
+            table.c.subproperty == bindparam("subproperty_"),
+        )).values(
+            tags=bindparam("tags"),
+            content=bindparam("content"),
+        ),
+        [{"key_": rec["key"],
+          "property_": rec["property"],
+          "subproperty_": rec["subproperty"],
+          "tags": rec["tags"],
+          "content": rec["content"]} for rec in to_update],
+    )
+  if to_insert:
+    db.session.execute(table.insert(), to_insert)
+  db.session.commit()
+  return len(to_insert), len(to_update), len(to_delete)
+
+
 def reindex_pairs(pairs):
   """Reindex selected snapshots.
 
+  Snapshots are indexed from raw revision content, data shared by the
+  snapshots is loaded once per call. Only records that differ from the
+  existing index are written.
+
   Args:
     pairs: A list of parent-child pairs that uniquely represent snapshot
     object whose properties should be reindexed.
+  Returns:
+    tuple of numbers of inserted, updated and deleted records.
   """
   if not pairs:
-    return
-  snapshots = dict()
+    return 0, 0, 0
   options = get_options()
-  snapshot_query = models.Snapshot.query.filter(
-      tuple_(
-          models.Snapshot.parent_type,
-          models.Snapshot.parent_id,
-          models.Snapshot.child_type,
-          models.Snapshot.child_id,
-      ).in_(
-          {pair.to_4tuple() for pair in pairs}
-      )
-  ).options(
-      orm.subqueryload("revision").load_only(
-          "id",
-          "resource_type",
-          "resource_id",
-          "_content",
-      ),
-      orm.load_only(
-          "id",
-          "parent_type",
-          "parent_id",
-          "child_type",
-          "child_id",
-          "revision_id",
-      )
-  )
+  roles = get_roles()
   cad_dict = _get_custom_attribute_dict()
-  for snapshot in snapshot_query:
-    revision = snapshot.revision
-    snapshots[snapshot.id] = {
-        "id": snapshot.id,
-        "parent_type": snapshot.parent_type,
-        "parent_id": snapshot.parent_id,
-        "child_type": snapshot.child_type,
-        "child_id": snapshot.child_id,
-        "revision": get_searchable_attributes(
-            CLASS_PROPERTIES[revision.resource_type],
-            cad_dict[revision.resource_type],
-            revision.content)
-    }
+  snapshots = []
+  for snapshot, resource_type, content in get_snapshots_content(pairs):
+    content = get_index_content(content, resource_type,
+                                roles[resource_type], cad_dict[resource_type])
+    snapshot["revision"] = get_searchable_attributes(
+        CLASS_PROPERTIES[resource_type],
+        cad_dict[resource_type],
+        content,
+    )
+    snapshots.append((snapshot, get_properties(snapshot)))
+  load_people(set().union(*(get_person_ids(properties)
+                            for _, properties in snapshots)))
   search_payload = []
-  for snapshot in snapshots.values():
-    for prop, val in get_properties(snapshot).items():
+  for snapshot, properties in snapshots:
+    for prop, val in properties.items():
       search_payload.extend(
           get_record_value(
               prop,
@@ -415,8 +641,8 @@ def reindex_pairs(pairs):
               options
           )
       )
-  delete_records(snapshots.keys())
-  insert_records(search_payload)
+  return update_records([snapshot["id"] for snapshot, _ in snapshots],
+                        search_payload)
 
 
 def reindex_pairs_bg(pairs):
@@ -5,6 +5,7 @@
 
 from ggrc import db
 from ggrc import models
+from ggrc.models import relationship_adjacency
 from ggrc.login import get_current_user_id
 from ggrc.services import signals
 from ggrc.snapshotter import create_snapshots
@@ -62,11 +63,12 @@ def _copy_snapshot_relationships(*_, **kwargs):
           s_2.parent_id = :parent_id AND
           (s_1.id = :snapshot_id OR s_2.id = :snapshot_id)
       """
-  db.session.execute(query, {
-      "user_id": get_current_user_id(),
-      "parent_id": kwargs.get("obj").parent.id,
-      "snapshot_id": kwargs.get("obj").id
-  })
+  with relationship_adjacency.sync_inserted():
+    db.session.execute(query, {
+        "user_id": get_current_user_id(),
+        "parent_id": kwargs.get("obj").parent.id,
+        "snapshot_id": kwargs.get("obj").id
+    })
 
 
 def register_snapshot_listeners():
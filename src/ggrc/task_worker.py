@@ -0,0 +1,157 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Local worker pool for background tasks.
+
+Workers execute background tasks stored in the background_task_queue table
+when BACKGROUND_TASK_EXECUTOR setting is "worker". Run the pool with:
+
+    python -m ggrc.task_worker
+
+The number of worker processes is set by BACKGROUND_TASK_WORKERS setting.
+"""
+
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+
+import flask
+from werkzeug import exceptions
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models import background_task_queue
+
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(object):
+  """Worker that claims and executes queued background tasks."""
+
+  def __init__(self, app, worker_id=None, queues=None):
+    self.app = app
+    self.worker_id = worker_id or "{}-{}".format(socket.gethostname(),
+                                                 os.getpid())
+    self.queues = queues
+    self.lease_seconds = settings.BACKGROUND_TASK_LEASE_SECONDS
+    self.poll_seconds = settings.BACKGROUND_TASK_POLL_SECONDS
+
+  def _heartbeat(self, item_id, stop_event):
+    """Extend the item lease until the task is finished."""
+    interval = max(self.lease_seconds / 3.0, 1)
+    while not stop_event.wait(interval):
+      try:
+        with db.engine.connect() as connection:
+          background_task_queue.extend_lease(
+              connection, item_id, self.worker_id, self.lease_seconds)
+      except Exception:  # pylint: disable=broad-except
+        logger.exception("Unable to extend lease of queue item %s", item_id)
+
+  def _get_view(self, item):
+    """Get the view function that handles the task url."""
+    adapter = self.app.url_map.bind("")
+    endpoint, _ = adapter.match(item.url, method=item.method)
+    return self.app.view_functions[endpoint]
+
+  def execute(self, item):
+    """Execute the claimed item.
+
+    Returns:
+      None on success or error description for a task that should be retried.
+    """
+    from ggrc.models.background_task import BackgroundTask
+    with self.app.test_request_context(
+        item.url,
+        method=item.method,
+        headers=[("X-Task-Name", item.bg_task_name)],
+    ):
+      try:
+        bg_task = BackgroundTask.query.filter_by(
+            name=item.bg_task_name).first()
+        if bg_task is None:
+          return "BackgroundTask {} not found".format(item.bg_task_name)
+        # pylint: disable=protected-access
+        flask.g._current_user = bg_task.modified_by
+        view = self._get_view(item)
+        response = self.app.make_response(view(bg_task))
+        if response.status_code >= 500:
+          return "Task responded with {}".format(response.status)
+        return None
+      except exceptions.NotFound:
+        return "No view found for {} {}".format(item.method, item.url)
+      except Exception:  # pylint: disable=broad-except
+        logger.exception("Task %s failed", item.bg_task_name)
+        return traceback.format_exc()
+      finally:
+        db.session.remove()
+
+  def run_once(self):
+    """Claim and execute a single item.
+
+    Returns:
+      True if an item was handled, False if the queue was empty.
+    """
+    with self.app.app_context():
+      item = background_task_queue.claim(self.worker_id, self.lease_seconds,
+                                         self.queues)
+      if item is None:
+        return False
+      item_id = item.id
+      db.session.expunge(item)
+    stop_event = threading.Event()
+    heartbeat = threading.Thread(target=self._heartbeat,
+                                 args=(item_id, stop_event))
+    heartbeat.daemon = True
+    heartbeat.start()
+    try:
+      error = self.execute(item)
+    finally:
+      stop_event.set()
+      heartbeat.join()
+    with self.app.app_context():
+      status = background_task_queue.complete(item_id, self.worker_id, error)
+      db.session.remove()
+    logger.info("Queue item %s (%s): %s", item_id, item.bg_task_name, status)
+    return True
+
+  def run_forever(self):
+    """Process queue items until the process is terminated."""
+    logger.info("Background task worker %s started", self.worker_id)
+    while True:
+      try:
+        handled = self.run_once()
+      except Exception:  # pylint: disable=broad-except
+        logger.exception("Background task worker %s failed", self.worker_id)
+        handled = False
+      if not handled:
+        time.sleep(self.poll_seconds)
+
+
+def _run_worker_process(queues=None):
+  """Entry point of a single worker process."""
+  from ggrc.app import app
+  db.engine.dispose()
+  Worker(app, queues=queues).run_forever()
+
+
+def main(workers=None, queues=None):
+  """Start the pool of worker processes and wait for them."""
+  workers = workers or settings.BACKGROUND_TASK_WORKERS
+  processes = [
+      multiprocessing.Process(target=_run_worker_process, args=(queues,))
+      for _ in range(workers)
+  ]
+  for process in processes:
+    process.daemon = True
+    process.start()
+  for process in processes:
+    process.join()
+
+
+if __name__ == "__main__":
+  main()
@@ -286,12 +286,64 @@ def iso_to_us_date(date_string):
   return convert_date_format(date_string, DATE_FORMAT_ISO, DATE_FORMAT_US)
 
 
-def generate_query_chunks(query, chunk_size=CHUNK_SIZE):
-  """Make a generator splitting `query` into chunks of size `chunk_size`."""
-  count = query.count()
-  query = query.order_by("id")
-  for offset in range(0, count, chunk_size):
-    yield query.limit(chunk_size).offset(offset)
+def _get_id_column(query, id_column):
+  """Get id column of the first entity of the query if none is given."""
+  if id_column is not None:
+    return id_column
+  return query.column_descriptions[0]["entity"].id
+
+
+def split_id_ranges(query, chunk_size=CHUNK_SIZE, id_column=None):
+  """Split rows of `query` into id ranges with `chunk_size` rows each.
+
+  Boundaries are found by walking the id index of the filtered query with
+  `WHERE id > last_id ORDER BY id LIMIT 1 OFFSET chunk_size - 1`, so each
+  step reads at most `chunk_size` index entries. The ranges can be handed
+  to parallel workers that select their rows with filter_id_range.
+
+  Args:
+    query: query to split.
+    chunk_size: number of rows in a range, the last range can be smaller.
+    id_column: column to split by, id of the first query entity by default.
+
+  Yields:
+    (start, end) tuples of ids: start is exclusive and None for the first
+    range, end is inclusive and None for the last range.
+  """
+  id_column = _get_id_column(query, id_column)
+  ids_query = query.with_entities(id_column).order_by(id_column)
+  start = None
+  while True:
+    boundary_query = ids_query
+    if start is not None:
+      boundary_query = boundary_query.filter(id_column > start)
+    end = boundary_query.offset(chunk_size - 1).limit(1).scalar()
+    yield start, end
+    if end is None:
+      return
+    start = end
+
+
+def filter_id_range(query, id_range, id_column=None):
+  """Filter `query` by an id range returned by split_id_ranges."""
+  id_column = _get_id_column(query, id_column)
+  start, end = id_range
+  if start is not None:
+    query = query.filter(id_column > start)
+  if end is not None:
+    query = query.filter(id_column <= end)
+  return query.order_by(id_column)
+
+
+def generate_query_chunks(query, chunk_size=CHUNK_SIZE, id_column=None):
+  """Make a generator splitting `query` into chunks of size `chunk_size`.
+
+  Chunks are id ranges (see split_id_ranges), so selecting a chunk costs the
+  same at the end of a big table as at its start, unlike LIMIT with OFFSET.
+  """
+  id_column = _get_id_column(query, id_column)
+  for id_range in split_id_ranges(query, chunk_size, id_column):
+    yield filter_id_range(query, id_range, id_column)
 
 
 def list_chunks(list_, chunk_size=CHUNK_SIZE):
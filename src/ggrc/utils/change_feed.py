@@ -0,0 +1,215 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Ordered feed of committed changes.
+
+Every revision logged by log_event or inserted in bulk is a change record
+with the fields in FIELDS. Records are ordered by revision id. Consumers
+read them with
+
+  GET /api/changes?after=<revision id>&limit=<number of records>
+
+and pass the "next" cursor of the response as "after" of the next request.
+
+Revision ids are allocated when revisions are inserted, not when they are
+committed, so a transaction can commit a revision with a lower id after a
+revision with a higher id is already visible. This also happens to revisions
+added to old events, e.g. by update_cad_related_objects. To keep the cursor
+from skipping such revisions, a page ends before the first revision created
+after the low watermark: the start of the oldest running transaction that
+modified data, or now if there is none, minus settings.CHANGE_FEED_LAG
+seconds. The lag also covers clock differences of application instances.
+Without access to information_schema.innodb_trx only the lag is used.
+
+With settings.CHANGE_FEED_FILE records are also appended to a local file as
+JSON lines, see FileSink.
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import settings
+
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("event_id", "revision_id", "type", "id", "action")
+
+# Min number of seconds between file sink updates of the process.
+SINK_INTERVAL = 10
+
+# Start of the oldest running transaction that modified data, in UTC.
+OLDEST_TRANSACTION_QUERY = sa.text("""
+    SELECT DATE_SUB(
+        MIN(trx_started),
+        INTERVAL TIMESTAMPDIFF(SECOND, UTC_TIMESTAMP(), NOW()) SECOND
+    )
+    FROM information_schema.innodb_trx
+    WHERE trx_mysql_thread_id != CONNECTION_ID() AND trx_rows_modified > 0
+""")
+
+
+def get_oldest_transaction_start(connection=None):
+  """Get start time of the oldest running writing transaction.
+
+  Returns:
+    datetime in UTC, or None if there are no such transactions or they can't
+    be read.
+  """
+  try:
+    return (connection or db.session).execute(
+        OLDEST_TRANSACTION_QUERY).scalar()
+  except sa.exc.DBAPIError as error:
+    logger.warning("Unable to read running transactions: %s", error)
+    return None
+
+
+def get_low_watermark(connection=None):
+  """Get the time before which all created revisions are committed."""
+  watermark = datetime.datetime.utcnow()
+  oldest_start = get_oldest_transaction_start(connection)
+  if oldest_start is not None:
+    watermark = min(watermark, oldest_start)
+  return watermark - datetime.timedelta(seconds=settings.CHANGE_FEED_LAG)
+
+
+def iter_records(after, limit, connection=None):
+  """Iterate over committed change records after the cursor.
+
+  Records stop before the first revision created after the low watermark,
+  as revisions with lower ids may still be committed before it.
+
+  Args:
+    after: revision id cursor.
+    limit: max number of records.
+    connection: connection to use instead of the current session.
+
+  Yields:
+    tuples of FIELDS values.
+  """
+  from ggrc.models import all_models
+  revisions = all_models.Revision.__table__
+  watermark = get_low_watermark(connection)
+  query = sa.select([
+      revisions.c.event_id,
+      revisions.c.id,
+      revisions.c.resource_type,
+      revisions.c.resource_id,
+      revisions.c.action,
+      revisions.c.created_at,
+  ]).where(
+      revisions.c.id > after,
+  ).order_by(
+      revisions.c.id,
+  ).limit(limit).execution_options(stream_results=True)
+  result = (connection or db.session).execute(query)
+  try:
+    for row in result:
+      if row.created_at >= watermark:
+        return
+      yield tuple(row)[:len(FIELDS)]
+  finally:
+    result.close()
+
+
+def iter_page_json(after, limit):
+  """Generate JSON chunks of a feed page.
+
+  The page is a JSON object with "fields", list of "changes" with values of
+  these fields, "next" cursor and "has_more" flag.
+  """
+  yield '{{"fields": {}, "changes": ['.format(json.dumps(FIELDS))
+  separator = ""
+  count = 0
+  for record in iter_records(after, limit):
+    yield separator + json.dumps(record)
+    separator = ", "
+    after = record[1]
+    count += 1
+  yield '], "next": {}, "has_more": {}}}'.format(
+      json.dumps(after),
+      json.dumps(count == limit),
+  )
+
+
+class FileSink(object):
+  """Append-only file with change records as JSON lines.
+
+  The cursor is the revision id of the last record in the file, so the file
+  can be truncated or rotated by consumers at any line.
+  """
+
+  def __init__(self, path):
+    self.path = path
+
+  def get_cursor(self):
+    """Get revision id of the last record in the file or 0."""
+    if not os.path.exists(self.path):
+      return 0
+    with open(self.path, "rb") as sink_file:
+      sink_file.seek(0, os.SEEK_END)
+      size = sink_file.tell()
+      sink_file.seek(max(size - 4096, 0))
+      lines = sink_file.read().splitlines()
+    for line in reversed(lines):
+      try:
+        return json.loads(line)["revision_id"]
+      except (ValueError, KeyError, TypeError):
+        continue
+    return 0
+
+  def sync(self, connection=None, limit=None):
+    """Append records of revisions committed after the cursor.
+
+    Returns:
+      number of appended records.
+    """
+    import fcntl
+    limit = limit or settings.CHANGE_FEED_PAGE_SIZE
+    count = 0
+    with open(self.path, "ab") as sink_file:
+      # Lock the file so that concurrent processes don't append the same
+      # records twice.
+      fcntl.flock(sink_file, fcntl.LOCK_EX)
+      try:
+        after = self.get_cursor()
+        page_size = limit
+        while page_size == limit:
+          page_size = 0
+          for record in iter_records(after, limit, connection):
+            sink_file.write(json.dumps(dict(zip(FIELDS, record))) + "\n")
+            after = record[1]
+            page_size += 1
+          sink_file.flush()
+          count += page_size
+      finally:
+        fcntl.flock(sink_file, fcntl.LOCK_UN)
+    return count
+
+
+_SINK_LOCK = threading.Lock()
+_LAST_SINK_SYNC = [0]
+
+
+def sync_file_sink():
+  """Update the file sink if it is configured and not updated recently."""
+  path = settings.CHANGE_FEED_FILE
+  if not path:
+    return
+  now = time.time()
+  with _SINK_LOCK:
+    if now - _LAST_SINK_SYNC[0] < SINK_INTERVAL:
+      return
+    _LAST_SINK_SYNC[0] = now
+  try:
+    with db.engine.connect() as connection:
+      FileSink(path).sync(connection)
+  except Exception:  # pylint: disable=broad-except
+    logger.exception("Unable to update change feed file %s", path)
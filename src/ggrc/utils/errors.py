@@ -22,6 +22,8 @@ STATUS_SET_FAILED = u"Failed to set job status"
 
 RELOAD_PAGE = u"Try to reload /export page."
 
+EXPORT_NOT_FINISHED = u"Export is not finished yet."
+
 MISSING_FILE = u"The file is missing."
 
 WRONG_FILE_TYPE = u"Invalid file type."
@@ -1,8 +1,21 @@
 # Copyright (C) 2019 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
-"""Provides an HTML cleaner function with sqalchemy compatible API"""
+"""Provides an HTML cleaner function with sqalchemy compatible API
+
+Sanitized value is the fix point of bleach cleaning and unescaping. Bleach is
+slow on long texts, so:
+  - values without markup, entities and control characters are their own fix
+    point and are returned without running bleach;
+  - results for other values are memoized in a bounded in-process LRU keyed
+    by the content hash. Results are stored as their own results too, so
+    sanitizing an already clean value again is a cache hit.
+"""
+import collections
+import hashlib
 import HTMLParser
+import re
+import threading
 
 import bleach
 
@@ -33,6 +46,112 @@ CLEANER = bleach.sanitizer.Cleaner(
 
 PARSER = HTMLParser.HTMLParser()
 
+# Characters that bleach or unescape can change: tags, entities, control
+# characters replaced by bleach and carriage returns normalized by the HTML
+# parser.
+UNSAFE_CHARS_RE = re.compile(u"[<&\x00-\x08\x0b-\x1f\x7f-\x9f]")
+
+# Max number of memoized results.
+CACHE_SIZE = 10000
+
+# Max total length of memoized results. Results longer than 1/8 of it are
+# not memoized.
+CACHE_MAX_LENGTH = 8 * 1024 * 1024
+
+
+class SanitizedCache(object):
+  """LRU of sanitized values keyed by the content hash."""
+
+  def __init__(self, size=CACHE_SIZE, max_length=CACHE_MAX_LENGTH):
+    self.size = size
+    self.max_length = max_length
+    self.length = 0
+    self.entries = collections.OrderedDict()
+    self.lock = threading.Lock()
+
+  @staticmethod
+  def get_key(value):
+    return hashlib.sha1(value.encode("utf-8")).digest()
+
+  def get(self, key):
+    """Get the memoized result and mark it recently used or None."""
+    with self.lock:
+      result = self.entries.pop(key, None)
+      if result is not None:
+        self.entries[key] = result
+      return result
+
+  def set(self, key, result):
+    """Store the result and evict least recently used ones."""
+    if len(result) > self.max_length // 8:
+      return
+    with self.lock:
+      old = self.entries.pop(key, None)
+      if old is not None:
+        self.length -= len(old)
+      self.entries[key] = result
+      self.length += len(result)
+      while (len(self.entries) > self.size or
+             self.length > self.max_length):
+        _, evicted = self.entries.popitem(last=False)
+        self.length -= len(evicted)
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+      self.length = 0
+
+
+CACHE = SanitizedCache()
+
+
+def _clean(value):
+  """Run bleach and unescape until the value reaches a fix point."""
+  while True:
+    lastvalue = value
+    value = PARSER.unescape(CLEANER.clean(value))
+    if value == lastvalue:
+      break
+  return value
+
+
+def sanitize(value):
+  """Get sanitized unicode value of a string."""
+  value = unicode(value)
+  if not UNSAFE_CHARS_RE.search(value):
+    return value
+  key = CACHE.get_key(value)
+  result = CACHE.get(key)
+  if result is None:
+    result = _clean(value)
+    CACHE.set(key, result)
+    if result != value:
+      CACHE.set(CACHE.get_key(result), result)
+  return result
+
+
+def clean_values(values):
+  """Sanitize a batch of values.
+
+  Every distinct value is sanitized once. Values that are not strings are
+  returned unchanged.
+
+  Args:
+    values: iterable of values to be cleaned.
+  Returns:
+    list of cleaned values in the order of the given values.
+  """
+  results = {}
+  cleaned = []
+  for value in values:
+    if not isinstance(value, basestring):
+      cleaned.append(value)
+      continue
+    if value not in results:
+      results[value] = sanitize(value)
+    cleaned.append(results[value])
+  return cleaned
+
 
 def cleaner(dummy, value, *_):
   """Cleans out unsafe HTML tags.
@@ -53,10 +172,4 @@ def cleaner(dummy, value, *_):
     # No point in sanitizing non-strings
     return value
 
-  value = unicode(value)
-  while True:
-    lastvalue = value
-    value = PARSER.unescape(CLEANER.clean(value))
-    if value == lastvalue:
-      break
-  return value
+  return sanitize(value)
@@ -9,6 +9,9 @@ so it can be properly tested on FE.
 """
 
 import os
+import threading
+import time
+
 from google.appengine.api import apiproxy_stub
 from google.appengine.api import apiproxy_stub_map
 
@@ -16,8 +19,13 @@ from google.appengine.api import apiproxy_stub_map
 class FetchServiceMock(apiproxy_stub.APIProxyStub):
   """Mock for urlfetch serice"""
 
-  def __init__(self, service_name='urlfetch'):
+  def __init__(self, service_name='urlfetch', latency=0, verbose=True):
     super(FetchServiceMock, self).__init__(service_name)
+    # Latency in seconds emulates network round trips in benchmarks.
+    self.latency = latency
+    self.verbose = verbose
+    self.request_count = 0
+    self.lock = threading.Lock()
     dirname = os.path.dirname(os.path.realpath(__file__))
     json_file = os.path.join(dirname, 'response.json')
     self.mock_response_issue = open(json_file).read()
@@ -25,8 +33,13 @@ class FetchServiceMock(apiproxy_stub.APIProxyStub):
   # pylint: disable=invalid-name
   def _Dynamic_Fetch(self, request, response):
     """Process request to urlfetch serice"""
-    print "Request:"
-    print ("Request: {}").format(request)
+    with self.lock:
+      self.request_count += 1
+    if self.verbose:
+      print "Request:"
+      print ("Request: {}").format(request)
+    if self.latency:
+      time.sleep(self.latency)
     response.set_content(self.mock_response_issue)
     response.set_statuscode(200)
     new_header = response.add_header()
@@ -42,6 +55,7 @@ class FetchServiceMock(apiproxy_stub.APIProxyStub):
     self.response = response
 
 
-def init_issue_tracker_mock():
-  fetch_mock = FetchServiceMock()
+def init_issue_tracker_mock(**kwargs):
+  fetch_mock = FetchServiceMock(**kwargs)
   apiproxy_stub_map.apiproxy.RegisterStub('urlfetch', fetch_mock)
+  return fetch_mock
@@ -0,0 +1,355 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Request profiler.
+
+The profiler records for every request:
+
+  - wall time, CPU time, number of SQL queries and time spent in them;
+  - the same numbers for every benchmark() label entered in the request,
+    including queries of nested labels;
+  - N+1 patterns: statement shapes executed more than
+    settings.QUERY_PROFILER_REPEAT_THRESHOLD times in the request. A shape is
+    a statement with literals and lists of placeholders collapsed, so that
+    loading objects one by one gives the same shape for all of them.
+
+The last settings.QUERY_PROFILER_SIZE requests are kept in a ring buffer and
+totals are kept per endpoint and per benchmark label since the process
+start. Both are exposed with:
+
+  GET /admin/query_profile -- JSON with recent requests and aggregates;
+  GET /admin/query_profile/metrics -- Prometheus text format of the totals.
+
+Data is kept in process memory, so every instance reports only requests it
+has served. Set GGRC_DISABLE_QUERY_PROFILER to turn the profiler off.
+"""
+
+import collections
+import datetime
+import re
+import threading
+import time
+
+import flask
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+
+from ggrc import settings
+
+
+# Max number of distinct benchmark labels with stored totals. Labels over
+# the limit are counted under OTHER_LABEL.
+MAX_LABELS = 1000
+OTHER_LABEL = "<other>"
+
+# Max number of cached statement shapes.
+MAX_SHAPES = 5000
+
+# Max length of a statement shape in reports.
+SHAPE_LENGTH = 500
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_RE = re.compile(r"\bIN\s*\(\?(?:\s*,\s*\?)*\)", re.I)
+_PLACEHOLDERS_RE = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROWS_RE = re.compile(r"\(\?[^()]*\)(?:\s*,\s*\(\?[^()]*\))+")
+_SPACES_RE = re.compile(r"\s+")
+
+_shapes = {}
+
+STAT_FIELDS = ("duration", "cpu_time", "query_count", "sql_time")
+
+
+def get_shape(statement):
+  """Get statement with literals and lists of placeholders collapsed."""
+  shape = _shapes.get(statement)
+  if shape is None:
+    shape = statement.replace("%s", "?")
+    shape = _STRING_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_RE.sub("IN (?, ...)", shape)
+    shape = _PLACEHOLDERS_RE.sub("?, ...", shape)
+    shape = _ROWS_RE.sub("(?, ...), ...", shape)
+    shape = _SPACES_RE.sub(" ", shape).strip()
+    if len(_shapes) >= MAX_SHAPES:
+      _shapes.clear()
+    _shapes[statement] = shape
+  return shape
+
+
+class RequestProfile(object):
+  """Numbers collected during a single request."""
+  # pylint: disable=too-many-instance-attributes
+
+  def __init__(self, endpoint):
+    self.endpoint = endpoint
+    self.started_at = datetime.datetime.utcnow()
+    self.start = time.time()
+    self.start_cpu = time.clock()
+    self.query_count = 0
+    self.sql_time = 0.0
+    # {(innermost label, shape): [count, sql time]}
+    self.shapes = collections.defaultdict(lambda: [0, 0.0])
+    # stack of (label, start, start cpu, query count, sql time)
+    self.labels = []
+    self.active_labels = collections.Counter()
+    # {label: {field: value}}
+    self.benchmarks = collections.defaultdict(
+        lambda: collections.defaultdict(float))
+
+  def add_query(self, shape, duration):
+    self.query_count += 1
+    self.sql_time += duration
+    label = self.labels[-1][0] if self.labels else None
+    entry = self.shapes[(label, shape)]
+    entry[0] += 1
+    entry[1] += duration
+
+  def enter(self, label):
+    self.labels.append((label, time.time(), time.clock(), self.query_count,
+                        self.sql_time))
+    self.active_labels[label] += 1
+
+  def exit(self, label):
+    """Add numbers of the innermost label to its stats."""
+    if not self.labels or self.labels[-1][0] != label:
+      return
+    _, start, start_cpu, query_count, sql_time = self.labels.pop()
+    self.active_labels[label] -= 1
+    stats = self.benchmarks[label]
+    stats["calls"] += 1
+    if self.active_labels[label]:
+      # Recursive labels are counted once, by the outermost call.
+      return
+    stats["duration"] += time.time() - start
+    stats["cpu_time"] += time.clock() - start_cpu
+    stats["query_count"] += self.query_count - query_count
+    stats["sql_time"] += self.sql_time - sql_time
+
+  def get_repeated(self, threshold):
+    """Get statement shapes executed more than threshold times.
+
+    Returns:
+      tuple of a list of shape dicts for the request and a
+      {label: list of shape dicts} dict with shapes of every label.
+    """
+    by_shape = collections.defaultdict(lambda: [0, 0.0])
+    by_label = collections.defaultdict(list)
+    for (label, shape), (count, sql_time) in self.shapes.iteritems():
+      by_shape[shape][0] += count
+      by_shape[shape][1] += sql_time
+      if label is not None and count > threshold:
+        by_label[label].append(_shape_dict(shape, count, sql_time))
+    repeated = [_shape_dict(shape, count, sql_time)
+                for shape, (count, sql_time) in by_shape.iteritems()
+                if count > threshold]
+    repeated.sort(key=lambda item: item["count"], reverse=True)
+    return repeated, by_label
+
+  def finish(self, status, threshold):
+    """Get the request record stored in the ring buffer."""
+    repeated, repeated_by_label = self.get_repeated(threshold)
+    benchmarks = {}
+    for label, stats in self.benchmarks.iteritems():
+      benchmarks[label] = dict(
+          stats,
+          calls=int(stats["calls"]),
+          query_count=int(stats["query_count"]),
+          n_plus_one=repeated_by_label.get(label, []),
+      )
+    return {
+        "endpoint": self.endpoint,
+        "path": flask.request.path,
+        "status": status,
+        "started_at": self.started_at.isoformat(),
+        "duration": time.time() - self.start,
+        "cpu_time": time.clock() - self.start_cpu,
+        "query_count": self.query_count,
+        "sql_time": self.sql_time,
+        "n_plus_one": repeated,
+        "benchmarks": benchmarks,
+    }
+
+
+def _shape_dict(shape, count, sql_time):
+  return {
+      "statement": shape[:SHAPE_LENGTH],
+      "count": count,
+      "sql_time": sql_time,
+  }
+
+
+class Profiler(object):
+  """Ring buffer of request records and totals since the process start."""
+
+  def __init__(self, size, threshold):
+    self.threshold = threshold
+    self.lock = threading.Lock()
+    self.recent = collections.deque(maxlen=size)
+    self.endpoints = collections.defaultdict(
+        lambda: collections.defaultdict(float))
+    self.labels = collections.defaultdict(
+        lambda: collections.defaultdict(float))
+
+  def add(self, record):
+    """Store a finished request record."""
+    with self.lock:
+      self.recent.append(record)
+      totals = self.endpoints[record["endpoint"]]
+      totals["requests"] += 1
+      totals["n_plus_one"] += len(record["n_plus_one"])
+      for field in STAT_FIELDS:
+        totals[field] += record[field]
+      for label, stats in record["benchmarks"].iteritems():
+        if label not in self.labels and len(self.labels) >= MAX_LABELS:
+          label = OTHER_LABEL
+        totals = self.labels[label]
+        totals["calls"] += stats["calls"]
+        totals["n_plus_one"] += len(stats["n_plus_one"])
+        for field in STAT_FIELDS:
+          totals[field] += stats.get(field, 0)
+
+  def get_report(self):
+    """Get recent requests and totals as a JSON serializable dict."""
+    with self.lock:
+      recent = list(self.recent)
+      endpoints = {name: dict(totals)
+                   for name, totals in self.endpoints.iteritems()}
+      labels = {name: dict(totals)
+                for name, totals in self.labels.iteritems()}
+    repeated = collections.defaultdict(lambda: collections.defaultdict(float))
+    for record in recent:
+      for item in record["n_plus_one"]:
+        stats = repeated[(record["endpoint"], item["statement"])]
+        stats["requests"] += 1
+        stats["count"] += item["count"]
+        stats["sql_time"] += item["sql_time"]
+    n_plus_one = [
+        dict(shape_stats, endpoint=endpoint, statement=statement)
+        for (endpoint, statement), shape_stats in repeated.iteritems()
+    ]
+    n_plus_one.sort(key=lambda item: item["sql_time"], reverse=True)
+    return {
+        "repeat_threshold": self.threshold,
+        "endpoints": endpoints,
+        "benchmarks": labels,
+        "n_plus_one": n_plus_one,
+        "recent": recent[::-1],
+    }
+
+  def get_metrics(self):
+    """Get totals in Prometheus text exposition format."""
+    with self.lock:
+      endpoints = {name: dict(totals)
+                   for name, totals in self.endpoints.iteritems()}
+      labels = {name: dict(totals)
+                for name, totals in self.labels.iteritems()}
+    lines = []
+    _add_metrics(lines, "ggrc_request", "endpoint", endpoints, (
+        ("requests", "total", "Number of profiled requests."),
+        ("duration", "seconds_total", "Wall time of requests."),
+        ("cpu_time", "cpu_seconds_total", "CPU time of requests."),
+        ("query_count", "queries_total", "Number of SQL queries."),
+        ("sql_time", "sql_seconds_total", "Time spent in SQL queries."),
+        ("n_plus_one", "n_plus_one_total",
+         "Number of repeated statement shapes."),
+    ))
+    _add_metrics(lines, "ggrc_benchmark", "label", labels, (
+        ("calls", "calls_total", "Number of benchmark calls."),
+        ("duration", "seconds_total", "Wall time of benchmarks."),
+        ("cpu_time", "cpu_seconds_total", "CPU time of benchmarks."),
+        ("query_count", "queries_total", "Number of SQL queries."),
+        ("sql_time", "sql_seconds_total", "Time spent in SQL queries."),
+        ("n_plus_one", "n_plus_one_total",
+         "Number of repeated statement shapes."),
+    ))
+    return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+  return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _add_metrics(lines, prefix, label_name, totals, metrics):
+  """Add counter lines of totals for all metrics."""
+  for field, suffix, help_text in metrics:
+    name = "{}_{}".format(prefix, suffix)
+    lines.append("# HELP {} {}".format(name, help_text))
+    lines.append("# TYPE {} counter".format(name))
+    for label in sorted(totals):
+      value = totals[label].get(field, 0)
+      lines.append('{}{{{}="{}"}} {}'.format(
+          name, label_name, _escape_label(label), repr(float(value))))
+
+
+PROFILER = Profiler(
+    size=getattr(settings, "QUERY_PROFILER_SIZE", 500),
+    threshold=getattr(settings, "QUERY_PROFILER_REPEAT_THRESHOLD", 20),
+)
+
+
+def _get_profile():
+  """Get the profile of the current request or None."""
+  if not flask.has_request_context():
+    return None
+  return getattr(flask.g, "request_profile", None)
+
+
+def enter_label(label):
+  """Mark the start of a benchmark label in the current request."""
+  profile = _get_profile()
+  if profile is not None:
+    profile.enter(label)
+
+
+def exit_label(label):
+  """Mark the end of a benchmark label in the current request."""
+  profile = _get_profile()
+  if profile is not None:
+    profile.exit(label)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+  # pylint: disable=unused-argument,too-many-arguments
+  # The start time is kept on the execution context, so a statement that
+  # raises does not leave a stale entry on the pooled connection.
+  if context is not None and _get_profile() is not None:
+    context.profiler_query_start = time.time()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+  # pylint: disable=unused-argument,too-many-arguments
+  profile = _get_profile()
+  start = getattr(context, "profiler_query_start", None)
+  if profile is None or start is None:
+    return
+  profile.add_query(get_shape(statement), time.time() - start)
+
+
+def _get_endpoint():
+  rule = flask.request.url_rule
+  name = rule.rule if rule is not None else "<unknown>"
+  return "{} {}".format(flask.request.method, name)
+
+
+def init_app(app):
+  """Start profiling requests of the app."""
+  if not getattr(settings, "QUERY_PROFILER", False):
+    return
+  sa.event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+  sa.event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+  # pylint: disable=unused-variable
+  @app.before_request
+  def start_request_profile():
+    flask.g.request_profile = RequestProfile(_get_endpoint())
+
+  @app.after_request
+  def finish_request_profile(response):
+    profile = getattr(flask.g, "request_profile", None)
+    if profile is not None:
+      flask.g.request_profile = None
+      PROFILER.add(profile.finish(response.status_code, PROFILER.threshold))
+    return response
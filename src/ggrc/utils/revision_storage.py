@@ -0,0 +1,300 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compact delta encoded storage of revision content.
+
+By default every revision stores the complete object content. Compaction
+rewrites older revisions of each resource so that only periodic keyframes
+keep the full content, while all other revisions store a compressed delta
+against the previous revision of the same resource:
+
+    keyframe, delta, delta, ..., keyframe, delta, ..., latest (full)
+
+The latest revision of every resource is always left in full format, since
+it is the one read most often and new revisions are always written in full
+format. Delta revisions have an empty content column, a content_delta value
+and content_keyframe_id pointing to the keyframe their chain starts from.
+Revision._content reconstructs the content transparently.
+
+Snapshot revisions are never compacted, their content is read directly from
+the content column in bulk queries.
+
+Content of compacted revisions must not be rewritten in place because later
+revisions of the resource depend on it. Expand revisions of the resource
+before changing them.
+
+Compaction and expansion of existing revisions is done with:
+
+    python -m ggrc.utils.revision_storage compact [--type TYPE]
+    python -m ggrc.utils.revision_storage expand [--type TYPE]
+"""
+
+import argparse
+import logging
+
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import settings
+from ggrc.utils import benchmark
+
+
+logger = logging.getLogger(__name__)
+
+# Revisions of these types are read directly from the content column.
+NOT_COMPACTED_TYPES = ("Snapshot",)
+
+# Number of resources handled in a single transaction.
+RESOURCES_CHUNK_SIZE = 100
+
+
+def get_keyframe_interval():
+  """Get max number of revisions in a keyframe and delta chain."""
+  return max(getattr(settings, "REVISION_KEYFRAME_INTERVAL", 20), 1)
+
+
+def make_delta(old_content, new_content):
+  """Get delta that turns old_content into new_content.
+
+  The delta is computed for the top level keys of the content, which is
+  enough to keep only the changed attributes of the object.
+
+  Returns:
+    dict with "set" - changed and added items and "unset" - removed keys.
+  """
+  changed = {key: value for key, value in new_content.iteritems()
+             if key not in old_content or old_content[key] != value}
+  removed = sorted(key for key in old_content if key not in new_content)
+  return {"set": changed, "unset": removed}
+
+
+def apply_delta(content, delta):
+  """Get new content from content and a delta made by make_delta."""
+  result = dict(content)
+  for key in delta.get("unset", []):
+    result.pop(key, None)
+  result.update(delta.get("set", {}))
+  return result
+
+
+def reconstruct_content(revision):
+  """Reconstruct full content of a delta encoded revision.
+
+  Revisions of the resource between the keyframe and the given revision are
+  loaded in a single query and deltas are applied in their order.
+  """
+  from ggrc.models import all_models
+  model = all_models.Revision
+  # pylint: disable=protected-access
+  rows = db.session.query(
+      model._stored_content,
+      model._content_delta,
+  ).filter(
+      model.resource_type == revision.resource_type,
+      model.resource_id == revision.resource_id,
+      model.id >= revision._content_keyframe_id,
+      model.id <= revision.id,
+  ).order_by(model.id)
+  content = None
+  for stored_content, delta in rows:
+    if delta is None:
+      content = stored_content
+    elif content is not None:
+      content = apply_delta(content, delta)
+  if content is None:
+    raise ValueError("Unable to reconstruct content of revision {}".format(
+        revision.id))
+  return content
+
+
+def _get_resource_revisions(resource_type, resource_id):
+  """Get revisions of the resource with reconstructed content.
+
+  Returns:
+    list of (id, content, is_full, keyframe_id) tuples ordered by id.
+  """
+  from ggrc.models import all_models
+  model = all_models.Revision
+  # pylint: disable=protected-access
+  rows = db.session.query(
+      model.id,
+      model._stored_content,
+      model._content_delta,
+      model._content_keyframe_id,
+  ).filter(
+      model.resource_type == resource_type,
+      model.resource_id == resource_id,
+  ).order_by(model.id)
+  result = []
+  content = None
+  for id_, stored_content, delta, keyframe_id in rows:
+    is_full = delta is None
+    content = stored_content if is_full else apply_delta(content, delta)
+    result.append((id_, content, is_full, keyframe_id))
+  return result
+
+
+def plan_resource_layout(revisions, keyframe_interval):
+  """Get the storage layout for ordered revisions of a single resource.
+
+  Args:
+    revisions: list of (id, content) tuples ordered by id.
+    keyframe_interval: max number of revisions in a chain.
+  Returns:
+    list of (id, content, delta, keyframe_id) tuples, where content is None
+    for delta revisions and delta and keyframe_id are None for full ones.
+  """
+  layout = []
+  keyframe_id = None
+  previous = None
+  last_index = len(revisions) - 1
+  for index, (id_, content) in enumerate(revisions):
+    if index % keyframe_interval == 0 or index == last_index:
+      keyframe_id = id_
+      layout.append((id_, content, None, None))
+    else:
+      layout.append((id_, None, make_delta(previous, content), keyframe_id))
+    previous = content
+  return layout
+
+
+def _store_layout(current, layout):
+  """Update revisions whose storage format differs from the layout."""
+  from ggrc.models import all_models
+  table = all_models.Revision.__table__
+  current_formats = {id_: (is_full, keyframe_id)
+                     for id_, _, is_full, keyframe_id in current}
+  for id_, content, delta, keyframe_id in layout:
+    if current_formats[id_] == (delta is None, keyframe_id):
+      continue
+    db.session.execute(table.update().where(table.c.id == id_).values(
+        content=content,
+        content_delta=delta,
+        content_keyframe_id=keyframe_id,
+    ))
+
+
+def compact_resource(resource_type, resource_id, keyframe_interval=None):
+  """Rewrite revisions of a single resource as keyframes and deltas."""
+  if resource_type in NOT_COMPACTED_TYPES:
+    return
+  keyframe_interval = keyframe_interval or get_keyframe_interval()
+  current = _get_resource_revisions(resource_type, resource_id)
+  layout = plan_resource_layout(
+      [(id_, content) for id_, content, _, _ in current],
+      keyframe_interval,
+  )
+  _store_layout(current, layout)
+
+
+def expand_resource(resource_type, resource_id):
+  """Rewrite all revisions of a single resource in full format."""
+  current = _get_resource_revisions(resource_type, resource_id)
+  layout = [(id_, content, None, None) for id_, content, _, _ in current]
+  _store_layout(current, layout)
+
+
+def _get_resources(resource_type=None, compacted_only=False):
+  """Get (type, id) pairs of resources that have revisions."""
+  from ggrc.models import all_models
+  model = all_models.Revision
+  query = db.session.query(
+      model.resource_type,
+      model.resource_id,
+  ).filter(
+      model.resource_type.notin_(NOT_COMPACTED_TYPES),
+  )
+  if resource_type:
+    query = query.filter(model.resource_type == resource_type)
+  if compacted_only:
+    # pylint: disable=protected-access
+    query = query.filter(model._content_delta.isnot(None))
+  return query.distinct().order_by(
+      model.resource_type,
+      model.resource_id,
+  ).all()
+
+
+def _run_for_resources(handler, resources, name):
+  """Apply handler to resources committing every chunk."""
+  total = len(resources)
+  for start in range(0, total, RESOURCES_CHUNK_SIZE):
+    chunk = resources[start:start + RESOURCES_CHUNK_SIZE]
+    with benchmark("%s revisions of %s resources" % (name, len(chunk))):
+      for resource_type, resource_id in chunk:
+        handler(resource_type, resource_id)
+      db.session.plain_commit()
+    logger.info("%s: %s / %s resources", name, start + len(chunk), total)
+
+
+def compact_revisions(resource_type=None, keyframe_interval=None):
+  """Compact revisions of all resources or resources of the given type."""
+  keyframe_interval = keyframe_interval or get_keyframe_interval()
+
+  def handler(type_, id_):
+    compact_resource(type_, id_, keyframe_interval)
+
+  _run_for_resources(handler, _get_resources(resource_type), "Compact")
+
+
+def expand_revisions(resource_type=None):
+  """Rewrite compacted revisions in full format."""
+  _run_for_resources(
+      expand_resource,
+      _get_resources(resource_type, compacted_only=True),
+      "Expand",
+  )
+
+
+def get_storage_stats(resource_type=None):
+  """Get number and size of full and delta revisions.
+
+  Returns:
+    dict with "full" and "delta" items containing revisions count and total
+    stored bytes.
+  """
+  from ggrc.models import all_models
+  table = all_models.Revision.__table__
+  query = sa.select([
+      table.c.content_delta.is_(None),
+      sa.func.count(table.c.id),
+      sa.func.sum(sa.func.coalesce(sa.func.length(table.c.content), 0) +
+                  sa.func.coalesce(sa.func.length(table.c.content_delta), 0)),
+  ])
+  if resource_type:
+    query = query.where(table.c.resource_type == resource_type)
+  query = query.group_by(table.c.content_delta.is_(None))
+  stats = {
+      "full": {"count": 0, "bytes": 0},
+      "delta": {"count": 0, "bytes": 0},
+  }
+  for is_full, count, size in db.session.execute(query):
+    stats["full" if is_full else "delta"] = {
+        "count": count,
+        "bytes": int(size or 0),
+    }
+  return stats
+
+
+def main():
+  """Compact or expand existing revisions."""
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("command", choices=("compact", "expand", "stats"))
+  parser.add_argument("--type", dest="resource_type", default=None,
+                      help="handle revisions of a single resource type")
+  parser.add_argument("--interval", type=int, default=None,
+                      help="max number of revisions in a chain")
+  args = parser.parse_args()
+
+  from ggrc.app import app
+  with app.app_context():
+    if args.command == "compact":
+      compact_revisions(args.resource_type, args.interval)
+    elif args.command == "expand":
+      expand_revisions(args.resource_type)
+    print get_storage_stats(args.resource_type)
+
+
+if __name__ == "__main__":
+  logging.basicConfig(level=logging.INFO)
+  main()
@@ -12,13 +12,39 @@ from ggrc.models import all_models
 logger = getLogger(__name__)
 
 
-def _get_new_objects():
-  """Returns list of new objects"""
-  result = db.session.execute("""
-      SELECT obj_id, obj_type, action, modified_by_id
-      FROM objects_without_revisions
-  """).fetchall()
-  return result
+def _get_new_objects_chunks(size):
+  """Yield chunks of new objects.
+
+  Chunks are selected by the (obj_id, obj_type) unique key after the last
+  row of the previous chunk, so the table is never loaded as a whole and
+  reading a chunk does not rescan the preceding rows.
+  """
+  last_id, last_type = None, None
+  while True:
+    if last_id is None:
+      chunk = db.session.execute("""
+          SELECT obj_id, obj_type, action, modified_by_id
+          FROM objects_without_revisions
+          ORDER BY obj_id, obj_type
+          LIMIT :size
+      """, {"size": size}).fetchall()
+    else:
+      chunk = db.session.execute("""
+          SELECT obj_id, obj_type, action, modified_by_id
+          FROM objects_without_revisions
+          WHERE obj_id > :last_id OR (obj_id = :last_id AND
+                                      obj_type > :last_type)
+          ORDER BY obj_id, obj_type
+          LIMIT :size
+      """, {
+          "last_id": last_id,
+          "last_type": last_type,
+          "size": size,
+      }).fetchall()
+    if not chunk:
+      return
+    yield chunk
+    last_id, last_type = chunk[-1][0], chunk[-1][1]
 
 
 def _get_new_objects_count():
@@ -27,12 +53,6 @@ def _get_new_objects_count():
                             "FROM objects_without_revisions").scalar()
 
 
-def _get_chunks(objects, size):
-  """Yield sized chunks from objects."""
-  for i in xrange(0, len(objects), size):
-    yield objects[i:i + size]
-
-
 # pylint: disable-msg=too-many-arguments
 def build_revision_body(obj_id, obj_type, obj_content, event_id, action,
                         modified_by_id):
@@ -66,8 +86,7 @@ def do_missing_revisions():
   count = _get_new_objects_count()
   chunk_size = 100
   logger.info("Creating revision content...")
-  for index, chunk in enumerate(_get_chunks(_get_new_objects(),
-                                            chunk_size), 1):
+  for index, chunk in enumerate(_get_new_objects_chunks(chunk_size), 1):
     logger.info("Processing chunk %s of %s", index, count / chunk_size + 1)
     revisions = []
     for obj_id, obj_type, action, modified_by_id in chunk:
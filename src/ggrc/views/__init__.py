@@ -20,22 +20,23 @@ from ggrc import fulltext, login, models, settings, utils as ggrc_utils, \
 from ggrc.app import app, db
 from ggrc.builder import json as builder_json
 from ggrc.cache import utils as cache_utils
-from ggrc.fulltext import mixin
+from ggrc.fulltext import indexing_queue
+from ggrc.fulltext import reindex as fulltext_reindex
 from ggrc.integrations import integrations_errors, issues
-from ggrc.models import background_task, reflection, revision
+from ggrc.models import audit_rollup, background_task, reflection, revision
 from ggrc.models.hooks.issue_tracker import integration_utils
 from ggrc.notifications import common
 from ggrc.query import views as query_views
 from ggrc.rbac import permissions
 from ggrc.services import common as services_common
 from ggrc.snapshotter import rules, indexer as snapshot_indexer
-from ggrc.utils import benchmark, helpers, log_event, revisions
+from ggrc.utils import benchmark, change_feed, helpers, log_event, \
+    profiler, revisions
 from ggrc.views import converters, cron, filters, notifications, registry, \
     utils
 
 
 logger = logging.getLogger(__name__)
-REINDEX_CHUNK_SIZE = 100
 
 
 # Needs to be secured as we are removing @login_required
@@ -44,6 +45,7 @@ REINDEX_CHUNK_SIZE = 100
 def propagate_acl(_):
   """Web hook to update revision content."""
   models.hooks.acl.propagation.propagate_all()
+  cache_utils.clear_permission_cache()
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
@@ -65,6 +67,15 @@ def reindex_snapshots(_):
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
+@app.route("/_background_tasks/rebuild_audit_rollups", methods=["POST"])
+@background_task.queued_task
+def rebuild_audit_rollups(_):
+  """Web hook to recompute stored audit summaries and snapshot counts."""
+  with benchmark("Rebuild audit rollups"):
+    audit_rollup.rebuild()
+  return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+
+
 @app.route("/_background_tasks/reindex", methods=["POST"])
 @background_task.queued_task
 def reindex(_):
@@ -108,9 +119,13 @@ def compute_attributes(task):
 @background_task.queued_task
 def bg_update_ft_records(task):
   """Background indexing endpoint"""
-  fulltext.listeners.update_ft_records(task.parameters.get("models_ids", {}),
-                                       task.parameters.get("chunk_size"))
-  db.session.plain_commit()
+  models_ids = task.parameters.get("models_ids")
+  if models_ids:
+    # tasks created before the indexing queue was introduced
+    fulltext.listeners.update_ft_records(models_ids,
+                                         task.parameters.get("chunk_size"))
+    db.session.plain_commit()
+  indexing_queue.drain()
   return app.make_response(('success', 200, [('Content-Type', 'text/html')]))
 
 
@@ -284,8 +299,9 @@ def update_cad_related_objects(task):
   query = db.session.query(model if need_revisions else model.id)
   objects_count = query.count()
   handled_objects = 0
-  for chunk in ggrc_utils.generate_query_chunks(query):
-    handled_objects += chunk.count()
+  for chunk in ggrc_utils.generate_query_chunks(query, id_column=model.id):
+    chunk = chunk.all()
+    handled_objects += len(chunk)
     logger.info(
         "Updating CAD related objects: %s/%s", handled_objects, objects_count
     )
@@ -356,43 +372,18 @@ def generate_wf_tasks_notifications(_):
 
 @helpers.without_sqlalchemy_cache
 def do_reindex(with_reindex_snapshots=False):
-  """Update the full text search index."""
-
-  indexer = fulltext.get_indexer()
-  indexed_models = {
-      m.__name__: m for m in models.all_models.all_models
-      if issubclass(m, mixin.Indexed) and m.REQUIRED_GLOBAL_REINDEX
-  }
-  people_query = db.session.query(
-      models.all_models.Person.id,
-      models.all_models.Person.name,
-      models.all_models.Person.email
-  )
-  indexer.cache["people_map"] = {p.id: (p.name, p.email) for p in people_query}
-  indexer.cache["ac_role_map"] = dict(db.session.query(
-      models.all_models.AccessControlRole.id,
-      models.all_models.AccessControlRole.name,
-  ))
-  for model_name in sorted(indexed_models.keys()):
-    logger.info("Updating index for: %s", model_name)
-    with benchmark("Create records for %s" % model_name):
-      model = indexed_models[model_name]
-      ids = [id_[0] for id_ in db.session.query(model.id)]
-      ids_count = len(ids)
-      handled_ids = 0
-      ids_chunks = ggrc_utils.list_chunks(ids, chunk_size=REINDEX_CHUNK_SIZE)
-      for ids_chunk in ids_chunks:
-        handled_ids += len(ids_chunk)
-        logger.info("%s: %s / %s", model.__name__, handled_ids, ids_count)
-        model.bulk_record_update_for(ids_chunk)
-        db.session.plain_commit()
+  """Update the full text search index.
 
+  The reindex is resumed from the last checkpoint if the previous run of the
+  same job was interrupted.
+  """
+  object_types = sorted(fulltext_reindex.get_indexed_models().keys())
+  job_name = fulltext_reindex.REINDEX_JOB
   if with_reindex_snapshots:
-    logger.info("Updating index for: %s", "Snapshot")
-    with benchmark("Create records for %s" % "Snapshot"):
-      snapshot_indexer.reindex()
-
-  indexer.invalidate_cache()
+    object_types.append(fulltext_reindex.SNAPSHOT_TYPE)
+    job_name = fulltext_reindex.FULL_REINDEX_JOB
+  with benchmark("Run %s job" % job_name):
+    fulltext_reindex.run_job(job_name, object_types)
 
 
 @helpers.without_sqlalchemy_cache
@@ -697,6 +688,74 @@ def admin_reindex():
                          [('Content-Type', 'text/html')])))
 
 
+@app.route("/admin/reindex", methods=["GET"])
+@login.login_required
+@login.admin_required
+def admin_reindex_progress():
+  """Get progress of the last reindex job"""
+  return _reindex_progress_response(fulltext_reindex.REINDEX_JOB)
+
+
+@app.route("/admin/indexing_queue", methods=["GET"])
+@login.login_required
+@login.admin_required
+def admin_indexing_queue():
+  """Get depth and lag of the full text indexing queue"""
+  return app.make_response((json.dumps(indexing_queue.get_metrics()), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/admin/rebuild_audit_rollups", methods=["POST"])
+@login.login_required
+@login.admin_required
+def admin_rebuild_audit_rollups():
+  """Calls a webhook that recomputes all audit rollups
+  """
+  bg_task = background_task.create_task(
+      name="rebuild_audit_rollups",
+      url=flask.url_for(rebuild_audit_rollups.__name__),
+      queued_callback=rebuild_audit_rollups,
+  )
+  db.session.commit()
+  return bg_task.make_response(
+      app.make_response(("scheduled %s" % bg_task.name, 200,
+                         [('Content-Type', 'text/html')])))
+
+
+@app.route("/admin/query_profile", methods=["GET"])
+@login.login_required
+@login.admin_required
+def admin_query_profile():
+  """Get recent request profiles and totals per endpoint and benchmark"""
+  return app.make_response((json.dumps(profiler.PROFILER.get_report()), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/admin/query_profile/metrics", methods=["GET"])
+@login.login_required
+@login.admin_required
+def admin_query_profile_metrics():
+  """Get request profile totals in Prometheus text format"""
+  return app.make_response((profiler.PROFILER.get_metrics(), 200,
+                            [("Content-Type",
+                              "text/plain; version=0.0.4")]))
+
+
+@app.route("/admin/full_reindex", methods=["GET"])
+@login.login_required
+@login.admin_required
+def admin_full_reindex_progress():
+  """Get progress of the last full reindex job"""
+  return _reindex_progress_response(fulltext_reindex.FULL_REINDEX_JOB)
+
+
+def _reindex_progress_response(job_name):
+  """Create response with progress of reindex job work units."""
+  progress = fulltext_reindex.get_progress(job_name)
+  return app.make_response((json.dumps(progress), 200,
+                            [("Content-Type", "application/json")]))
+
+
 @app.route("/admin/full_reindex", methods=["POST"])
 @login.login_required
 @login.admin_required
@@ -939,7 +998,7 @@ def make_document_admin():
   for doc in docs:
     doc.add_admin_role()
   db.session.commit()
-  cache_utils.clear_permission_cache()
+  cache_utils.clear_users_permission_cache([login.get_current_user_id()])
   response = utils.DocumentEndpoint.build_make_admin_response(
       flask.request.json,
       docs
@@ -947,6 +1006,37 @@ def make_document_admin():
   return flask.Response(json.dumps(response), mimetype='application/json')
 
 
+def _get_int_arg(name, default, min_value, max_value=None):
+  """Get an integer query argument in the given range."""
+  value = flask.request.args.get(name)
+  if value is None:
+    return default
+  try:
+    value = int(value)
+  except ValueError:
+    raise exceptions.BadRequest("'{}' must be an integer.".format(name))
+  if value < min_value or (max_value is not None and value > max_value):
+    raise exceptions.BadRequest("'{}' is out of range.".format(name))
+  return value
+
+
+@app.route("/api/changes", methods=["GET"])
+@login.login_required
+@login.admin_required
+def get_changes():
+  """Get a page of the change feed after the 'after' revision id.
+
+  See ggrc.utils.change_feed for the response format.
+  """
+  after = _get_int_arg("after", 0, 0)
+  limit = _get_int_arg("limit", settings.CHANGE_FEED_PAGE_SIZE, 1,
+                       settings.CHANGE_FEED_MAX_PAGE_SIZE)
+  return flask.Response(
+      flask.stream_with_context(change_feed.iter_page_json(after, limit)),
+      mimetype='application/json',
+  )
+
+
 @app.route("/generate_children_issues", methods=["POST"])
 @login.login_required
 def generate_children_issues():
@@ -23,7 +23,8 @@ from flask import request
 from flask import json
 from flask import render_template
 from werkzeug.exceptions import (
-    BadRequest, InternalServerError, Unauthorized, Forbidden, NotFound
+    BadRequest, Conflict, InternalServerError, Unauthorized, Forbidden,
+    NotFound
 )
 
 from ggrc import db, utils
@@ -97,6 +98,19 @@ def export_file(export_to, filename, csv_string=None):
   raise BadRequest(app_errors.BAD_PARAMS)
 
 
+def stream_csv_file(content_chunks):
+  """Stream csv file content chunks with chunked transfer encoding"""
+  def generate():
+    for chunk in content_chunks:
+      yield chunk.encode("utf-8")
+  headers = [
+      ("Content-Type", "text/csv"),
+      ("Content-Disposition", "attachment"),
+  ]
+  return flask.Response(flask.stream_with_context(generate()),
+                        200, headers)
+
+
 def handle_export_request_error(handle_function):
   """Decorator for handle exceptions during exporting"""
   @wraps(handle_function)
@@ -163,19 +177,35 @@ def handle_export_csv_template_request():
   return export_file(export_to, filename, csv_string)
 
 
-def make_export(objects, exportable_objects=None):
-  """Make export"""
+def get_export_converter(objects, exportable_objects=None):
+  """Get export converter for the objects query."""
   query_helper = QueryHelper(objects)
   ids_by_type = query_helper.get_ids()
-  converter = ExportConverter(
+  return ExportConverter(
       ids_by_type=ids_by_type,
       exportable_queries=exportable_objects,
   )
+
+
+def make_export(objects, exportable_objects=None):
+  """Make export"""
+  converter = get_export_converter(objects, exportable_objects)
   csv_data = converter.export_csv_data()
   object_names = "_".join(converter.get_object_names())
   return csv_data, object_names
 
 
+def make_chunked_export(ie_id, objects, exportable_objects=None):
+  """Make export storing the csv file in content chunks of the job."""
+  import_export.delete_content_chunks(ie_id)
+  db.session.commit()
+  converter = get_export_converter(objects, exportable_objects)
+  converter.stream_csv_data(
+      import_export.ContentChunkWriter(ie_id),
+      settings.EXPORT_CHUNK_SIZE,
+  )
+
+
 def check_import_file():
   """Check if imported file format and type is valid"""
   if "file" not in request.files or not request.files["file"]:
@@ -250,13 +280,14 @@ def run_export(task):
     ie = import_export.get(ie_id)
     check_for_previous_run()
 
-    content, _ = make_export(objects, exportable_objects)
+    make_chunked_export(ie_id, objects, exportable_objects)
     db.session.refresh(ie)
     if ie.status == "Stopped":
+      import_export.delete_content_chunks(ie_id)
+      db.session.commit()
       return utils.make_simple_response()
     ie.status = "Finished"
     ie.end_at = datetime.utcnow()
-    ie.content = content
     db.session.commit()
 
     job_emails.send_email(job_emails.EXPORT_COMPLETED, user.email,
@@ -264,8 +295,10 @@ def run_export(task):
 
   except Exception as e:  # pylint: disable=broad-except
     logger.exception("Export failed: %s", e.message)
+    db.session.rollback()
     ie = import_export.get(ie_id)
     try:
+      import_export.delete_content_chunks(ie_id)
       ie.status = "Failed"
       ie.end_at = datetime.utcnow()
       db.session.commit()
@@ -534,8 +567,15 @@ def handle_file_download(id2):
   try:
     export_to = request.args.get("export_to")
     ie = import_export.get(id2)
-    return export_file(export_to, ie.title, ie.content.encode("utf-8"))
-  except (Forbidden, NotFound, Unauthorized):
+    if export_to == "csv" and import_export.has_content_chunks(ie.id):
+      # Chunks are committed while the export runs, so they form a complete
+      # file only when the job is finished.
+      if ie.status != "Finished":
+        raise Conflict(app_errors.EXPORT_NOT_FINISHED)
+      return stream_csv_file(import_export.iter_content_chunks(ie.id))
+    content = import_export.get_content(ie)
+    return export_file(export_to, ie.title, content.encode("utf-8"))
+  except (Conflict, Forbidden, NotFound, Unauthorized):
     raise
   except Exception as e:
     logger.exception(e.message)
@@ -10,6 +10,7 @@ import logging
 import flask
 import sqlalchemy as sa
 from sqlalchemy import orm
+from sqlalchemy.orm.session import Session
 
 
 from ggrc import db
@@ -17,16 +18,18 @@ from ggrc import settings
 from ggrc.login import is_external_app_user
 from ggrc.login import get_current_user
 from ggrc.models import all_models
+from ggrc.models.hooks.acl import permissions as acl_permissions
 
 from ggrc.access_control.roleable import Roleable
 from ggrc.models.audit import Audit
 from ggrc.models.program import Program
 from ggrc.rbac import permissions as rbac_permissions
 from ggrc.rbac.permissions_provider import DefaultUserPermissions
+from ggrc.cache import permissions_cache
 from ggrc.cache import utils as cache_utils
 from ggrc.services import signals
 from ggrc.services.registry import service
-from ggrc.utils import benchmark, memcache
+from ggrc.utils import benchmark
 from ggrc_basic_permissions.contributed_roles import BasicRoleDeclarations
 from ggrc_basic_permissions.converters.handlers import COLUMN_HANDLERS
 from ggrc_basic_permissions.models import Role
@@ -44,8 +47,6 @@ blueprint = flask.Blueprint(
     static_url_path='/static/ggrc_basic_permissions',
 )
 
-PERMISSION_CACHE_TIMEOUT = 3600  # 60 minutes
-
 
 def get_public_config(_):
   """Expose additional permissions-dependent config to client.
@@ -149,28 +150,6 @@ def _get_memcache_client():
   return cache_utils.get_cache_manager().cache_object.memcache_client
 
 
-def query_memcache(cache, key):
-  """Get cached permissions from memcache is available
-
-  Args:
-      cache (memcache client): mecahce client
-      key (string): key of the stored permissions
-  Returns:
-      permissions_cache (dict): dict with all permissions or None if there
-                                was a cache miss
-  """
-
-  cached_keys_set = cache.get('permissions:list') or set()
-  if key not in cached_keys_set:
-    # We set the permissions:list variable so that we are able to batch
-    # remove all permissions related keys from memcache
-    cached_keys_set.add(key)
-    cache.set('permissions:list', cached_keys_set, PERMISSION_CACHE_TIMEOUT)
-    return None
-
-  return memcache.blob_get(cache, key)
-
-
 def load_default_permissions(permissions):
   """Load default permissions for all users
 
@@ -353,14 +332,25 @@ def _get_acl_filter(acl_model):
   ]
 
 
-def load_access_control_list(user, permissions):
-  """Load permissions from access_control_list"""
+def load_access_control_list(user, permissions, object_types=None):
+  """Load permissions from access_control_list
+
+  Args:
+      user (Person): Person object
+      permissions (dict): dict where the permissions will be stored
+      object_types (list): optional list of object types to load permissions
+                           for
+  Returns:
+      None
+  """
   acl_base = db.aliased(all_models.AccessControlList, name="acl_base")
   acl_propagated = db.aliased(all_models.AccessControlList,
                               name="acl_propagated")
   acr = all_models.AccessControlRole
   acp = all_models.AccessControlPerson
   additional_filters = _get_acl_filter(acl_propagated)
+  if object_types is not None:
+    additional_filters.append(acl_propagated.object_type.in_(object_types))
   access_control_list = db.session.query(
       acl_propagated.object_type,
       acl_propagated.object_id,
@@ -388,33 +378,17 @@ def load_access_control_list(user, permissions):
           .add(object_id)
 
 
-def store_results_into_memcache(permissions, cache, key):
-  """Load personal context for user
-
-  This function must only be called if memcahe is enabled
-
-  Args:
-      permissions (dict): dict where the permissions will be stored
-      cache (cache_manager): Cache manager that should be used for storing
-                             permissions
-      key (string): key of under which permissions should be stored
-  Returns:
-      None
-  """
-
-  cached_keys_set = cache.get('permissions:list') or set()
-  if key in cached_keys_set and \
-     not memcache.blob_set(
-         cache,
-         key,
-         permissions,
-         exp_time=PERMISSION_CACHE_TIMEOUT,
-     ):
-    logger.error("Failed to set permissions data into memcache")
+def get_acl_object_types():
+  """Get object types that can have permissions from access control list"""
+  acr = all_models.AccessControlRole
+  query = db.session.query(acr.object_type).filter(
+      acr.object_type != all_models.Relationship.__name__,
+  ).distinct()
+  return sorted(object_type for object_type, in query)
 
 
-def _load_permissions_from_database(user):
-  """Calculate permissions based on DB queries"""
+def _load_base_permissions_from_database(user):
+  """Calculate permissions that do not depend on access control list"""
 
   permissions = {}
 
@@ -433,6 +407,30 @@ def _load_permissions_from_database(user):
   with benchmark("load_permissions > load personal context"):
     load_personal_context(user, permissions)
 
+  return permissions
+
+
+def _load_acl_permissions_from_database(user, object_types):
+  """Calculate access control list permissions for the given object types
+
+  Returns:
+      dict: {object_type: {action: set of object ids}}
+  """
+  permissions = {}
+  with benchmark("load_permissions > load access control list"):
+    load_access_control_list(user, permissions, object_types)
+  result = {}
+  for action, types in permissions.iteritems():
+    for object_type, value in types.iteritems():
+      result.setdefault(object_type, {})[action] = value["resources"]
+  return result
+
+
+def _load_permissions_from_database(user):
+  """Calculate permissions based on DB queries"""
+
+  permissions = _load_base_permissions_from_database(user)
+
   with benchmark("load_permissions > load access control list"):
     load_access_control_list(user, permissions)
 
@@ -456,30 +454,28 @@ def load_permissions_for(user):
     keys.
   'condition' is the string name of a conditional operator, such as 'contains'.
   'terms' are the arguments to the 'condition'.
+
+  If memcache is enabled, parts of the permissions are cached separately and
+  only missing parts are loaded from the database, see
+  ggrc.cache.permissions_cache.
   """
-  key = 'permissions:{}'.format(user.id)
-
-  # try to get cached permissions from memcahe
-  with benchmark("load_permissions > query memcache"):
-    cache = _get_memcache_client()
-    if cache:
-      result = query_memcache(cache, key)
-      if result:
-        return result
-
-  # no permissions were stored in memcache for this user. Use DB to get perms
-  permissions = _load_permissions_from_database(user)
-
-  # store calculated permissions into memcahe
-  if not hasattr(flask.g, "referenced_object_stubs"):
-    # In some cases for optimization we only load a small chunk of permissions
-    # and in that case we can not cache the value because it might not contain
-    # the permissions information for any subsequent request.
-    with benchmark("load_permissions > store results into memcache"):
-      if cache:
-        store_results_into_memcache(permissions, cache, key)
+  cache = _get_memcache_client()
+  if not cache:
+    return _load_permissions_from_database(user)
 
-  return permissions
+  def load_base():
+    return (_load_base_permissions_from_database(user),
+            get_acl_object_types())
+
+  def load_acl(object_types):
+    return _load_acl_permissions_from_database(user, object_types)
+
+  # In some cases for optimization we only load a small chunk of permissions
+  # and in that case we can not cache the value because it might not contain
+  # the permissions information for any subsequent request.
+  store = not hasattr(flask.g, "referenced_object_stubs")
+  with benchmark("load_permissions > load cached permissions"):
+    return permissions_cache.load(cache, user.id, load_base, load_acl, store)
 
 
 def _get_or_create_personal_context(user):
@@ -553,6 +549,23 @@ def handle_resource_deleted(sender, obj=None, service=None):
         .delete()
 
 
+def handle_user_roles_flush(session, _):
+  """Drop cached permissions affected by flushed user roles."""
+  if not flask.has_app_context():
+    return
+  people = set()
+  for obj in session.new | session.dirty | session.deleted:
+    if isinstance(obj, UserRole):
+      people.add(obj.person_id)
+    elif isinstance(obj, Role):
+      acl_permissions.mark_roles_changed()
+  if people:
+    acl_permissions.add_changed_people(people)
+
+
+sa.event.listen(Session, "after_flush", handle_user_roles_flush)
+
+
 def contributed_services():
   """The list of all collections provided by this extension."""
   return [
@@ -22,6 +22,7 @@ from google.appengine.ext import testbed
 from ggrc import db
 from ggrc.app import app
 from ggrc import settings
+from ggrc.cache import cad_registry
 from ggrc.converters.import_helper import read_csv_file
 from ggrc.views.converters import check_import_file
 from ggrc.models import Revision, all_models
@@ -170,6 +171,7 @@ class TestCase(BaseTestCase, object):
     if hasattr(db.session, "reindex_set"):
       delattr(db.session, "reindex_set")
     db.session.commit()
+    cad_registry.bump_generation()
 
   def setUp(self):
     """Setup method."""
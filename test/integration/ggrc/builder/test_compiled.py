@@ -0,0 +1,73 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for compiled JSON serializers."""
+
+import json
+
+import mock
+
+from ggrc.builder import compiled
+from ggrc.builder import json as builder_json
+from ggrc.models import all_models
+from ggrc.utils import GrcEncoder
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestCompiledSerializer(TestCase):
+  """Compiled serializers give the same output as the builder."""
+
+  @staticmethod
+  def _dump(value):
+    return json.dumps(value, cls=GrcEncoder, sort_keys=True)
+
+  def _assert_equivalent(self, objects, fields=None):
+    """Check compiled output against publish and publish_representation."""
+    expected = builder_json.publish_representation(
+        [builder_json.publish(obj, attribute_whitelist=fields)
+         for obj in objects]
+    )
+    result = compiled.publish_objects(objects, attribute_whitelist=fields)
+    self.assertEqual(self._dump(result), self._dump(expected))
+
+  def test_equivalent_output(self):
+    """Objects with stubs, relationships and ACL are published equally."""
+    with factories.single_commit():
+      audit = factories.AuditFactory()
+      assessments = [factories.AssessmentFactory(audit=audit)
+                     for _ in range(3)]
+      factories.RelationshipFactory(source=audit, destination=assessments[0])
+    assessments = all_models.Assessment.query.all()
+    self._assert_equivalent(assessments)
+    self._assert_equivalent(all_models.Audit.query.all())
+    self._assert_equivalent(assessments, fields=["title", "audit", "id"])
+
+  def test_cached_serializer(self):
+    """Serializers are compiled once for the same options."""
+    first = compiled.get_serializer(all_models.Market, (), ["title"])
+    second = compiled.get_serializer(all_models.Market, (), ["title"])
+    other = compiled.get_serializer(all_models.Market)
+    self.assertIs(first, second)
+    self.assertIsNot(first, other)
+    self.assertEqual([name for name, _ in first.getters], ["title"])
+
+  def test_unknown_fields(self):
+    """Unknown fields in the whitelist don't create new serializers."""
+    first = compiled.get_serializer(all_models.Market, (), ["title"])
+    second = compiled.get_serializer(all_models.Market, (),
+                                     ["title", "unknown"])
+    unknown = compiled.get_serializer(all_models.Market, (), ["unknown"])
+    self.assertIs(first, second)
+    self.assertEqual(unknown.getters, [])
+
+  def test_cache_size(self):
+    """Least recently used serializers are evicted."""
+    with mock.patch.object(compiled, "SERIALIZERS_CACHE_SIZE", 1):
+      first = compiled.get_serializer(all_models.Market, (), ["title"])
+      compiled.get_serializer(all_models.Market, (), ["slug"])
+      self.assertIsNot(
+          compiled.get_serializer(all_models.Market, (), ["title"]),
+          first,
+      )
@@ -0,0 +1,113 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for batched import mode."""
+
+from collections import OrderedDict
+
+import mock
+from sqlalchemy import exc
+
+from ggrc.converters import base_row
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+
+
+@mock.patch("ggrc.settings.IMPORT_BATCH_SIZE", new=3)
+class TestImportBatches(TestCase):
+  """Tests for import of rows committed in batches."""
+
+  def setUp(self):
+    super(TestImportBatches, self).setUp()
+    self.client.get("/login")
+
+  @staticmethod
+  def _market_row(index, title=None):
+    return OrderedDict([
+        ("object_type", "Market"),
+        ("code", "market-{}".format(index)),
+        ("title", title or "Market {}".format(index)),
+        ("Admin", "user@example.com"),
+        ("Assignee", "user@example.com"),
+        ("Verifier", "user@example.com"),
+    ])
+
+  def test_rows_committed_in_batches(self):
+    """All rows of a batch share a single import event."""
+    response = self.import_data(*[self._market_row(i) for i in range(5)])
+
+    self.assertEqual(response[0]["created"], 5)
+    self.assertEqual(response[0]["row_errors"], [])
+    self.assertEqual(all_models.Market.query.count(), 5)
+    market_event_ids = {
+        revision.event_id
+        for revision in all_models.Revision.query.filter_by(
+            resource_type="Market")
+    }
+    self.assertEqual(len(market_event_ids), 2)
+
+  def test_failed_row_in_batch(self):
+    """Row errors do not affect other rows in the same batch."""
+    rows = [self._market_row(i) for i in range(5)]
+    rows[2] = self._market_row(2, title="Market 1")
+
+    response = self.import_data(*rows)
+
+    self.assertEqual(response[0]["created"], 4)
+    self.assertEqual(response[0]["ignored"], 1)
+    self.assertEqual(len(response[0]["row_errors"]), 1)
+    self.assertEqual(
+        {market.slug for market in all_models.Market.query},
+        {"market-0", "market-1", "market-3", "market-4"},
+    )
+    self.assertEqual(
+        all_models.Revision.query.filter_by(resource_type="Market").count(),
+        4,
+    )
+
+  def test_db_error_in_batch(self):
+    """Database errors of a row do not affect other rows in the batch."""
+    insert_object = base_row.ImportRowConverter.insert_object
+
+    def insert_or_fail(row):
+      if row.obj.slug == "market-1":
+        raise exc.SQLAlchemyError("Test error")
+      insert_object(row)
+
+    with mock.patch.object(base_row.ImportRowConverter, "insert_object",
+                           autospec=True, side_effect=insert_or_fail):
+      response = self.import_data(*[self._market_row(i) for i in range(5)])
+
+    self.assertEqual(len(response[0]["row_errors"]), 1)
+    self.assertIn("Import failed due to unknown error",
+                  response[0]["row_errors"][0])
+    self.assertEqual(
+        {market.slug for market in all_models.Market.query},
+        {"market-0", "market-2", "market-3", "market-4"},
+    )
+    revisions = all_models.Revision.query.filter_by(resource_type="Market")
+    self.assertEqual(
+        {revision.content["slug"] for revision in revisions},
+        {"market-0", "market-2", "market-3", "market-4"},
+    )
+
+  def test_acl_propagated_per_batch(self):
+    """ACL entries are propagated once after every batch commit."""
+    with mock.patch("ggrc.models.hooks.acl.after_commit") as after_commit:
+      with mock.patch.object(base_row, "commit_rows",
+                             wraps=base_row.commit_rows) as commit_rows:
+        self.import_data(*[self._market_row(i) for i in range(5)])
+
+    self.assertEqual(commit_rows.call_count, 2)
+    for call in commit_rows.call_args_list:
+      self.assertTrue(call[1]["propagate_acl"])
+    self.assertGreaterEqual(after_commit.call_count, 2)
+
+  def test_dry_run(self):
+    """Batched dry run does not store anything."""
+    response = self.import_data(*[self._market_row(i) for i in range(4)],
+                                dry_run=True)
+
+    self.assertEqual(response[0]["created"], 4)
+    self.assertEqual(all_models.Market.query.count(), 0)
@@ -0,0 +1,131 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the coalescing full text indexing queue."""
+
+import datetime
+
+import mock
+
+from ggrc import db
+from ggrc import settings
+from ggrc.fulltext import indexing_queue
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc import api_helper
+from integration.ggrc.models import factories
+
+
+class TestIndexingQueue(TestCase):
+  """Tests for enqueue, drain and metrics of the indexing queue."""
+
+  def setUp(self):
+    super(TestIndexingQueue, self).setUp()
+    self.api = api_helper.Api()
+    self.init_taskqueue()
+
+  @staticmethod
+  def _queued():
+    """Get queued objects as a set of (type, id) tuples."""
+    return set(db.session.query(
+        indexing_queue.DirtyObject.object_type,
+        indexing_queue.DirtyObject.object_id,
+    ))
+
+  def test_enqueue_coalesces(self):
+    """Objects are stored once and only the first enqueue needs a drain."""
+    indexing_queue.enqueue({"Market": {1, 2}})
+    self.assertTrue(indexing_queue.acquire_drain())
+    indexing_queue.enqueue({"Market": {2, 3}})
+    self.assertFalse(indexing_queue.acquire_drain())
+    self.assertEqual(self._queued(), {("Market", 1), ("Market", 2),
+                                      ("Market", 3)})
+    self.assertEqual(indexing_queue.get_metrics()["depth"], 3)
+
+  def test_drain(self):
+    """Drain reindexes queued objects in batches and empties the queue."""
+    with factories.single_commit():
+      markets = [factories.MarketFactory() for _ in range(3)]
+    market_ids = {market.id for market in markets}
+    indexing_queue.enqueue({"Market": market_ids})
+    db.session.commit()
+
+    with mock.patch.object(all_models.Market, "bulk_record_update_for") \
+            as bulk_update:
+      self.assertEqual(indexing_queue.drain(batch_size=2), 3)
+
+    updated_ids = set()
+    for call in bulk_update.call_args_list:
+      updated_ids.update(call[0][0])
+    self.assertEqual(updated_ids, market_ids)
+    self.assertEqual(self._queued(), set())
+    self.assertEqual(indexing_queue.get_metrics(),
+                     {"depth": 0, "lag_seconds": 0})
+    # The drain lease is released by the drain
+    self.assertTrue(indexing_queue.acquire_drain())
+
+  def test_claimed_objects(self):
+    """Claimed objects stay queued until their reindex is committed."""
+    market = factories.MarketFactory()
+    indexing_queue.enqueue({"Market": {market.id}})
+    db.session.commit()
+
+    # pylint: disable=protected-access
+    self.assertEqual(indexing_queue._claim_batch("killed", 10),
+                     {"Market": {market.id}})
+    self.assertEqual(self._queued(), {("Market", market.id)})
+    self.assertFalse(indexing_queue.has_claimable())
+
+    # Objects of a killed drain are claimed again after the lease expires
+    indexing_queue.DirtyObject.query.update({
+        "claimed_until": (datetime.datetime.utcnow() -
+                          datetime.timedelta(seconds=1)),
+    })
+    db.session.commit()
+    with mock.patch.object(all_models.Market, "bulk_record_update_for"):
+      self.assertEqual(indexing_queue.drain(), 1)
+    self.assertEqual(self._queued(), set())
+
+  def test_enqueue_claimed(self):
+    """Objects enqueued while they are claimed are reindexed again."""
+    indexing_queue.enqueue({"Market": {1}})
+    db.session.commit()
+    # pylint: disable=protected-access
+    indexing_queue._claim_batch("claim", 10)
+    self.assertFalse(indexing_queue.has_claimable())
+
+    indexing_queue.enqueue({"Market": {1}})
+    db.session.commit()
+    self.assertTrue(indexing_queue.has_claimable())
+
+  def test_failed_drain(self):
+    """Objects are returned to the queue if reindex fails."""
+    market = factories.MarketFactory()
+    indexing_queue.enqueue({"Market": {market.id}})
+    db.session.commit()
+
+    with mock.patch.object(all_models.Market, "bulk_record_update_for",
+                           side_effect=ValueError):
+      with self.assertRaises(ValueError):
+        indexing_queue.drain()
+
+    self.assertEqual(self._queued(), {("Market", market.id)})
+
+  @mock.patch.object(settings, "APP_ENGINE", True, create=True)
+  def test_single_task_for_burst(self):
+    """Only the request that finds the queue empty creates a task."""
+    responses = [
+        self.api.post(all_models.Market, {"market": {
+            "title": "Market {}".format(index),
+            "context": None,
+        }})
+        for index in range(3)
+    ]
+    for response in responses:
+      self.assertStatus(response, 201)
+    task_ids = [response.headers.get("X-GGRC-Indexing-Task-Id")
+                for response in responses]
+    self.assertIsNotNone(task_ids[0])
+    self.assertEqual(task_ids[1:], [None, None])
+    self.assertEqual(indexing_queue.get_metrics()["depth"], 3)
@@ -0,0 +1,84 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for resumable reindex jobs."""
+
+import mock
+
+from ggrc import db
+from ggrc.fulltext import mysql
+from ggrc.fulltext import reindex
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestReindexCheckpoints(TestCase):
+  """Tests for reindex work units and checkpoints."""
+
+  def setUp(self):
+    super(TestReindexCheckpoints, self).setUp()
+    reindex.ReindexCheckpoint.query.delete()
+    db.session.commit()
+    self.client.get("/login")
+
+  def _market_record_keys(self):
+    return {
+        key for key, in db.session.query(mysql.MysqlRecordProperty.key).filter(
+            mysql.MysqlRecordProperty.type == "Market"
+        )
+    }
+
+  def test_split_ids(self):
+    """Sorted ids are split into ranges of units."""
+    self.assertEqual(
+        reindex.split_ids([1, 2, 5, 7, 8], 2),
+        [(1, 2, 2), (5, 7, 2), (8, 8, 1)],
+    )
+
+  @mock.patch("ggrc.fulltext.reindex.UNIT_CHUNKS", 1)
+  @mock.patch("ggrc.fulltext.reindex.REINDEX_CHUNK_SIZE", 1)
+  def test_resume_job(self):
+    """Interrupted job reindexes only pending units."""
+    with factories.single_commit():
+      markets = [factories.MarketFactory() for _ in range(3)]
+    market_ids = [market.id for market in markets]
+
+    reindex.plan_units(reindex.REINDEX_JOB, ["Market"])
+    done_unit = reindex.ReindexCheckpoint.query.filter_by(
+        object_type="Market", min_id=market_ids[0]).one()
+    done_unit.done = True
+    db.session.commit()
+    mysql.MysqlRecordProperty.query.filter_by(type="Market").delete()
+    db.session.commit()
+
+    reindex.run_job(reindex.REINDEX_JOB, ["Market"], processes=1)
+
+    self.assertEqual(self._market_record_keys(), set(market_ids[1:]))
+    progress = reindex.get_progress(reindex.REINDEX_JOB)
+    self.assertTrue(progress["finished"])
+    self.assertEqual(progress["types"]["Market"]["objects_done"], 3)
+
+  def test_new_job_after_finished(self):
+    """Finished job is planned again on the next run."""
+    market = factories.MarketFactory()
+    market_id = market.id
+    reindex.run_job(reindex.REINDEX_JOB, ["Market"], processes=1)
+    mysql.MysqlRecordProperty.query.filter_by(type="Market").delete()
+    db.session.commit()
+
+    reindex.run_job(reindex.REINDEX_JOB, ["Market"], processes=1)
+
+    self.assertIn(market_id, self._market_record_keys())
+
+  def test_progress_endpoint(self):
+    """Reindex progress is returned by admin endpoint."""
+    factories.MarketFactory()
+    reindex.run_job(reindex.REINDEX_JOB, ["Market"], processes=1)
+
+    response = self.client.get("/admin/reindex")
+
+    self.assert200(response)
+    self.assertEqual(response.json["job_name"], reindex.REINDEX_JOB)
+    self.assertTrue(response.json["finished"])
+    self.assertIn("Market", response.json["types"])
@@ -0,0 +1,80 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Integration tests for fulltext trigram postings."""
+
+import mock
+
+from ggrc.fulltext import tokens
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+@mock.patch("ggrc.settings.FULLTEXT_TOKEN_INDEX_SEARCH", new=True)
+class TestTokenIndex(TestCase):
+  """Tests for maintenance and usage of trigram postings."""
+
+  def setUp(self):
+    super(TestTokenIndex, self).setUp()
+    self.api = Api()
+
+  def _get_postings(self, obj):
+    """Get set of tokens stored for an object title."""
+    return {
+        posting.token
+        for posting in tokens.MysqlRecordToken.query.filter_by(
+            type=obj.type,
+            key=obj.id,
+            property="title",
+        )
+    }
+
+  def test_postings_maintained(self):
+    """Postings are created and updated with object index records."""
+    market = factories.MarketFactory(title="Abcd")
+    self.assertEqual(self._get_postings(market), {u"abc", u"bcd"})
+
+    market_id = market.id
+    self.api.put(market, {"title": "wxyz"})
+    market = all_models.Market.query.get(market_id)
+    self.assertEqual(self._get_postings(market), {u"wxy", u"xyz"})
+
+  def test_postings_deleted(self):
+    """Postings are deleted with deleted object."""
+    market = factories.MarketFactory(title="Abcd")
+    market_id = market.id
+    self.api.delete(market)
+    self.assertEqual(
+        tokens.MysqlRecordToken.query.filter_by(type="Market",
+                                                key=market_id).count(),
+        0,
+    )
+
+  def test_search_with_postings(self):
+    """Search returns only objects matched by postings and content."""
+    with factories.single_commit():
+      expected = factories.MarketFactory(title="Some abcdef market")
+      factories.MarketFactory(title="Some fedcba market")
+    expected_id = expected.id
+
+    res, _ = self.api.search("Market", query="cde")
+    self.assertEqual(
+        {entry["id"] for entry in res.json["results"]["entries"]},
+        {expected_id},
+    )
+
+  def test_short_term_search(self):
+    """Short terms fall back to the content scan."""
+    with factories.single_commit():
+      expected = factories.MarketFactory(title="Some xq market")
+      factories.MarketFactory(title="Some other market")
+    expected_id = expected.id
+
+    res, _ = self.api.search("Market", query="xq")
+    self.assertEqual(
+        {entry["id"] for entry in res.json["results"]["entries"]},
+        {expected_id},
+    )
@@ -19,6 +19,7 @@ from sqlalchemy.orm.session import Session
 
 from ggrc import app
 from ggrc import db
+from ggrc.access_control import propagation_graph
 from ggrc.models import all_models
 from ggrc.models.hooks import acl
 from ggrc.models.hooks.acl import propagation
@@ -35,6 +36,7 @@ class BaseTestPropagation(TestCase):
     self.roles = defaultdict(dict)
     for role in all_models.AccessControlRole.query:
       self.roles[role.object_type][role.name] = role
+    self.graph = propagation_graph.get_graph()
 
 
 @ddt.ddt
@@ -75,7 +77,7 @@ class TestPropagation(BaseTestPropagation):
     acl_entries = [acl.id for acl in audit.program._access_control_list]
 
     self.assertEqual(all_models.AccessControlList.query.count(), 7)
-    propagation._handle_acl_step(acl_entries, self.user_id)
+    propagation._handle_acl_step(self.graph, acl_entries, self.user_id)
     db.session.commit()
     self.assertEqual(all_models.AccessControlList.query.count(), 13)
 
@@ -93,7 +95,8 @@ class TestPropagation(BaseTestPropagation):
 
     acl_id = program.acr_name_acl_map["Program Editors"].id
 
-    child_ids = propagation._handle_acl_step([acl_id], self.user_id)
+    child_ids = propagation._handle_acl_step(
+        self.graph, [acl_id], self.user_id)
 
     self.assertEqual(
         all_models.AccessControlList.query.filter(
@@ -102,7 +105,7 @@ class TestPropagation(BaseTestPropagation):
         count * 2
     )
     self.assertEqual(
-        db.session.execute(child_ids.alias("counts").count()).scalar(),
+        len(child_ids),
         count,
     )
 
@@ -123,7 +126,7 @@ class TestPropagation(BaseTestPropagation):
         all_models.AccessControlList.query.count(),
         11  # 5 program roles, 6 audit roles
     )
-    propagation._handle_acl_step(acl_ids, self.user_id)
+    propagation._handle_acl_step(self.graph, acl_ids, self.user_id)
 
     self.assertEqual(
         all_models.AccessControlList.query.count(),
@@ -156,7 +159,7 @@ class TestPropagation(BaseTestPropagation):
                if acl.ac_role.name in propagated_roles]
 
     propagate_acl_ids = acl_ids[:partial_count]
-    propagation._handle_acl_step(propagate_acl_ids, self.user_id)
+    propagation._handle_acl_step(self.graph, propagate_acl_ids, self.user_id)
 
     self.assertEqual(
         all_models.AccessControlList.query.filter(
@@ -186,7 +189,7 @@ class TestPropagation(BaseTestPropagation):
 
     acl_ids = [acl.id for acl in audit.program._access_control_list]
 
-    propagation._propagate(acl_ids, self.user_id)
+    propagation._propagate(self.graph, acl_ids, self.user_id)
 
     assessment_acls = all_models.AccessControlList.query.filter(
         all_models.AccessControlList.object_type ==
@@ -225,6 +228,7 @@ class TestPropagation(BaseTestPropagation):
       ]
 
     child_ids = propagation._handle_relationship_step(
+        self.graph,
         relationship_ids,
         [],
         self.user_id,
@@ -237,7 +241,7 @@ class TestPropagation(BaseTestPropagation):
         20
     )
     self.assertEqual(
-        db.session.execute(child_ids.alias("counts").count()).scalar(),
+        len(child_ids),
         10,
     )
 
@@ -280,7 +284,7 @@ class TestPropagation(BaseTestPropagation):
 
     acl_ids = [acl.id for acl in audit.program._access_control_list]
 
-    propagation._propagate(acl_ids, self.user_id)
+    propagation._propagate(self.graph, acl_ids, self.user_id)
     self.assertEqual(all_models.AccessControlList.query.count(), 17)
     propagation.propagate_all()
     self.assertEqual(all_models.AccessControlList.query.count(), 25)
@@ -384,7 +388,7 @@ class TestPropagation(BaseTestPropagation):
 
     acl_entry = control._access_control_list[0]
 
-    propagation._propagate([acl_entry.id], self.user_id)
+    propagation._propagate(self.graph, [acl_entry.id], self.user_id)
 
     self.assertEqual(
         all_models.AccessControlList.query.filter(
@@ -397,7 +401,7 @@ class TestPropagation(BaseTestPropagation):
         acl for acl in assessment.audit.program._access_control_list
         if acl.ac_role.name == "Program Editors"
     )
-    propagation._propagate([acl_entry.id], self.user_id)
+    propagation._propagate(self.graph, [acl_entry.id], self.user_id)
 
     self.assertEqual(
         all_models.AccessControlList.query.filter(
@@ -472,3 +476,34 @@ class TestPropagationViaImport(BaseTestPropagation):
     )
     self.check_import_errors(response)
     self.assertEqual(acl_q.count(), 20)
+
+
+class TestPropagationGraph(BaseTestPropagation):
+  """Tests for in memory propagation graph."""
+
+  def test_graph_edges(self):
+    """Edges connect parent, relationship and child roles."""
+    graph = propagation_graph.PropagationGraph([
+        (1, None, "Program"),
+        (2, 1, "Relationship"),
+        (3, 2, "Audit"),
+        (4, 2, "Control"),
+        (5, None, "Program"),
+        (6, 5, "Relationship"),
+    ])
+    self.assertEqual(dict(graph.relationship_edges), {
+        (1, "Audit"): {2},
+        (1, "Control"): {2},
+    })
+    self.assertEqual(dict(graph.child_edges), {
+        (2, "Audit"): {3},
+        (2, "Control"): {4},
+    })
+    self.assertEqual(graph.propagated_role_ids, [1])
+
+  def test_graph_invalidation(self):
+    """Graph is rebuilt when roles change."""
+    self.assertIs(propagation_graph.get_graph(), self.graph)
+    factories.AccessControlRoleFactory(object_type="Market")
+    graph = propagation_graph.get_graph()
+    self.assertIsNot(graph, self.graph)
@@ -0,0 +1,133 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for stored audit summaries and snapshot counts."""
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import audit_rollup
+
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+class TestAuditRollup(TestCase):
+  """Audit rollups are stored, invalidated and rebuilt."""
+
+  def setUp(self):
+    super(TestAuditRollup, self).setUp()
+    self.api = Api()
+    with factories.single_commit():
+      self.audit = factories.AuditFactory()
+      self.audit_id = self.audit.id
+      self.assessment = factories.AssessmentFactory(
+          audit=self.audit,
+          status=all_models.Assessment.START_STATE,
+      )
+      self.assessment_id = self.assessment.id
+
+  def _get(self, command):
+    response = self.api.client.get(
+        "/api/audits/{}/{}".format(self.audit_id, command))
+    self.assert200(response)
+    return response.json
+
+  def _stored(self):
+    """Get the stored rollup of the audit."""
+    db.session.expire_all()
+    return audit_rollup.AuditRollup.query.get(self.audit_id)
+
+  def test_summary_invalidation(self):
+    """Status changes and evidence mappings drop the stored summary."""
+    summary = self._get("summary")
+    self.assertEqual(summary["total"], {"assessments": 1, "evidence": 0})
+    self.assertEqual(self._stored().summary, summary)
+
+    assessment = all_models.Assessment.query.get(self.assessment_id)
+    self.api.modify_object(assessment, {
+        "status": all_models.Assessment.PROGRESS_STATE,
+    })
+    self.assertIsNone(self._stored().summary)
+    summary = self._get("summary")
+    self.assertEqual(
+        [status["name"] for status in summary["statuses"]],
+        [all_models.Assessment.PROGRESS_STATE],
+    )
+
+    factories.RelationshipFactory(
+        source=all_models.Assessment.query.get(self.assessment_id),
+        destination=factories.EvidenceFactory(kind=all_models.Evidence.URL),
+    )
+    self.assertIsNone(self._stored().summary)
+    self.assertEqual(self._get("summary")["total"]["evidence"], 1)
+
+  def test_snapshot_counts_invalidation(self):
+    """Snapshots created by the snapshotter drop stored counts."""
+    control_id = factories.ControlFactory().id
+    self.assertEqual(self._get("snapshot_counts"), {})
+    self.assertEqual(self._stored().snapshot_counts, {})
+
+    response = self.api.post(all_models.Relationship, {
+        "relationship": {
+            "source": {"id": self.audit_id, "type": "Audit"},
+            "destination": {"id": control_id, "type": "Control"},
+            "context": None,
+        },
+    })
+    self.assertStatus(response, 201)
+    self.assertIsNone(self._stored().snapshot_counts)
+    self.assertEqual(self._get("snapshot_counts"), {"Control": 1})
+
+  def test_other_part_is_kept(self):
+    """Assessment changes do not drop stored snapshot counts."""
+    self._get("summary")
+    self._get("snapshot_counts")
+    factories.AssessmentFactory(audit=all_models.Audit.query.get(
+        self.audit_id))
+    stored = self._stored()
+    self.assertIsNone(stored.summary)
+    self.assertEqual(stored.snapshot_counts, {})
+
+  def test_stale_value(self):
+    """Values computed before an invalidation are not stored."""
+    self._get("summary")
+    generation = self._stored().generation
+    factories.AssessmentFactory(audit=all_models.Audit.query.get(
+        self.audit_id))
+    self.assertGreater(self._stored().generation, generation)
+
+    # A request that read the rollup before the invalidation stores the
+    # summary computed from its snapshot.
+    # pylint: disable=protected-access
+    audit_rollup._store(self.audit_id, {
+        audit_rollup.SUMMARY: {"total": {"assessments": 1, "evidence": 0}},
+    }, generation)
+    db.session.commit()
+    self.assertIsNone(self._stored().summary)
+    self.assertEqual(self._get("summary")["total"]["assessments"], 2)
+
+  def test_invalidation_creates_row(self):
+    """Invalidation of a missing rollup creates the row with a generation."""
+    audit_id = factories.AuditFactory().id
+    self.assertIsNone(audit_rollup.AuditRollup.query.get(audit_id))
+    factories.AssessmentFactory(audit=all_models.Audit.query.get(audit_id))
+    db.session.expire_all()
+    stored = audit_rollup.AuditRollup.query.get(audit_id)
+    self.assertIsNone(stored.summary)
+    self.assertGreater(stored.generation, 0)
+
+  def test_rebuild(self):
+    """Rebuild stores rollups of all audits."""
+    self.assertIsNone(self._stored().summary)
+    self.assertEqual(audit_rollup.rebuild(), 1)
+    stored = self._stored()
+    self.assertEqual(stored.summary["total"]["assessments"], 1)
+    self.assertEqual(stored.snapshot_counts, {})
+
+  def test_admin_rebuild(self):
+    """Only admins can schedule a rebuild."""
+    self.client.get("/login")
+    response = self.client.post("/admin/rebuild_audit_rollups")
+    self.assert200(response)
+    self.assertEqual(self._stored().summary["total"]["assessments"], 1)
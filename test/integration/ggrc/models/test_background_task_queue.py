@@ -0,0 +1,111 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Integration tests for background tasks executed by local workers."""
+
+import datetime
+
+import mock
+
+from ggrc import db
+from ggrc.app import app
+from ggrc.models import all_models
+from ggrc.models import background_task_queue
+from ggrc import task_worker
+
+from integration.ggrc import TestCase
+
+
+Item = background_task_queue.BackgroundTaskQueueItem
+
+
+@mock.patch("ggrc.settings.BACKGROUND_TASK_EXECUTOR", new="worker")
+class TestBackgroundTaskQueue(TestCase):
+  """Tests for the durable background task queue."""
+
+  def setUp(self):
+    super(TestBackgroundTaskQueue, self).setUp()
+    self.client.get("/login")
+    self.worker = task_worker.Worker(app, worker_id="test-worker")
+
+  def _schedule_reindex(self):
+    """Schedule reindex task and return its queue item id."""
+    response = self.client.post("/admin/reindex")
+    self.assert200(response)
+    item = Item.query.one()
+    return item.id
+
+  def test_task_enqueued(self):
+    """Task is stored in the queue instead of inline execution."""
+    item_id = self._schedule_reindex()
+    item = Item.query.get(item_id)
+    task = all_models.BackgroundTask.query.filter_by(
+        name=item.bg_task_name).one()
+    self.assertEqual(item.status, background_task_queue.PENDING_STATUS)
+    self.assertEqual(task.status, "Pending")
+
+  def test_worker_executes_task(self):
+    """Worker claims the item and runs the task."""
+    item_id = self._schedule_reindex()
+
+    self.assertTrue(self.worker.run_once())
+
+    item = Item.query.get(item_id)
+    task = all_models.BackgroundTask.query.filter_by(
+        name=item.bg_task_name).one()
+    self.assertEqual(item.status, background_task_queue.DONE_STATUS)
+    self.assertEqual(item.attempts, 1)
+    self.assertEqual(task.status, "Success")
+    self.assertFalse(self.worker.run_once())
+
+  def test_leased_item_not_claimed(self):
+    """Item with an active lease is not claimed by another worker."""
+    item_id = self._schedule_reindex()
+    claimed = background_task_queue.claim("other-worker", 60)
+    self.assertEqual(claimed.id, item_id)
+
+    self.assertIsNone(background_task_queue.claim("test-worker", 60))
+
+  def test_expired_lease_reclaimed(self):
+    """Item of a dead worker is claimed again after lease expiration."""
+    item_id = self._schedule_reindex()
+    background_task_queue.claim("dead-worker", 60)
+    Item.query.filter_by(id=item_id).update({
+        "lease_expires_at": (datetime.datetime.utcnow() -
+                             datetime.timedelta(seconds=1)),
+    })
+    db.session.commit()
+
+    claimed = background_task_queue.claim("test-worker", 60)
+
+    self.assertEqual(claimed.id, item_id)
+    self.assertEqual(claimed.attempts, 2)
+
+  @mock.patch("ggrc.settings.BACKGROUND_TASK_QUEUE_CONCURRENCY",
+              new={None: 1})
+  def test_queue_concurrency(self):
+    """Items are not claimed over the queue concurrency limit."""
+    self._schedule_reindex()
+    self.client.post("/admin/reindex")
+    self.assertEqual(Item.query.count(), 2)
+
+    self.assertIsNotNone(background_task_queue.claim("worker-1", 60))
+    self.assertIsNone(background_task_queue.claim("worker-2", 60))
+    queues = {item.queue for item in Item.query}
+    self.assertEqual(
+        {lock.queue for lock in
+         background_task_queue.BackgroundTaskQueueLock.query},
+        queues,
+    )
+
+  def test_failed_item_retried(self):
+    """Failed item is scheduled for retry with backoff."""
+    item_id = self._schedule_reindex()
+    background_task_queue.claim("test-worker", 60)
+
+    status = background_task_queue.complete(item_id, "test-worker", "error")
+
+    item = Item.query.get(item_id)
+    self.assertEqual(status, background_task_queue.PENDING_STATUS)
+    self.assertEqual(item.last_error, "error")
+    self.assertGreater(item.eta, datetime.datetime.utcnow())
@@ -0,0 +1,100 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the registry of global custom attribute definitions."""
+
+import mock
+
+from ggrc import db
+from ggrc.cache import cad_registry
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestCadRegistry(TestCase):
+  """Global CADs are loaded once per generation."""
+
+  def setUp(self):
+    super(TestCadRegistry, self).setUp()
+    with factories.single_commit():
+      for title in ("CA 1", "CA 2"):
+        factories.CustomAttributeDefinitionFactory(
+            title=title,
+            definition_type="control",
+        )
+
+  @staticmethod
+  def _titles(cads):
+    return [cad.title for cad in cads]
+
+  def test_entries_are_reused(self):
+    """Entries are loaded once and reloaded after CAD changes."""
+    first = cad_registry.get_global_cads("control")["control"]
+    second = cad_registry.get_global_cads("control")["control"]
+    self.assertEqual(self._titles(first), ["CA 1", "CA 2"])
+    self.assertEqual([id(cad) for cad in first],
+                     [id(cad) for cad in second])
+
+    factories.CustomAttributeDefinitionFactory(
+        title="CA 3",
+        definition_type="control",
+    )
+    self.assertEqual(
+        self._titles(cad_registry.get_global_cads("control")["control"]),
+        ["CA 1", "CA 2", "CA 3"],
+    )
+
+  def test_shared_generation(self):
+    """Entries are reloaded after a CAD change in another process."""
+    first = cad_registry.get_global_cads("control")["control"]
+    db.session.commit()
+    # Another process bumps the generation and keeps this process entries.
+    with mock.patch.object(cad_registry, "_ENTRIES", {}):
+      cad_registry.bump_generation()
+    second = cad_registry.get_global_cads("control")["control"]
+    self.assertNotEqual([id(cad) for cad in first],
+                        [id(cad) for cad in second])
+
+  def test_uncommitted_changes(self):
+    """Sessions with flushed CAD changes read CADs from the database."""
+    cad_registry.get_global_cads("control")
+    cad = all_models.CustomAttributeDefinition.query.filter_by(
+        title="CA 2").one()
+    cad.title = "CA 2 changed"
+    db.session.flush()
+    self.assertEqual(
+        self._titles(cad_registry.get_session_cads("control")),
+        ["CA 1", "CA 2 changed"],
+    )
+    db.session.rollback()
+    self.assertEqual(
+        self._titles(cad_registry.get_session_cads("control")),
+        ["CA 1", "CA 2"],
+    )
+
+  def test_eager_query(self):
+    """Objects loaded with eager_query get CADs from the registry."""
+    factories.ControlFactory()
+    control = all_models.Control.eager_query().one()
+    self.assertEqual(self._titles(control.custom_attribute_definitions),
+                     ["CA 1", "CA 2"])
+    self.assertTrue(all(cad in db.session
+                        for cad in control.custom_attribute_definitions))
+
+  def test_log_json(self):
+    """Revisions contain definitions of set values."""
+    with factories.single_commit():
+      control = factories.ControlFactory()
+      cad = all_models.CustomAttributeDefinition.query.filter_by(
+          title="CA 2").one()
+      factories.CustomAttributeValueFactory(
+          custom_attribute=cad,
+          attributable=control,
+          attribute_value="value",
+      )
+    control = all_models.Control.query.get(control.id)
+    definitions = control.log_json()["custom_attribute_definitions"]
+    self.assertEqual([definition["title"] for definition in definitions],
+                     ["CA 2"])
@@ -0,0 +1,124 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for stored "My Work" and "All Objects" counts."""
+
+import datetime
+
+import mock
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import person_counters
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestPersonCounters(TestCase):
+  """Counts are stored, invalidated and reconciled."""
+
+  def setUp(self):
+    super(TestPersonCounters, self).setUp()
+    self.client.get("/login")
+    self.user_id = all_models.Person.query.filter_by(
+        email="user@example.com"
+    ).one().id
+
+  def _get_counts(self, counter):
+    response = self.client.get(
+        "/api/people/{}/{}".format(self.user_id, counter))
+    self.assert200(response)
+    return response.json
+
+  def _stored(self, counter):
+    """Get stored counts of the user as {object type: value} dict."""
+    table = person_counters.PersonObjectCount
+    return dict(db.session.query(table.object_type, table.value).filter(
+        table.person_id == self.user_id,
+        table.counter == counter,
+    ))
+
+  def test_all_objects_invalidation(self):
+    """Created objects drop stored counts of their type."""
+    factories.MarketFactory()
+    self.assertEqual(self._get_counts("all_objects_count")["Market"], 1)
+    self.assertEqual(self._stored(person_counters.ALL_OBJECTS)["Market"], 1)
+
+    factories.MarketFactory()
+    self.assertNotIn("Market", self._stored(person_counters.ALL_OBJECTS))
+    self.assertIn("Control", self._stored(person_counters.ALL_OBJECTS))
+    self.assertEqual(self._get_counts("all_objects_count")["Market"], 2)
+
+  def test_invalidation_scope(self):
+    """Created objects keep counts of people without access to them."""
+    person_id = factories.PersonFactory().id
+    factories.MarketFactory()
+    self._get_counts("all_objects_count")
+    db.session.execute(
+        person_counters.PersonObjectCount.__table__.insert().values(
+            person_id=person_id,
+            counter=person_counters.ALL_OBJECTS,
+            object_type="Market",
+            value=0,
+            computed_at=datetime.datetime.utcnow(),
+        )
+    )
+    db.session.commit()
+
+    factories.MarketFactory()
+    self.assertNotIn("Market", self._stored(person_counters.ALL_OBJECTS))
+    table = person_counters.PersonObjectCount
+    self.assertEqual(table.query.filter_by(person_id=person_id).count(), 1)
+
+  def test_my_work_invalidation(self):
+    """Added roles drop stored counts of the person."""
+    market = factories.MarketFactory()
+    self.assertEqual(self._get_counts("my_work_count")["Market"], 0)
+
+    market = all_models.Market.query.get(market.id)
+    market.add_person_with_role_name(
+        all_models.Person.query.get(self.user_id), "Admin")
+    db.session.commit()
+
+    self.assertEqual(self._stored(person_counters.MY_WORK), {})
+    self.assertEqual(self._get_counts("my_work_count")["Market"], 1)
+
+  def test_concurrent_invalidation(self):
+    """Counts invalidated while being computed are not stored."""
+    # pylint: disable=protected-access
+    factories.MarketFactory()
+    compute = person_counters._COMPUTE[person_counters.ALL_OBJECTS]
+
+    def compute_and_invalidate(person_id, types):
+      """Compute counts while another transaction invalidates them."""
+      result = compute(person_id, types)
+      db.engine.execute(
+          "INSERT INTO person_count_generations (person_id, generation) "
+          "VALUES (%s, 1) ON DUPLICATE KEY UPDATE generation = generation + 1",
+          person_counters.GLOBAL_GENERATION_ID,
+      )
+      return result
+
+    with mock.patch.dict(person_counters._COMPUTE, {
+        person_counters.ALL_OBJECTS: compute_and_invalidate,
+    }):
+      self.assertEqual(self._get_counts("all_objects_count")["Market"], 1)
+    self.assertEqual(self._stored(person_counters.ALL_OBJECTS), {})
+
+    self._get_counts("all_objects_count")
+    self.assertEqual(self._stored(person_counters.ALL_OBJECTS)["Market"], 1)
+
+  def test_reconcile(self):
+    """Reconcile fixes and reports drifted counts."""
+    factories.MarketFactory()
+    self._get_counts("all_objects_count")
+    db.session.execute(
+        person_counters.PersonObjectCount.__table__.update().where(
+            person_counters.PersonObjectCount.object_type == "Market"
+        ).values(value=5)
+    )
+    db.session.commit()
+
+    self.assertEqual(person_counters.reconcile(), 1)
+    self.assertEqual(self._stored(person_counters.ALL_OBJECTS)["Market"], 1)
@@ -0,0 +1,113 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the relationship adjacency table."""
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import relationship_adjacency
+from ggrc.models.relationship import RelationshipsCache, Stub
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestRelationshipAdjacency(TestCase):
+  """Tests for sync, check and rebuild of relationship adjacency."""
+
+  @staticmethod
+  def _neighbors(obj):
+    """Get stubs of neighbors of obj from the adjacency table."""
+    query = relationship_adjacency.neighbors_query(obj.type, [obj.id])
+    return {Stub(type_, id_) for type_, id_ in query}
+
+  def test_orm_insert(self):
+    """Both directions are stored for a new relationship."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      product = factories.ProductFactory()
+      factories.RelationshipFactory(source=market, destination=product)
+
+    self.assertEqual(self._neighbors(market), {Stub("Product", product.id)})
+    self.assertEqual(self._neighbors(product), {Stub("Market", market.id)})
+    self.assertEqual(relationship_adjacency.check_consistency(),
+                     {"missing": 0, "stale": 0})
+
+  def test_delete(self):
+    """Adjacency rows are removed with the relationship."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      product = factories.ProductFactory()
+      relationship = factories.RelationshipFactory(source=market,
+                                                   destination=product)
+
+    db.session.delete(relationship)
+    db.session.commit()
+
+    self.assertEqual(self._neighbors(market), set())
+    self.assertEqual(self._neighbors(product), set())
+
+  def test_sync_inserted(self):
+    """Relationships inserted with plain SQL are synced."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      product = factories.ProductFactory()
+    with relationship_adjacency.sync_inserted():
+      db.session.execute(all_models.Relationship.__table__.insert().values(
+          source_type="Market",
+          source_id=market.id,
+          destination_type="Product",
+          destination_id=product.id,
+          is_external=False,
+      ))
+    db.session.commit()
+
+    self.assertEqual(self._neighbors(product), {Stub("Market", market.id)})
+
+  def test_relationships_cache(self):
+    """RelationshipsCache gets neighbors from both directions."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      product = factories.ProductFactory()
+      program = factories.ProgramFactory()
+      factories.RelationshipFactory(source=market, destination=product)
+      factories.RelationshipFactory(source=program, destination=product)
+
+    cache = RelationshipsCache()
+    product_stub = Stub("Product", product.id)
+    cache.populate_cache({product_stub})
+    self.assertEqual(cache.cache[product_stub], {
+        Stub("Market", market.id),
+        Stub("Program", program.id),
+    })
+
+  def test_check_and_rebuild(self):
+    """Checker finds missing and stale rows that rebuild fixes."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      product = factories.ProductFactory()
+      relationship = factories.RelationshipFactory(source=market,
+                                                   destination=product)
+    table = all_models.RelationshipAdjacency.__table__
+    db.session.execute(table.delete().where(
+        table.c.object_type == "Market"
+    ))
+    db.session.execute(table.update().where(
+        table.c.object_type == "Product"
+    ).values(neighbor_id=market.id + 1))
+    db.session.commit()
+
+    self.assertEqual(relationship_adjacency.check_consistency(),
+                     {"missing": 2, "stale": 1})
+
+    relationship_adjacency.rebuild()
+
+    self.assertEqual(relationship_adjacency.check_consistency(),
+                     {"missing": 0, "stale": 0})
+    self.assertEqual(self._neighbors(market), {Stub("Product", product.id)})
+    self.assertEqual(
+        db.session.query(table).filter(
+            table.c.relationship_id == relationship.id
+        ).count(),
+        2,
+    )
@@ -0,0 +1,75 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for compaction of revision content."""
+
+import mock
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.utils import revision_storage
+
+from integration.ggrc import TestCase
+from integration.ggrc import api_helper
+from integration.ggrc.models import factories
+
+
+class TestRevisionStorage(TestCase):
+  """Tests for delta encoded revisions."""
+
+  def setUp(self):
+    super(TestRevisionStorage, self).setUp()
+    self.api = api_helper.Api()
+    market = factories.MarketFactory()
+    self.market_id = market.id
+    for index in range(4):
+      market = all_models.Market.query.get(self.market_id)
+      response = self.api.put(market, {"title": "Market {}".format(index)})
+      self.assert200(response)
+
+  def _get_revisions(self):
+    db.session.expire_all()
+    return all_models.Revision.query.filter_by(
+        resource_type="Market",
+        resource_id=self.market_id,
+    ).order_by(all_models.Revision.id).all()
+
+  @mock.patch("ggrc.settings.REVISION_KEYFRAME_INTERVAL", new=2)
+  def test_compact_and_expand(self):
+    """Compacted revisions keep their content."""
+    expected = [revision.content for revision in self._get_revisions()]
+    self.assertEqual(len(expected), 5)
+
+    revision_storage.compact_revisions("Market")
+    revisions = self._get_revisions()
+    # pylint: disable=protected-access
+    self.assertEqual(
+        [revision._content_delta is None for revision in revisions],
+        [True, False, True, False, True],
+    )
+    self.assertIsNone(revisions[1]._stored_content)
+    self.assertEqual(revisions[1]._content_keyframe_id, revisions[0].id)
+    self.assertEqual([revision.content for revision in revisions], expected)
+
+    revision_storage.expand_revisions("Market")
+    revisions = self._get_revisions()
+    self.assertTrue(all(revision._content_delta is None
+                        for revision in revisions))
+    self.assertEqual([revision.content for revision in revisions], expected)
+
+  def test_new_revision_after_compaction(self):
+    """Revisions created after compaction are stored in full format."""
+    revision_storage.compact_revisions("Market")
+    market = all_models.Market.query.get(self.market_id)
+    self.assert200(self.api.put(market, {"title": "New title"}))
+
+    revisions = self._get_revisions()
+    self.assertEqual(revisions[-1].content["title"], "New title")
+    self.assertEqual(revisions[-2].content["title"], "Market 3")
+    # pylint: disable=protected-access
+    self.assertIsNone(revisions[-1]._content_delta)
+
+    revision_storage.compact_revisions("Market")
+    revisions = self._get_revisions()
+    self.assertIsNotNone(revisions[-2]._content_delta)
+    self.assertEqual(revisions[-2].content["title"], "Market 3")
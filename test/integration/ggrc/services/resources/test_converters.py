@@ -324,6 +324,65 @@ class TestImportExports(TestImportExportBase):
     self.assert200(response)
     self.assertEqual(response.data, "test content")
 
+  @mock.patch("ggrc.settings.EXPORT_CHUNK_SIZE", new=1)
+  def test_chunked_export_download(self):
+    """Test download of export stored in content chunks"""
+    user = all_models.Person.query.first()
+    with factories.single_commit():
+      assessments = [factories.AssessmentFactory() for _ in range(3)]
+    titles = [assessment.title for assessment in assessments]
+    response = self.client.post(
+        "/api/people/{}/exports".format(user.id),
+        data=json.dumps({
+            "objects": [{
+                "object_name": "Assessment",
+                "ids": [assessment.id for assessment in assessments]}],
+            "current_time": str(datetime.now())}),
+        headers=self.headers)
+    self.assert200(response)
+    ie_id = response.json["id"]
+    ie_job = all_models.ImportExport.query.get(ie_id)
+    self.assertEqual(ie_job.status, "Finished")
+    self.assertIsNone(ie_job.content)
+    chunks = all_models.ImportExportChunk.query.filter_by(
+        import_export_id=ie_id).count()
+    # Chunk size of 1 byte gives a separate chunk for every csv line
+    self.assertGreater(chunks, len(titles))
+
+    response = self.client.get(
+        "/api/people/{}/exports/{}/download?export_to=csv".format(
+            user.id, ie_id),
+        headers=self.headers)
+    self.assert200(response)
+    for title in titles:
+      self.assertIn(title, response.data)
+
+    ie_job = all_models.ImportExport.query.get(ie_id)
+    ie_job.status = "In Progress"
+    db.session.commit()
+    response = self.client.get(
+        "/api/people/{}/exports/{}/download?export_to=csv".format(
+            user.id, ie_id),
+        headers=self.headers)
+    self.assertStatus(response, 409)
+
+  def test_empty_export_download(self):
+    """Test download of finished export without content"""
+    user = all_models.Person.query.first()
+    ie_job = factories.ImportExportFactory(
+        job_type="Export",
+        status="Finished",
+        created_at=datetime.now(),
+        created_by=user,
+        title="test.csv",
+        content=None)
+    response = self.client.get(
+        "/api/people/{}/exports/{}/download?export_to=csv".format(
+            user.id, ie_job.id),
+        headers=self.headers)
+    self.assert200(response)
+    self.assertEqual(response.data, "")
+
   @ddt.data(u'漢字.csv', u'фыв.csv', u'asd.csv')
   def test_download_unicode_filename(self, filename):
     """Test import history download unicode filename"""
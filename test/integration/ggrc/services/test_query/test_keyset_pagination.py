@@ -0,0 +1,95 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests keyset pagination for /query api."""
+
+import ddt
+
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from integration.ggrc.query_helper import WithQueryApi
+
+
+@ddt.ddt
+class TestKeysetPagination(TestCase, WithQueryApi):
+  """Tests for "page" parameter of /query api."""
+
+  def setUp(self):
+    super(TestKeysetPagination, self).setUp()
+    self.client.get("/login")
+    with factories.single_commit():
+      # Objects created in a single commit have equal created_at values,
+      # which checks that id is used as a tie breaker.
+      for _ in range(7):
+        factories.MarketFactory()
+
+  def _query_page(self, page, order_by=None, total_mode=None):
+    """Make a query for a page of markets."""
+    query = self._make_query_dict("Market", type_="ids", order_by=order_by)
+    query["page"] = page
+    if total_mode:
+      query["total_mode"] = total_mode
+    return self._get_first_result_set(query, "Market")
+
+  def _query_all_pages(self, size, order_by=None):
+    """Get ids from all pages following next_page tokens."""
+    ids = []
+    page = {"size": size}
+    while True:
+      result = self._query_page(page, order_by)
+      ids.extend(result["ids"])
+      if not result["next_page"]:
+        return ids
+      page = {"size": size, "after": result["next_page"]}
+
+  @ddt.data(
+      None,
+      [{"name": "title"}],
+      [{"name": "title", "desc": True}],
+      [{"name": "created_at"}],
+      [{"name": "created_at", "desc": True}],
+  )
+  def test_pages_match_limit(self, order_by):
+    """Pages are the same as the result of a query with limit."""
+    query = self._make_query_dict("Market", type_="ids", order_by=order_by)
+    expected = self._get_first_result_set(query, "Market", "ids")
+    if not order_by or order_by[0]["name"] == "created_at":
+      # Limit queries don't define the order of objects with equal keys.
+      expected = sorted(expected)
+
+    for size in (1, 2, 3, 7, 10):
+      ids = self._query_all_pages(size, order_by)
+      if order_by and order_by[0]["name"] == "created_at":
+        self.assertEqual(len(ids), len(set(ids)))
+        ids = sorted(ids)
+      self.assertEqual(ids, expected)
+
+  def test_total(self):
+    """Total is counted according to total_mode."""
+    result = self._query_page({"size": 2})
+    self.assertEqual(result["total"], all_models.Market.query.count())
+    result = self._query_page({"size": 2}, total_mode="none")
+    self.assertIsNone(result["total"])
+    result = self._query_page({"size": 2}, total_mode="approximate")
+    self.assertGreaterEqual(result["total"], 0)
+
+  @ddt.data(
+      {"size": 0},
+      {"size": "a"},
+      {"size": 2, "after": "invalid"},
+  )
+  def test_invalid_page(self, page):
+    """Invalid page parameters are rejected."""
+    query = self._make_query_dict("Market", type_="ids")
+    query["page"] = page
+    self.assert400(self._post(query))
+
+  def test_token_order_mismatch(self):
+    """Token of one ordering can't be used with another one."""
+    result = self._query_page({"size": 2}, [{"name": "title"}])
+    query = self._make_query_dict("Market", type_="ids",
+                                  order_by=[{"name": "title", "desc": True}])
+    query["page"] = {"size": 2, "after": result["next_page"]}
+    self.assert400(self._post(query))
@@ -0,0 +1,126 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for planning of multiple object queries in a single request."""
+
+import mock
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.query import planner
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from integration.ggrc.query_helper import WithQueryApi
+
+
+class TestQueryPlanner(TestCase, WithQueryApi):
+  """Tests for merged and cached object queries."""
+
+  def setUp(self):
+    super(TestQueryPlanner, self).setUp()
+    self.client.get("/login")
+    with factories.single_commit():
+      self.program = factories.ProgramFactory()
+      for _ in range(3):
+        factories.RelationshipFactory(source=self.program,
+                                      destination=factories.MarketFactory())
+      for _ in range(2):
+        factories.RelationshipFactory(source=factories.ProductFactory(),
+                                      destination=self.program)
+      # Not mapped objects.
+      factories.MarketFactory()
+      factories.ProductFactory()
+
+  def _relevant_query(self, object_name, type_):
+    """Make a query for objects relevant to the program."""
+    return self._make_query_dict_base(
+        object_name,
+        type_=type_,
+        filters={"expression": {
+            "object_name": "Program",
+            "op": {"name": "relevant"},
+            "ids": [self.program.id],
+        }},
+    )
+
+  def test_merged_counts(self):
+    """Count queries are executed in a single statement."""
+    queries = [
+        self._relevant_query("Market", "count"),
+        self._relevant_query("Product", "count"),
+        self._relevant_query("Market", "count"),
+        self._relevant_query("Market", "ids"),
+    ]
+    with mock.patch("ggrc.query.planner.count_queries",
+                    side_effect=planner.count_queries) as count_queries:
+      response = self._post(queries)
+    self.assert200(response)
+    count_queries.assert_called_once()
+    # Identical count queries are counted once.
+    self.assertEqual(len(count_queries.call_args[0][0]), 2)
+
+    results = [result.values()[0] for result in response.json]
+    self.assertEqual([result["count"] for result in results], [3, 2, 3, 3])
+    self.assertEqual([result["total"] for result in results], [3, 2, 3, 3])
+
+  def test_cached_relevant(self):
+    """Relevant ids are loaded once for identical filters."""
+    queries = [
+        self._relevant_query("Market", "ids"),
+        self._relevant_query("Market", "values"),
+        self._relevant_query("Product", "ids"),
+    ]
+    with mock.patch("ggrc.query.planner.ids_filter",
+                    side_effect=planner.ids_filter) as ids_filter:
+      response = self._post(queries)
+    self.assert200(response)
+    self.assertEqual(ids_filter.call_count, 2)
+
+  def test_previous_reference(self):
+    """Counts that depend on other queries are not merged."""
+    queries = [
+        self._relevant_query("Market", "ids"),
+        self._make_query_dict_base(
+            "Program",
+            type_="count",
+            filters={"expression": {
+                "object_name": "__previous__",
+                "op": {"name": "relevant"},
+                "ids": [0],
+            }},
+        ),
+    ]
+    response = self._post(queries)
+    self.assert200(response)
+    self.assertEqual(response.json[1]["Program"]["count"], 1)
+
+  def test_relevant_subquery(self):
+    """Relevant filters over the IN list limit use a subquery."""
+    queries = [
+        self._relevant_query("Market", "ids"),
+        self._relevant_query("Product", "count"),
+    ]
+    with mock.patch("ggrc.query.planner.IN_LIST_LIMIT", 1):
+      subquery_response = self._post(queries)
+    self.assert200(subquery_response)
+    response = self._post(queries)
+    self.assert200(response)
+
+    self.assertEqual(len(response.json[0]["Market"]["ids"]), 3)
+    self.assertEqual(response.json[1]["Product"]["count"], 2)
+    self.assertEqual(subquery_response.json, response.json)
+
+  def test_ids_filter_duplicates(self):
+    """Duplicate ids don't hide ids over the IN list limit."""
+    market_ids = db.session.query(all_models.Market.id)
+    ids_query = market_ids.union_all(market_ids).order_by(
+        all_models.Market.id,
+    )
+    expected = {market_id for market_id, in market_ids}
+
+    id_filter = planner.ids_filter(all_models.Market.id, ids_query,
+                                   limit=len(expected) - 1)
+    filtered = all_models.Market.query.filter(id_filter)
+
+    self.assertEqual({market.id for market in filtered}, expected)
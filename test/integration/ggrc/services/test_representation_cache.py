@@ -0,0 +1,101 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cached object representations in API responses."""
+
+import mock
+
+from ggrc import db
+from ggrc import settings
+from ggrc.builder import compiled
+from ggrc.cache import representation_cache
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc import api_helper
+from integration.ggrc.models import factories
+
+
+@mock.patch.object(settings, "REPRESENTATION_CACHE", "local")
+class TestRepresentationCache(TestCase):
+  """Resource GET uses and invalidates cached representations."""
+
+  def setUp(self):
+    super(TestRepresentationCache, self).setUp()
+    representation_cache.clear()
+    self.api = api_helper.Api()
+
+  def _get_market(self, market_id):
+    """Get a market and the number of published objects."""
+    with mock.patch.object(compiled, "publish_objects",
+                           wraps=compiled.publish_objects) as publish:
+      response = self.api.get(all_models.Market, market_id)
+    self.assert200(response)
+    return response.json["market"], publish.call_count
+
+  def test_cached_get(self):
+    """The second GET of an unchanged object is served from the cache."""
+    market_id = factories.MarketFactory().id
+    first, first_calls = self._get_market(market_id)
+    second, second_calls = self._get_market(market_id)
+    self.assertEqual(first_calls, 1)
+    self.assertEqual(second_calls, 0)
+    self.assertEqual(first, second)
+
+  def test_acl_invalidation(self):
+    """Changes of ACL invalidate the cached representation of the object."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      person = factories.PersonFactory()
+    market_id, person_id = market.id, person.id
+    self._get_market(market_id)
+
+    market = all_models.Market.query.get(market_id)
+    market.add_person_with_role_name(all_models.Person.query.get(person_id),
+                                     "Admin")
+    db.session.commit()
+
+    response, calls = self._get_market(market_id)
+    self.assertEqual(calls, 1)
+    self.assertIn(person_id, [acl["person_id"]
+                              for acl in response["access_control_list"]])
+
+  def test_cached_collection(self):
+    """Collection GET looks up all representations with one call."""
+    with factories.single_commit():
+      market_ids = [factories.MarketFactory().id for _ in range(3)]
+    ids = ",".join(str(id_) for id_ in market_ids)
+    first = self.api.get_collection(all_models.Market, ids)
+    with mock.patch.object(all_models.Market, "eager_query") as eager_query:
+      second = self.api.get_collection(all_models.Market, ids)
+    self.assertFalse(eager_query.called)
+    self.assertEqual(first.json, second.json)
+
+  def test_invalidation_after_commit(self):
+    """Representations cached between flush and commit are invalidated."""
+    with factories.single_commit():
+      market = factories.MarketFactory()
+      person = factories.PersonFactory()
+    market_id, person_id = market.id, person.id
+    self._get_market(market_id)
+
+    market = all_models.Market.query.get(market_id)
+    market.add_person_with_role_name(all_models.Person.query.get(person_id),
+                                     "Admin")
+    db.session.flush()
+    # A concurrent request caches the representation of the old data.
+    backend = representation_cache.get_backend()
+    _, keys = representation_cache.lookup(
+        backend,
+        [("Market", market_id, market.updated_at)],
+        representation_cache.get_fields_digest([]),
+    )
+    representation_cache.store(backend, keys, {
+        ("Market", market_id): {"access_control_list": []},
+    })
+    db.session.commit()
+
+    response, calls = self._get_market(market_id)
+    self.assertEqual(calls, 1)
+    self.assertIn(person_id, [acl["person_id"]
+                              for acl in response["access_control_list"]])
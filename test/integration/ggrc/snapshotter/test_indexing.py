@@ -11,6 +11,8 @@ from ggrc import db
 from ggrc import models
 from ggrc.models import all_models
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
+from ggrc.snapshotter import indexer
+from ggrc.snapshotter.datastructures import Pair
 from ggrc.snapshotter.indexer import delete_records
 
 from integration.ggrc.snapshotter import SnapshotterBaseTestCase
@@ -36,7 +38,7 @@ def get_records(_audit, _snapshots):
 class TestSnapshotIndexing(SnapshotterBaseTestCase):
   """Test cases for Snapshoter module"""
 
-  # pylint: disable=invalid-name,too-many-locals
+  # pylint: disable=invalid-name,too-many-locals,protected-access
 
   def setUp(self):
     super(TestSnapshotIndexing, self).setUp()
@@ -664,3 +666,73 @@ class TestSnapshotIndexing(SnapshotterBaseTestCase):
     self.assert_indexed_fields(snapshot, "kind", {
         "": option_title
     })
+
+  def _create_indexed_audit(self):
+    """Create an audit with snapshots of imported objects."""
+    self._check_csv_response(self._import_file("snapshotter_create.csv"), {})
+    program = db.session.query(models.Program).filter(
+        models.Program.slug == "Prog-13211"
+    ).one()
+    self.create_audit(program)
+    return db.session.query(models.Snapshot).all()
+
+  def test_index_content(self):
+    """Index content of revisions matches populated revision content."""
+    snapshots = self._create_indexed_audit()
+    roles = indexer.get_roles()
+    cads = indexer._get_custom_attribute_dict()
+    for snapshot in snapshots:
+      revision = snapshot.revision
+      resource_type = revision.resource_type
+      index_content = indexer.get_index_content(
+          revision._content, resource_type, roles[resource_type],
+          cads[resource_type],
+      )
+      self.assertEqual(
+          indexer.get_searchable_attributes(
+              indexer.CLASS_PROPERTIES[resource_type],
+              cads[resource_type],
+              index_content,
+          ),
+          indexer.get_searchable_attributes(
+              indexer.CLASS_PROPERTIES[resource_type],
+              cads[resource_type],
+              revision.content,
+          ),
+      )
+
+  def test_reindex_changed_records(self):
+    """Only records that differ from the index are written."""
+    snapshots = self._create_indexed_audit()
+    snapshot = snapshots[0]
+    pairs = {Pair.from_4tuple((s.parent_type, s.parent_id,
+                               s.child_type, s.child_id))
+             for s in snapshots}
+    self.assertEqual(indexer.reindex_pairs(pairs), (0, 0, 0))
+
+    title = db.session.query(Record).filter(
+        Record.type == "Snapshot",
+        Record.key == snapshot.id,
+        Record.property == "title",
+    ).one()
+    title_content = title.content
+    title.content = "changed title"
+    db.session.query(Record).filter(
+        Record.type == "Snapshot",
+        Record.key == snapshot.id,
+        Record.property == "parent",
+    ).delete(synchronize_session=False)
+    db.session.add(Record(key=snapshot.id, type="Snapshot", tags="",
+                          property="stale", subproperty="",
+                          content="stale"))
+    db.session.commit()
+
+    self.assertEqual(indexer.reindex_pairs(pairs), (1, 1, 1))
+    records = dict(db.session.query(Record).filter(
+        Record.type == "Snapshot",
+        Record.key == snapshot.id,
+        Record.subproperty == "",
+    ).values("property", "content"))
+    self.assertEqual(records["title"], title_content)
+    self.assertIn("parent", records)
+    self.assertNotIn("stale", records)
@@ -0,0 +1,61 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for keyset chunking of queries."""
+
+from ggrc import db
+from ggrc import utils
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestQueryChunks(TestCase):
+  """Tests for generate_query_chunks and split_id_ranges."""
+
+  def setUp(self):
+    super(TestQueryChunks, self).setUp()
+    with factories.single_commit():
+      self.markets = [factories.MarketFactory() for _ in range(7)]
+    self.market_ids = sorted(market.id for market in self.markets)
+
+  def test_chunks(self):
+    """Chunks cover all rows in id order."""
+    query = db.session.query(all_models.Market.id)
+    chunks = [[id_ for id_, in chunk]
+              for chunk in utils.generate_query_chunks(query, chunk_size=3)]
+    self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+    self.assertEqual(sum(chunks, []), self.market_ids)
+
+  def test_filtered_query(self):
+    """Chunks respect query filters."""
+    selected_ids = self.market_ids[1::2]
+    query = db.session.query(all_models.Market.title).filter(
+        all_models.Market.id.in_(selected_ids),
+    )
+    chunks = [chunk.all()
+              for chunk in utils.generate_query_chunks(query, chunk_size=2)]
+    self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+
+  def test_id_ranges(self):
+    """Id ranges select disjoint chunks of rows."""
+    query = all_models.Market.query
+    ranges = list(utils.split_id_ranges(query, chunk_size=4))
+    self.assertEqual(ranges, [
+        (None, self.market_ids[3]),
+        (self.market_ids[3], None),
+    ])
+    ids = [
+        [market.id for market in utils.filter_id_range(query, id_range)]
+        for id_range in ranges
+    ]
+    self.assertEqual(ids, [self.market_ids[:4], self.market_ids[4:]])
+
+  def test_empty_query(self):
+    """Empty query gives a single empty chunk."""
+    query = db.session.query(all_models.Market.id).filter(
+        all_models.Market.id < 0,
+    )
+    chunks = [chunk.all() for chunk in utils.generate_query_chunks(query)]
+    self.assertEqual(chunks, [[]])
@@ -0,0 +1,148 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Integration tests for the change feed."""
+
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.utils import change_feed
+from ggrc.utils import log_event
+
+from integration.ggrc.services import TestCase
+from integration.ggrc.models import factories
+
+
+class TestChangeFeed(TestCase):
+  """Tests for /api/changes endpoint and the file sink."""
+
+  def setUp(self):
+    super(TestChangeFeed, self).setUp()
+    self.clear_data()
+    self.client.get("/login")
+    self.market_ids = [factories.MarketFactory().id for _ in range(3)]
+
+  def _get_changes(self, **args):
+    """Get a feed page and check that the response is valid."""
+    response = self.client.get("/api/changes", query_string=args)
+    self.assert200(response)
+    page = json.loads(response.data)
+    self.assertEqual(page["fields"], list(change_feed.FIELDS))
+    return page
+
+  @staticmethod
+  def _get_expected():
+    revisions = all_models.Revision
+    query = db.session.query(
+        revisions.event_id,
+        revisions.id,
+        revisions.resource_type,
+        revisions.resource_id,
+        revisions.action,
+    ).order_by(revisions.id)
+    return [list(row) for row in query]
+
+  def test_all_changes(self):
+    """All revisions are returned in revision order."""
+    page = self._get_changes()
+    self.assertEqual(page["changes"], self._get_expected())
+    self.assertFalse(page["has_more"])
+    market_changes = [(type_, id_, action) for _, _, type_, id_, action
+                      in page["changes"] if type_ == "Market"]
+    self.assertEqual(
+        market_changes,
+        [("Market", id_, "created") for id_ in self.market_ids],
+    )
+    self.assertEqual(
+        page["next"],
+        db.session.query(db.func.max(all_models.Revision.id)).scalar(),
+    )
+
+  def test_pages(self):
+    """Pages of single revisions can be read with the cursor."""
+    changes = []
+    after = 0
+    has_more = True
+    while has_more:
+      page = self._get_changes(after=after, limit=1)
+      self.assertLessEqual(len(page["changes"]), 1)
+      changes.extend(page["changes"])
+      after = page["next"]
+      has_more = page["has_more"]
+    self.assertEqual(changes, self._get_expected())
+    self.assertEqual(self._get_changes(after=after),
+                     {"fields": list(change_feed.FIELDS), "changes": [],
+                      "next": after, "has_more": False})
+
+  def test_lag(self):
+    """Recent revisions are not returned."""
+    with mock.patch.object(change_feed.settings, "CHANGE_FEED_LAG", 3600):
+      page = self._get_changes()
+    self.assertEqual(page["changes"], [])
+    self.assertEqual(page["next"], 0)
+
+  def test_running_transaction(self):
+    """Revisions created after a running transaction started are held."""
+    expected = self._get_expected()
+    after = self._get_changes()["next"]
+    factories.MarketFactory()
+    oldest_start = all_models.Revision.query.get(after).created_at
+    with mock.patch.object(change_feed, "get_oldest_transaction_start",
+                           return_value=oldest_start):
+      page = self._get_changes(after=after)
+    self.assertEqual(page["changes"], [])
+    self.assertEqual(page["next"], after)
+    self.assertEqual(self._get_changes(after=after)["changes"],
+                     self._get_expected()[len(expected):])
+
+  def test_revisions_of_old_event(self):
+    """Revisions added to an already returned event are returned."""
+    after = self._get_changes()["next"]
+    event = all_models.Event.query.filter_by(
+        resource_type="Market",
+        resource_id=self.market_ids[0],
+    ).one()
+    market = all_models.Market.query.get(self.market_ids[0])
+    market.title = "new title"
+    log_event.log_event(db.session, market, event=event)
+    db.session.commit()
+
+    page = self._get_changes(after=after)
+    self.assertIn([event.id, "Market", self.market_ids[0], "modified"],
+                  [[event_id, type_, id_, action] for event_id, _, type_,
+                   id_, action in page["changes"]])
+    self.assertGreater(page["next"], after)
+
+  def test_bad_arguments(self):
+    """Invalid cursor and page size are rejected."""
+    max_limit = change_feed.settings.CHANGE_FEED_MAX_PAGE_SIZE
+    for args in ({"after": "a"}, {"after": -1}, {"limit": 0},
+                 {"limit": max_limit + 1}):
+      response = self.client.get("/api/changes", query_string=args)
+      self.assert400(response)
+
+  def test_file_sink(self):
+    """File sink appends only new records."""
+    tmp_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, tmp_dir)
+    sink = change_feed.FileSink(os.path.join(tmp_dir, "changes.jsonl"))
+    expected = self._get_expected()
+    self.assertEqual(sink.sync(limit=1), len(expected))
+    self.assertEqual(sink.get_cursor(), expected[-1][1])
+
+    factories.MarketFactory()
+    new_records = self._get_expected()[len(expected):]
+    self.assertEqual(sink.sync(), len(new_records))
+    with open(sink.path) as sink_file:
+      records = [json.loads(line) for line in sink_file]
+    self.assertEqual(
+        [[record[field] for field in change_feed.FIELDS]
+         for record in records],
+        self._get_expected(),
+    )
@@ -7,6 +7,7 @@ import mock
 from appengine import base
 
 from ggrc.models import all_models
+from ggrc.cache import permissions_cache
 from ggrc.cache import utils as cache_utils
 from integration.ggrc import TestCase, generator
 from integration.ggrc.api_helper import Api
@@ -51,66 +52,95 @@ class TestPermissionsLoading(TestMemcacheBase):
   def test_permissions_loading(self):
     """Test if permissions created only once for GET requests."""
     with mock.patch(
-        "ggrc_basic_permissions.store_results_into_memcache",
-        side_effect=ggrc_basic_permissions.store_results_into_memcache
-    ) as store_perm:
+        "ggrc_basic_permissions._load_base_permissions_from_database",
+        side_effect=ggrc_basic_permissions._load_base_permissions_from_database
+    ) as load_base:
       self.api.get(all_models.Control, self.control_id)
-      store_perm.assert_called_once()
-      store_perm.call_count = 0
+      load_base.assert_called_once()
+      load_base.call_count = 0
 
       # On second GET permissions should be loaded from memcache
       # but not created from scratch.
       self.api.get(all_models.Control, self.control_id)
-      store_perm.assert_not_called()
+      load_base.assert_not_called()
 
 
 class TestPermissionsCacheFlushing(TestMemcacheBase):
-  """Test user permissions loading."""
+  """Test invalidation and incremental updates of cached permissions."""
 
-  @staticmethod
-  def load_perms(user_id, new_perms):
-    """Emulate procedure to load permissions
-    """
+  def setUp(self):
+    super(TestPermissionsCacheFlushing, self).setUp()
+    self.client = cache_utils.get_cache_manager().cache_object.memcache_client
+    self.client.flush_all()
 
+  @staticmethod
+  def load_perms(user_id, base_perms, acl_perms=None):
+    """Emulate procedure to load permissions."""
+    acl_perms = acl_perms or {}
     with mock.patch(
-        'ggrc_basic_permissions._load_permissions_from_database',
-        return_value=new_perms
-    ):
-
+        "ggrc_basic_permissions._load_base_permissions_from_database",
+        return_value=base_perms,
+    ), mock.patch(
+        "ggrc_basic_permissions.get_acl_object_types",
+        return_value=sorted(acl_perms),
+    ), mock.patch(
+        "ggrc_basic_permissions._load_acl_permissions_from_database",
+        return_value=acl_perms,
+    ) as load_acl:
       mock_user = mock.Mock()
       mock_user.id = user_id
-
-      return ggrc_basic_permissions.load_permissions_for(mock_user)
+      return (ggrc_basic_permissions.load_permissions_for(mock_user),
+              load_acl.call_count)
 
   def test_memcache_flushing(self):
-    """Test if memcache is properly cleaned on object creation
-
-      Procedure to test functionality:
-      1) load and permissions for specific user and store them in memcahe
-      2) emulate new object creation, which cleans permissions in memcache
-      3) make request which tries to get cache for permissions from memcache
-
-      Also, it's assumed that 2 or more GGRC workers are running
-    """
-
-    client = cache_utils.get_cache_manager().cache_object.memcache_client
-    client.flush_all()
-
-    # load perms and store them in memcache
+    """Test if memcache is properly cleaned on global invalidation."""
     self.load_perms(11, {"11": "a"})
 
-    # emulate situation when a new object is created
-    # this procedure cleans memcache in the end
     cache_utils.clear_permission_cache()
 
-    # emulate work of worker #1 - get permissions for our user
-    # the first step - check permissions in memcache
-    ggrc_basic_permissions.query_memcache(client, "permissions:11")
-    # step 2 - load permissions from DB and save then into memcahe
-    # this step is omitted
-
-    # load permission on behalf of worker #2, before step 2 of worker #1
-    result = self.load_perms(11, {"11": "b"})
-
-    # ensure that new permissions were returned instead of old ones
+    result, _ = self.load_perms(11, {"11": "b"})
     self.assertEquals(result, {"11": "b"})
+
+  def test_user_flushing(self):
+    """Test that only permissions of the given users are invalidated."""
+    self.load_perms(11, {"11": "a"})
+    self.load_perms(12, {"12": "a"})
+
+    cache_utils.clear_users_permission_cache([11])
+
+    self.assertEquals(self.load_perms(11, {"11": "b"})[0], {"11": "b"})
+    self.assertEquals(self.load_perms(12, {"12": "b"})[0], {"12": "a"})
+
+  def test_type_flushing(self):
+    """Test that only permissions for the given type are invalidated."""
+    acl_perms = {
+        "Control": {"read": {1}},
+        "Market": {"read": {2}},
+    }
+    self.load_perms(11, {}, acl_perms)
+
+    permissions_cache.bump_type_versions(self.client, ["Control"])
+
+    new_acl_perms = {
+        "Control": {"read": {3}},
+    }
+    result, load_count = self.load_perms(11, {}, new_acl_perms)
+    self.assertEqual(load_count, 1)
+    self.assertEqual(result["read"]["Control"]["resources"], {3})
+    self.assertEqual(result["read"]["Market"]["resources"], {2})
+
+  def test_incremental_add(self):
+    """Test that new ACL entries are added to the cached permissions."""
+    acl_perms = {"Control": {"read": {1}, "update": {1}}}
+    self.load_perms(11, {}, acl_perms)
+
+    permissions_cache.add_acl_permissions(self.client, [
+        (11, "Control", 5, True, False, False),
+        (12, "Control", 6, True, True, True),
+    ])
+
+    result, load_count = self.load_perms(11, {}, acl_perms)
+    self.assertEqual(load_count, 0)
+    self.assertEqual(result["read"]["Control"]["resources"], {1, 5})
+    self.assertEqual(result["update"]["Control"]["resources"], {1})
+    self.assertNotIn("delete", result)
@@ -0,0 +1,58 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for collection operations of MemCache."""
+
+import unittest
+
+from ggrc.cache import fake_memcache
+from ggrc.cache import memcache
+
+
+class TestMemCache(unittest.TestCase):
+  """MemCache uses a single round trip per step for any number of ids."""
+
+  def setUp(self):
+    self.client = fake_memcache.FakeMemcacheClient()
+    self.cache = memcache.MemCache(client=self.client)
+    self.data = {id_: {"id": id_, "title": "Market {}".format(id_)}
+                 for id_ in range(1, 11)}
+
+  def _round_trips(self, function, *args):
+    round_trips = self.client.round_trips
+    result = function(*args)
+    return result, self.client.round_trips - round_trips
+
+  def test_partial_hit(self):
+    """Only found items are returned, in one round trip."""
+    self.cache.add("collection", "markets",
+                   {id_: self.data[id_] for id_ in range(1, 6)})
+    filter_ = {"ids": range(1, 11), "attrs": ["title"]}
+    found, round_trips = self._round_trips(
+        self.cache.get, "collection", "markets", filter_)
+    self.assertEqual(round_trips, 1)
+    self.assertEqual(found.keys(), range(1, 6))
+    self.assertEqual(found[1], {"title": "Market 1"})
+
+  def test_add_existing(self):
+    """Adding new and cached items takes a round trip for each kind."""
+    self.cache.add("collection", "markets", {1: self.data[1]})
+    stored, round_trips = self._round_trips(
+        self.cache.add, "collection", "markets", self.data)
+    self.assertEqual(round_trips, 3)
+    self.assertEqual(set(stored), set(self.data))
+
+  def test_update_and_remove(self):
+    """Only cached items are updated, all items are removed at once."""
+    self.cache.add("collection", "markets", {1: self.data[1]})
+    updated = self.cache.update("collection", "markets",
+                                {1: {"title": "New"}, 2: {"title": "New"}}, 0)
+    self.assertEqual(updated.keys(), [1])
+    self.assertEqual(self.client.get("collection:markets:1"),
+                     {"title": "New"})
+    _, round_trips = self._round_trips(
+        self.cache.remove, "collection", "markets", self.data)
+    self.assertEqual(round_trips, 1)
+    found = self.cache.get("collection", "markets",
+                           {"ids": [1], "attrs": None})
+    self.assertEqual(found, {})
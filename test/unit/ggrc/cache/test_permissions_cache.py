@@ -0,0 +1,28 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for encoding of cached permissions."""
+
+import unittest
+
+from ggrc.cache import permissions_cache
+
+
+class TestIdsEncoding(unittest.TestCase):
+  """Tests for encoding of object ids in cached permissions."""
+
+  def test_roundtrip(self):
+    """Decoded ids are equal to the encoded ones."""
+    ids = {1, 2, 127, 128, 300, 16384, 10 ** 9}
+    encoded = permissions_cache.encode_ids(ids)
+    self.assertEqual(permissions_cache.decode_ids(encoded), ids)
+
+  def test_empty(self):
+    """Empty set of ids is encoded."""
+    encoded = permissions_cache.encode_ids([])
+    self.assertEqual(permissions_cache.decode_ids(encoded), set())
+
+  def test_compact(self):
+    """Sequential ids take less than a byte each."""
+    ids = range(1, 10001)
+    self.assertLess(len(permissions_cache.encode_ids(ids)), len(ids))
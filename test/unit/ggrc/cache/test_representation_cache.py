@@ -0,0 +1,69 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the in-process backend of the representation cache."""
+
+import datetime
+import unittest
+
+from ggrc.cache import representation_cache
+
+
+class TestLocalBackend(unittest.TestCase):
+  """Tests for LRU eviction and multi-key operations."""
+
+  def setUp(self):
+    self.backend = representation_cache.LocalBackend(size=2)
+
+  def test_multi_operations(self):
+    """Values are stored, added and deleted with multi-key calls."""
+    self.backend.set_multi({"a": 1, "b": 2})
+    self.backend.add_multi({"a": 3})
+    self.assertEqual(self.backend.get_multi(["a", "b", "c"]),
+                     {"a": 1, "b": 2})
+    self.backend.delete_multi(["a"])
+    self.assertEqual(self.backend.get_multi(["a", "b"]), {"b": 2})
+
+  def test_lru_eviction(self):
+    """The least recently used key is evicted."""
+    self.backend.set_multi({"a": 1, "b": 2})
+    self.backend.get_multi(["a"])
+    self.backend.set_multi({"c": 3})
+    self.assertEqual(self.backend.get_multi(["a", "b", "c"]),
+                     {"a": 1, "c": 3})
+
+
+class TestLookup(unittest.TestCase):
+  """Tests for keys of cached representations."""
+
+  def setUp(self):
+    self.backend = representation_cache.LocalBackend()
+    self.updated_at = datetime.datetime(2019, 1, 1)
+    self.entries = [("Market", 1, self.updated_at)]
+
+  def test_store_and_lookup(self):
+    """Stored representations are found for the same entries only."""
+    cached, keys = representation_cache.lookup(self.backend, self.entries,
+                                               "all")
+    self.assertEqual(cached, {})
+    representation_cache.store(self.backend, keys, {
+        ("Market", 1): {"id": 1, "updated_at": self.updated_at},
+    })
+    cached, _ = representation_cache.lookup(self.backend, self.entries, "all")
+    self.assertEqual(cached, {("Market", 1): {"id": 1,
+                                              "updated_at": "2019-01-01"}})
+    for entries, digest in (
+        ([("Market", 1, datetime.datetime(2019, 1, 2))], "all"),
+        (self.entries, representation_cache.get_fields_digest(["title"])),
+        ([("Market", 1, None)], "all"),
+    ):
+      cached, _ = representation_cache.lookup(self.backend, entries, digest)
+      self.assertEqual(cached, {})
+
+  def test_dropped_stamp(self):
+    """Representations are invalidated by dropping the object stamp."""
+    _, keys = representation_cache.lookup(self.backend, self.entries, "all")
+    representation_cache.store(self.backend, keys, {("Market", 1): {}})
+    self.backend.delete_multi(["repr_stamp:Market:1"])
+    cached, _ = representation_cache.lookup(self.backend, self.entries, "all")
+    self.assertEqual(cached, {})
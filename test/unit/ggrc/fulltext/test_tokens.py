@@ -0,0 +1,56 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for fulltext trigram postings."""
+
+import unittest
+
+from ggrc.fulltext import tokens
+
+
+class TestTokens(unittest.TestCase):
+  """Tests for tokenization of fulltext records and search terms."""
+
+  def test_tokenize(self):
+    """Text is split into lowercase overlapping trigrams."""
+    self.assertEqual(tokens.tokenize(u"AbCd"), {u"abc", u"bcd"})
+    self.assertEqual(tokens.tokenize(u"aaaa"), {u"aaa"})
+
+  def test_tokenize_short(self):
+    """Text shorter than a token has no trigrams."""
+    self.assertEqual(tokens.tokenize(u""), set())
+    self.assertEqual(tokens.tokenize(None), set())
+    self.assertEqual(tokens.tokenize(u"ab"), set())
+
+  def test_query_tokens(self):
+    """Query tokens are limited and sorted."""
+    self.assertEqual(tokens.get_query_tokens(u"Title"),
+                     [u"itl", u"tit", u"tle"])
+    long_term = u"".join(unichr(ord(u"a") + i) for i in range(26))
+    self.assertEqual(len(tokens.get_query_tokens(long_term)),
+                     tokens.MAX_QUERY_TOKENS)
+
+  def test_query_tokens_fallback(self):
+    """Terms that can not be planned with postings give None."""
+    self.assertIsNone(tokens.get_query_tokens(u""))
+    self.assertIsNone(tokens.get_query_tokens(u"ab"))
+    self.assertIsNone(tokens.get_query_tokens(u"50%"))
+    self.assertIsNone(tokens.get_query_tokens(u"a_b_c"))
+
+  def test_records_to_postings(self):
+    """Postings are generated for all records except sort ones."""
+    records = [
+        {"key": 1, "type": "Control", "property": "title",
+         "subproperty": u"", "content": u"abcd"},
+        {"key": 1, "type": "Control", "property": "title",
+         "subproperty": u"__sort__", "content": u"xyz"},
+    ]
+    postings = list(tokens.records_to_postings(records))
+    self.assertEqual(
+        sorted(p["token"] for p in postings),
+        [u"abc", u"bcd"],
+    )
+    self.assertEqual(
+        {(p["type"], p["key"], p["property"]) for p in postings},
+        {("Control", 1, "title")},
+    )
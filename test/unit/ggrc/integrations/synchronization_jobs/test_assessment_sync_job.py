@@ -179,7 +179,7 @@ class BaseClientTest(unittest.TestCase):
       ])
       self.assertEqual(sleep_mock.call_args_list, [
           mock.call(5),
-          mock.call(5),
+          mock.call(10),
       ])
 
   def test_update_issue_with_raise(self):
@@ -0,0 +1,149 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the Issue Tracker sync engine."""
+
+import threading
+import unittest
+
+import mock
+
+from ggrc.integrations.synchronization_jobs import sync_engine
+
+
+class FakeClock(object):
+  """Clock that moves only when somebody sleeps."""
+
+  def __init__(self):
+    self.now = 0.0
+    self.sleeps = []
+
+  def time(self):
+    return self.now
+
+  def sleep(self, seconds):
+    self.sleeps.append(seconds)
+    self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+  """Requests over the burst capacity wait for tokens."""
+
+  def test_acquire(self):
+    clock = FakeClock()
+    bucket = sync_engine.TokenBucket(rate=2, capacity=2, clock=clock.time,
+                                     sleep=clock.sleep)
+    for _ in range(4):
+      bucket.acquire()
+    self.assertEqual(clock.sleeps, [0.5, 0.5])
+
+  def test_refill(self):
+    clock = FakeClock()
+    bucket = sync_engine.TokenBucket(rate=2, capacity=2, clock=clock.time,
+                                     sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10
+    for _ in range(2):
+      bucket.acquire()
+    self.assertEqual(clock.sleeps, [])
+
+
+class TestIterResults(unittest.TestCase):
+  """Items are processed by the worker pool."""
+
+  def test_results(self):
+    results = list(sync_engine.iter_results(lambda item: item * 2,
+                                            range(10), workers=4))
+    self.assertItemsEqual(
+        [(item, result) for item, result, _ in results],
+        [(item, item * 2) for item in range(10)],
+    )
+
+  def test_errors(self):
+    def func(item):
+      if item == 2:
+        raise ValueError(item)
+      return item
+
+    results = {item: error for item, _, error in
+               sync_engine.iter_results(func, range(4), workers=2)}
+    self.assertIsInstance(results.pop(2), ValueError)
+    self.assertEqual(results.values(), [None] * 3)
+
+  def test_workers_limit(self):
+    """No more than workers items are processed at the same time."""
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def func(item):
+      with lock:
+        active[0] += 1
+        active[1] = max(active)
+      threading.Event().wait(0.01)
+      with lock:
+        active[0] -= 1
+      return item
+
+    list(sync_engine.iter_results(func, range(12), workers=3))
+    self.assertLessEqual(active[1], 3)
+
+  def test_stop(self):
+    """Items are not processed after the generator is closed."""
+    processed = []
+    for item, _, _ in sync_engine.iter_results(processed.append, range(100),
+                                               workers=1):
+      if item == 1:
+        break
+    self.assertEqual(processed, [0, 1])
+
+  def test_stop_workers(self):
+    """Results of started items are yielded after the stop event is set."""
+    lock = threading.Lock()
+    processed = []
+
+    def func(item):
+      threading.Event().wait(0.01)
+      with lock:
+        processed.append(item)
+      return item
+
+    stop = threading.Event()
+    yielded = []
+    for item, _, _ in sync_engine.iter_results(func, range(100), workers=4,
+                                               stop=stop):
+      stop.set()
+      yielded.append(item)
+    self.assertLess(len(processed), 100)
+    self.assertItemsEqual(yielded, processed)
+
+
+class TestIsRetriable(unittest.TestCase):
+  """Not idempotent requests are retried only if they weren't processed."""
+
+  def test_statuses(self):
+    for status, idempotent, expected in (
+        (429, False, True),
+        (503, False, True),
+        (502, False, False),
+        (504, False, False),
+        (502, True, True),
+        (504, True, True),
+        (400, True, False),
+    ):
+      error = mock.Mock(status=status)
+      self.assertEqual(sync_engine.is_retriable(error, idempotent), expected)
+
+
+class TestFingerprint(unittest.TestCase):
+  """Fingerprints depend on payload values only."""
+
+  def test_fingerprint(self):
+    self.assertEqual(
+        sync_engine.get_fingerprint({"status": "FIXED", "ccs": ["a"]}),
+        sync_engine.get_fingerprint({"ccs": ["a"], "status": "FIXED"}),
+    )
+    self.assertNotEqual(
+        sync_engine.get_fingerprint({"status": "FIXED"}),
+        sync_engine.get_fingerprint({"status": "VERIFIED"}),
+    )
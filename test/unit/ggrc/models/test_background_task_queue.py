@@ -0,0 +1,51 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for background task queue helpers."""
+
+import unittest
+
+import ddt
+import mock
+
+from ggrc.models import background_task_queue
+
+
+RETRY_OPTIONS = {
+    "min_backoff_seconds": 30,
+    "max_backoff_seconds": 3600,
+    "max_doublings": 5,
+    "task_retry_limit": 10,
+}
+
+
+@ddt.ddt
+class TestBackgroundTaskQueue(unittest.TestCase):
+  """Tests for retry and concurrency settings of queued tasks."""
+
+  @ddt.data(
+      (1, 30),
+      (2, 60),
+      (6, 960),
+      (7, 1920),
+      (8, 2880),
+      (20, 3600),
+  )
+  @ddt.unpack
+  def test_backoff(self, retry_count, expected):
+    """Backoff doubles up to max_doublings and then grows linearly."""
+    self.assertEqual(
+        background_task_queue.get_backoff_seconds(RETRY_OPTIONS, retry_count),
+        expected,
+    )
+
+  def test_backoff_empty_options(self):
+    """Tasks without retry options are retried immediately."""
+    self.assertEqual(background_task_queue.get_backoff_seconds({}, 3), 0)
+
+  @mock.patch("ggrc.settings.BACKGROUND_TASK_QUEUE_CONCURRENCY",
+              new={"ggrc": 5, None: 2})
+  def test_queue_limit(self):
+    """Unknown queues use the default concurrency limit."""
+    self.assertEqual(background_task_queue.get_queue_limit("ggrc"), 5)
+    self.assertEqual(background_task_queue.get_queue_limit("other"), 2)
@@ -10,6 +10,7 @@ import ddt
 import mock
 
 from ggrc.models import all_models
+from ggrc.models.revision import get_populated_cavs
 
 
 @ddt.ddt
@@ -304,3 +305,30 @@ class TestCheckPopulatedContent(unittest.TestCase):
 
         for acl in revision.content["access_control_list"]:
           self.assertIsNone(acl.get("parent_id"))
+
+
+class TestPopulatedCavs(unittest.TestCase):
+  """Values of CADs are added to custom attribute values of content."""
+
+  def test_missing_values(self):
+    """Missing values are filled with default values."""
+    content = {"custom_attributes": [
+        {"custom_attribute_id": 1, "attribute_value": "text"},
+    ]}
+    cavs = get_populated_cavs(
+        content,
+        [(1, "Text", ""), (2, "Map:Person", None), (3, "Text", "default")],
+        "Control",
+        5,
+    )
+    values = {cav["custom_attribute_id"]: cav["attribute_value"]
+              for cav in cavs}
+    self.assertEqual(values, {1: "text", 2: "Person", 3: "default"})
+
+  def test_checkbox(self):
+    """Falsy checkbox values get default values without changing content."""
+    cav = {"custom_attribute_id": 1, "attribute_value": None}
+    content = {"custom_attribute_values": [cav]}
+    cavs = get_populated_cavs(content, [(1, "Checkbox", "0")], "Control", 5)
+    self.assertEqual([item["attribute_value"] for item in cavs], ["0"])
+    self.assertIsNone(cav["attribute_value"])
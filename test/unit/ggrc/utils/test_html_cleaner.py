@@ -0,0 +1,83 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the memoized HTML cleaner."""
+
+import unittest
+
+import mock
+
+from ggrc.utils import html_cleaner
+
+
+class TestSanitize(unittest.TestCase):
+  """Sanitized values are the same with and without shortcuts."""
+  # pylint: disable=protected-access
+
+  def setUp(self):
+    html_cleaner.CACHE.clear()
+
+  def test_plain_text(self):
+    """Text without markup is returned without running bleach."""
+    values = [
+        u"Plain text with > and \"quotes\"\n\tand unicode \xe9",
+        u"",
+        "ascii string",
+    ]
+    for value in values:
+      self.assertEqual(html_cleaner.sanitize(value),
+                       html_cleaner._clean(unicode(value)))
+    with mock.patch.object(html_cleaner, "_clean") as clean:
+      for value in values:
+        html_cleaner.sanitize(value)
+    clean.assert_not_called()
+
+  def test_unsafe_chars(self):
+    """Markup, entities and control characters are sanitized."""
+    values = [
+        u"<p>Text</p><script>alert(1)</script>",
+        u"Fish &amp; chips",
+        u"Line\r\nbreak",
+        u"Bell\x07",
+    ]
+    for value in values:
+      self.assertEqual(html_cleaner.sanitize(value),
+                       html_cleaner._clean(value))
+
+  def test_memoized(self):
+    """Values and their results are sanitized once."""
+    value = u"<p>Text</p><script>alert(1)</script>"
+    with mock.patch.object(html_cleaner, "_clean",
+                           return_value=u"<p>Text</p>alert(1)") as clean:
+      html_cleaner.sanitize(value)
+      self.assertEqual(html_cleaner.sanitize(value), u"<p>Text</p>alert(1)")
+      self.assertEqual(html_cleaner.sanitize(u"<p>Text</p>alert(1)"),
+                       u"<p>Text</p>alert(1)")
+    self.assertEqual(clean.call_count, 1)
+
+  def test_clean_values(self):
+    """Batches keep the order of values."""
+    values = [u"<b>a</b><script>", 1, u"<b>a</b><script>", None, u"b"]
+    self.assertEqual(html_cleaner.clean_values(values),
+                     [u"<b>a</b>", 1, u"<b>a</b>", None, u"b"])
+
+
+class TestSanitizedCache(unittest.TestCase):
+  """The cache is bounded by number of entries and total length."""
+
+  def test_size(self):
+    cache = html_cleaner.SanitizedCache(size=2, max_length=100)
+    for key in "abc":
+      cache.set(key, u"value")
+    self.assertIsNone(cache.get("a"))
+    self.assertEqual(cache.get("c"), u"value")
+
+  def test_length(self):
+    cache = html_cleaner.SanitizedCache(size=10, max_length=80)
+    cache.set("a", u"x" * 10)
+    cache.set("b", u"x" * 11)
+    self.assertIsNone(cache.get("b"))
+    for key in "cdefghij":
+      cache.set(key, u"x" * 10)
+    self.assertIsNone(cache.get("a"))
+    self.assertEqual(cache.length, 80)
@@ -0,0 +1,165 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the request profiler."""
+
+import unittest
+
+import mock
+
+from ggrc.utils import profiler
+
+
+class TestGetShape(unittest.TestCase):
+  """Statements that differ only in values have the same shape."""
+
+  def test_placeholders(self):
+    self.assertEqual(
+        profiler.get_shape("SELECT a FROM t WHERE id IN (%s, %s, %s)"),
+        profiler.get_shape("SELECT a FROM t WHERE id IN (%s)"),
+    )
+
+  def test_literals(self):
+    self.assertEqual(
+        profiler.get_shape("SELECT a FROM t_1 WHERE id = 12 AND b = 'x'"),
+        "SELECT a FROM t_1 WHERE id = ? AND b = ?",
+    )
+
+  def test_rows(self):
+    self.assertEqual(
+        profiler.get_shape("INSERT INTO t VALUES (%s, %s), (%s, %s)"),
+        "INSERT INTO t VALUES (?, ...), ...",
+    )
+
+
+class TestRequestProfile(unittest.TestCase):
+  """Queries are counted per request and per benchmark label."""
+
+  def setUp(self):
+    self.profile = profiler.RequestProfile("GET /api/audits")
+
+  def test_labels(self):
+    """Queries of nested labels are counted in outer labels."""
+    self.profile.enter("outer")
+    self.profile.add_query("SELECT ?", 0.5)
+    self.profile.enter("inner")
+    self.profile.add_query("SELECT ?", 0.25)
+    self.profile.exit("inner")
+    self.profile.exit("outer")
+
+    self.assertEqual(self.profile.query_count, 2)
+    self.assertEqual(self.profile.benchmarks["outer"]["query_count"], 2)
+    self.assertEqual(self.profile.benchmarks["outer"]["sql_time"], 0.75)
+    self.assertEqual(self.profile.benchmarks["inner"]["query_count"], 1)
+
+  def test_recursive_label(self):
+    """Recursive labels count their queries once."""
+    self.profile.enter("label")
+    self.profile.enter("label")
+    self.profile.add_query("SELECT ?", 0.5)
+    self.profile.exit("label")
+    self.profile.exit("label")
+
+    stats = self.profile.benchmarks["label"]
+    self.assertEqual(stats["calls"], 2)
+    self.assertEqual(stats["query_count"], 1)
+
+  def test_repeated(self):
+    """Shapes over the threshold are reported for request and label."""
+    self.profile.enter("loop")
+    for _ in range(4):
+      self.profile.add_query("SELECT a FROM t WHERE id = ?", 0.1)
+    self.profile.exit("loop")
+    self.profile.add_query("SELECT a FROM t WHERE id = ?", 0.1)
+    self.profile.add_query("SELECT b FROM t", 0.1)
+
+    repeated, by_label = self.profile.get_repeated(threshold=3)
+    self.assertEqual(
+        [(item["statement"], item["count"]) for item in repeated],
+        [("SELECT a FROM t WHERE id = ?", 5)],
+    )
+    self.assertEqual(by_label["loop"][0]["count"], 4)
+
+    repeated, by_label = self.profile.get_repeated(threshold=4)
+    self.assertEqual(len(repeated), 1)
+    self.assertEqual(by_label, {})
+
+
+class TestCursorEvents(unittest.TestCase):
+  """Query times are measured per execution context."""
+
+  def setUp(self):
+    self.profile = profiler.RequestProfile("GET /api/audits")
+    patcher = mock.patch("ggrc.utils.profiler._get_profile",
+                         return_value=self.profile)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def _execute(self, conn, context, statement, raises=False):
+    profiler._before_cursor_execute(conn, None, statement, None, context,
+                                    False)
+    if not raises:
+      profiler._after_cursor_execute(conn, None, statement, None, context,
+                                     False)
+
+  @mock.patch("ggrc.utils.profiler.time.time")
+  def test_failed_statement(self, time_mock):
+    """A statement that raises does not affect timing of later ones."""
+    conn = mock.Mock(info={})
+    time_mock.side_effect = [1.0, 5.0, 6.0]
+    self._execute(conn, mock.Mock(), "SELECT a FROM t", raises=True)
+    self._execute(conn, mock.Mock(), "SELECT b FROM t")
+
+    self.assertEqual(self.profile.query_count, 1)
+    self.assertEqual(self.profile.sql_time, 1.0)
+    self.assertEqual(conn.info, {})
+
+  def test_no_context(self):
+    """Statements executed without a context are skipped."""
+    self._execute(mock.Mock(info={}), None, "SELECT 1")
+    self.assertEqual(self.profile.query_count, 0)
+
+
+class TestProfiler(unittest.TestCase):
+  """Records are kept in a bounded buffer and summed up in totals."""
+
+  @staticmethod
+  def _record(endpoint, query_count):
+    return {
+        "endpoint": endpoint,
+        "path": "/",
+        "status": 200,
+        "started_at": "2019-03-18T10:00:00",
+        "duration": 1.0,
+        "cpu_time": 0.5,
+        "query_count": query_count,
+        "sql_time": 0.25,
+        "n_plus_one": [],
+        "benchmarks": {
+            "label": {"calls": 1, "duration": 1.0, "cpu_time": 0.5,
+                      "query_count": query_count, "sql_time": 0.25,
+                      "n_plus_one": []},
+        },
+    }
+
+  def test_ring_buffer(self):
+    prof = profiler.Profiler(size=2, threshold=10)
+    for query_count in range(3):
+      prof.add(self._record("GET /", query_count))
+
+    report = prof.get_report()
+    self.assertEqual([item["query_count"] for item in report["recent"]],
+                     [2, 1])
+    self.assertEqual(report["endpoints"]["GET /"]["requests"], 3)
+    self.assertEqual(report["endpoints"]["GET /"]["query_count"], 3)
+    self.assertEqual(report["benchmarks"]["label"]["calls"], 3)
+
+  def test_metrics(self):
+    prof = profiler.Profiler(size=2, threshold=10)
+    prof.add(self._record('GET /"x"', 2))
+
+    metrics = prof.get_metrics().splitlines()
+    self.assertIn("# TYPE ggrc_request_queries_total counter", metrics)
+    self.assertIn('ggrc_request_queries_total{endpoint="GET /\\"x\\""} 2.0',
+                  metrics)
+    self.assertIn('ggrc_benchmark_calls_total{label="label"} 1.0', metrics)
@@ -0,0 +1,52 @@
+# Copyright (C) 2019 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for delta encoding of revision content."""
+
+import unittest
+
+from ggrc.utils import revision_storage
+
+
+class TestRevisionDeltas(unittest.TestCase):
+  """Tests for revision content deltas and storage layout."""
+
+  def test_delta_roundtrip(self):
+    """Applying a delta to the old content gives the new content."""
+    old = {"title": "a", "description": "b", "status": "Draft"}
+    new = {"title": "c", "description": "b", "notes": "d"}
+    delta = revision_storage.make_delta(old, new)
+    self.assertEqual(delta, {
+        "set": {"title": "c", "notes": "d"},
+        "unset": ["status"],
+    })
+    self.assertEqual(revision_storage.apply_delta(old, delta), new)
+    self.assertEqual(old["title"], "a")
+
+  def test_empty_delta(self):
+    """Equal contents give an empty delta."""
+    content = {"title": "a", "acl": [{"id": 1}]}
+    self.assertEqual(
+        revision_storage.make_delta(content, dict(content)),
+        {"set": {}, "unset": []},
+    )
+
+  def test_layout(self):
+    """Keyframes are placed every interval and on the latest revision."""
+    revisions = [(id_, {"title": str(id_)}) for id_ in range(1, 8)]
+    layout = revision_storage.plan_resource_layout(revisions, 3)
+    self.assertEqual(
+        [(id_, keyframe_id) for id_, _, _, keyframe_id in layout],
+        [(1, None), (2, 1), (3, 1), (4, None), (5, 4), (6, 4), (7, None)],
+    )
+    for id_, content, delta, _ in layout:
+      if delta is None:
+        self.assertEqual(content, {"title": str(id_)})
+      else:
+        self.assertIsNone(content)
+        self.assertEqual(delta, {"set": {"title": str(id_)}, "unset": []})
+
+  def test_single_revision_layout(self):
+    """Single revision is always stored in full format."""
+    layout = revision_storage.plan_resource_layout([(5, {"a": 1})], 20)
+    self.assertEqual(layout, [(5, {"a": 1}, None, None)])